@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Skirmish AI Match
+
+Plays headless Quick Skirmish games between two AI backends and reports
+the results and how long each side took per turn. No display needed.
+
+Usage: python scripts/ai_match.py [--blue mcts:60] [--red greedy] [--games N]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from mini_game_generator.game_engine import QuickSkirmishEngine, Team
+from mini_game_generator.skirmish_ai import create_player
+
+
+def parse_player(spec: str):
+    """'greedy', 'mcts', 'mcts:hard' or 'mcts:120' (budget in ms)"""
+    backend, _, setting = spec.partition(":")
+    if setting.replace(".", "", 1).isdigit():
+        return create_player(backend, budget_ms=float(setting), seed=0)
+    return create_player(backend, setting or "normal", seed=0)
+
+
+def play(blue_spec: str, red_spec: str, seed: int, turn_times: dict):
+    blue, red = parse_player(blue_spec), parse_player(red_spec)
+    engine = QuickSkirmishEngine(ai=red, seed=seed)
+    while not engine.game_over:
+        start = time.perf_counter()
+        plan = blue.plan_turn(blue.observe(engine))
+        turn_times[Team.BLUE].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        engine.apply_plan(plan)  # ends blue's turn, then red plans and plays inline
+        turn_times[Team.RED].append(time.perf_counter() - start)
+    return engine.winner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI backends against each other")
+    parser.add_argument("--blue", default="mcts:normal", help="backend[:difficulty or budget ms] for blue")
+    parser.add_argument("--red", default="greedy", help="backend[:difficulty or budget ms] for red")
+    parser.add_argument("--games", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {Team.BLUE: 0, Team.RED: 0, None: 0}
+    turn_times = {Team.BLUE: [], Team.RED: []}
+    for seed in range(args.games):
+        results[play(args.blue, args.red, seed, turn_times)] += 1
+        print(f"\r🎮 {seed + 1}/{args.games} games", end="", flush=True)
+    print()
+
+    print(f"Blue ({args.blue}) wins: {results[Team.BLUE]}")
+    print(f"Red  ({args.red}) wins: {results[Team.RED]}")
+    print(f"Draws: {results[None]}")
+    for team, spec in ((Team.BLUE, args.blue), (Team.RED, args.red)):
+        times = sorted(turn_times[team])
+        print(f"⏱️  {spec}: {times[len(times) // 2] * 1e3:.1f} ms median, {times[-1] * 1e3:.1f} ms max per turn")
+
+
+if __name__ == "__main__":
+    main()
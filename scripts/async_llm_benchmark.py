@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Async LLM Client Benchmark
+
+Runs AsyncLLMClient against the local mock LLM server, comparing
+sequential requests with concurrent fan-out under simulated latency,
+429 rate limits and overloads. No API keys or network access needed.
+
+Usage: python scripts/async_llm_benchmark.py [--requests N] [--latency S] [--rate-limit P] [--overload P]
+                                             [--concurrency N] [--rpm N] [--tpm N]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+# Measure the network path, not the response cache
+os.environ.setdefault("LLM_CACHE_MODE", "off")
+
+from llm_analyzer.async_llm_client import AsyncLLMClient
+from llm_analyzer.mock_llm_server import MockLLMServer
+from llm_analyzer.rate_limiter import configure_rate_limiter
+
+
+async def run_sequential(client: AsyncLLMClient, prompts):
+    return [await client.query_with_retry(p, max_tokens=200) for p in prompts]
+
+
+async def run_concurrent(client: AsyncLLMClient, prompts):
+    return await client.query_many(prompts, max_tokens=200)
+
+
+async def benchmark(args):
+    with MockLLMServer(latency=args.latency, rate_limit_prob=args.rate_limit,
+                       overload_prob=args.overload, retry_after=0.05, seed=42) as server:
+        prompts = [f"Analyze game file {i}" for i in range(args.requests)]
+
+        for label, runner in [("sequential", run_sequential), ("concurrent", run_concurrent)]:
+            # Fresh budgets per run so the two modes are comparable
+            for provider in ('anthropic', 'openai'):
+                configure_rate_limiter(provider, rpm=args.rpm, tpm=args.tpm, max_concurrency=args.concurrency,
+                                       default_cooldown=0.2)
+            async with AsyncLLMClient(
+                anthropic_key="mock-key", openai_key="mock-key",
+                anthropic_base_url=server.url, openai_base_url=server.url + "/v1",
+                max_concurrency={'anthropic': args.concurrency, 'openai': args.concurrency},
+                backoff_base=0.05, max_backoff=0.5
+            ) as client:
+                start = time.perf_counter()
+                responses = await runner(client, prompts)
+                elapsed = time.perf_counter() - start
+                limiter_metrics = client.rate_limit_metrics()
+
+            succeeded = sum(1 for r in responses if r.success)
+            by_model = {}
+            for r in responses:
+                by_model[r.model_used] = by_model.get(r.model_used, 0) + 1
+            print(f"{label:>10}: {elapsed:6.2f}s  {succeeded}/{len(responses)} ok  {by_model}")
+            for provider, metrics in limiter_metrics.items():
+                print(f"{'':>12}{provider}: concurrency={metrics['concurrency_limit']} "
+                      f"rejections={metrics['rejections']} mean_wait={metrics['mean_wait_s']}s "
+                      f"max_wait={metrics['max_wait_s']}s")
+
+        print(f"Mock server stats: {server.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AsyncLLMClient against a mock server")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit", type=float, default=0.1)
+    parser.add_argument("--overload", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--tpm", type=float, default=1_000_000)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Batch Repository Analysis Script
+
+Nightly bulk analysis: runs the LLM game analysis for many repositories
+through provider batch APIs (cheaper, no interactive latency) and saves
+one <game>_llm_analysis.json per repository, like llm_analyze_game.py.
+Prompts the batches cannot answer fall back to concurrent single requests.
+
+Usage: python scripts/batch_analyze_repos.py [game_name ...] [--poll-interval S] [--mock]
+
+Without game names every directory in data/repositories is analyzed.
+--mock runs against the local mock LLM server (no API keys needed).
+"""
+import sys
+import json
+import os
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from llm_analyzer.llm_game_analyzer import LLMGameAnalyzer, ANALYZER_CLAUDE_MODEL, ANALYZER_GPT_MODEL
+from llm_analyzer.batch_client import BatchLLMClient
+from llm_analyzer.mock_llm_server import MockLLMServer
+
+
+def save_result(game_name: str, result, model_label: str):
+    output_path = Path("data") / f"{game_name}_llm_analysis.json"
+    with open(output_path, 'w') as f:
+        json.dump({
+            "game_name": game_name,
+            "analysis_result": {
+                "game_summary": result.game_summary,
+                "core_mechanics": result.core_mechanics,
+                "engagement_moments": result.engagement_moments,
+                "visual_style": result.visual_style,
+                "target_audience": result.target_audience,
+                "mini_game_concepts": result.mini_game_concepts,
+                "confidence_score": result.confidence_score
+            },
+            "llm_model": model_label,
+            "mode": "batch"
+        }, f, indent=2)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch LLM analysis across repositories")
+    parser.add_argument("games", nargs="*", help="directories under data/repositories (default: all)")
+    parser.add_argument("--poll-interval", type=float, default=60.0)
+    parser.add_argument("--mock", action="store_true", help="use the local mock LLM server")
+    args = parser.parse_args()
+
+    repo_root = Path("data/repositories")
+    games = args.games
+    if not games and repo_root.exists():
+        games = sorted(p.name for p in repo_root.iterdir() if p.is_dir())
+    repos = [(repo_root / game, game) for game in games if (repo_root / game).exists()]
+    missing = sorted(set(games) - {game for _, game in repos})
+    if missing:
+        print(f"⚠️ Skipping missing repositories: {', '.join(missing)}")
+    if not repos:
+        print("❌ No repositories to analyze")
+        return
+
+    anthropic_key = os.getenv('ANTHROPIC_API_KEY')
+    openai_key = os.getenv('OPENAI_API_KEY')
+    server = None
+    if args.mock:
+        server = MockLLMServer(batch_latency=1.0).start()
+        anthropic_key, openai_key = "mock-key", "mock-key"
+        args.poll_interval = min(args.poll_interval, 0.5)
+    elif not anthropic_key and not openai_key:
+        print("❌ Error: set ANTHROPIC_API_KEY or OPENAI_API_KEY (or use --mock)")
+        return
+
+    try:
+        analyzer = LLMGameAnalyzer(anthropic_api_key=anthropic_key, openai_api_key=openai_key)
+        client = BatchLLMClient(
+            anthropic_key=anthropic_key, openai_key=openai_key,
+            anthropic_base_url=server.url if server else None,
+            openai_base_url=server.url + "/v1" if server else None,
+            models={'anthropic': ANALYZER_CLAUDE_MODEL, 'openai': ANALYZER_GPT_MODEL},
+            response_cache=analyzer.response_cache,
+            poll_interval=args.poll_interval
+        )
+
+        print(f"🗂️ Batch analysis of {len(repos)} repositories")
+        results = analyzer.analyze_games_batch(repos, client)
+
+        model_label = "Claude" if anthropic_key else "GPT-4"
+        for game_name, result in results.items():
+            print(f"📄 {game_name}: {len(result.engagement_moments)} moments, "
+                  f"{len(result.mini_game_concepts)} concepts -> {save_result(game_name, result, model_label)}")
+
+        failed = [game for _, game in repos if game not in results]
+        print(f"\n✅ {len(results)}/{len(repos)} repositories analyzed  {client.stats}")
+        if failed:
+            print(f"❌ Incomplete: {', '.join(failed)}")
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
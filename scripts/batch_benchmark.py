@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Batch Engine Benchmark
+
+Checks that BatchSkirmish plays by GameBoard's rules, by mirroring every
+batched game on a QuickSkirmishEngine (same actions, same dice) and
+comparing reachable cells, attack targets and the resulting positions
+step by step. Then times whole batches of games against stepping
+SkirmishState games one at a time. No display needed.
+
+Usage: python scripts/batch_benchmark.py [--check G] [--batches 256 1024 4096] [--policy greedy] [--terrain T]
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from mini_game_generator.batch_engine import BLUE, DRAW, POLICIES, BatchSkirmish
+from mini_game_generator.game_engine import OBSTACLE, ROUGH, TEAM_CODES, Position, QuickSkirmishEngine
+from mini_game_generator.game_state import PASS, SkirmishState
+
+
+class FixedDice:
+    """Stands in for GameBoard.rng: replays the batch's damage rolls"""
+
+    def __init__(self):
+        self.rolls = []
+
+    def randint(self, low: int, high: int) -> int:
+        return self.rolls.pop(0)
+
+
+def make_engine(terrain: float, seed: int) -> QuickSkirmishEngine:
+    engine = QuickSkirmishEngine(seed=seed, record=False)
+    engine.auto_red = False
+    rng = random.Random(seed)
+    occupied = {(unit.position.x, unit.position.y) for unit in engine.board.units}
+    for x in range(engine.board.size):
+        for y in range(engine.board.size):
+            if (x, y) not in occupied and rng.random() < terrain:
+                engine.board.set_terrain(Position(x, y), rng.choice([OBSTACLE, ROUGH]))
+    return engine
+
+
+def check(games: int, policy: str, terrain: float):
+    """Every batched step against GameBoard on a mirrored engine"""
+    batch = BatchSkirmish(make_engine(terrain, seed=0), games, seed=1)
+    mirrors = [make_engine(terrain, seed=0) for _ in range(games)]
+    dice = [FixedDice() for _ in range(games)]
+    for mirror, rolls in zip(mirrors, dice):
+        mirror.board.rng = rolls
+    steps = 0
+    while not batch.game_over.all():
+        # Positions and reachable cells before the step, as the batch sees them
+        x0, y0 = batch.x.copy(), batch.y.copy()
+        running = np.flatnonzero(~batch.game_over)
+        undone = batch._undone(running)
+        units = undone.argmax(axis=1)
+        reach = batch.reachability(running, units)
+        batch.step(POLICIES[policy], POLICIES[policy])
+        last = batch.last_step
+        assert np.array_equal(last["games"], running) and np.array_equal(last["units"], units)
+        for i, game in enumerate(last["games"]):
+            engine, unit_index = mirrors[game], int(last["units"][i])
+            unit = engine.board.get_unit_at(Position(int(x0[game, unit_index]), int(y0[game, unit_index])))
+            expected = sorted((p.x, p.y) for p in engine.board.get_valid_moves(unit))
+            reached = np.argwhere(reach[i])
+            assert sorted(map(tuple, reached.tolist())) == sorted(expected + [(unit.position.x, unit.position.y)])
+            destination = Position(int(last["x"][i]), int(last["y"][i]))
+            if destination != unit.position:
+                assert engine.board.move_unit(unit, destination)
+            target = int(last["targets"][i])
+            targets = engine.board.get_attack_targets(unit)
+            if target == -1:
+                assert not targets
+            else:
+                target_pos = Position(int(x0[game, target]), int(y0[game, target]))
+                assert target_pos in targets
+                assert min(engine.board.get_unit_at(pos).health for pos in targets) == \
+                    engine.board.get_unit_at(target_pos).health
+                dice[game].rolls.append(int(last["rolls"][i]))
+                assert engine.board.attack_unit(unit, target_pos)
+            if engine.current_team.value != ("blue" if batch.current_team[game] == BLUE else "red"):
+                engine.end_turn()
+            compare(batch, game, engine)
+        steps += len(last["games"])
+    print(f"✅ {games} games, {steps} game-steps: moves, attacks, damage, removal and turns match GameBoard")
+
+
+def compare(batch: BatchSkirmish, game: int, engine: QuickSkirmishEngine):
+    units = {(unit.position.x, unit.position.y): unit for unit in engine.board.units}
+    alive = np.flatnonzero(batch.alive[game])
+    assert len(alive) == len(units)
+    for index in alive:
+        unit = units[(int(batch.x[game, index]), int(batch.y[game, index]))]
+        assert TEAM_CODES[unit.team] == batch.teams[game, index] and unit.health == batch.hp[game, index]
+    assert engine.turn_count == batch.turn_count[game] and engine.game_over == batch.game_over[game]
+    assert (TEAM_CODES[engine.winner] if engine.winner else DRAW) == batch.winner[game]
+
+
+def scalar_games_per_second(games: int) -> float:
+    """Greedy SkirmishState games, one make() at a time"""
+    start, steps = time.perf_counter(), 0
+    for _ in range(games):
+        state = SkirmishState.from_engine(QuickSkirmishEngine(record=False))
+        while not state.game_over:
+            actions = state.legal_actions()
+            state.make(actions[-1] if actions else PASS)
+            steps += 1
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the batched skirmish engine")
+    parser.add_argument("--check", type=int, default=200, help="games to mirror on GameBoard (0 to skip)")
+    parser.add_argument("--batches", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--terrain", type=float, default=0.2, help="share of free cells that are obstacles or rough")
+    args = parser.parse_args()
+
+    if args.check:
+        for policy in sorted(POLICIES):
+            check(args.check, policy, args.terrain)
+
+    print(f"SkirmishState, one game at a time: {scalar_games_per_second(200):12,.0f} game-steps/s")
+    for size in args.batches:
+        batch = BatchSkirmish(make_engine(args.terrain, seed=0), size, seed=0)
+        start = time.perf_counter()
+        steps = batch.run(POLICIES[args.policy], POLICIES[args.policy])
+        elapsed = time.perf_counter() - start
+        wins = batch.win_counts()
+        print(f"BatchSkirmish, B={size:<5}          {steps / elapsed:12,.0f} game-steps/s   "
+              f"({size / elapsed:,.0f} games/s; blue {wins['blue']}, red {wins['red']}, draw {wins['draw']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Game Board Benchmark
+
+Compares GameBoard queries backed by the occupancy index (O(1)
+get_unit_at, NumPy reachability and attack masks) with a list-scanning,
+pure-Python implementation on boards of several sizes with random
+terrain, and checks both return the same answers. An uncached
+reachability query must stay under REACHABILITY_BOUND on boards up to
+32x32 at any movement range; the benchmark fails if it does not. No
+display needed.
+
+Usage: python scripts/board_benchmark.py [--sizes 6 8 16 32] [--density D] [--terrain T] [--repeat N]
+"""
+import sys
+import time
+import heapq
+import random
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from mini_game_generator.game_engine import (
+    GameBoard, Position, Team, Unit, UnitType, OPEN, OBSTACLE, ROUGH, TERRAIN_COSTS
+)
+
+REACHABILITY_BOUND = 1e-3  # seconds per uncached reachability query, boards up to 32x32
+
+
+class ScanningGameBoard(GameBoard):
+    """Reference queries: every lookup scans the unit list, moves use a heapq Dijkstra"""
+
+    def get_unit_at(self, pos: Position) -> Optional[Unit]:
+        for unit in self.units:
+            if unit.position.x == pos.x and unit.position.y == pos.y:
+                return unit
+        return None
+
+    def get_valid_moves(self, unit: Unit) -> List[Position]:
+        start = (unit.position.x, unit.position.y)
+        best = {start: 0.0}
+        queue = [(0.0, start)]
+        while queue:
+            cost, (x, y) = heapq.heappop(queue)
+            if cost > best[(x, y)]:
+                continue
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < self.size and 0 <= ny < self.size and self.get_unit_at(Position(nx, ny)) is None:
+                    step = cost + TERRAIN_COSTS[self.terrain[ny][nx]]
+                    if step <= unit.movement_range and step < best.get((nx, ny), float('inf')):
+                        best[(nx, ny)] = step
+                        heapq.heappush(queue, (step, (nx, ny)))
+        return [Position(x, y) for x, y in sorted(best) if (x, y) != start]
+
+    def get_attack_targets(self, unit: Unit) -> List[Position]:
+        targets = []
+        for x in range(max(0, unit.position.x - unit.attack_range),
+                       min(self.size, unit.position.x + unit.attack_range + 1)):
+            for y in range(max(0, unit.position.y - unit.attack_range),
+                           min(self.size, unit.position.y + unit.attack_range + 1)):
+                pos = Position(x, y)
+                target = self.get_unit_at(pos)
+                if target and unit.can_attack(pos) and target.team != unit.team:
+                    targets.append(pos)
+        return targets
+
+
+def populate(board: GameBoard, density: float, terrain: float, seed: int) -> GameBoard:
+    rng = random.Random(seed)
+    board.load_terrain([[rng.choice([OBSTACLE, ROUGH]) if rng.random() < terrain else OPEN
+                         for _ in range(board.size)] for _ in range(board.size)])
+    cells = [(x, y) for x in range(board.size) for y in range(board.size) if board.terrain[y][x] != OBSTACLE]
+    for x, y in rng.sample(cells, int(len(cells) * density)):
+        board.add_unit(Unit(rng.choice(list(UnitType)), rng.choice(list(Team)), Position(x, y),
+                            attack_range=rng.choice([1, 1, 2])))
+    return board
+
+
+def timed(func, repeat: int) -> float:
+    """Best-of-3 seconds per call"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def benchmark(size: int, density: float, terrain: float, repeat: int):
+    indexed = populate(GameBoard(size), density, terrain, seed=size)
+    scanning = populate(ScanningGameBoard(size), density, terrain, seed=size)
+    cells = [Position(x, y) for x in range(size) for y in range(size)]
+
+    # Same answers from both implementations
+    for a, b in zip(indexed.units, scanning.units):
+        assert indexed.get_valid_moves(a) == scanning.get_valid_moves(b)
+        assert indexed.get_attack_targets(a) == scanning.get_attack_targets(b)
+        assert sorted(map(tuple, np.argwhere(indexed.move_mask(a)))) == \
+            [(p.x, p.y) for p in scanning.get_valid_moves(b)]
+        assert sorted(map(tuple, np.argwhere(indexed.attack_mask(a)))) == \
+            [(p.x, p.y) for p in scanning.get_attack_targets(b)]
+
+    queries = [
+        ("get_unit_at (all cells)",
+         lambda board: (lambda: [board.get_unit_at(pos) for pos in cells])),
+        ("get_valid_moves (all units)",
+         lambda board: (lambda: [board.get_valid_moves(unit) for unit in board.units])),
+        ("get_attack_targets (all units)",
+         lambda board: (lambda: [board.get_attack_targets(unit) for unit in board.units])),
+    ]
+    print(f"{size}x{size} board, {len(indexed.units)} units")
+    for label, make in queries:
+        before = timed(make(scanning), repeat)
+        after = timed(make(indexed), repeat)
+        print(f"  {label:<32} scan {before * 1e3:8.3f} ms   index {after * 1e3:8.3f} ms   "
+              f"x{before / after:6.1f}")
+    masks = timed(lambda: [(indexed.move_mask(unit), indexed.attack_mask(unit)) for unit in indexed.units], repeat)
+    print(f"  {'NumPy move + attack masks':<32} {'':>17}   index {masks * 1e3:8.3f} ms")
+
+    # Uncached cost of one reachability query (what a move or a new selection pays)
+    for movement_range in (3, 6, size):
+        unit = Unit(UnitType.TANK, Team.BLUE, indexed.units[0].position, movement_range=movement_range)
+        cold = timed(lambda: indexed._compute_reachability(unit.position, movement_range), repeat)
+        print(f"  {f'reachability, range {movement_range}':<32} {'':>17}   cold  {cold * 1e3:8.3f} ms")
+        if size <= 32:
+            assert cold < REACHABILITY_BOUND, \
+                f"reachability at range {movement_range} took {cold * 1e3:.3f} ms on {size}x{size}"
+    field = timed(lambda: indexed.distance_field([unit.position for unit in indexed.units[:2]]), repeat)
+    print(f"  {'distance_field, 2 sources':<32} {'':>17}   cold  {field * 1e3:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GameBoard occupancy index against list scanning")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 8, 16, 32])
+    parser.add_argument("--density", type=float, default=0.25, help="share of free cells holding a unit")
+    parser.add_argument("--terrain", type=float, default=0.2, help="share of cells that are obstacles or rough")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        benchmark(size, args.density, args.terrain, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,18 @@ LLM-Powered Game Analysis Script
 Uses SOTA Large Language Models to intelligently analyze games
 and generate engaging mini-game concepts.
 
-Usage: python scripts/llm_analyze_game.py <game_name> --anthropic-key <key>
+Completed steps are kept in data/pipeline/<game_name>/, so re-running after
+a failure resumes from the failed step (--fresh starts over).
+
+--template-mode generates code as parameters + diffs against the Quick
+Skirmish skeleton instead of complete files (far fewer output tokens).
+
+Usage: python scripts/llm_analyze_game.py <game_name> --anthropic-key <key> [--fresh] [--template-mode]
 """
 import sys
 import json
 import os
+import shutil
 from pathlib import Path
 
 # Add src to path
@@ -20,7 +27,7 @@ from llm_analyzer.llm_game_analyzer import LLMGameAnalyzer, LLMCodeGenerator
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python scripts/llm_analyze_game.py <game_name> [--anthropic-key KEY] [--openai-key KEY]")
+        print("Usage: python scripts/llm_analyze_game.py <game_name> [--anthropic-key KEY] [--openai-key KEY] [--fresh] [--template-mode]")
         print("Example: python scripts/llm_analyze_game.py tanks-of-freedom --anthropic-key sk-...")
         return
     
@@ -64,6 +71,10 @@ def main():
     print(f"Using: {'Claude' if anthropic_key else 'GPT-4'}")
     print()
     
+    run_dir = Path("data/pipeline") / game_name
+    if "--fresh" in sys.argv:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    
     try:
         # Initialize LLM analyzer
         analyzer = LLMGameAnalyzer(
@@ -71,9 +82,25 @@ def main():
             openai_api_key=openai_key
         )
         
+        def show_progress(path, value):
+            # Streamed results: print each moment/concept as soon as it is generated
+            if len(path) == 2 and isinstance(value, dict):
+                label = "Moment" if path[0] == 'moments' else "Concept" if path[0] == 'mini_game_concepts' else None
+                if label:
+                    print(f"  ⚡ {label} {path[1] + 1}: {value.get('name') or value.get('title', 'Unnamed')}")
+        
         print("🔍 Step 1: LLM analyzing game code and mechanics...")
-        # Perform intelligent analysis
-        analysis_result = analyzer.analyze_game_with_llm(repo_path, game_name)
+        # Perform intelligent analysis (steps finished by an earlier run are reused)
+        run = analyzer.run_pipeline(repo_path, game_name, run_dir=run_dir, targets=["concepts"],
+                                    on_event=show_progress)
+        if run.reused:
+            print(f"♻️ Reused from {run_dir}: {', '.join(run.reused)}")
+        if not run.ok:
+            for node, error in run.failed.items():
+                print(f"❌ {node} failed: {error}")
+            print(f"Re-run to resume from the failed step ({', '.join(run.ran) or 'nothing'} saved)")
+            return
+        analysis_result = analyzer.result_from_outputs(run.outputs)
         
         print("✅ LLM Analysis Complete!")
         print(f"Confidence Score: {analysis_result.confidence_score:.2f}")
@@ -134,28 +161,37 @@ def main():
         print(f"📄 Detailed analysis saved to: {output_path}")
         print()
         
-        # Ask if user wants to generate code for top concept
-        if analysis_result.mini_game_concepts:
-            top_concept = analysis_result.mini_game_concepts[0]
-            print(f"🚀 Generate code for top concept: '{top_concept.get('concept_name', 'Unknown')}'?")
+        # Ask if user wants to generate code for the concepts
+        concepts = analysis_result.mini_game_concepts
+        if concepts:
+            print(f"🚀 Generate code for {len(concepts)} concept(s): "
+                  f"{', '.join(concept.get('concept_name', 'Unknown') for concept in concepts)}?")
             response = input("Generate mini-game code? (y/N): ").strip().lower()
             
             if response == 'y':
-                print("🔧 Step 2: LLM generating mini-game code...")
+                print("🔧 Step 2: LLM generating mini-game code (one concept per worker)...")
                 
                 code_generator = LLMCodeGenerator(
                     anthropic_api_key=anthropic_key,
-                    openai_api_key=openai_key
+                    openai_api_key=openai_key,
+                    mode='template' if "--template-mode" in sys.argv else 'full'
                 )
                 
                 # Collect asset information
                 assets_info = {"available_assets": "Character sprites, UI elements, sounds from original game"}
                 
-                generated_code = code_generator.generate_mini_game_code(top_concept, assets_info)
+                # The analysis steps are reused from run_dir; only code generation runs
+                run = analyzer.run_pipeline(repo_path, game_name, run_dir=run_dir,
+                                            code_generator=code_generator, assets_info=assets_info)
                 
-                if "error" not in generated_code:
+                generated = run.outputs.get("code_generation") or run.partial.get("code_generation", [])
+                for index, (concept, generated_code) in enumerate(zip(concepts, generated)):
+                    if generated_code is None:
+                        print(f"❌ Code generation failed for {concept.get('concept_name', 'concept')}: "
+                              f"{run.failed.get(f'code_generation.{index}')} (re-run to retry)")
+                        continue
                     # Save generated code files
-                    generated_dir = Path("generated_games") / f"{game_name}_{top_concept.get('concept_name', 'concept').lower().replace(' ', '_')}"
+                    generated_dir = Path("generated_games") / f"{game_name}_{concept.get('concept_name', 'concept').lower().replace(' ', '_')}"
                     generated_dir.mkdir(parents=True, exist_ok=True)
                     
                     for filename, code in generated_code.items():
@@ -165,8 +201,24 @@ def main():
                     
                     print(f"✅ Mini-game code generated in: {generated_dir}")
                     print(f"🎮 To play: cd {generated_dir} && python main.py")
-                else:
-                    print(f"❌ Code generation failed: {generated_code.get('error', 'Unknown error')}")
+        
+        cache = analyzer.cache_stats()
+        if cache.get("mode") != "off":
+            print(f"💾 Response cache: {cache['hits']} hits, {cache['misses']} misses "
+                  f"(hit rate {cache['hit_rate']:.0%}, {cache['mode']})")
+        if "semantic" in cache:
+            semantic = cache["semantic"]
+            print(f"🧭 Semantic cache: {semantic['hits']} near-duplicate reuses, {semantic['misses']} misses "
+                  f"(threshold {semantic['threshold']}, {semantic['entries']} entries)")
+        for provider, usage in cache.get("prompt_cache", {}).items():
+            print(f"🧱 {provider} prompt cache: {usage['read_tokens']} tokens read, "
+                  f"{usage['write_tokens']} written, {usage['uncached_tokens']} uncached "
+                  f"(hit rate {usage['hit_rate']:.0%})")
+        
+        telemetry_path = Path("data") / f"{game_name}_llm_telemetry.json"
+        analyzer.telemetry.save(telemetry_path)
+        print(f"📈 Call telemetry saved to: {telemetry_path} "
+              f"(summary: python scripts/llm_telemetry_report.py {telemetry_path})")
         
         print("\n🎉 LLM Analysis Complete!")
         print("Compare this intelligent analysis with the rule-based version to see")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+LLM Telemetry Report
+
+Summarizes a telemetry export written by Telemetry.save (for example
+data/<game>_llm_telemetry.json from llm_analyze_game.py): calls, latency
+percentiles, time to first byte, queue wait, tokens, retries, cache hits
+and estimated cost per pipeline stage, plus each stage's share of total
+LLM time and spend.
+
+Usage: python scripts/llm_telemetry_report.py <telemetry.json> [--by-provider] [--prometheus]
+                                              [--slowest N]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from llm_analyzer.telemetry import load_telemetry
+
+
+def seconds(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.2f}s"
+
+
+def print_table(rows, total_time: float, total_cost: float):
+    header = (f"{'stage':<26} {'calls':>5} {'err':>4} {'retry':>5} {'cache':>5} {'p50':>8} {'p95':>8} "
+              f"{'p99':>8} {'ttfb p50':>8} {'queue p95':>9} {'in tok':>8} {'out tok':>8} {'cached tok':>10} "
+              f"{'cost $':>8} {'time %':>6} {'cost %':>6}")
+    print(header)
+    print("-" * len(header))
+    for label, aggregate in rows:
+        counters = aggregate.counters
+        latency = aggregate.latency
+        print(f"{label:<26} {counters['calls']:>5} {counters['errors']:>4} {counters['retries']:>5} "
+              f"{counters['response_cache_hits']:>5} {seconds(latency.percentile(0.5)):>8} "
+              f"{seconds(latency.percentile(0.95)):>8} {seconds(latency.percentile(0.99)):>8} "
+              f"{seconds(aggregate.ttfb.percentile(0.5)):>8} {seconds(aggregate.queue_wait.percentile(0.95)):>9} "
+              f"{counters['input_tokens']:>8} {counters['output_tokens']:>8} {counters['cache_read_tokens']:>10} "
+              f"{aggregate.cost_usd:>8.4f} "
+              f"{(latency.total / total_time if total_time else 0):>6.0%} "
+              f"{(aggregate.cost_usd / total_cost if total_cost else 0):>6.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize an LLM telemetry export")
+    parser.add_argument("path", type=Path, help="JSON file written by Telemetry.save")
+    parser.add_argument("--by-provider", action="store_true", help="one row per (stage, provider)")
+    parser.add_argument("--prometheus", action="store_true", help="print Prometheus text format instead")
+    parser.add_argument("--slowest", type=int, default=5, help="list the N slowest calls (0 to skip)")
+    args = parser.parse_args()
+
+    if not args.path.exists():
+        print(f"❌ Telemetry file not found: {args.path}")
+        return
+    telemetry = load_telemetry(args.path)
+
+    if args.prometheus:
+        print(telemetry.to_prometheus(), end="")
+        return
+
+    if args.by_provider:
+        rows = [(f"{stage}/{provider}", aggregate) for (stage, provider), aggregate in sorted(telemetry.aggregates.items())]
+    else:
+        rows = sorted(telemetry.stage_totals().items())
+    if not rows:
+        print("No LLM calls recorded")
+        return
+
+    total_time = sum(aggregate.latency.total for _, aggregate in rows)
+    total_cost = sum(aggregate.cost_usd for _, aggregate in rows)
+    total_calls = sum(aggregate.counters['calls'] for _, aggregate in rows)
+    print(f"📈 {total_calls} LLM calls, {total_time:.1f}s of LLM time, ${total_cost:.4f} estimated spend")
+    print()
+    print_table(rows, total_time, total_cost)
+
+    if args.slowest and telemetry.records:
+        print()
+        print(f"🐢 Slowest {args.slowest} calls:")
+        for record in sorted(telemetry.records, key=lambda r: r.latency, reverse=True)[:args.slowest]:
+            status = "ok" if record.success else f"failed: {(record.error or '')[:60]}"
+            print(f"  {seconds(record.latency):>8}  {record.stage:<20} {record.provider or '-':<10} "
+                  f"queue {seconds(record.queue_wait)}, {record.attempts} attempt(s), {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Replay Session
+
+Re-simulates a recorded game session (a .mgrl log from data/replays)
+headlessly and as fast as the engine steps, checking the state
+checksums recorded during play. Works for Quick Skirmish, SuperTuxKart
+and Boss Rush logs. Use it to reproduce crashes from player devices or,
+with --repeat, to time the engine on a fixed workload.
+
+Usage: python scripts/replay_session.py LOG [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add src and the standalone games to path; no window is opened
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from mini_game_generator.replay import ActionLog, ReplayDivergence
+
+
+def load_replayer(game: str):
+    """The replay classmethod of the game that wrote the log"""
+    if game == "skirmish":
+        from mini_game_generator.game_engine import QuickSkirmishEngine
+        return QuickSkirmishEngine.replay, lambda engine: engine.checksum()
+    if game == "kart":
+        from supertuxkart_mini_game import SuperTuxKartMiniGame
+        return SuperTuxKartMiniGame.replay, lambda kart_game: kart_game.checksum()
+    if game == "bossrush":
+        from shattered_pixel_dungeon_mini_game import BossRushGame
+        return BossRushGame.replay, lambda boss_game: boss_game.checksum()
+    raise ValueError(f"Unknown game {game!r} in replay log")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded session without rendering")
+    parser.add_argument("log", type=Path)
+    parser.add_argument("--repeat", type=int, default=1, help="replay N times and report the best time")
+    args = parser.parse_args()
+
+    log = ActionLog.load(args.log)
+    replay, checksum = load_replayer(log.game)
+    print(f"🎬 {log.game} session, seed {log.seed}: {len(log)} records in {args.log.stat().st_size} bytes")
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        try:
+            game = replay(log)
+        except ReplayDivergence as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        best = min(best, time.perf_counter() - start)
+    print(f"✅ Replayed bit-exactly in {best * 1e3:.1f} ms ({len(log) / best:,.0f} records/s)")
+    print(f"   Final state checksum: {checksum(game):08x}")
+
+
+if __name__ == "__main__":
+    main()
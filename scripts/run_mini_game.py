@@ -5,6 +5,7 @@ Mini-Game Runner
 Runs the generated Quick Skirmish mini-game
 """
 import sys
+import argparse
 import pygame
 from pathlib import Path
 
@@ -14,9 +15,25 @@ sys.path.append(str(Path(__file__).parent.parent / "src"))
 from mini_game_generator.game_engine import QuickSkirmishEngine
 from mini_game_generator.asset_manager import AssetManager
 from mini_game_generator.ui_renderer import UIRenderer
+from mini_game_generator.skirmish_ai import AI_BACKENDS, DIFFICULTY_BUDGETS_MS, create_player
+
+REPLAY_DIR = Path("data/replays")
+
+
+def save_replay(engine: QuickSkirmishEngine):
+    """Keep the session's action log (replay with scripts/replay_session.py)"""
+    if engine.action_log is not None and len(engine.action_log):
+        path = engine.action_log.save(REPLAY_DIR / f"skirmish-{engine.seed}.mgrl")
+        print(f"💾 Replay saved to {path}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the Quick Skirmish mini-game")
+    parser.add_argument("--ai", choices=sorted(AI_BACKENDS), default="mcts", help="AI backend for the red team")
+    parser.add_argument("--difficulty", choices=list(DIFFICULTY_BUDGETS_MS), default="normal",
+                        help="AI thinking time per turn")
+    args = parser.parse_args()
+    
     print("Starting Quick Skirmish Mini-Game...")
     print("Based on Tanks of Freedom")
     print()
@@ -39,8 +56,9 @@ def main():
         print("Please run: python scripts/analyze_game.py tanks-of-freedom")
         return
     
-    # Initialize game components
-    engine = QuickSkirmishEngine()
+    # Initialize game components (the AI plans on a worker thread so frames keep coming)
+    ai = create_player(args.ai, args.difficulty)
+    engine = QuickSkirmishEngine(ai=ai, background_ai=True)
     assets = AssetManager(source_game_path)
     assets.load_tanks_of_freedom_assets()
     
@@ -59,7 +77,8 @@ def main():
                     running = False
                 elif event.key == pygame.K_r and engine.game_over:
                     # Restart game
-                    engine = QuickSkirmishEngine()
+                    save_replay(engine)
+                    engine = QuickSkirmishEngine(ai=ai, background_ai=True)
                     renderer.engine = engine
                     renderer.selected_unit_pos = None
                     renderer.highlighted_moves = []
@@ -71,12 +90,17 @@ def main():
                 elif event.button == 3:  # Right click
                     renderer.handle_right_click(event.pos)
         
+        # Apply the AI's turn once it is planned
+        engine.update()
+        
         # Render game
         renderer.render()
         
         # Control frame rate
         clock.tick(60)
     
+    save_replay(engine)
+    ai.close()
     pygame.quit()
     print("Game closed")
 
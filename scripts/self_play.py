@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Skirmish Self-Play
+
+Runs a headless batch of Quick Skirmish games between two AI policies on
+all CPU cores and prints a balance report (win rates, game lengths,
+damage). Unit stats and the turn limit can be overridden per run.
+
+Usage: python scripts/self_play.py [--blue greedy] [--red random] [--games N] [--workers N]
+           [--seed S] [--max-turns T] [--set attack_power=35 --set tank.movement_range=4] [--json out.json]
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from mini_game_generator.simulator import SimulationConfig, parse_unit_stats, run_simulation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch self-play for balance and difficulty tuning")
+    parser.add_argument("--blue", default="greedy", help="backend[:difficulty or budget ms] for blue")
+    parser.add_argument("--red", default="greedy", help="backend[:difficulty or budget ms] for red")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--max-turns", type=int, default=None)
+    parser.add_argument("--set", dest="stats", action="append", default=[], metavar="[TYPE.]STAT=VALUE",
+                        help="unit stat override, for all units or one unit type (repeatable)")
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        config = SimulationConfig(blue=args.blue, red=args.red, games=args.games, seed=args.seed,
+                                  max_turns=args.max_turns, unit_stats=parse_unit_stats(args.stats))
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = run_simulation(config, workers=args.workers,
+                            progress=lambda done, total: print(f"\r🎮 {done}/{total} games", end="", flush=True))
+    print()
+    print(report.format())
+    if "pygame" in sys.modules or "kivy" in sys.modules:
+        print("⚠️  A UI toolkit was imported during the run")
+    if args.json:
+        args.json.write_text(json.dumps(report.to_dict(), indent=2))
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
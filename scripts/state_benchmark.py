@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Game State Benchmark
+
+Times copying a Quick Skirmish position for look-ahead:
+copy.deepcopy of the engine against the struct-of-arrays SkirmishState
+(snapshot, clone, make + unmake), on the standard 6x6 game and on larger
+random boards. Also checks that make / unmake restore the position and
+keep the Zobrist hash in step. No display needed.
+
+Usage: python scripts/state_benchmark.py [--sizes 6 16 32] [--density D] [--repeat N]
+"""
+import sys
+import copy
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from mini_game_generator.game_engine import GameBoard, Position, QuickSkirmishEngine, Team, Unit, UnitType
+from mini_game_generator.game_state import PASS, SkirmishState
+
+
+def make_engine(size: int, density: float, seed: int) -> QuickSkirmishEngine:
+    engine = QuickSkirmishEngine()
+    if size != engine.board.size:
+        rng = random.Random(seed)
+        engine.board = GameBoard(size)
+        cells = [(x, y) for x in range(size) for y in range(size)]
+        for x, y in rng.sample(cells, int(len(cells) * density)):
+            engine.board.add_unit(Unit(rng.choice(list(UnitType)), rng.choice(list(Team)), Position(x, y)))
+    return engine
+
+
+def timed(func, repeat: int) -> float:
+    """Best-of-3 seconds per call"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def check_make_unmake(state: SkirmishState, steps: int, seed: int):
+    rng = random.Random(seed)
+    fields = lambda s: (s.xs[:], s.ys[:], s.hp[:], s.moved[:], s.attacked[:], dict(s.cells),
+                        s.current_team, s.turn_count, s.game_over, s.hash)
+    history = []
+    for _ in range(steps):
+        if state.game_over:
+            break
+        actions = state.legal_actions()
+        history.append(fields(state))
+        state.make(rng.choice(actions) if actions else PASS)
+        assert state.hash == state.compute_hash()
+    while history:
+        state.unmake()
+        assert fields(state) == history.pop()
+
+
+def benchmark(size: int, density: float, repeat: int):
+    engine = make_engine(size, density, seed=size)
+    state = SkirmishState.from_engine(engine)
+    check_make_unmake(state.clone(), steps=200, seed=size)
+    action = state.legal_actions()[-1]
+
+    def make_unmake():
+        state.make(action)
+        state.unmake()
+
+    deep = timed(lambda: copy.deepcopy(engine), max(1, repeat // 10))
+    print(f"{size}x{size} board, {len(engine.board.units)} units")
+    print(f"  {'copy.deepcopy(engine)':<28} {deep * 1e6:10.1f} us")
+    for label, func in (("SkirmishState.from_engine", lambda: SkirmishState.from_engine(engine)),
+                        ("SkirmishState.clone", state.clone),
+                        ("make + unmake", make_unmake)):
+        seconds = timed(func, repeat)
+        print(f"  {label:<28} {seconds * 1e6:10.1f} us   x{deep / seconds:7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark state copies: deepcopy vs SkirmishState")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 16, 32])
+    parser.add_argument("--density", type=float, default=0.2, help="share of cells holding a unit (boards > 6)")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    for size in args.sizes:
+        benchmark(size, args.density, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -214,6 +214,9 @@ def test_task_specific_routing():
     print("📈 Results:")
     print(f"  Code Analysis: {'✅ Claude Sonnet 4' if code_response.success else '❌ Failed'}")
     print(f"  Creative Generation: {'✅ Gemini 2.5 Pro' if creative_response.success else '❌ Failed'}")
+    cache = client.cache_stats()
+    if cache.get("mode") != "off":
+        print(f"  Response Cache: {cache['hits']} hits, {cache['misses']} misses ({cache['mode']})")
     print()
     
     # Save combined results
@@ -223,11 +226,13 @@ def test_task_specific_routing():
             "code_analysis": {
                 "model": code_response.model_used,
                 "success": code_response.success,
+                "cached": code_response.cached,
                 "content": code_response.content[:500] + "..." if len(code_response.content) > 500 else code_response.content
             },
             "creative_generation": {
                 "model": creative_response.model_used, 
                 "success": creative_response.success,
+                "cached": creative_response.cached,
                 "content": creative_response.content[:500] + "..." if len(creative_response.content) > 500 else creative_response.content
             }
         },
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Engagement Model Training Script
+
+Fits the learned moment ranking model on exported ad telemetry.
+Each telemetry record holds the moment fields from a moments report
+plus observed `impressions` and `engagements`.
+
+Usage: python scripts/train_engagement_model.py <telemetry.jsonl> [--output PATH]
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+
+from engagement_ai.engagement_model import EngagementModel, load_telemetry, DEFAULT_MODEL_PATH
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/train_engagement_model.py <telemetry.jsonl> [--output PATH]")
+        print("Example: python scripts/train_engagement_model.py data/ad_telemetry.jsonl")
+        return
+
+    telemetry_file = Path(sys.argv[1])
+    output_path = DEFAULT_MODEL_PATH
+    if "--output" in sys.argv:
+        output_path = Path(sys.argv[sys.argv.index("--output") + 1])
+
+    if not telemetry_file.exists():
+        print(f"Telemetry file {telemetry_file} not found")
+        return
+
+    features, rates, impressions = load_telemetry(telemetry_file)
+    print(f"Loaded {len(rates)} moment records from {telemetry_file}")
+    if len(rates) == 0:
+        print("No usable records (need impressions > 0 or engagement_rate)")
+        return
+
+    start = time.perf_counter()
+    model = EngagementModel().fit(features, rates, sample_weight=impressions)
+    train_time = time.perf_counter() - start
+
+    predicted = model.predict(features)
+    weighted_error = np.average(np.abs(predicted - rates), weights=impressions)
+
+    # Batched inference timing over the training set
+    start = time.perf_counter()
+    for _ in range(100):
+        model.predict(features)
+    per_candidate_us = (time.perf_counter() - start) / (100 * len(rates)) * 1e6
+
+    model.save(output_path)
+
+    print(f"Training time: {train_time:.3f}s")
+    print(f"Weighted mean absolute error: {weighted_error:.4f}")
+    print(f"Batched inference: {per_candidate_us:.2f}µs per candidate")
+    print(f"Model saved to {output_path}")
+    print()
+
+    print("Strongest features:")
+    importance = sorted(model.feature_importance().items(), key=lambda x: abs(x[1]), reverse=True)
+    for name, weight in importance[:8]:
+        print(f"• {name}: {weight:+.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,10 @@ A 5-8 minute mini-game capturing the most exciting moments from Shattered Pixel
 - Simplified but authentic mechanics
 
 Based on analysis of the full Shattered Pixel Dungeon open-source codebase.
+
+Every session is seeded and its key presses are recorded to data/replays;
+BossRushGame.replay re-simulates a log headlessly (see
+scripts/replay_session.py).
 """
 
 import pygame
@@ -16,10 +20,18 @@ import random
 import math
 import json
 import sys
+import zlib
 from enum import Enum
 from dataclasses import dataclass
+from pathlib import Path
 from typing import List, Optional, Dict, Tuple
 
+sys.path.append(str(Path(__file__).parent / "src"))
+try:
+    from mini_game_generator.replay import ActionLog
+except ImportError:  # copied without src/: play without logs
+    ActionLog = None
+
 # Initialize Pygame
 pygame.init()
 
@@ -46,6 +58,13 @@ BROWN = (139, 69, 19)
 DUNGEON_FLOOR = (89, 86, 82)
 DUNGEON_WALL = (45, 45, 45)
 
+# Replay log opcodes and their payloads (see mini_game_generator.replay)
+LOG_GAME = "bossrush"
+LOG_KEY = 1  # key pressed
+LOG_CHECKSUM = 2  # BossRushGame.checksum() after every hero action
+LOG_FORMATS = {LOG_KEY: "I", LOG_CHECKSUM: "I"}
+REPLAY_DIR = Path(__file__).parent / "data" / "replays"
+
 class GameState(Enum):
     MENU = "menu"
     CLASS_SELECT = "class_select"
@@ -86,7 +105,9 @@ class StatusEffect:
         return self.duration > 0
 
 class Entity:
-    def __init__(self, x: int, y: int, color: Tuple[int, int, int], symbol: str):
+    def __init__(self, x: int, y: int, color: Tuple[int, int, int], symbol: str,
+                 rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()  # the game's seeded RNG
         self.x = x
         self.y = y
         self.color = color
@@ -108,8 +129,8 @@ class Entity:
         self.stats.health = min(self.stats.max_health, self.stats.health + amount)
         
     def attack(self, target: 'Entity') -> int:
-        if random.randint(1, 100) <= self.stats.accuracy:
-            damage = random.randint(self.stats.damage[0], self.stats.damage[1])
+        if self.rng.randint(1, 100) <= self.stats.accuracy:
+            damage = self.rng.randint(self.stats.damage[0], self.stats.damage[1])
             target.take_damage(damage)
             return damage
         return 0
@@ -123,8 +144,8 @@ class Entity:
         self.status_effects = [e for e in self.status_effects if e.tick()]
 
 class Hero(Entity):
-    def __init__(self, hero_class: HeroClass):
-        super().__init__(7, 12, WHITE, "@")
+    def __init__(self, hero_class: HeroClass, rng: Optional[random.Random] = None):
+        super().__init__(7, 12, WHITE, "@", rng)
         self.hero_class = hero_class
         self.level = 3
         self.experience = 0
@@ -173,7 +194,7 @@ class Hero(Entity):
     def use_potion(self):
         if self.potions > 0:
             self.potions -= 1
-            heal_amount = random.randint(20, 35)
+            heal_amount = self.rng.randint(20, 35)
             self.heal(heal_amount)
             return heal_amount
         return 0
@@ -191,7 +212,7 @@ class Hero(Entity):
             
         elif self.hero_class == HeroClass.MAGE:
             if target:
-                damage = random.randint(25, 35)
+                damage = self.rng.randint(25, 35)
                 target.take_damage(damage)
                 target.add_status_effect(StatusEffect("Burning", 3, ORANGE))
                 return f"Fireball! {damage} damage + burning"
@@ -220,8 +241,8 @@ class Hero(Entity):
         return "Special ability used!"
 
 class Boss(Entity):
-    def __init__(self, boss_type: BossType):
-        super().__init__(7, 3, RED, "B")
+    def __init__(self, boss_type: BossType, rng: Optional[random.Random] = None):
+        super().__init__(7, 3, RED, "B", rng)
         self.boss_type = boss_type
         self.phase = 1
         self.special_cooldown = 0
@@ -281,7 +302,7 @@ class Boss(Entity):
             return f"{self.name} moves closer"
             
     def _use_special_ability(self, hero: Hero) -> str:
-        self.special_cooldown = random.randint(3, 5)
+        self.special_cooldown = self.rng.randint(3, 5)
         
         if self.boss_type == BossType.GOO:
             # Pump up - next attack deals massive damage
@@ -297,7 +318,7 @@ class Boss(Entity):
             valid_positions = [(x, y) for x, y in possible_positions 
                              if 0 <= x < ARENA_WIDTH and 0 <= y < ARENA_HEIGHT]
             if valid_positions:
-                self.x, self.y = random.choice(valid_positions)
+                self.x, self.y = self.rng.choice(valid_positions)
                 # Immediate attack with bonus damage
                 damage = self.attack(hero) + 10
                 return f"{self.name} teleports and strikes for {damage} damage!"
@@ -305,7 +326,7 @@ class Boss(Entity):
             
         elif self.boss_type == BossType.DM300:
             # Rocket barrage - damages hero regardless of position
-            damage = random.randint(15, 25)
+            damage = self.rng.randint(15, 25)
             hero.take_damage(damage)
             hero.add_status_effect(StatusEffect("Stunned", 1, YELLOW))
             return f"{self.name} fires rockets for {damage} damage! Hero is stunned!"
@@ -318,12 +339,18 @@ class Boss(Entity):
             self.special_cooldown -= 1
 
 class BossRushGame:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Shattered Pixel Dungeon: Boss Rush Arena")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 24)
-        self.title_font = pygame.font.Font(None, 48)
+    def __init__(self, seed: Optional[int] = None, headless: bool = False, record: bool = True):
+        if not headless:
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            pygame.display.set_caption("Shattered Pixel Dungeon: Boss Rush Arena")
+            self.clock = pygame.time.Clock()
+            self.font = pygame.font.Font(None, 24)
+            self.title_font = pygame.font.Font(None, 48)
+        
+        # Seeded RNG for every roll and the session's replay log
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.action_log = ActionLog(LOG_GAME, self.seed, LOG_FORMATS) if record and ActionLog else None
         
         self.state = GameState.MENU
         self.hero: Optional[Hero] = None
@@ -340,32 +367,74 @@ class BossRushGame:
                 return False
                 
             if event.type == pygame.KEYDOWN:
-                if self.state == GameState.MENU:
-                    if event.key == pygame.K_SPACE:
-                        self.state = GameState.CLASS_SELECT
-                        
-                elif self.state == GameState.CLASS_SELECT:
-                    class_keys = {
-                        pygame.K_1: HeroClass.WARRIOR,
-                        pygame.K_2: HeroClass.MAGE,
-                        pygame.K_3: HeroClass.ROGUE,
-                        pygame.K_4: HeroClass.HUNTRESS,
-                        pygame.K_5: HeroClass.DUELIST,
-                        pygame.K_6: HeroClass.CLERIC
-                    }
-                    if event.key in class_keys:
-                        self.start_game(class_keys[event.key])
-                        
-                elif self.state == GameState.PLAYING:
-                    self.handle_game_input(event.key)
-                    
-                elif self.state in [GameState.VICTORY, GameState.GAME_OVER]:
-                    if event.key == pygame.K_r:
-                        self.reset_game()
-                    elif event.key == pygame.K_q:
-                        return False
+                if not self.handle_key(event.key):
+                    return False
                         
         return True
+    
+    def handle_key(self, key) -> bool:
+        """React to a key press; False means quit"""
+        self._log(LOG_KEY, key)
+        if self.state == GameState.MENU:
+            if key == pygame.K_SPACE:
+                self.state = GameState.CLASS_SELECT
+                
+        elif self.state == GameState.CLASS_SELECT:
+            class_keys = {
+                pygame.K_1: HeroClass.WARRIOR,
+                pygame.K_2: HeroClass.MAGE,
+                pygame.K_3: HeroClass.ROGUE,
+                pygame.K_4: HeroClass.HUNTRESS,
+                pygame.K_5: HeroClass.DUELIST,
+                pygame.K_6: HeroClass.CLERIC
+            }
+            if key in class_keys:
+                self.start_game(class_keys[key])
+                
+        elif self.state == GameState.PLAYING:
+            self.handle_game_input(key)
+            
+        elif self.state in [GameState.VICTORY, GameState.GAME_OVER]:
+            if key == pygame.K_r:
+                self.reset_game()
+            elif key == pygame.K_q:
+                return False
+        return True
+    
+    def _log(self, op: int, *values):
+        if self.action_log is not None:
+            self.action_log.record(op, *values)
+    
+    def checksum(self) -> int:
+        """CRC32 of the combat state (hero, boss, progress)"""
+        fighters = []
+        for entity in (self.hero, self.current_boss):
+            if entity is not None:
+                fighters.append((entity.x, entity.y, entity.stats.health, entity.stats.armor, entity.stats.damage,
+                                 entity.special_cooldown, [(e.name, e.duration) for e in entity.status_effects]))
+        potions = self.hero.potions if self.hero else 0
+        state = (self.state.value, self.current_boss_index, self.score, potions, fighters)
+        return zlib.crc32(repr(state).encode())
+    
+    def save_replay(self) -> Optional[Path]:
+        if self.action_log is None or not len(self.action_log):
+            return None
+        path = self.action_log.save(REPLAY_DIR / f"{LOG_GAME}-{self.seed}.mgrl")
+        print(f"💾 Replay saved to {path}")
+        return path
+    
+    @classmethod
+    def replay(cls, log) -> 'BossRushGame':
+        """Re-simulate a recorded session headlessly; raises ReplayDivergence on a mismatch"""
+        if log.game != LOG_GAME:
+            raise ValueError(f"Not a Boss Rush log: {log.game!r}")
+        game = cls(seed=log.seed, headless=True, record=False)
+        
+        def key(key):
+            game.handle_key(key)
+        
+        log.play({LOG_KEY: key, LOG_CHECKSUM: lambda checksum: game.checksum() == checksum})
+        return game
         
     def handle_game_input(self, key):
         if not self.hero or not self.current_boss:
@@ -429,9 +498,10 @@ class BossRushGame:
                 self.boss_defeated()
             elif self.hero.stats.health <= 0:
                 self.state = GameState.GAME_OVER
+            self._log(LOG_CHECKSUM, self.checksum())
                 
     def start_game(self, hero_class: HeroClass):
-        self.hero = Hero(hero_class)
+        self.hero = Hero(hero_class, rng=self.rng)
         self.current_boss_index = 0
         self.score = 0
         self.turn_log = []
@@ -443,7 +513,7 @@ class BossRushGame:
     def spawn_next_boss(self):
         if self.current_boss_index < len(self.boss_queue):
             boss_type = self.boss_queue[self.current_boss_index]
-            self.current_boss = Boss(boss_type)
+            self.current_boss = Boss(boss_type, rng=self.rng)
             self.add_log(f"{self.current_boss.name} appears!")
         else:
             self.state = GameState.VICTORY
@@ -715,6 +785,7 @@ class BossRushGame:
             pygame.display.flip()
             self.clock.tick(FPS)
             
+        self.save_replay()
         pygame.quit()
 
 if __name__ == "__main__":
@@ -722,10 +793,13 @@ if __name__ == "__main__":
     print("Based on the acclaimed open-source roguelike!")
     print("Face iconic bosses in epic 5-8 minute battles!")
     
+    game = None
     try:
         game = BossRushGame()
         game.run()
     except Exception as e:
         print(f"Game error: {e}")
+        if game is not None:
+            game.save_replay()  # reproduce the crash with scripts/replay_session.py
         pygame.quit()
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Engagement Model
+
+Lightweight learned replacement for the hand-set engagement weights in
+MomentAnalyzer. A logistic regression is fitted offline on exported
+per-moment features joined with observed ad engagement, and scores
+candidate moments in one batched matrix product at analysis time.
+"""
+import json
+import math
+from typing import Dict, List, Optional, Sequence
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_MODEL_PATH = Path("data/models/engagement_model.json")
+
+# Mechanic vocabulary covers the MomentAnalyzer pattern categories plus the
+# mechanics attached to the generated strategy/asset moments
+MECHANIC_VOCABULARY = [
+    'combat', 'strategy', 'resource', 'competitive', 'progression',
+    'movement', 'tactics', 'capture', 'defense', 'story', 'objectives',
+    'selection', 'preview', 'building', 'management'
+]
+
+COMPLEXITY_LEVELS = ['simple', 'medium', 'complex']
+
+FEATURE_NAMES = (
+    ['engagement_score', 'mini_game_potential', 'play_time', 'asset_count']
+    + [f'complexity_{level}' for level in COMPLEXITY_LEVELS]
+    + [f'mechanic_{mechanic}' for mechanic in MECHANIC_VOCABULARY]
+)
+
+
+def _field(moment, name: str, default=None):
+    """Read a moment field from an EngagingMoment or a report/telemetry dict"""
+    if isinstance(moment, dict):
+        return moment.get(name, default)
+    return getattr(moment, name, default)
+
+
+def extract_moment_features(moment) -> List[float]:
+    """Build the feature vector for one moment (EngagingMoment or dict)"""
+    complexity = str(_field(moment, 'tutorial_complexity', 'medium')).lower()
+    mechanics = {str(m).lower() for m in _field(moment, 'gameplay_mechanics', []) or []}
+    required_assets = _field(moment, 'required_assets', []) or []
+
+    features = [
+        float(_field(moment, 'engagement_score', 0.0)),
+        float(_field(moment, 'mini_game_potential', 0.0)),
+        float(_field(moment, 'estimated_play_time', 5)) / 10.0,
+        math.log1p(len(required_assets)),
+    ]
+    features.extend(1.0 if complexity == level else 0.0 for level in COMPLEXITY_LEVELS)
+    features.extend(1.0 if mechanic in mechanics else 0.0 for mechanic in MECHANIC_VOCABULARY)
+    return features
+
+
+def build_feature_matrix(moments: Sequence) -> np.ndarray:
+    """Stack feature vectors for a batch of moments"""
+    if not moments:
+        return np.zeros((0, len(FEATURE_NAMES)), dtype=np.float64)
+    return np.asarray([extract_moment_features(m) for m in moments], dtype=np.float64)
+
+
+def load_telemetry(telemetry_path: Path):
+    """Load exported moment telemetry into (features, engagement rate, impressions)
+
+    Accepts a JSON list or JSON-lines file. Each record carries the moment
+    fields from `MomentAnalyzer.generate_moment_report` plus observed
+    `impressions` and `engagements` counts (or a precomputed
+    `engagement_rate`).
+    """
+    telemetry_path = Path(telemetry_path)
+    with open(telemetry_path, 'r', encoding='utf-8') as f:
+        if telemetry_path.suffix == '.jsonl':
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = json.load(f)
+
+    rows, rates, weights = [], [], []
+    for record in records:
+        impressions = float(record.get('impressions', 1) or 0)
+        if 'engagement_rate' in record:
+            rate = float(record['engagement_rate'])
+        elif impressions > 0:
+            rate = float(record.get('engagements', 0)) / impressions
+        else:
+            continue
+        rows.append(extract_moment_features(record))
+        rates.append(min(max(rate, 0.0), 1.0))
+        weights.append(max(impressions, 1.0))
+
+    return (
+        np.asarray(rows, dtype=np.float64).reshape(-1, len(FEATURE_NAMES)),
+        np.asarray(rates, dtype=np.float64),
+        np.asarray(weights, dtype=np.float64)
+    )
+
+
+class EngagementModel:
+    """Logistic regression over moment features, fitted with Newton steps"""
+
+    def __init__(self, weights: Optional[np.ndarray] = None, bias: float = 0.0,
+                 feature_mean: Optional[np.ndarray] = None, feature_scale: Optional[np.ndarray] = None):
+        n_features = len(FEATURE_NAMES)
+        self.weights = np.zeros(n_features) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.feature_mean = np.zeros(n_features) if feature_mean is None else np.asarray(feature_mean, dtype=np.float64)
+        self.feature_scale = np.ones(n_features) if feature_scale is None else np.asarray(feature_scale, dtype=np.float64)
+
+    def fit(self, features: np.ndarray, rates: np.ndarray, sample_weight: Optional[np.ndarray] = None,
+            l2: float = 1e-2, max_iter: int = 50, tol: float = 1e-8) -> 'EngagementModel':
+        """Fit on engagement rates in [0, 1] (soft labels), weighted by impressions"""
+        features = np.asarray(features, dtype=np.float64)
+        rates = np.asarray(rates, dtype=np.float64)
+        if features.shape[0] == 0:
+            raise ValueError("No telemetry rows to train on")
+        if sample_weight is None:
+            sample_weight = np.ones(features.shape[0])
+        sample_weight = sample_weight / sample_weight.mean()
+
+        self.feature_mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        self.feature_scale = np.where(scale > 1e-12, scale, 1.0)
+
+        # Intercept lives in column 0 so it is left unregularized
+        design = np.hstack([np.ones((features.shape[0], 1)), self._standardize(features)])
+        theta = np.zeros(design.shape[1])
+        penalty = np.full(design.shape[1], l2)
+        penalty[0] = 0.0
+
+        for _ in range(max_iter):
+            probs = _sigmoid(design @ theta)
+            gradient = design.T @ (sample_weight * (probs - rates)) + penalty * theta
+            curvature = sample_weight * probs * (1.0 - probs)
+            hessian = (design * curvature[:, None]).T @ design + np.diag(penalty + 1e-9)
+            step = np.linalg.solve(hessian, gradient)
+            theta -= step
+            if np.max(np.abs(step)) < tol:
+                break
+
+        self.bias = float(theta[0])
+        self.weights = theta[1:]
+        return self
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Predicted engagement probability for a batch of feature rows"""
+        features = np.asarray(features, dtype=np.float64)
+        return _sigmoid(self._standardize(features) @ self.weights + self.bias)
+
+    def predict_moments(self, moments: Sequence) -> np.ndarray:
+        """Predicted engagement probability for a batch of moments"""
+        return self.predict(build_feature_matrix(moments))
+
+    def _standardize(self, features: np.ndarray) -> np.ndarray:
+        return (features - self.feature_mean) / self.feature_scale
+
+    def save(self, model_path: Path = DEFAULT_MODEL_PATH):
+        """Save model parameters as JSON"""
+        model_path = Path(model_path)
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(model_path, 'w') as f:
+            json.dump({
+                "model_type": "logistic_regression",
+                "feature_names": FEATURE_NAMES,
+                "weights": self.weights.tolist(),
+                "bias": self.bias,
+                "feature_mean": self.feature_mean.tolist(),
+                "feature_scale": self.feature_scale.tolist()
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, model_path: Path = DEFAULT_MODEL_PATH) -> Optional['EngagementModel']:
+        """Load a saved model, or None when no usable model file exists"""
+        model_path = Path(model_path)
+        if not model_path.exists():
+            return None
+        try:
+            with open(model_path, 'r') as f:
+                data = json.load(f)
+            if data.get('feature_names') != FEATURE_NAMES:
+                print(f"Engagement model {model_path} was trained on different features, ignoring it")
+                return None
+            model = cls(
+                weights=np.array(data['weights'], dtype=np.float64),
+                bias=float(data['bias']),
+                feature_mean=np.array(data['feature_mean'], dtype=np.float64),
+                feature_scale=np.array(data['feature_scale'], dtype=np.float64)
+            )
+            for name in ('weights', 'feature_mean', 'feature_scale'):
+                if getattr(model, name).shape != (len(FEATURE_NAMES),):
+                    raise ValueError(f"{name} has shape {getattr(model, name).shape}")
+            return model
+        except (json.JSONDecodeError, KeyError, ValueError, TypeError, AttributeError) as e:
+            # A corrupt or partial file must not break analysis: fall back to the static weights
+            print(f"⚠️ Engagement model {model_path} is unreadable ({e}), using static pattern weights")
+            return None
+
+    def feature_importance(self) -> Dict[str, float]:
+        """Standardized coefficients keyed by feature name"""
+        return {name: float(weight) for name, weight in zip(FEATURE_NAMES, self.weights)}
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35.0, 35.0)))
@@ -6,10 +6,14 @@ that would work well as short interactive ads
 """
 import json
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass
 
+from game_analyzer.map_analyzer import MapAnalyzer
+from game_analyzer.scene_parser import SceneInfo, parse_repository_scenes
+from .engagement_model import EngagementModel, DEFAULT_MODEL_PATH
+
 
 @dataclass
 class EngagingMoment:
@@ -27,7 +31,9 @@ class EngagingMoment:
 class MomentAnalyzer:
     """Analyzes game code and assets to find engaging moments"""
     
-    def __init__(self):
+    def __init__(self, model_path: Optional[Path] = DEFAULT_MODEL_PATH):
+        # Learned ranking model; falls back to the static weights below when absent
+        self.engagement_model = EngagementModel.load(model_path) if model_path else None
         self.engagement_patterns = {
             # Combat patterns
             'combat': {
@@ -71,12 +77,16 @@ class MomentAnalyzer:
         # Analyze assets for visual engagement
         asset_moments = self._analyze_asset_potential(analysis_data)
         
+        # Parse engine scene files for playable levels
+        scenes = parse_repository_scenes(repo_path)
+        scene_moments = self._generate_scene_moments(scenes)
+        
         # Generate specific moments for this game type
         if analysis_data.get('repository', {}).get('genre') == 'Strategy':
-            moments.extend(self._generate_strategy_moments(repo_path, analysis_data))
+            moments.extend(self._generate_strategy_moments(repo_path, analysis_data, scenes))
         
         # Combine and score all moments
-        all_moments = code_moments + asset_moments + moments
+        all_moments = code_moments + asset_moments + scene_moments + moments
         return self._score_and_filter_moments(all_moments, analysis_data)
         
     def _analyze_code_patterns(self, repo_path: Path) -> List[EngagingMoment]:
@@ -151,14 +161,56 @@ class MomentAnalyzer:
             
         return moments
         
-    def _generate_strategy_moments(self, repo_path: Path, analysis_data: Dict) -> List[EngagingMoment]:
+    def _generate_scene_moments(self, scenes: List[SceneInfo], max_levels: int = 3) -> List[EngagingMoment]:
+        """Turn parsed level scenes into moment candidates"""
+        moments = []
+        levels = sorted((s for s in scenes if s.is_level), key=lambda s: s.node_count, reverse=True)
+        
+        for scene in levels[:max_levels]:
+            # Mechanics come from the scripts actually attached in the scene
+            script_text = ' '.join(scene.scripts).lower()
+            mechanics = [
+                pattern_name for pattern_name, pattern_data in self.engagement_patterns.items()
+                if any(keyword in script_text for keyword in pattern_data['patterns'])
+            ]
+            weights = [self.engagement_patterns[m]['weight'] for m in mechanics]
+            
+            moments.append(EngagingMoment(
+                name=f"Level: {Path(scene.path).stem.replace('_', ' ').title()}",
+                description=f"{scene.engine} scene {scene.path} with {scene.node_count} nodes "
+                            f"and {len(scene.scripts)} scripts",
+                engagement_score=min(0.5 + 0.05 * len(scene.scripts), 0.9),
+                mini_game_potential=max(weights) if weights else 0.5,
+                required_assets=sorted(scene.resources),
+                gameplay_mechanics=mechanics or ['exploration'],
+                estimated_play_time=min(max(scene.node_count // 20, 3), 10),
+                tutorial_complexity="simple" if scene.node_count < 50 else "medium" if scene.node_count < 200 else "complex"
+            ))
+            
+        return moments
+        
+    def _generate_strategy_moments(self, repo_path: Path, analysis_data: Dict,
+                                   scenes: List[SceneInfo] = None) -> List[EngagingMoment]:
         """Generate strategy game specific moments"""
         moments = []
+        scenes = scenes or []
+        
+        # Analyze specific strategy patterns from the scenes' nodes, scripts and resources
+        scene_refs = [ref.lower() for scene in scenes for ref in scene.scripts | scene.resources]
+        node_names = [node.name.lower() for scene in scenes for node in scene.nodes]
+        unit_assets = sorted({ref for scene in scenes for ref in scene.resources if 'unit' in ref.lower()})
+        building_assets = sorted({ref for scene in scenes for ref in scene.resources if 'building' in ref.lower()})
+        terrain_assets = sorted({ref for scene in scenes for ref in scene.resources
+                                 if 'terrain' in ref.lower() or 'tileset' in ref.lower()})
         
-        # Analyze specific strategy patterns
-        has_units = any('unit' in asset['path'] for asset in analysis_data.get('character_assets', []))
-        has_buildings = 'buildings' in str(repo_path)
-        has_ai = (repo_path / 'scripts' / 'ai').exists()
+        has_units = bool(unit_assets) or any('unit' in name for name in node_names)
+        has_buildings = bool(building_assets) or any('building' in name for name in node_names)
+        has_ai = any('/ai/' in ref or ref.endswith('ai.gd') for ref in scene_refs)
+        if not scenes:
+            # No scenes parsed; fall back to repository layout heuristics
+            has_units = any('unit' in asset['path'] for asset in analysis_data.get('character_assets', []))
+            has_buildings = 'buildings' in str(repo_path)
+            has_ai = (repo_path / 'scripts' / 'ai').exists()
         
         if has_units and has_ai:
             moments.append(EngagingMoment(
@@ -166,7 +218,7 @@ class MomentAnalyzer:
                 description="Fast-paced tactical battle with limited units",
                 engagement_score=0.9,
                 mini_game_potential=0.95,
-                required_assets=['units_spritesheet.png', 'terrain assets'],
+                required_assets=(unit_assets + terrain_assets) or ['units_spritesheet.png', 'terrain assets'],
                 gameplay_mechanics=['combat', 'movement', 'tactics'],
                 estimated_play_time=8,
                 tutorial_complexity="medium"
@@ -178,7 +230,7 @@ class MomentAnalyzer:
                 description="Capture and hold strategic points",
                 engagement_score=0.85,
                 mini_game_potential=0.9,
-                required_assets=['building sprites', 'unit sprites'],
+                required_assets=(building_assets + unit_assets) or ['building sprites', 'unit sprites'],
                 gameplay_mechanics=['capture', 'defense', 'resource'],
                 estimated_play_time=6,
                 tutorial_complexity="simple"
@@ -199,6 +251,25 @@ class MomentAnalyzer:
                 tutorial_complexity="complex"
             ))
             
+        # Best tile map for a quick skirmish, cropped to the mini-game board
+        map_analyzer = MapAnalyzer(repo_path)
+        ranked_maps = map_analyzer.analyze_maps()
+        if ranked_maps:
+            grid, features = ranked_maps[0]
+            board_size = 8 if min(grid.shape) >= 8 and features.unit_count > 6 else 6
+            board = map_analyzer.crop_board(grid, board_size)
+            moments.append(EngagingMoment(
+                name=f"Quick Skirmish: {features.name.replace('_', ' ').title()}",
+                description=f"{board_size}x{board_size} battle cropped from {features.path} at {board.offset} "
+                            f"({len(board.units)} units, {features.chokepoints} chokepoints on the full map)",
+                engagement_score=round(0.7 + 0.2 * features.skirmish_score, 3),
+                mini_game_potential=0.9,
+                required_assets=[features.path, 'maps/blueprint_terrain_tileset.xml', 'maps/blueprint_units_tileset.xml'],
+                gameplay_mechanics=['combat', 'movement', 'tactics'],
+                estimated_play_time=6 if board_size == 6 else 8,
+                tutorial_complexity="medium"
+            ))
+            
         return moments
         
     def _score_and_filter_moments(self, moments: List[EngagingMoment], analysis_data: Dict) -> List[EngagingMoment]:
@@ -207,15 +278,23 @@ class MomentAnalyzer:
         valid_moments = [m for m in moments if 3 <= m.estimated_play_time <= 10]
         
         # Sort by engagement potential
-        valid_moments.sort(key=lambda x: x.engagement_score * x.mini_game_potential, reverse=True)
+        if self.engagement_model is not None and valid_moments:
+            predicted = self.engagement_model.predict_moments(valid_moments)
+            order = sorted(range(len(valid_moments)), key=lambda i: predicted[i], reverse=True)
+            valid_moments = [valid_moments[i] for i in order]
+        else:
+            valid_moments.sort(key=lambda x: x.engagement_score * x.mini_game_potential, reverse=True)
         
         # Return top candidates
         return valid_moments[:5]
         
     def generate_moment_report(self, moments: List[EngagingMoment], game_name: str) -> Dict:
         """Generate detailed report of engaging moments"""
+        predicted = (self.engagement_model.predict_moments(moments).tolist()
+                     if self.engagement_model is not None else [None] * len(moments))
         return {
             "game": game_name,
+            "ranking_model": "learned" if self.engagement_model is not None else "static",
             "total_moments_found": len(moments),
             "top_moments": [
                 {
@@ -227,9 +306,10 @@ class MomentAnalyzer:
                     "tutorial_complexity": moment.tutorial_complexity,
                     "required_assets": moment.required_assets,
                     "gameplay_mechanics": moment.gameplay_mechanics,
-                    "feasibility_score": moment.engagement_score * moment.mini_game_potential
+                    "feasibility_score": moment.engagement_score * moment.mini_game_potential,
+                    "predicted_engagement": predicted_score
                 }
-                for moment in moments
+                for moment, predicted_score in zip(moments, predicted)
             ],
             "recommendations": self._generate_recommendations(moments)
         }
@@ -0,0 +1,350 @@
+"""
+Map Analyzer
+
+Loads Tanks of Freedom-style tile maps into NumPy grids and computes
+tactical features (unit density, chokepoints, open area) to rank maps
+for the Quick Skirmish mini-game and crop a playable board from them.
+
+Supported map sources:
+- Campaign/editor map data: GDScript or JSON dictionaries with
+  x/y/terrain/unit keys (maps/campaign/*.gd, *.json)
+- Godot TileMap scenes (.xml, .tscn) with tile_data arrays per layer
+
+Tile ids are resolved to names through the Godot TileSet XMLs under
+maps/ so obstacles, buildings and units can be told apart.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+OBSTACLE_KEYWORDS = ['mountain', 'river', 'water', 'rock', 'tree', 'forest', 'wall', 'lake', 'sea', 'cliff']
+BUILDING_KEYWORDS = ['building', 'hq', 'barrack', 'factory', 'airfield', 'tower', 'city', 'gsm', 'bunker']
+UNIT_KEYWORDS = ['unit', 'tank', 'soldier', 'infantry', 'heli', 'jeep', 'artillery']
+
+# Layer names as used by Tanks of Freedom map scenes
+UNIT_LAYERS = {'units', 'unit'}
+TERRAIN_LAYERS = {'terrain', 'underground', 'buildings', 'building', 'decoration', 'decorations'}
+
+# Grid cell values
+EMPTY, OBSTACLE, BUILDING = 0, 1, 2
+NO_UNIT, BLUE_UNIT, RED_UNIT, NEUTRAL_UNIT = 0, 1, 2, 3
+
+_TILESET_NAME = re.compile(r'name="(\d+)/name"\s*>\s*"([^"]*)"')
+_TSCN_TILESET_NAME = re.compile(r'^(\d+)/name\s*=\s*"([^"]*)"', re.MULTILINE)
+_FLAT_DICT = re.compile(r'\{[^{}]*\}')
+_DICT_INT_ITEM = re.compile(r'["\']?(\w+)["\']?\s*:\s*(-?\d+)')
+_XML_TILE_DATA = re.compile(r'<node\s+name="([^"]+)"[^>]*>(.*?)</node>', re.DOTALL)
+_XML_INT_ARRAY = re.compile(r'<int_array\s+name="tile_data"[^>]*>([^<]*)</int_array>')
+_TSCN_NODE = re.compile(r'^\[node\s+name="([^"]+)"', re.MULTILINE)
+_TSCN_TILE_DATA = re.compile(r'tile_data\s*=\s*\w*Array\(([^)]*)\)')
+
+
+@dataclass
+class TileMapGrid:
+    """A map rasterized into NumPy layers"""
+    name: str
+    path: str
+    terrain: np.ndarray  # EMPTY / OBSTACLE / BUILDING per cell
+    units: np.ndarray  # NO_UNIT / BLUE_UNIT / RED_UNIT / NEUTRAL_UNIT per cell
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.terrain.shape
+
+    @property
+    def passable(self) -> np.ndarray:
+        return self.terrain != OBSTACLE
+
+
+@dataclass
+class MapFeatures:
+    """Tactical features of one map"""
+    name: str
+    path: str
+    width: int
+    height: int
+    unit_count: int
+    unit_density: float
+    chokepoints: int
+    open_area_ratio: float
+    obstacle_ratio: float
+    mean_clearance: float
+    skirmish_score: float = 0.0
+
+
+@dataclass
+class CroppedBoard:
+    """A square board cut from a map for the mini-game"""
+    map_name: str
+    offset: Tuple[int, int]  # (x, y) of the top-left cell in the source map
+    size: int
+    terrain: List[List[int]] = field(default_factory=list)  # 0 = empty, 1 = obstacle (GameBoard convention)
+    units: List[Dict] = field(default_factory=list)  # {"x", "y", "team"}
+
+
+def classify_tile_name(name: str) -> str:
+    """Classify a tileset entry as obstacle, building, unit or ground"""
+    name = name.lower()
+    if any(keyword in name for keyword in UNIT_KEYWORDS):
+        return 'unit'
+    if any(keyword in name for keyword in BUILDING_KEYWORDS):
+        return 'building'
+    if any(keyword in name for keyword in OBSTACLE_KEYWORDS):
+        return 'obstacle'
+    return 'ground'
+
+
+def unit_team(name: str) -> int:
+    name = name.lower()
+    if 'blue' in name:
+        return BLUE_UNIT
+    if 'red' in name:
+        return RED_UNIT
+    return NEUTRAL_UNIT
+
+
+def load_tileset_names(tileset_path: Path) -> Dict[int, str]:
+    """Read tile id -> tile name from a Godot TileSet (.xml or .tres)"""
+    try:
+        text = tileset_path.read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return {}
+    pattern = _TILESET_NAME if tileset_path.suffix == '.xml' else _TSCN_TILESET_NAME
+    return {int(tile_id): name for tile_id, name in pattern.findall(text)}
+
+
+class MapAnalyzer:
+    """Parses, scores and crops tile maps"""
+
+    def __init__(self, repo_path: Path, choke_width: int = 2):
+        self.repo_path = repo_path
+        self.choke_width = choke_width
+        maps_dir = repo_path / 'maps'
+        self.terrain_names = load_tileset_names(maps_dir / 'blueprint_terrain_tileset.xml')
+        self.unit_names = load_tileset_names(maps_dir / 'blueprint_units_tileset.xml')
+
+    def find_map_files(self) -> List[Path]:
+        """Campaign data and map scenes under maps/ (tilesets excluded)"""
+        maps_dir = self.repo_path / 'maps'
+        if not maps_dir.exists():
+            return []
+        map_files = []
+        for file_path in sorted(maps_dir.rglob('*')):
+            if file_path.suffix not in ('.gd', '.json', '.xml', '.tscn') or not file_path.is_file():
+                continue
+            if 'tileset' in file_path.name or file_path.name == 'fog_of_war.xml':
+                continue
+            map_files.append(file_path)
+        return map_files
+
+    def load_map(self, map_path: Path) -> Optional[TileMapGrid]:
+        """Rasterize one map file; None if it holds no tile data"""
+        text = map_path.read_text(encoding='utf-8', errors='replace')
+        if map_path.suffix in ('.gd', '.json'):
+            cells = self._cells_from_dicts(text)
+        else:
+            cells = self._cells_from_tilemap(text, map_path.suffix)
+        if not cells:
+            return None
+
+        xs = np.array([c[0] for c in cells])
+        ys = np.array([c[1] for c in cells])
+        min_x, min_y = xs.min(), ys.min()
+        width, height = xs.max() - min_x + 1, ys.max() - min_y + 1
+        terrain = np.zeros((height, width), dtype=np.int8)
+        units = np.zeros((height, width), dtype=np.int8)
+        for x, y, terrain_value, unit_value in cells:
+            if terrain_value:
+                terrain[y - min_y, x - min_x] = max(terrain[y - min_y, x - min_x], terrain_value)
+            if unit_value:
+                units[y - min_y, x - min_x] = unit_value
+
+        return TileMapGrid(
+            name=map_path.stem,
+            path=str(map_path.relative_to(self.repo_path)),
+            terrain=terrain,
+            units=units
+        )
+
+    def _terrain_value(self, tile_id: int) -> int:
+        kind = classify_tile_name(self.terrain_names.get(tile_id, ''))
+        return OBSTACLE if kind == 'obstacle' else BUILDING if kind == 'building' else EMPTY
+
+    def _cells_from_dicts(self, text: str) -> List[Tuple[int, int, int, int]]:
+        """Map editor format: one {x, y, terrain, building, unit} dict per cell"""
+        cells = []
+        for match in _FLAT_DICT.finditer(text):
+            items = {key: int(value) for key, value in _DICT_INT_ITEM.findall(match.group(0))}
+            if 'x' not in items or 'y' not in items:
+                continue
+            terrain_value = self._terrain_value(items['terrain']) if items.get('terrain', -1) >= 0 else EMPTY
+            if items.get('building', -1) >= 0:
+                terrain_value = BUILDING
+            unit_value = NO_UNIT
+            if items.get('unit', -1) >= 0:
+                unit_value = unit_team(self.unit_names.get(items['unit'], ''))
+            cells.append((items['x'], items['y'], terrain_value, unit_value))
+        return cells
+
+    def _cells_from_tilemap(self, text: str, suffix: str) -> List[Tuple[int, int, int, int]]:
+        """Godot TileMap layers: tile_data packs (y << 16 | x) with a tile id"""
+        layers = []
+        if suffix == '.xml':
+            for node_name, body in _XML_TILE_DATA.findall(text):
+                array = _XML_INT_ARRAY.search(body)
+                if array:
+                    layers.append((node_name, array.group(1), 2))
+        else:
+            nodes = [(m.start(), m.group(1)) for m in _TSCN_NODE.finditer(text)]
+            for match in _TSCN_TILE_DATA.finditer(text):
+                owner = [name for start, name in nodes if start < match.start()]
+                node_name = owner[-1] if owner else 'terrain'
+                # Godot 3 stores (position, tile id, flags) triples
+                layers.append((node_name, match.group(1), 3))
+
+        cells = []
+        for node_name, raw, stride in layers:
+            values = np.array([int(v) for v in raw.replace(',', ' ').split()], dtype=np.int64)
+            if values.size < stride:
+                continue
+            values = values[:values.size - values.size % stride].reshape(-1, stride)
+            packed, tile_ids = values[:, 0], values[:, 1]
+            xs = (packed & 0xFFFF).astype(np.int16).astype(int)  # sign-extend 16-bit coordinates
+            ys = (packed >> 16).astype(int)
+            is_unit_layer = node_name.lower() in UNIT_LAYERS
+            for x, y, tile_id in zip(xs, ys, tile_ids & 0x1FFFFFFF):
+                if is_unit_layer:
+                    cells.append((x, y, EMPTY, unit_team(self.unit_names.get(int(tile_id), ''))))
+                else:
+                    cells.append((x, y, self._terrain_value(int(tile_id)), NO_UNIT))
+        return cells
+
+    def compute_features(self, grid: TileMapGrid) -> MapFeatures:
+        """Tactical features from a rasterized map"""
+        passable = grid.passable
+        passable_count = max(int(passable.sum()), 1)
+        clearance = distance_to_obstacles(~passable)
+        chokes = chokepoint_mask(clearance, passable, self.choke_width)
+        unit_count = int((grid.units != NO_UNIT).sum())
+        finite = clearance[passable & np.isfinite(clearance)]
+
+        height, width = grid.shape
+        return MapFeatures(
+            name=grid.name,
+            path=grid.path,
+            width=int(width),
+            height=int(height),
+            unit_count=unit_count,
+            unit_density=unit_count / passable_count,
+            chokepoints=int(chokes.sum()),
+            open_area_ratio=float((passable & (clearance > self.choke_width)).sum()) / passable_count,
+            obstacle_ratio=float((~passable).sum()) / passable.size,
+            mean_clearance=float(finite.mean()) if finite.size else float(max(width, height))
+        )
+
+    def analyze_maps(self) -> List[Tuple[TileMapGrid, MapFeatures]]:
+        """Load, featurize and rank every map by Quick Skirmish suitability"""
+        results = []
+        for map_path in self.find_map_files():
+            try:
+                grid = self.load_map(map_path)
+            except (OSError, ValueError) as e:
+                print(f"Error loading map {map_path}: {e}")
+                continue
+            if grid is None:
+                continue
+            features = self.compute_features(grid)
+            features.skirmish_score = skirmish_suitability(features)
+            results.append((grid, features))
+        results.sort(key=lambda r: r[1].skirmish_score, reverse=True)
+        return results
+
+    def crop_board(self, grid: TileMapGrid, size: int = 6) -> CroppedBoard:
+        """Cut the size x size window best suited for a quick skirmish
+
+        Windows are scored with integral images: both teams present, a few
+        chokepoints for tactics and little blocked ground.
+        """
+        height, width = grid.shape
+        size_y, size_x = min(size, height), min(size, width)
+        passable = grid.passable
+        chokes = chokepoint_mask(distance_to_obstacles(~passable), passable, self.choke_width)
+
+        blue = _window_sums(grid.units == BLUE_UNIT, size_y, size_x)
+        red = _window_sums(grid.units == RED_UNIT, size_y, size_x)
+        neutral = _window_sums(grid.units == NEUTRAL_UNIT, size_y, size_x)
+        obstacles = _window_sums(~passable, size_y, size_x)
+        choke_count = _window_sums(chokes, size_y, size_x)
+
+        score = (2.0 * np.minimum(blue, red) + 0.5 * (blue + red + neutral)
+                 + 0.5 * np.minimum(choke_count, 3) - 0.3 * obstacles)
+        y, x = np.unravel_index(int(np.argmax(score)), score.shape)
+
+        window = (slice(y, y + size_y), slice(x, x + size_x))
+        terrain = (grid.terrain[window] == OBSTACLE).astype(int)
+        unit_ys, unit_xs = np.nonzero(grid.units[window])
+        teams = {BLUE_UNIT: 'blue', RED_UNIT: 'red', NEUTRAL_UNIT: 'neutral'}
+        return CroppedBoard(
+            map_name=grid.name,
+            offset=(int(x), int(y)),
+            size=size,
+            terrain=terrain.tolist(),
+            units=[{"x": int(ux), "y": int(uy), "team": teams[int(grid.units[window][uy, ux])]}
+                   for uy, ux in zip(unit_ys, unit_xs)]
+        )
+
+
+def distance_to_obstacles(blocked: np.ndarray) -> np.ndarray:
+    """Manhattan distance transform: steps from each cell to the nearest obstacle
+
+    Relaxes all cells at once per iteration, so the loop runs at most
+    (height + width) vectorized passes. Maps without obstacles are inf.
+    """
+    dist = np.where(blocked, 0.0, np.inf)
+    for _ in range(sum(blocked.shape)):
+        relaxed = dist.copy()
+        np.minimum(relaxed[1:, :], dist[:-1, :] + 1, out=relaxed[1:, :])
+        np.minimum(relaxed[:-1, :], dist[1:, :] + 1, out=relaxed[:-1, :])
+        np.minimum(relaxed[:, 1:], dist[:, :-1] + 1, out=relaxed[:, 1:])
+        np.minimum(relaxed[:, :-1], dist[:, 1:] + 1, out=relaxed[:, :-1])
+        if np.array_equal(relaxed, dist):
+            break
+        dist = relaxed
+    return dist
+
+
+def chokepoint_mask(clearance: np.ndarray, passable: np.ndarray, choke_width: int = 2) -> np.ndarray:
+    """Narrow corridor cells: clearance ridges no wider than choke_width
+
+    A cell is on a ridge when its clearance is not lower than both
+    neighbours along one axis, i.e. it sits mid-way between obstacles.
+    """
+    padded = np.pad(clearance, 1, constant_values=-np.inf)
+    center = padded[1:-1, 1:-1]
+    ridge_x = (center >= padded[1:-1, :-2]) & (center >= padded[1:-1, 2:])
+    ridge_y = (center >= padded[:-2, 1:-1]) & (center >= padded[2:, 1:-1])
+    # Require an obstacle-side drop on the ridge axis so open plains don't count
+    drop_x = (padded[1:-1, :-2] < center) | (padded[1:-1, 2:] < center)
+    drop_y = (padded[:-2, 1:-1] < center) | (padded[2:, 1:-1] < center)
+    return passable & (clearance <= choke_width) & ((ridge_x & drop_x) | (ridge_y & drop_y))
+
+
+def skirmish_suitability(features: MapFeatures) -> float:
+    """Score in [0, 1]: small, fairly open maps with a handful of units and chokepoints"""
+    area = features.width * features.height
+    size_score = 1.0 / (1.0 + max(area - 64, 0) / 256.0)
+    density_score = float(np.exp(-((features.unit_density - 0.1) / 0.08) ** 2))
+    choke_score = min(features.chokepoints / 4.0, 1.0) * (1.0 if features.chokepoints <= area * 0.15 else 0.5)
+    open_score = 1.0 - abs(features.open_area_ratio - 0.6)
+    return round(0.25 * size_score + 0.3 * density_score + 0.2 * choke_score + 0.25 * open_score, 4)
+
+
+def _window_sums(mask: np.ndarray, size_y: int, size_x: int) -> np.ndarray:
+    """Sum of mask over every size_y x size_x window via an integral image"""
+    integral = np.pad(mask.astype(np.int32).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    return (integral[size_y:, size_x:] - integral[:-size_y, size_x:]
+            - integral[size_y:, :-size_x] + integral[:-size_y, :-size_x])
@@ -0,0 +1,289 @@
+"""
+Scene Parser
+
+Streaming parsers for engine scene files, used to find playable levels:
+- Godot text scenes (.tscn/.escn) and binary scenes (.scn)
+- Unity YAML scenes and prefabs (.unity/.prefab)
+
+Files are read line by line (or in fixed-size chunks for binary data) and
+only compact per-node records are kept, so multi-MB scenes are parsed in
+bounded memory.
+"""
+import re
+from typing import Dict, Iterator, List, Optional, Set
+from pathlib import Path
+from dataclasses import dataclass, field
+
+
+GODOT_SCENE_EXTENSIONS = {'.tscn', '.escn', '.scn'}
+UNITY_SCENE_EXTENSIONS = {'.unity', '.prefab'}
+
+# Scene paths that usually hold a playable level rather than a UI widget or prop
+LEVEL_KEYWORDS = ['level', 'map', 'stage', 'mission', 'campaign', 'arena', 'track', 'world', 'skirmish']
+LEVEL_MIN_NODES = 25
+
+_GODOT_SECTION = re.compile(r'^\[(\w+)(.*)\]\s*$')
+_GODOT_ATTR = re.compile(r'(\w+)\s*=\s*("(?:[^"\\]|\\.)*"|[^\s\]]+)')
+_GODOT_EXT_REF = re.compile(r'ExtResource\(\s*"?([\w\-]+)"?\s*\)')
+_GODOT_RES_PATH = re.compile(rb'res://[\w\-./ ]+?\.\w{1,6}')
+
+_UNITY_DOC = re.compile(r'^--- !u!(\d+) &(-?\d+)')
+_UNITY_FILE_ID = re.compile(r'fileID:\s*(-?\d+)')
+_UNITY_GUID = re.compile(r'guid:\s*([0-9a-f]{32})')
+
+# Unity class IDs we care about (https://docs.unity3d.com/Manual/ClassIDReference.html)
+UNITY_GAME_OBJECT = 1
+UNITY_TRANSFORM = 4
+UNITY_RECT_TRANSFORM = 224
+UNITY_MONO_BEHAVIOUR = 114
+UNITY_PREFAB_INSTANCE = 1001
+
+
+@dataclass
+class SceneNode:
+    """A node (Godot) or GameObject (Unity) in a scene tree"""
+    name: str
+    type: str
+    parent: Optional[str] = None
+    scripts: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SceneInfo:
+    """Compact summary of a parsed scene file"""
+    path: str
+    engine: str  # Godot, Unity
+    nodes: List[SceneNode] = field(default_factory=list)
+    scripts: Set[str] = field(default_factory=set)
+    resources: Set[str] = field(default_factory=set)
+    node_count: int = 0
+    truncated: bool = False  # node list capped at max_nodes
+
+    @property
+    def is_level(self) -> bool:
+        """Heuristic: scene is a playable level rather than a component"""
+        path_lower = self.path.lower()
+        return any(keyword in path_lower for keyword in LEVEL_KEYWORDS) or self.node_count >= LEVEL_MIN_NODES
+
+    def node_types(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for node in self.nodes:
+            counts[node.type] = counts.get(node.type, 0) + 1
+        return counts
+
+
+class GodotSceneParser:
+    """Line-streaming parser for Godot scenes"""
+
+    def __init__(self, max_nodes: int = 5000):
+        self.max_nodes = max_nodes
+
+    def parse(self, scene_path: Path, repo_root: Optional[Path] = None) -> SceneInfo:
+        relative = str(scene_path.relative_to(repo_root)) if repo_root else str(scene_path)
+        info = SceneInfo(path=relative, engine="Godot")
+
+        if scene_path.suffix.lower() == '.scn':
+            self._scan_binary(scene_path, info)
+            return info
+
+        ext_resources: Dict[str, tuple] = {}  # id -> (path, type)
+        current_node: Optional[SceneNode] = None
+
+        with open(scene_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                section = _GODOT_SECTION.match(line)
+                if section:
+                    kind, attrs = section.group(1), dict(_GODOT_ATTR.findall(section.group(2)))
+                    attrs = {key: value.strip('"') for key, value in attrs.items()}
+                    current_node = None
+
+                    if kind == 'ext_resource':
+                        res_path, res_type = attrs.get('path', ''), attrs.get('type', '')
+                        ext_resources[attrs.get('id', '')] = (res_path, res_type)
+                        if res_type in ('Script', 'GDScript', 'CSharpScript'):
+                            info.scripts.add(res_path)
+                        else:
+                            info.resources.add(res_path)
+                    elif kind == 'node':
+                        info.node_count += 1
+                        node_type = attrs.get('type', '')
+                        instance = _GODOT_EXT_REF.search(section.group(2))
+                        if not node_type and instance:
+                            node_type = 'Instance:' + ext_resources.get(instance.group(1), ('', ''))[0]
+                        node = SceneNode(name=attrs.get('name', ''), type=node_type or 'Node',
+                                         parent=attrs.get('parent'))
+                        if len(info.nodes) < self.max_nodes:
+                            info.nodes.append(node)
+                            current_node = node
+                        else:
+                            info.truncated = True
+                    continue
+
+                # Property lines: only script assignments matter for the tree
+                if current_node is not None and line.startswith('script'):
+                    ref = _GODOT_EXT_REF.search(line)
+                    if ref and ref.group(1) in ext_resources:
+                        current_node.scripts.append(ext_resources[ref.group(1)][0])
+
+        return info
+
+    def _scan_binary(self, scene_path: Path, info: SceneInfo, chunk_size: int = 1 << 16):
+        """Binary scenes have no readable tree; collect res:// references chunk by chunk"""
+        tail = b''
+        with open(scene_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                data = tail + chunk
+                for match in _GODOT_RES_PATH.finditer(data):
+                    res_path = match.group(0).decode('utf-8', errors='replace')
+                    if res_path.endswith(('.gd', '.cs', '.gdns')):
+                        info.scripts.add(res_path)
+                    else:
+                        info.resources.add(res_path)
+                # Keep an overlap so paths spanning chunk boundaries are not lost
+                tail = data[-256:]
+
+
+class UnityYAMLParser:
+    """Document-streaming parser for Unity text-serialized scenes and prefabs"""
+
+    def __init__(self, guid_index: Optional[Dict[str, str]] = None, max_nodes: int = 5000):
+        self.guid_index = guid_index or {}
+        self.max_nodes = max_nodes
+
+    def parse(self, scene_path: Path, repo_root: Optional[Path] = None) -> SceneInfo:
+        relative = str(scene_path.relative_to(repo_root)) if repo_root else str(scene_path)
+        info = SceneInfo(path=relative, engine="Unity")
+
+        # Compact per-document records: only ids and names survive the stream
+        game_objects: Dict[str, List] = {}  # fileID -> [name, component types]
+        transform_owner: Dict[str, str] = {}  # transform fileID -> GameObject fileID
+        transform_parent: Dict[str, str] = {}  # transform fileID -> parent transform fileID
+        object_scripts: Dict[str, List[str]] = {}  # GameObject fileID -> script paths
+
+        with open(scene_path, 'r', encoding='utf-8', errors='replace') as f:
+            first_line = f.readline()
+            if not first_line.startswith('%YAML'):
+                return info  # Binary serialization; nothing to stream
+
+            doc_class, doc_id, doc_type = None, None, None
+            owner, father, script_guid = None, None, None
+
+            def flush():
+                if doc_class is None:
+                    return
+                if doc_class in (UNITY_TRANSFORM, UNITY_RECT_TRANSFORM) and owner:
+                    transform_owner[doc_id] = owner
+                    if father and father != '0':
+                        transform_parent[doc_id] = father
+                elif doc_class == UNITY_MONO_BEHAVIOUR and owner and script_guid:
+                    script = self.guid_index.get(script_guid, f'guid:{script_guid}')
+                    object_scripts.setdefault(owner, []).append(script)
+                    info.scripts.add(script)
+                elif owner and owner in game_objects and doc_type:
+                    game_objects[owner][1].append(doc_type)
+
+            for line in f:
+                header = _UNITY_DOC.match(line)
+                if header:
+                    flush()
+                    doc_class, doc_id = int(header.group(1)), header.group(2)
+                    doc_type, owner, father, script_guid = None, None, None, None
+                    continue
+                if doc_class is None:
+                    continue
+
+                if doc_type is None and line and not line.startswith(' '):
+                    doc_type = line.strip().rstrip(':')
+                    if doc_class == UNITY_GAME_OBJECT:
+                        info.node_count += 1
+                        if len(game_objects) < self.max_nodes:
+                            game_objects[doc_id] = ['', []]
+                        else:
+                            info.truncated = True
+                    continue
+
+                stripped = line.strip()
+                if stripped.startswith('m_Name:') and doc_class == UNITY_GAME_OBJECT and doc_id in game_objects:
+                    game_objects[doc_id][0] = stripped[len('m_Name:'):].strip()
+                elif stripped.startswith('m_GameObject:'):
+                    file_id = _UNITY_FILE_ID.search(stripped)
+                    owner = file_id.group(1) if file_id else None
+                elif stripped.startswith('m_Father:'):
+                    file_id = _UNITY_FILE_ID.search(stripped)
+                    father = file_id.group(1) if file_id else None
+                elif stripped.startswith('m_Script:'):
+                    guid = _UNITY_GUID.search(stripped)
+                    script_guid = guid.group(1) if guid else None
+                else:
+                    # Any other guid reference is an asset (material, mesh, sprite, prefab...)
+                    guid = _UNITY_GUID.search(stripped)
+                    if guid:
+                        info.resources.add(self.guid_index.get(guid.group(1), f'guid:{guid.group(1)}'))
+            flush()
+
+        # Resolve hierarchy: GameObject -> its transform -> parent transform -> parent GameObject
+        object_transform = {go: tr for tr, go in transform_owner.items()}
+        for object_id, (name, components) in game_objects.items():
+            parent_name = None
+            transform_id = object_transform.get(object_id)
+            if transform_id in transform_parent:
+                parent_object = transform_owner.get(transform_parent[transform_id])
+                if parent_object in game_objects:
+                    parent_name = game_objects[parent_object][0]
+            info.nodes.append(SceneNode(
+                name=name,
+                type=components[0] if components else 'GameObject',
+                parent=parent_name,
+                scripts=object_scripts.get(object_id, [])
+            ))
+
+        return info
+
+
+def build_unity_guid_index(repo_path: Path) -> Dict[str, str]:
+    """Map asset GUIDs to repository paths using Unity .meta files"""
+    guid_index = {}
+    for meta_path in repo_path.rglob('*.meta'):
+        try:
+            with open(meta_path, 'r', encoding='utf-8', errors='replace') as f:
+                for _, line in zip(range(5), f):
+                    guid = _UNITY_GUID.search(line)
+                    if guid:
+                        asset_path = meta_path.with_suffix('')
+                        guid_index[guid.group(1)] = str(asset_path.relative_to(repo_path))
+                        break
+        except OSError:
+            continue
+    return guid_index
+
+
+def find_scene_files(repo_path: Path) -> Iterator[Path]:
+    """Yield all Godot and Unity scene files in a repository"""
+    extensions = GODOT_SCENE_EXTENSIONS | UNITY_SCENE_EXTENSIONS
+    for file_path in repo_path.rglob('*'):
+        if file_path.suffix.lower() in extensions and file_path.is_file():
+            yield file_path
+
+
+def parse_repository_scenes(repo_path: Path, max_nodes: int = 5000) -> List[SceneInfo]:
+    """Parse every scene file in a repository"""
+    scene_files = list(find_scene_files(repo_path))
+    godot_parser = GodotSceneParser(max_nodes=max_nodes)
+    unity_parser = None
+
+    scenes = []
+    for scene_path in scene_files:
+        try:
+            if scene_path.suffix.lower() in GODOT_SCENE_EXTENSIONS:
+                scenes.append(godot_parser.parse(scene_path, repo_path))
+            else:
+                if unity_parser is None:
+                    unity_parser = UnityYAMLParser(build_unity_guid_index(repo_path), max_nodes=max_nodes)
+                scenes.append(unity_parser.parse(scene_path, repo_path))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error parsing scene {scene_path}: {e}")
+            continue
+    return scenes
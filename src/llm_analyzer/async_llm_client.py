@@ -0,0 +1,422 @@
+"""
+Async LLM Client
+
+asyncio counterpart of RobustLLMClient. Each provider keeps one SDK
+client (and so one pooled HTTP connection pool) for the lifetime of the
+AsyncLLMClient, requests are paced per provider by the shared
+ProviderRateLimiter (RPM/TPM buckets, adaptive concurrency), and
+backoff uses asyncio.sleep so other requests keep flowing while one
+provider is rate limited. Fallback queries are hedged: when a provider
+runs past its p95 latency the next one is raced against it and the
+loser is cancelled.
+"""
+import asyncio
+import inspect
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+import anthropic
+import openai
+import google.generativeai as genai
+
+from .robust_llm_client import (LLMResponse, ProviderError, classify_error, _usage_tokens,
+                                CLAUDE_MODEL, GEMINI_MODEL, GPT_MODEL)
+from .rate_limiter import ProviderRateLimiter, get_rate_limiter, estimate_tokens
+from .response_cache import ResponseCache
+from .hedging import HedgePolicy, get_latency_tracker
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .prompt_cache import (Prompt, PromptCacheStats, PromptCacheUsage, anthropic_messages, cache_usage,
+                           openai_cache_kwargs, prompt_text)
+from .telemetry import Telemetry, current_trace, get_telemetry
+
+
+PROVIDER_ORDER = ['anthropic', 'gemini', 'openai']
+
+DEFAULT_MODELS = {
+    'anthropic': CLAUDE_MODEL,
+    'gemini': GEMINI_MODEL,
+    'openai': GPT_MODEL,
+}
+
+MODEL_DISPLAY_NAMES = {
+    CLAUDE_MODEL: "Claude Sonnet 4",
+    GEMINI_MODEL: "Gemini 2.5 Pro",
+    GPT_MODEL: "GPT-4.1",
+}
+
+
+
+class AsyncLLMClient:
+    """Async LLM client with pooled connections and per-provider concurrency limits"""
+
+    def __init__(self, anthropic_key: str = None, openai_key: str = None, gemini_key: str = None,
+                 anthropic_base_url: str = None, openai_base_url: str = None,
+                 models: Optional[Dict[str, str]] = None,
+                 max_concurrency: Optional[Dict[str, int]] = None,
+                 rate_limiters: Optional[Dict[str, ProviderRateLimiter]] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 circuit_breakers: Optional[Dict[str, CircuitBreaker]] = None,
+                 telemetry: Optional[Telemetry] = None,
+                 timeout: float = 120.0, backoff_base: float = 2.0, max_backoff: float = 30.0):
+        self.anthropic_client = None
+        self.openai_client = None
+        self.gemini_configured = False
+        self.models = {**DEFAULT_MODELS, **(models or {})}
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+
+        # SDK retries are disabled so backoff is decided here, without blocking the loop
+        if anthropic_key:
+            self.anthropic_client = anthropic.AsyncAnthropic(
+                api_key=anthropic_key, base_url=anthropic_base_url, timeout=timeout, max_retries=0
+            )
+        if openai_key:
+            self.openai_client = openai.AsyncOpenAI(
+                api_key=openai_key, base_url=openai_base_url, timeout=timeout, max_retries=0
+            )
+        if gemini_key:
+            genai.configure(api_key=gemini_key)
+            self.gemini_configured = True
+
+        # Shared process-wide limiters unless the caller supplies its own
+        self.rate_limiters = {provider: get_rate_limiter(provider) for provider in PROVIDER_ORDER}
+        self.rate_limiters.update(rate_limiters or {})
+        # max_concurrency caps this client only; the shared limiters keep their own limits
+        self.concurrency_caps = {provider: asyncio.Semaphore(limit)
+                                 for provider, limit in (max_concurrency or {}).items()}
+
+        # None falls back to LLM_CACHE_MODE (set it to "off" to disable)
+        self.response_cache = response_cache if response_cache is not None else ResponseCache.from_env()
+
+        self.hedge_policy = hedge_policy or HedgePolicy()
+        self.latency_trackers = {provider: get_latency_tracker(provider) for provider in PROVIDER_ORDER}
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0}
+
+        # Same process-wide provider health as RobustLLMClient
+        self.circuit_breakers = {provider: get_circuit_breaker(provider) for provider in PROVIDER_ORDER}
+        self.circuit_breakers.update(circuit_breakers or {})
+
+        # Provider-side prompt cache hits/misses (CachedPrompt prefixes)
+        self.prompt_cache_stats = PromptCacheStats()
+
+        # Per-query latency/token/cost records, process-wide unless given
+        self.telemetry = telemetry or get_telemetry()
+
+    async def __aenter__(self) -> 'AsyncLLMClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close pooled HTTP connections"""
+        if self.anthropic_client:
+            await self.anthropic_client.close()
+        if self.openai_client:
+            await self.openai_client.close()
+
+    def available_providers(self) -> List[str]:
+        configured = {
+            'anthropic': self.anthropic_client is not None,
+            'gemini': self.gemini_configured,
+            'openai': self.openai_client is not None,
+        }
+        return [provider for provider in PROVIDER_ORDER if configured[provider]]
+
+    def model_name(self, provider: str) -> str:
+        model = self.models[provider]
+        return MODEL_DISPLAY_NAMES.get(model, model)
+
+    async def _call_provider(self, provider: str, prompt: Prompt, max_tokens: int,
+                             temperature: float) -> Tuple[str, Optional[PromptCacheUsage]]:
+        """One raw request to a provider, admitted by its circuit breaker and rate limiter
+
+        Returns the text and the call's prompt cache usage. The attempt is
+        reported to the current telemetry trace.
+        """
+        cap = self.concurrency_caps.get(provider)
+        if cap is None:
+            return await self._admitted_call(provider, prompt, max_tokens, temperature)
+        async with cap:
+            return await self._admitted_call(provider, prompt, max_tokens, temperature)
+
+    async def _admitted_call(self, provider: str, prompt: Prompt, max_tokens: int,
+                             temperature: float) -> Tuple[str, Optional[PromptCacheUsage]]:
+        breaker = self.circuit_breakers[provider]
+        breaker.before_call()
+        limiter = self.rate_limiters[provider]
+        trace = current_trace()
+        model = self.models[provider]
+        try:
+            permit = await limiter.acquire(estimate_tokens(prompt, max_tokens))
+        except asyncio.CancelledError:
+            breaker.record('cancelled')
+            raise
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            content, response, headers = await self._send(provider, prompt, max_tokens, temperature)
+        except asyncio.CancelledError:
+            # Lost a hedged race; free the slot and refund its tokens without penalising the provider
+            limiter.release(permit, 'cancelled', actual_tokens=0)
+            breaker.record('cancelled')
+            if trace is not None:
+                trace.add_attempt(provider, model, 'cancelled', permit.wait_time, loop.time() - started)
+            raise
+        except Exception as e:
+            error = classify_error(provider, e)
+            error_response = getattr(e, 'response', None)
+            limiter.release(permit, error.kind, headers=getattr(error_response, 'headers', None),
+                            retry_after=error.retry_after)
+            breaker.record(error.kind)
+            if trace is not None:
+                trace.add_attempt(provider, model, error.kind, permit.wait_time, loop.time() - started)
+            raise
+        elapsed = loop.time() - started
+        breaker.record('ok', elapsed)
+        self.latency_trackers[provider].record(elapsed)
+        limiter.release(permit, 'ok', actual_tokens=_usage_tokens(response), headers=headers)
+        prompt_cache = cache_usage(response)
+        self.prompt_cache_stats.record(provider, prompt_cache)
+        if trace is not None:
+            trace.add_attempt(provider, model, 'ok' if content else 'empty', permit.wait_time, elapsed, response)
+        return content, prompt_cache
+
+    async def _send(self, provider: str, prompt: Prompt, max_tokens: int, temperature: float):
+        """Returns (text, the SDK response carrying usage, response headers or None)"""
+        if provider == 'anthropic':
+            raw = await self.anthropic_client.messages.with_raw_response.create(
+                model=self.models[provider],
+                max_tokens=max_tokens,
+                messages=anthropic_messages(prompt)
+            )
+            response = await _parse_raw(raw)
+            return response.content[0].text, response, raw.headers
+        if provider == 'openai':
+            raw = await self.openai_client.chat.completions.with_raw_response.create(
+                model=self.models[provider],
+                messages=[{"role": "user", "content": prompt_text(prompt)}],
+                max_tokens=max_tokens,
+                **openai_cache_kwargs(prompt)
+            )
+            response = await _parse_raw(raw)
+            return response.choices[0].message.content, response, raw.headers
+        if provider == 'gemini':
+            model = genai.GenerativeModel(self.models[provider])
+            response = await model.generate_content_async(
+                prompt_text(prompt),
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=temperature
+                )
+            )
+            return response.text, response, None
+        raise ValueError(f"Unknown provider: {provider}")
+
+    def rate_limit_metrics(self) -> Dict[str, Dict]:
+        """Live limiter metrics for the configured providers"""
+        return {provider: self.rate_limiters[provider].metrics() for provider in self.available_providers()}
+
+    def _backoff_delay(self, error: ProviderError, attempt: int) -> float:
+        """Exponential backoff with full jitter; server Retry-After wins when given"""
+        if error.retry_after is not None:
+            return min(error.retry_after, self.max_backoff)
+        base = self.backoff_base * (2 if error.kind == 'rate_limit' else 1)
+        return random.uniform(0, min(base * (2 ** attempt), self.max_backoff))
+
+    def _cache_route(self, provider: str, temperature: float) -> tuple:
+        """Cache key parts; as in RobustLLMClient, only Gemini is called with a temperature"""
+        return provider, self.models[provider], temperature if provider == 'gemini' else None
+
+    def _store(self, response: LLMResponse, prompt: Prompt, max_tokens: int, temperature: float):
+        if response.success and not response.cached and self.response_cache is not None:
+            provider, model, key_temperature = self._cache_route(response.provider, temperature)
+            self.response_cache.put_response(provider, model, prompt, max_tokens, key_temperature,
+                                             response.model_used, response.content)
+
+    def _cached(self, providers: Sequence[str], prompt: Prompt, max_tokens: int,
+                temperature: float) -> Optional[LLMResponse]:
+        """Cached answer from any of the providers, or a replay-mode miss"""
+        if self.response_cache is None:
+            return None
+        routes = [self._cache_route(provider, temperature) for provider in providers]
+        hit = self.response_cache.get_any(routes, prompt, max_tokens)
+        if hit is not None:
+            provider, content, model_used = hit
+            return LLMResponse(content=content, model_used=model_used, success=True, provider=provider, cached=True)
+        if self.response_cache.replay:
+            return LLMResponse(content="", model_used="None", success=False, error="Cache miss in replay mode")
+        return None
+
+    async def query_provider(self, provider: str, prompt: Prompt, max_tokens: int = 2000,
+                             max_retries: int = 3, temperature: float = 0.1, cacheable: bool = True) -> LLMResponse:
+        """Query a single provider with async retry/backoff
+
+        cacheable=False bypasses the response cache (sampled answers must not be replayed).
+        """
+        with self.telemetry.trace() as trace:
+            response = self._cached([provider], prompt, max_tokens, temperature) if cacheable else None
+            if response is None:
+                response = await self._query_provider(provider, prompt, max_tokens, max_retries, temperature)
+                if cacheable:
+                    self._store(response, prompt, max_tokens, temperature)
+        self.telemetry.finish(trace, response, model=self.models[provider])
+        return response
+
+    async def _query_provider(self, provider: str, prompt: Prompt, max_tokens: int,
+                              max_retries: int, temperature: float) -> LLMResponse:
+        last_error = "not attempted"
+        for attempt in range(max_retries):
+            try:
+                content, prompt_cache = await self._call_provider(provider, prompt, max_tokens, temperature)
+                if content:
+                    return LLMResponse(content=content, model_used=self.model_name(provider), success=True,
+                                       provider=provider, prompt_cache=prompt_cache)
+                last_error = "empty response"
+                continue
+            except Exception as e:
+                error = classify_error(provider, e)
+                last_error = str(error)
+                print(f"❌ {self.model_name(provider)} {error.kind} (attempt {attempt + 1}/{max_retries}): {last_error[:120]}")
+                if error.kind in ('error', 'circuit_open') or attempt == max_retries - 1:
+                    break
+                if error.kind == 'overloaded':
+                    await asyncio.sleep(self._backoff_delay(error, attempt))
+                # Rate limits need no sleep here: the limiter holds the next acquire until the cooldown ends
+
+        return LLMResponse(content="", model_used=self.model_name(provider), success=False, error=last_error,
+                           provider=provider)
+
+    async def query_with_retry(self, prompt: Prompt, max_tokens: int = 2000, max_retries: int = 3,
+                               providers: Optional[Sequence[str]] = None) -> LLMResponse:
+        """Query providers in fallback order until one succeeds"""
+        with self.telemetry.trace() as trace:
+            response = await self._query_with_retry(prompt, max_tokens, max_retries, providers)
+        self.telemetry.finish(trace, response,
+                              model=self.models.get(response.provider) if response.provider else None)
+        return response
+
+    async def _query_with_retry(self, prompt: Prompt, max_tokens: int, max_retries: int,
+                                providers: Optional[Sequence[str]]) -> LLMResponse:
+        providers = list(providers or self.available_providers())
+        cached = self._cached(providers, prompt, max_tokens, 0.1)
+        if cached is not None:
+            return cached
+
+        errors = [f"{provider}: circuit open" for provider in providers
+                  if not self.circuit_breakers[provider].available()]
+        providers = [provider for provider in providers if self.circuit_breakers[provider].available()]
+        if self.hedge_policy.enabled and len(providers) > 1:
+            response = await self._race(providers, prompt, max_tokens, max_retries, 0.1, errors)
+            if response is not None:
+                self._store(response, prompt, max_tokens, 0.1)
+                return response
+        else:
+            for provider in providers:
+                response = await self._query_provider(provider, prompt, max_tokens, max_retries, 0.1)
+                if response.success:
+                    self._store(response, prompt, max_tokens, 0.1)
+                    return response
+                errors.append(f"{provider}: {response.error}")
+
+        return LLMResponse(
+            content="",
+            model_used="None",
+            success=False,
+            error="All LLM providers failed or unavailable" + (f" ({'; '.join(errors)})" if errors else "")
+        )
+
+    async def _race(self, providers: Sequence[str], prompt: Prompt, max_tokens: int, max_retries: int,
+                    temperature: float, errors: List[str]) -> Optional[LLMResponse]:
+        """Hedged fallback: start the next provider once the newest one runs past its p95 latency
+
+        The first successful answer wins and the other tasks are cancelled.
+        A provider that fails outright hands over to the next one at once.
+        """
+        loop = asyncio.get_running_loop()
+        queue = list(providers)
+        running: Dict[asyncio.Task, str] = {}
+        newest, newest_started = None, 0.0
+
+        def launch():
+            nonlocal newest, newest_started
+            provider = queue.pop(0)
+            task = asyncio.create_task(self._query_provider(provider, prompt, max_tokens, max_retries, temperature))
+            running[task] = provider
+            newest, newest_started = provider, loop.time()
+
+        launch()
+        primary = newest
+        try:
+            while running:
+                timeout = None
+                if queue and len(running) <= self.hedge_policy.max_hedges:
+                    delay = self.latency_trackers[newest].hedge_delay(self.hedge_policy)
+                    timeout = max(0.0, newest_started + delay - loop.time())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    self.hedge_stats["hedged"] += 1
+                    launch()
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    response = task.result()
+                    if response.success:
+                        if provider != primary:
+                            self.hedge_stats["hedge_wins"] += 1
+                        return response
+                    errors.append(f"{provider}: {response.error}")
+                if not running and queue:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        return None
+
+    def latency_metrics(self) -> Dict[str, Dict]:
+        """Observed latency quantiles per configured provider, plus hedge counters"""
+        metrics = {provider: self.latency_trackers[provider].metrics() for provider in self.available_providers()}
+        metrics["hedging"] = dict(self.hedge_stats)
+        return metrics
+
+    def provider_health(self) -> Dict[str, Dict]:
+        """Circuit state and health score (0-1) per configured provider"""
+        return {provider: self.circuit_breakers[provider].metrics() for provider in self.available_providers()}
+
+    def prompt_cache_metrics(self) -> Dict[str, Dict]:
+        """Provider-side prompt cache read/write/uncached input tokens per provider"""
+        return self.prompt_cache_stats.summary()
+
+    async def query_code_analysis(self, prompt: Prompt, max_tokens: int = 2000) -> LLMResponse:
+        """Claude-only, as in RobustLLMClient.query_code_analysis"""
+        if not self.anthropic_client:
+            return LLMResponse(content="", model_used="None", success=False,
+                               error="Claude API key required for code analysis")
+        return await self.query_provider('anthropic', prompt, max_tokens)
+
+    async def query_creative_generation(self, prompt: str, max_tokens: int = 2000) -> LLMResponse:
+        """Gemini-only, as in RobustLLMClient.query_creative_generation"""
+        if not self.gemini_configured:
+            return LLMResponse(content="", model_used="None", success=False,
+                               error="Gemini API key required for creative generation")
+        return await self.query_provider('gemini', prompt, max_tokens, temperature=0.8, cacheable=False)
+
+    def cache_stats(self) -> Dict:
+        """Response cache statistics for the current run"""
+        return self.response_cache.summary() if self.response_cache is not None else {"mode": "off"}
+
+    async def query_many(self, prompts: Sequence[str], max_tokens: int = 2000) -> List[LLMResponse]:
+        """Fan out independent prompts concurrently; results keep prompt order"""
+        return list(await asyncio.gather(*(self.query_with_retry(p, max_tokens) for p in prompts)))
+
+
+async def _parse_raw(raw):
+    """with_raw_response objects parse synchronously or asynchronously depending on SDK version"""
+    parsed = raw.parse()
+    if inspect.isawaitable(parsed):
+        parsed = await parsed
+    return parsed
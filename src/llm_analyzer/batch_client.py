@@ -0,0 +1,216 @@
+"""
+Batch LLM Client
+
+Bulk, latency-insensitive LLM work (nightly multi-repo analysis) through
+the providers' batch APIs: Anthropic Message Batches first, then the
+OpenAI Batch API. Jobs are submitted, polled until they end, and results
+are mapped back by custom_id. Anything a batch could not answer (submit
+failure, timeout, per-request errors) falls back to concurrent single
+requests through AsyncLLMClient, so callers always get one LLMResponse
+per request.
+
+Both batch APIs are served by MockLLMServer for offline testing.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+import anthropic
+import openai
+
+from .robust_llm_client import LLMResponse
+from .async_llm_client import AsyncLLMClient, DEFAULT_MODELS, MODEL_DISPLAY_NAMES
+from .response_cache import ResponseCache, cache_key
+from .prompt_cache import Prompt, anthropic_messages, openai_cache_fields, prompt_text
+
+
+BATCH_PROVIDERS = ['anthropic', 'openai']
+
+
+@dataclass
+class BatchRequest:
+    """One prompt in a batch; custom_id must be unique and match [A-Za-z0-9_-]{1,64}"""
+    custom_id: str
+    prompt: Prompt
+    max_tokens: int = 2000
+
+
+class BatchLLMClient:
+    """Submit prompts as provider batch jobs, with single-request fallback"""
+
+    def __init__(self, anthropic_key: str = None, openai_key: str = None,
+                 anthropic_base_url: str = None, openai_base_url: str = None,
+                 models: Optional[Dict[str, str]] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 poll_interval: float = 30.0, timeout: float = 24 * 3600,
+                 max_batch_size: int = 10000):
+        self.anthropic_key = anthropic_key
+        self.openai_key = openai_key
+        self.anthropic_base_url = anthropic_base_url
+        self.openai_base_url = openai_base_url
+        self.models = {**DEFAULT_MODELS, **(models or {})}
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.anthropic_client = anthropic.Anthropic(api_key=anthropic_key, base_url=anthropic_base_url) if anthropic_key else None
+        self.openai_client = openai.OpenAI(api_key=openai_key, base_url=openai_base_url) if openai_key else None
+        self.response_cache = response_cache if response_cache is not None else ResponseCache.from_env()
+        self.stats = {"cached": 0, "batched": 0, "fallback": 0, "failed": 0, "batches": 0}
+
+    def available_providers(self) -> List[str]:
+        configured = {'anthropic': self.anthropic_client is not None, 'openai': self.openai_client is not None}
+        return [provider for provider in BATCH_PROVIDERS if configured[provider]]
+
+    def run(self, requests: Sequence[BatchRequest]) -> Dict[str, LLMResponse]:
+        """Answer every request; returns custom_id -> LLMResponse"""
+        results: Dict[str, LLMResponse] = {}
+        pending = []
+        for request in requests:
+            cached = self._cached(request)
+            if cached is not None:
+                results[request.custom_id] = cached
+                self.stats["cached"] += 1
+            else:
+                pending.append(request)
+
+        for provider in self.available_providers():
+            if not pending:
+                break
+            runner = self._run_anthropic if provider == 'anthropic' else self._run_openai
+            for start in range(0, len(pending), self.max_batch_size):
+                chunk = pending[start:start + self.max_batch_size]
+                try:
+                    answers = runner(chunk)
+                except Exception as e:
+                    print(f"⚠️ {provider} batch failed: {e}")
+                    continue
+                for request in chunk:
+                    text = answers.get(request.custom_id)
+                    if text:
+                        results[request.custom_id] = LLMResponse(
+                            content=text, model_used=self._model_name(provider), success=True, provider=provider
+                        )
+                        self._store(provider, request, text)
+                        self.stats["batched"] += 1
+            pending = [request for request in pending if request.custom_id not in results]
+
+        if pending:
+            print(f"↩️ Falling back to single requests for {len(pending)} prompt(s)")
+            for request, response in zip(pending, asyncio.run(self._run_single(pending))):
+                results[request.custom_id] = response
+                self.stats["fallback" if response.success else "failed"] += 1
+        return results
+
+    def _model_name(self, provider: str) -> str:
+        model = self.models[provider]
+        return MODEL_DISPLAY_NAMES.get(model, model) + " (Batch)"
+
+    def _cached(self, request: BatchRequest) -> Optional[LLMResponse]:
+        if self.response_cache is None:
+            return None
+        routes = [(provider, self.models[provider], None) for provider in self.available_providers()]
+        hit = self.response_cache.get_any(routes, request.prompt, request.max_tokens)
+        if hit is None:
+            return None
+        provider, content, model_used = hit
+        return LLMResponse(content=content, model_used=model_used, success=True, provider=provider, cached=True)
+
+    def _store(self, provider: str, request: BatchRequest, text: str):
+        if self.response_cache is not None:
+            self.response_cache.put(cache_key(provider, self.models[provider], request.prompt, request.max_tokens, None),
+                                    provider, self.models[provider], self._model_name(provider), text)
+
+    def _poll(self, retrieve: Callable, finished: Callable, cancel: Callable, label: str):
+        """Re-fetch the batch until finished(batch); cancel it on timeout"""
+        deadline = time.monotonic() + self.timeout
+        batch = retrieve()
+        while not finished(batch):
+            if time.monotonic() > deadline:
+                try:
+                    cancel()
+                except Exception as e:
+                    print(f"⚠️ Could not cancel {label}: {e}")
+                raise TimeoutError(f"{label} did not finish within {self.timeout:.0f}s")
+            time.sleep(self.poll_interval)
+            batch = retrieve()
+        return batch
+
+    def _run_anthropic(self, requests: Sequence[BatchRequest]) -> Dict[str, str]:
+        """Anthropic Message Batches; returns custom_id -> text for succeeded requests"""
+        batches = self.anthropic_client.messages.batches
+        batch = batches.create(requests=[
+            {
+                "custom_id": request.custom_id,
+                "params": {
+                    "model": self.models['anthropic'],
+                    "max_tokens": request.max_tokens,
+                    "messages": anthropic_messages(request.prompt)
+                }
+            }
+            for request in requests
+        ])
+        self.stats["batches"] += 1
+        print(f"📦 Submitted Anthropic batch {batch.id} ({len(requests)} requests)")
+        batch = self._poll(lambda: batches.retrieve(batch.id), lambda b: b.processing_status == 'ended',
+                           lambda: batches.cancel(batch.id), f"Anthropic batch {batch.id}")
+
+        answers = {}
+        for entry in batches.results(batch.id):
+            if entry.result.type == 'succeeded' and entry.result.message.content:
+                answers[entry.custom_id] = entry.result.message.content[0].text
+        print(f"📦 Anthropic batch {batch.id} ended: {len(answers)}/{len(requests)} succeeded")
+        return answers
+
+    def _run_openai(self, requests: Sequence[BatchRequest]) -> Dict[str, str]:
+        """OpenAI Batch API over /v1/chat/completions; returns custom_id -> text"""
+        lines = [
+            json.dumps({
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.models['openai'],
+                    "messages": [{"role": "user", "content": prompt_text(request.prompt)}],
+                    "max_tokens": request.max_tokens,
+                    **openai_cache_fields(request.prompt)
+                }
+            })
+            for request in requests
+        ]
+        input_file = self.openai_client.files.create(
+            file=("batch_input.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+        )
+        batch = self.openai_client.batches.create(
+            input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        self.stats["batches"] += 1
+        print(f"📦 Submitted OpenAI batch {batch.id} ({len(requests)} requests)")
+        batch = self._poll(lambda: self.openai_client.batches.retrieve(batch.id),
+                           lambda b: b.status in ('completed', 'failed', 'expired', 'cancelled'),
+                           lambda: self.openai_client.batches.cancel(batch.id), f"OpenAI batch {batch.id}")
+
+        answers = {}
+        if batch.output_file_id:
+            for line in self.openai_client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                if response.get("status_code") == 200:
+                    choices = response.get("body", {}).get("choices") or []
+                    if choices and choices[0]["message"].get("content"):
+                        answers[entry["custom_id"]] = choices[0]["message"]["content"]
+        print(f"📦 OpenAI batch {batch.id} {batch.status}: {len(answers)}/{len(requests)} succeeded")
+        return answers
+
+    async def _run_single(self, requests: Sequence[BatchRequest]) -> List[LLMResponse]:
+        """Concurrent single requests for whatever the batches did not answer"""
+        async with AsyncLLMClient(
+            anthropic_key=self.anthropic_key, openai_key=self.openai_key,
+            anthropic_base_url=self.anthropic_base_url, openai_base_url=self.openai_base_url,
+            models=self.models, response_cache=self.response_cache
+        ) as client:
+            return list(await asyncio.gather(
+                *(client.query_with_retry(request.prompt, request.max_tokens) for request in requests)
+            ))
@@ -0,0 +1,184 @@
+"""
+Provider Circuit Breakers
+
+Per-provider circuit breakers so a provider that is down is skipped
+instead of being retried (with backoff sleeps) on every call:
+- closed: calls flow; outcomes go into a sliding time window
+- open: the window's error rate or slow-call rate crossed its threshold;
+  calls are refused until the cool-down passes
+- half-open: a limited number of probe calls decide between closing
+  again and re-opening with a longer cool-down
+
+Breakers live in a process-wide registry guarded by a threading lock,
+so RobustLLMClient threads and AsyncLLMClient tasks share one view of
+provider health.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Outcomes that count against a provider's health. Rate limits are the
+# rate limiter's business, and cancelled hedges say nothing about health.
+FAILURE_OUTCOMES = ('overloaded', 'error')
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, provider: str, retry_in: Optional[float]):
+        super().__init__(f"{provider} circuit open; next probe in {retry_in or 0:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a sliding window of outcomes"""
+
+    def __init__(self, provider: str, window_seconds: float = 120.0, min_calls: int = 4,
+                 failure_rate_threshold: float = 0.5, slow_call_seconds: float = 60.0,
+                 slow_rate_threshold: float = 0.8, open_seconds: float = 30.0,
+                 max_open_seconds: float = 600.0, half_open_probes: int = 1):
+        self.provider = provider
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.current_open_seconds = open_seconds
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._window: Deque[Tuple[float, bool, bool]] = deque()  # (time, failed, slow)
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        while self._window and self._window[0][0] < now - self.window_seconds:
+            self._window.popleft()
+
+    def _rates(self) -> Tuple[float, float]:
+        if not self._window:
+            return 0.0, 0.0
+        calls = len(self._window)
+        failures = sum(1 for _, failed, _ in self._window if failed)
+        slow = sum(1 for _, _, is_slow in self._window if is_slow)
+        return failures / calls, slow / calls
+
+    def _open(self, now: float, escalate: bool):
+        if escalate:
+            self.current_open_seconds = min(self.max_open_seconds, self.current_open_seconds * 2)
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self.probes_in_flight = 0
+        print(f"🔌 {self.provider} circuit opened for {self.current_open_seconds:.0f}s")
+
+    def _refresh(self, now: float):
+        if self.state == OPEN and now - self.opened_at >= self.current_open_seconds:
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+
+    def available(self) -> bool:
+        """Worth routing to: closed, or ready for a half-open probe (does not reserve it)"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self.state == HALF_OPEN:
+                return self.probes_in_flight < self.half_open_probes
+            return self.state == CLOSED
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError; half-open admissions are probes"""
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+                self.probes_in_flight += 1
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.opened_at + self.current_open_seconds - now) if self.state == OPEN else 1.0
+        raise CircuitOpenError(self.provider, retry_in)
+
+    def record(self, outcome: str, latency: float = 0.0):
+        """Report a finished call: 'ok', 'rate_limit', 'overloaded', 'error' or 'cancelled'"""
+        now = time.monotonic()
+        failed = outcome in FAILURE_OUTCOMES
+        slow = outcome == 'ok' and latency > self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                if outcome == 'ok' and not slow:
+                    print(f"🔌 {self.provider} circuit closed (probe succeeded)")
+                    self.state = CLOSED
+                    self.current_open_seconds = self.open_seconds
+                    self._window.clear()
+                elif failed or slow:
+                    self._open(now, escalate=True)
+                return
+            if self.state == OPEN or outcome in ('cancelled', 'rate_limit'):
+                return
+
+            self._window.append((now, failed, slow))
+            self._prune(now)
+            if len(self._window) >= self.min_calls:
+                failure_rate, slow_rate = self._rates()
+                if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_rate_threshold:
+                    self._open(now, escalate=False)
+                    self._window.clear()
+
+    def health_score(self) -> float:
+        """0 (open) .. 1 (no recent failures or slow calls)"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            self._prune(time.monotonic())
+            if self.state == OPEN:
+                return 0.0
+            failure_rate, slow_rate = self._rates()
+            score = (1.0 - failure_rate) * (1.0 - 0.5 * slow_rate)
+            return score * 0.5 if self.state == HALF_OPEN else score
+
+    def metrics(self) -> Dict:
+        score = self.health_score()
+        with self._lock:
+            failure_rate, slow_rate = self._rates()
+            return {
+                "provider": self.provider,
+                "state": self.state,
+                "health": round(score, 3),
+                "window_calls": len(self._window),
+                "failure_rate": round(failure_rate, 3),
+                "slow_rate": round(slow_rate, 3),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Process-wide breaker for a provider"""
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def configure_circuit_breaker(provider: str, **kwargs) -> CircuitBreaker:
+    """Replace the process-wide breaker for a provider with custom thresholds"""
+    with _breakers_lock:
+        _breakers[provider] = CircuitBreaker(provider, **kwargs)
+        return _breakers[provider]
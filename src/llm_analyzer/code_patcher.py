@@ -0,0 +1,145 @@
+"""
+Unified Diff Patcher
+
+Applies unified diffs written by an LLM to in-memory source files.
+Model-written diffs are rarely byte-exact, so the patcher is tolerant
+where it is safe to be:
+- hunk line counts are ignored; a hunk ends at the next @@ or file header
+- blank lines without the leading space count as blank context lines
+- hunks are located by their context, searching outward from the stated
+  line number, first exactly and then ignoring whitespace differences
+
+Anything that cannot be placed unambiguously raises PatchError instead of
+producing a half-applied file.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+_HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@')
+
+
+class PatchError(Exception):
+    """A diff could not be parsed or applied"""
+
+
+@dataclass
+class Hunk:
+    old_start: int                                        # 1-based line in the original file
+    old_lines: List[str] = field(default_factory=list)    # context + removed lines
+    new_lines: List[str] = field(default_factory=list)    # context + added lines
+
+
+@dataclass
+class FilePatch:
+    path: str
+    hunks: List[Hunk] = field(default_factory=list)
+    new_file: bool = False
+
+
+def _strip_prefix(path: str) -> str:
+    path = path.split('\t')[0].strip()
+    return path[2:] if path.startswith(('a/', 'b/')) else path
+
+
+def parse_unified_diff(text: str) -> List[FilePatch]:
+    """Split diff text into per-file hunks"""
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    hunk: Optional[Hunk] = None
+    lines = text.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith('--- ') and i + 1 < len(lines) and lines[i + 1].startswith('+++ '):
+            old_path, new_path = _strip_prefix(line[4:]), _strip_prefix(lines[i + 1][4:])
+            current = FilePatch(path=new_path if new_path != '/dev/null' else old_path,
+                                new_file=old_path == '/dev/null')
+            patches.append(current)
+            hunk = None
+            i += 2
+            continue
+        header = _HUNK_HEADER_RE.match(line)
+        if header:
+            if current is None:
+                raise PatchError("Hunk before any ---/+++ file header")
+            hunk = Hunk(old_start=int(header.group(1)))
+            current.hunks.append(hunk)
+        elif hunk is not None:
+            if line.startswith('+'):
+                hunk.new_lines.append(line[1:])
+            elif line.startswith('-'):
+                hunk.old_lines.append(line[1:])
+            elif line.startswith(' ') or line == '':
+                hunk.old_lines.append(line[1:])
+                hunk.new_lines.append(line[1:])
+            elif line.startswith('\\'):
+                pass  # "\ No newline at end of file"
+            else:
+                hunk = None  # prose between hunks
+        i += 1
+
+    for patch in patches:
+        for hunk in patch.hunks:
+            # Trailing blank context is usually just the gap before the next header
+            while hunk.old_lines and hunk.new_lines and hunk.old_lines[-1] == '' and hunk.new_lines[-1] == '':
+                hunk.old_lines.pop()
+                hunk.new_lines.pop()
+    return [patch for patch in patches if patch.hunks]
+
+
+def _find(lines: List[str], needle: List[str], expected: int, lower_bound: int) -> Optional[int]:
+    """Index where needle occurs, nearest to expected and not before lower_bound
+
+    Raises PatchError when two matches are equally near (the context does
+    not say which one the hunk meant).
+    """
+    last = len(lines) - len(needle)
+    if last < lower_bound:
+        return None
+    expected = min(max(expected, lower_bound), last)
+    for normalize in (lambda s: s.rstrip(), lambda s: ' '.join(s.split())):
+        target = [normalize(line) for line in needle]
+        for distance in range(0, max(expected - lower_bound, last - expected) + 1):
+            matches = [start for start in sorted({expected - distance, expected + distance})
+                       if lower_bound <= start <= last and all(
+                           normalize(lines[start + k]) == target[k] for k in range(len(target)))]
+            if len(matches) > 1:
+                raise PatchError(f"context matches equally well at lines {matches[0] + 1} and {matches[1] + 1}")
+            if matches:
+                return matches[0]
+    return None
+
+
+def apply_hunks(source: str, hunks: List[Hunk], path: str = "<file>") -> str:
+    lines = source.split('\n')
+    result: List[str] = []
+    position = 0  # next unconsumed line of the original
+    for number, hunk in enumerate(hunks, 1):
+        if not hunk.old_lines:
+            start = min(max(hunk.old_start, position), len(lines))  # pure insertion after old_start
+        else:
+            try:
+                start = _find(lines, hunk.old_lines, hunk.old_start - 1, position)
+            except PatchError as e:
+                raise PatchError(f"{path}: hunk {number} (@@ -{hunk.old_start}) is ambiguous: {e}") from None
+            if start is None:
+                raise PatchError(f"{path}: hunk {number} (@@ -{hunk.old_start}) does not match the file")
+        result.extend(lines[position:start])
+        result.extend(hunk.new_lines)
+        position = start + len(hunk.old_lines)
+    result.extend(lines[position:])
+    return '\n'.join(result)
+
+
+def apply_patch(files: Dict[str, str], diff_text: str) -> Tuple[Dict[str, str], List[str]]:
+    """Apply a multi-file diff; returns the patched files and the paths that changed"""
+    patched = dict(files)
+    changed = []
+    for patch in parse_unified_diff(diff_text):
+        name = patch.path.rsplit('/', 1)[-1]
+        if name not in patched and not patch.new_file:
+            raise PatchError(f"Diff targets unknown file {patch.path}")
+        patched[name] = apply_hunks(patched.get(name, ''), patch.hunks, name)
+        changed.append(name)
+    return patched, changed
@@ -0,0 +1,313 @@
+"""
+Streaming Multi-File Code Parser
+
+Splits an LLM code-generation response into files in a single pass over
+the streamed text, reporting each file the moment it is complete so
+checks on main.py can start while later files are still streaming.
+
+Recognized layouts:
+- Fenced blocks named in the info string: ```python main.py,
+  ```python:main.py, ```python title="main.py", ```main.py
+- Fenced blocks named by a first-line comment: # main.py, # File: main.py
+- Fenced blocks named by the line before them: ## main.py,
+  **main.py**, File: `main.py`, 1. main.py - Entry point
+- JSON maps, bare or in a ```json fence: {"main.py": "..."}, nested
+  ({"files": {...}}) or as [{"filename": ..., "content": ...}]
+
+A response cut off mid-file (max_tokens) has its final file repaired:
+the unfinished fence or JSON string is closed and Python code is trimmed
+back to the longest prefix that compiles.
+
+Text is consumed line by line (markdown) or with a jump-to-next-quote
+scanner (JSON), buffering only the unfinished line or string, so the
+work is linear in the response size.
+"""
+import json
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+FILENAME = r'[\w.-]+(?:/[\w.-]+)*\.[A-Za-z][A-Za-z0-9]{0,4}'
+_FILENAME_RE = re.compile(FILENAME)
+_FULL_FILENAME_RE = re.compile(rf'{FILENAME}$')
+_FENCE_RE = re.compile(r'^\s*(`{3,}|~{3,})\s*(.*?)\s*$')
+_COMMENT_NAME_RE = re.compile(rf'^\s*(?:#|//|<!--)\s*(?:file(?:name)?\s*:\s*)?`?({FILENAME})`?\s*(?:-->)?\s*$', re.I)
+_LABEL_LINE_RE = re.compile(
+    rf'^\s*(?:#{{1,6}}\s*|\*\*|\d+[.)]\s*|[-*]\s+)?(?:file(?:name)?\s*:?\s*|path\s*:\s*)?'
+    rf'[`*"\']*({FILENAME})[`*"\']*\s*:?\s*(?:[-–—:(].*)?$', re.I)
+_TRAILING_NAME_RE = re.compile(rf'.*?[`*"\']*({FILENAME})[`*"\']*\s*:?\s*$')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+_PATH_KEYS = ('filename', 'file', 'path', 'name')
+_CONTENT_KEYS = ('content', 'code', 'source', 'contents')
+MAX_REPAIR_ATTEMPTS = 8
+
+
+def repair_python(code: str) -> str:
+    """Trim truncated Python back to the longest prefix that compiles (bounded attempts)
+
+    An unfinished last line is dropped first, then whole top-level
+    statements; a prefix ending in a block opener gets a `pass` body.
+    """
+    lines = code.split('\n')
+    if lines[-1].strip():
+        lines.pop()  # cut off mid-line
+    cut = len(lines)
+    for _ in range(MAX_REPAIR_ATTEMPTS):
+        body = '\n'.join(lines[:cut]).rstrip()
+        candidates = [body + '\n']
+        last = body.rsplit('\n', 1)[-1]
+        if last.rstrip().endswith(':'):
+            indent = len(last) - len(last.lstrip())
+            candidates.append(f"{body}\n{' ' * (indent + 4)}pass\n")
+        for candidate in candidates:
+            try:
+                compile(candidate, '<repair>', 'exec')
+                return candidate
+            except (SyntaxError, ValueError):
+                pass
+        # Back up to the previous top-level statement
+        cut -= 1
+        while cut > 0 and (not lines[cut] or lines[cut][0] in ' \t#)]}'):
+            cut -= 1
+        if cut <= 0:
+            break
+    # Nothing compiled: keep the complete lines and let validation reject the file
+    return '\n'.join(lines) + '\n'
+
+
+class _JSONFileScanner:
+    """Pulls filename -> code pairs out of a (possibly nested or truncated) JSON document"""
+
+    def __init__(self, emit: Callable[[str, str, bool], None]):
+        self.emit = emit
+        self.done = False
+        self._stack: List[dict] = []   # open containers: {'kind', 'key', 'expect_key', 'fields'}
+        self._in_string = False
+        self._escape = False
+        self._parts: List[str] = []
+
+    def feed(self, text: str):
+        i, end = 0, len(text)
+        while i < end and not self.done:
+            if self._in_string:
+                if self._escape:
+                    self._parts.append(text[i])
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL_RE.search(text, i)
+                if match is None:
+                    self._parts.append(text[i:])
+                    return
+                j = match.start()
+                self._parts.append(text[i:j])
+                if text[j] == '\\':
+                    self._parts.append('\\')
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    self._string_done(''.join(self._parts))
+                i = j + 1
+                continue
+
+            c = text[i]
+            if c == '"' and self._stack:
+                self._in_string = True
+                self._parts = []
+            elif c in '{[':
+                self._stack.append({'kind': c, 'key': None, 'expect_key': c == '{', 'fields': {}})
+            elif c in '}]' and self._stack:
+                frame = self._stack.pop()
+                self._object_done(frame)
+                if not self._stack:
+                    self.done = True
+            elif c == ',' and self._stack:
+                top = self._stack[-1]
+                top['expect_key'] = top['kind'] == '{'
+            elif c == ':' and self._stack:
+                self._stack[-1]['expect_key'] = False
+            i += 1
+
+    def _string_done(self, raw: str, truncated: bool = False):
+        try:
+            # strict=False: models often put raw newlines inside the code strings
+            value = json.loads(f'"{raw}"', strict=False)
+        except ValueError:
+            return
+        top = self._stack[-1]
+        if top['expect_key']:
+            top['key'] = value
+            return
+        if top['kind'] == '{' and top['key'] is not None:
+            top['fields'][top['key']] = value
+            if _FULL_FILENAME_RE.match(top['key']) and top['key'].lower() not in _PATH_KEYS:
+                self.emit(top['key'], value, truncated)
+
+    def _object_done(self, frame: dict, truncated: bool = False):
+        fields = {key.lower(): value for key, value in frame['fields'].items() if isinstance(key, str)}
+        path = next((fields[key] for key in _PATH_KEYS if isinstance(fields.get(key), str)), None)
+        content = next((fields[key] for key in _CONTENT_KEYS if isinstance(fields.get(key), str)), None)
+        if path and content is not None and _FULL_FILENAME_RE.match(path):
+            self.emit(path, content, truncated)
+
+    def close(self):
+        """Recover a file whose JSON string was cut off"""
+        if self.done or not self._stack:
+            return
+        if self._in_string and not self._stack[-1]['expect_key']:
+            raw = ''.join(self._parts)
+            if self._escape:
+                raw = raw[:-1]
+            raw = re.sub(r'\\u[0-9a-fA-F]{0,3}$', '', raw)
+            self._string_done(raw, truncated=True)
+        for frame in reversed(self._stack):
+            self._object_done(frame, truncated=True)
+        self.done = True
+
+
+class CodeResponseParser:
+    """Feed streamed text; get (filename, code) as each file completes
+
+    on_file(name, code) is called once per completed file (again if the
+    response redefines it). close() flushes and repairs the final file and
+    returns filename -> code; names of repaired files are in `truncated`.
+    """
+
+    def __init__(self, on_file: Optional[Callable[[str, str], None]] = None):
+        self.on_file = on_file
+        self.files: Dict[str, str] = {}
+        self.truncated: List[str] = []
+        self._line_parts: List[str] = []
+        self._mode: Optional[str] = None   # None (undecided), 'markdown' or 'json'
+        self._json: Optional[_JSONFileScanner] = None
+        self._label: Optional[str] = None  # filename from the line before a fence
+        self._fence: Optional[Tuple[str, int]] = None  # open fence (char, length)
+        self._block_name: Optional[str] = None
+        self._block_lang = ''
+        self._block_lines: List[str] = []
+        self._unnamed: List[Tuple[str, str]] = []  # (lang, code) of blocks without a filename
+        self._completed: List[Tuple[str, str]] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a chunk; returns the files it completed"""
+        completed: List[Tuple[str, str]] = []
+        self._completed = completed
+        if self._mode is None:
+            stripped = chunk.lstrip()
+            if not stripped:
+                return completed
+            if stripped[0] in '{[':
+                self._mode = 'json'
+                self._json = _JSONFileScanner(self._emit)
+            else:
+                self._mode = 'markdown'
+        if self._mode == 'json':
+            self._json.feed(chunk)
+            return completed
+
+        start = 0
+        while True:
+            newline = chunk.find('\n', start)
+            if newline == -1:
+                if start < len(chunk):
+                    self._line_parts.append(chunk[start:])
+                break
+            self._line_parts.append(chunk[start:newline])
+            line = ''.join(self._line_parts)
+            self._line_parts = []
+            self._line(line)
+            start = newline + 1
+            if self._mode == 'json':
+                # A bare JSON map after some prose: the scanner takes the rest
+                self._json.feed(chunk[start:])
+                break
+        return completed
+
+    def close(self) -> Dict[str, str]:
+        """Flush the stream, repair a truncated final file and return all files"""
+        self._completed = []
+        if self._mode == 'json':
+            self._json.close()
+        elif self._mode == 'markdown':
+            partial_line = bool(self._line_parts)
+            if partial_line:
+                self._line(''.join(self._line_parts), final=True)
+                self._line_parts = []
+            if self._fence is not None:
+                self._end_block(truncated=True, partial_line=partial_line)
+        if not self.files and self._unnamed:
+            # A single unnamed program is the entry point (the old parser's default)
+            lang, code = max(self._unnamed, key=lambda block: len(block[1]))
+            if lang in ('', 'python', 'py'):
+                self._emit('main.py', code, False)
+        return dict(self.files)
+
+    def _emit(self, name: str, code: str, truncated: bool):
+        if truncated:
+            if name.endswith('.py'):
+                code = repair_python(code)
+            self.truncated.append(name)
+        self.files[name] = code
+        self._completed.append((name, code))
+        if self.on_file:
+            self.on_file(name, code)
+
+    def _line(self, line: str, final: bool = False):
+        if self._fence is not None:
+            fence = _FENCE_RE.match(line)
+            char, length = self._fence
+            if fence and not fence.group(2) and fence.group(1)[0] == char and len(fence.group(1)) >= length:
+                self._end_block()
+            elif self._block_lang == 'json' and self._block_name is None:
+                self._json.feed(line + '\n')
+            else:
+                if not self._block_lines and self._block_name is None:
+                    named = _COMMENT_NAME_RE.match(line)
+                    if named:
+                        self._block_name = named.group(1)
+                # A final line without a newline may be cut off; close() repairs it
+                self._block_lines.append(line)
+            return
+
+        fence = _FENCE_RE.match(line)
+        if fence and not final:
+            info = fence.group(2)
+            named = _FILENAME_RE.search(info)
+            self._fence = (fence.group(1)[0], len(fence.group(1)))
+            self._block_lang = info.split()[0].split(':')[0].lower() if info else ''
+            self._block_name = named.group(0) if named else self._label
+            self._block_lines = []
+            if self._block_lang == 'json' and self._block_name is None:
+                self._json = _JSONFileScanner(self._emit)
+            self._label = None
+            return
+        stripped = line.strip()
+        if stripped.startswith('{') and not self.files and not self._unnamed:
+            self._mode = 'json'
+            self._json = _JSONFileScanner(self._emit)
+            self._json.feed(line + '\n')
+        elif stripped:
+            labelled = (_LABEL_LINE_RE.match(line) or _TRAILING_NAME_RE.match(line)) if len(line) < 200 else None
+            self._label = labelled.group(1) if labelled else None
+
+    def _end_block(self, truncated: bool = False, partial_line: bool = False):
+        if self._block_lang == 'json' and self._block_name is None:
+            if truncated:
+                self._json.close()
+        elif self._block_name is not None:
+            code = '\n'.join(self._block_lines)
+            if truncated and not partial_line:
+                code += '\n'  # the last line arrived complete
+            self._emit(self._block_name, code, truncated)
+        else:
+            self._unnamed.append((self._block_lang, '\n'.join(self._block_lines)))
+        self._fence = None
+        self._block_name = None
+        self._block_lang = ''
+        self._block_lines = []
+
+
+def parse_code_response(text: str) -> Dict[str, str]:
+    """Parse a complete response (see CodeResponseParser)"""
+    parser = CodeResponseParser()
+    parser.feed(text)
+    return parser.close()
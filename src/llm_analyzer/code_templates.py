@@ -0,0 +1,232 @@
+"""
+Template-Based Code Generation
+
+Instead of writing four files from scratch, the model tailors the
+existing Quick Skirmish skeleton (src/mini_game_generator) to a concept
+and answers with:
+- a small JSON object of template parameters (board size, turn limit,
+  unit stats, title, ...), substituted at fixed slots in the templates
+- unified diffs against the templates for everything else
+
+The templates are the same for every concept, so they form a cacheable
+prompt prefix, and the answer is a few hundred tokens instead of a few
+thousand. render_template_game applies the diffs and parameters locally
+and syntax-checks the result; any problem raises PatchError.
+"""
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .code_patcher import PatchError, apply_patch
+from .code_validator import check_syntax
+from .prompt_cache import CachedPrompt
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "mini_game_generator"
+TEMPLATE_MODULES = ("game_engine.py", "ui_renderer.py", "asset_manager.py")
+TEMPLATE_MAX_TOKENS = 1500
+
+# Entry point for the standalone game (scripts/run_mini_game.py without the source-repo requirement)
+MAIN_TEMPLATE = '''"""
+Mini-Game Entry Point
+
+Generated from the Quick Skirmish templates
+"""
+import pygame
+from pathlib import Path
+
+from game_engine import QuickSkirmishEngine
+from asset_manager import AssetManager
+from ui_renderer import UIRenderer
+
+TITLE = "Quick Skirmish"
+FPS = 60
+SOURCE_GAME_PATH = Path("source_game")
+
+
+def main():
+    pygame.init()
+    clock = pygame.time.Clock()
+
+    engine = QuickSkirmishEngine()
+    assets = AssetManager(SOURCE_GAME_PATH)
+    assets.load_tanks_of_freedom_assets()
+    if assets.get_sprite('soldier_blue') is None:
+        assets._create_placeholder_sprites()
+
+    renderer = UIRenderer(engine, assets)
+    pygame.display.set_caption(TITLE)
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_r and engine.game_over:
+                    engine = QuickSkirmishEngine()
+                    renderer.engine = engine
+                    renderer.selected_unit_pos = None
+                    renderer.highlighted_moves = []
+                    renderer.highlighted_attacks = []
+
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:
+                    renderer.handle_click(event.pos)
+                elif event.button == 3:
+                    renderer.handle_right_click(event.pos)
+
+        renderer.render()
+        clock.tick(FPS)
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+@dataclass
+class TemplateParameter:
+    """A value slot in a template: the first group of pattern in file"""
+    file: str
+    pattern: str
+    kind: type
+    description: str
+    minimum: Optional[int] = None
+    maximum: Optional[int] = None
+
+    def render(self, name: str, value: Any) -> str:
+        if self.kind is str:
+            if not isinstance(value, str) or not value.strip() or len(value) > 80:
+                raise PatchError(f"Parameter {name} must be a short string")
+            return json.dumps(value)
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise PatchError(f"Parameter {name} must be an integer, got {value!r}")
+        if (self.minimum is not None and value < self.minimum) or (self.maximum is not None and value > self.maximum):
+            raise PatchError(f"Parameter {name}={value} is outside {self.minimum}..{self.maximum}")
+        return str(value)
+
+
+PARAMETERS: Dict[str, TemplateParameter] = {
+    "title": TemplateParameter("main.py", r'^TITLE = (".*")$', str, "window title"),
+    "fps": TemplateParameter("main.py", r'^FPS = (\d+)$', int, "frame rate", 20, 120),
+    "board_size": TemplateParameter("game_engine.py", r'self\.board = GameBoard\((\d+)\)', int,
+                                    "board width/height in tiles", 4, 12),
+    "max_turns": TemplateParameter("game_engine.py", r'self\.max_turns = (\d+)', int,
+                                   "turn limit (both players)", 2, 60),
+    "unit_health": TemplateParameter("game_engine.py", r'^    (?:max_)?health: int = (\d+)$', int,
+                                     "starting and maximum unit health", 10, 500),
+    "attack_power": TemplateParameter("game_engine.py", r'^    attack_power: int = (\d+)$', int,
+                                      "damage per attack", 1, 200),
+    "movement_range": TemplateParameter("game_engine.py", r'^    movement_range: int = (\d+)$', int,
+                                        "tiles a unit may move per turn", 1, 8),
+    "attack_range": TemplateParameter("game_engine.py", r'^    attack_range: int = (\d+)$', int,
+                                      "attack distance in tiles", 1, 6),
+}
+
+
+def load_templates() -> Dict[str, str]:
+    """The skeleton files as a standalone game (package-relative imports made absolute)"""
+    templates = {"main.py": MAIN_TEMPLATE}
+    for name in TEMPLATE_MODULES:
+        source = (TEMPLATE_DIR / name).read_text()
+        templates[name] = re.sub(r'^from \.(\w+) import', r'from \1 import', source, flags=re.M)
+    return templates
+
+
+def apply_parameters(files: Dict[str, str], parameters: Dict[str, Any]) -> Dict[str, str]:
+    files = dict(files)
+    for name, value in parameters.items():
+        slot = PARAMETERS.get(name)
+        if slot is None:
+            raise PatchError(f"Unknown template parameter {name!r}")
+        literal = slot.render(name, value)
+        source = files.get(slot.file, '')
+        pattern = re.compile(slot.pattern, re.M)
+        if not pattern.search(source):
+            raise PatchError(f"Parameter {name}: its slot in {slot.file} was removed by the diff")
+        files[slot.file] = pattern.sub(lambda m: m.group(0)[:m.start(1) - m.start()] + literal
+                                       + m.group(0)[m.end(1) - m.start():], source)
+    return files
+
+
+def parse_template_response(text: str) -> Tuple[Dict[str, Any], str]:
+    """(parameters, diff text) from a ```json block and ```diff blocks"""
+    parameters: Dict[str, Any] = {}
+    json_at = text.find('```json')
+    brace = text.find('{', json_at if json_at != -1 else 0)
+    diff_at = text.find('--- ')
+    if brace != -1 and (json_at != -1 or diff_at == -1 or brace < diff_at):
+        try:
+            document, _ = json.JSONDecoder().raw_decode(text, brace)
+        except json.JSONDecodeError as e:
+            raise PatchError(f"Unreadable parameters JSON: {e}")
+        if isinstance(document, dict):
+            parameters = document.get("parameters", document)
+            if not isinstance(parameters, dict):
+                raise PatchError("'parameters' must be a JSON object")
+
+    blocks = re.findall(r'```(?:diff|patch|udiff)[^\n]*\n(.*?)(?:```|\Z)', text, flags=re.S)
+    if blocks:
+        diff = '\n'.join(blocks)
+    else:
+        diff = text[diff_at:] if diff_at != -1 else ''
+    return parameters, diff
+
+
+def render_template_game(response_text: str, templates: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Apply a template-mode answer: diffs first (they refer to the templates as shown), then parameters"""
+    templates = templates if templates is not None else load_templates()
+    parameters, diff = parse_template_response(response_text)
+    files, _ = apply_patch(templates, diff) if diff.strip() else (dict(templates), [])
+    files = apply_parameters(files, parameters)
+    error = check_syntax(files)
+    if error is not None:
+        raise PatchError(f"Patched code does not compile: {error}")
+    return files
+
+
+def build_template_prompt(concept: Dict, assets_info: Dict, templates: Optional[Dict[str, str]] = None) -> CachedPrompt:
+    """Templates and answer format as a cached prefix; the concept as the per-call suffix"""
+    templates = templates if templates is not None else load_templates()
+    parameter_table = "\n".join(
+        f"- {name} ({slot.kind.__name__}"
+        + (f", {slot.minimum}-{slot.maximum}" if slot.minimum is not None else "")
+        + f"): {slot.description}"
+        for name, slot in PARAMETERS.items()
+    )
+    listing = "\n\n".join(f"```python {name}\n{source}```" for name, source in templates.items())
+    prefix = f"""
+    You adapt an existing pygame mini-game skeleton to new game concepts. The
+    skeleton is a complete, working turn-based tactics game in four files:
+
+    {listing}
+
+    Tunable parameters (set them instead of editing those lines):
+    {parameter_table}
+
+    Answer with exactly two parts and nothing else:
+    1. A ```json block: {{"parameters": {{...}}}} with only the parameters you change
+    2. A ```diff block: unified diffs (--- a/<file>, +++ b/<file>, @@ hunks with
+       3 lines of context) against the files above for every other change
+
+    Keep diffs minimal: change only what the concept needs. Do not repeat
+    unchanged code. The result must run with `python main.py`.
+    """
+    suffix = f"""
+    Concept:
+    {json.dumps(concept, indent=2)}
+
+    Available assets:
+    {json.dumps(assets_info, indent=2)}
+
+    Adapt the skeleton to this concept (mobile-friendly, playable in 5-8 minutes,
+    clear win/lose conditions).
+    """
+    return CachedPrompt(prefix=[prefix], suffix=suffix)
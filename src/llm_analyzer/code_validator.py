@@ -0,0 +1,153 @@
+"""
+Generated Code Validator
+
+Checks LLM-generated mini-game code before it is kept:
+1. Syntax: every .py file compiles (in-process; nothing is executed)
+2. Import: every module imports under SDL's dummy video/audio drivers
+3. Run: main.py runs headless for a fixed number of frames with scripted
+   input, measuring the frame time
+
+Steps 2 and 3 run in one sandboxed subprocess per candidate (see
+headless_harness.py): an isolated interpreter in a throwaway directory
+with a minimal environment, a wall-clock timeout and, on POSIX, CPU /
+memory / file-size limits. Validations are spread over a bounded pool so
+many candidates (dozens of concepts per game) can be checked at once
+without oversubscribing the machine.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from .headless_harness import REPORT_PREFIX
+
+HARNESS_PATH = Path(__file__).with_name("headless_harness.py")
+DEFAULT_FRAMES = 300
+DEFAULT_TIMEOUT = 60.0
+MEMORY_LIMIT = 1024 * 1024 * 1024  # bytes of address space per candidate
+FILE_SIZE_LIMIT = 16 * 1024 * 1024
+
+
+class CandidateRejected(Exception):
+    """Raised (e.g. from a streaming callback) to abandon a candidate before it finishes"""
+
+
+@dataclass
+class ValidationResult:
+    """Outcome of validating one candidate"""
+    valid: bool
+    stage: str                     # last stage reached: syntax / import / run
+    frames: int = 0
+    mean_frame_ms: Optional[float] = None
+    p95_frame_ms: Optional[float] = None
+    duration: float = 0.0          # wall-clock seconds for the whole validation
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        return {"valid": self.valid, "stage": self.stage, "frames": self.frames,
+                "mean_frame_ms": self.mean_frame_ms, "p95_frame_ms": self.p95_frame_ms,
+                "duration": round(self.duration, 3), "error": self.error}
+
+
+def check_syntax(files: Dict[str, str]) -> Optional[str]:
+    """First syntax error among the .py files (None if all compile)"""
+    for filename, code in files.items():
+        if not filename.endswith('.py'):
+            continue
+        try:
+            compile(code, filename, 'exec')
+        except (SyntaxError, ValueError) as e:
+            return f"{filename}: {e}"
+    return None
+
+
+def _limit_resources(cpu_seconds: int):
+    """preexec_fn for the sandboxed subprocess (POSIX only)"""
+    def apply():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+        resource.setrlimit(resource.RLIMIT_AS, (MEMORY_LIMIT, MEMORY_LIMIT))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (FILE_SIZE_LIMIT, FILE_SIZE_LIMIT))
+    return apply
+
+
+class CodeValidator:
+    """Validates generated mini-games in a bounded pool of sandboxed subprocesses"""
+
+    def __init__(self, max_workers: Optional[int] = None, frames: int = DEFAULT_FRAMES,
+                 timeout: float = DEFAULT_TIMEOUT, seed: int = 0):
+        # Each worker thread only waits on its subprocess, so the pool size is the process limit
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.frames = frames
+        self.timeout = timeout
+        self.seed = seed
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="validate")
+
+    def submit(self, files: Dict[str, str]) -> 'Future[ValidationResult]':
+        return self._executor.submit(self.validate, files)
+
+    def validate(self, files: Dict[str, str]) -> ValidationResult:
+        """Syntax check, then import + headless run in a sandboxed subprocess"""
+        start = time.perf_counter()
+        if 'main.py' not in files:
+            return ValidationResult(valid=False, stage="syntax", error="no main.py")
+        error = check_syntax(files)
+        if error is not None:
+            return ValidationResult(valid=False, stage="syntax", error=error,
+                                    duration=time.perf_counter() - start)
+
+        with tempfile.TemporaryDirectory(prefix="minigame_") as game_dir:
+            for filename, code in files.items():
+                # Keep generated files inside the sandbox directory
+                target = Path(game_dir) / Path(filename).name
+                target.write_text(code)
+            result = self._run_harness(game_dir)
+        result.duration = time.perf_counter() - start
+        return result
+
+    def _run_harness(self, game_dir: str) -> ValidationResult:
+        env = {
+            "PATH": os.environ.get("PATH", ""),
+            "HOME": game_dir,
+            "SDL_VIDEODRIVER": "dummy",
+            "SDL_AUDIODRIVER": "dummy",
+            "PYGAME_HIDE_SUPPORT_PROMPT": "1",
+        }
+        command = [sys.executable, "-I", str(HARNESS_PATH), game_dir, str(self.frames), str(self.seed)]
+        try:
+            completed = subprocess.run(
+                command, cwd=game_dir, env=env, stdin=subprocess.DEVNULL,
+                capture_output=True, text=True, timeout=self.timeout, start_new_session=True,
+                preexec_fn=_limit_resources(int(self.timeout) + 1) if resource is not None else None
+            )
+        except subprocess.TimeoutExpired:
+            return ValidationResult(valid=False, stage="run", error=f"timed out after {self.timeout:.0f}s")
+
+        lines = [line for line in completed.stdout.splitlines() if line.startswith(REPORT_PREFIX)]
+        if not lines:
+            stderr = completed.stderr.strip().splitlines()
+            return ValidationResult(valid=False, stage="import",
+                                    error=f"harness exited with {completed.returncode}: "
+                                          f"{stderr[-1] if stderr else 'no output'}")
+        report = json.loads(lines[-1][len(REPORT_PREFIX):])
+        return ValidationResult(
+            valid=report["ok"],
+            stage=report["stage"],
+            frames=report.get("frames", 0),
+            mean_frame_ms=report.get("mean_frame_ms"),
+            p95_frame_ms=report.get("p95_frame_ms"),
+            error=report.get("error")
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=True)
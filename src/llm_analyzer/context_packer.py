@@ -0,0 +1,278 @@
+"""
+Token-Budget Context Packer
+
+Builds the code and asset sections of analysis prompts to fit a fixed
+token budget with as much useful information as possible:
+- tokens are counted locally (tiktoken when installed, otherwise a
+  regex approximation)
+- source files are split into function-level chunks, duplicates across
+  files (copied scripts, forks of the same component) are dropped, and
+  chunks are ranked by gameplay relevance per token
+- asset tables are serialized compactly, grouped by directory, and
+  sampled across categories instead of taking the first N files found
+"""
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .semantic_cache import embed_text
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to the regex estimate
+    tiktoken = None
+
+
+DEFAULT_CODE_BUDGET = 6000
+DEFAULT_ASSET_BUDGET = 1200
+
+CODE_EXTENSIONS = ('.gd', '.cs', '.py', '.js', '.ts', '.lua', '.cpp', '.c', '.h', '.hpp', '.java')
+SKIP_DIRS = {'.git', '.import', '.godot', 'node_modules', 'build', 'dist', 'bin', 'obj', 'library',
+             'temp', '__pycache__', 'venv', '.venv', 'thirdparty', 'third_party', 'vendor'}
+MAX_FILE_BYTES = 256 * 1024
+MAX_FILES = 400
+NEAR_DUPLICATE_SIMILARITY = 0.95
+
+# Gameplay vocabulary; each hit in a chunk adds to its relevance
+GAMEPLAY_TERMS = {
+    'player': 3.0, 'input': 2.0, 'attack': 3.0, 'damage': 3.0, 'health': 2.5, 'score': 2.5,
+    'move': 2.0, 'jump': 2.5, 'shoot': 3.0, 'fire': 1.5, 'turn': 2.0, 'level': 2.0, 'enemy': 3.0,
+    'spawn': 2.0, 'collision': 2.0, 'collide': 2.0, 'win': 2.0, 'lose': 2.0, 'victory': 2.5,
+    'defeat': 2.5, 'combat': 3.0, 'weapon': 2.5, 'unit': 2.0, 'boss': 3.0, 'power': 1.5,
+    'speed': 1.5, 'race': 2.0, 'lap': 2.0, 'item': 1.5, 'inventory': 2.0, 'ai': 1.5,
+    'state': 1.0, 'timer': 1.5, 'reward': 2.0, 'upgrade': 2.0, 'ability': 2.5, 'skill': 2.0,
+}
+PATH_PRIORITY = {'player': 3.0, 'game': 2.0, 'main': 1.5, 'combat': 3.0, 'level': 2.0, 'enemy': 2.5,
+                 'unit': 2.0, 'battle': 3.0, 'weapon': 2.0, 'ai': 1.5, 'controller': 1.5}
+PATH_PENALTY = {'test': 0.3, 'editor': 0.3, 'addons': 0.4, 'plugin': 0.4, 'generated': 0.1,
+                'tool': 0.5, 'menu': 0.6, 'settings': 0.5, 'translation': 0.2, 'locale': 0.2}
+
+_FUNCTION_START = {
+    '.gd': re.compile(r'^(static\s+)?func\s+\w+|^class\s+\w+|^signal\s+\w+'),
+    '.py': re.compile(r'^(async\s+)?def\s+\w+|^class\s+\w+'),
+    '.cs': re.compile(r'^\s{0,8}((public|private|protected|internal|static|override|virtual|async|sealed|abstract)\s+)+'
+                      r'[\w<>\[\],\s]*\w+\s*\('),
+    '.js': re.compile(r'^\s{0,4}(export\s+)?(async\s+)?function\s+\w+|^\s{0,4}\w+\s*\([^)]*\)\s*\{'),
+    '.lua': re.compile(r'^(local\s+)?function\s+[\w.:]+'),
+    '.java': re.compile(r'^\s{0,8}((public|private|protected|static|final|synchronized)\s+)+[\w<>\[\],\s]*\w+\s*\('),
+}
+_FUNCTION_START['.ts'] = _FUNCTION_START['.js']
+for _ext in ('.cpp', '.c', '.h', '.hpp'):
+    _FUNCTION_START[_ext] = re.compile(r'^[\w:<>\*&\s]+\s[\*&]?[\w:~]+\s*\([^;]*$')
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_WORD_PATTERN = re.compile(r'[a-z]+')
+
+
+class TokenCounter:
+    """tiktoken when available, else ~1 token per word piece/punctuation mark"""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self.encoder = None
+        if tiktoken is not None:
+            try:
+                self.encoder = tiktoken.get_encoding(encoding)
+            except Exception:  # encoding files unavailable offline
+                self.encoder = None
+        self.backend = "tiktoken" if self.encoder is not None else "regex"
+
+    def count(self, text: str) -> int:
+        if self.encoder is not None:
+            return len(self.encoder.encode(text, disallowed_special=()))
+        # Long identifiers split into several BPE tokens (~4 chars each)
+        return sum(1 + len(piece) // 6 for piece in _TOKEN_PATTERN.findall(text))
+
+
+@dataclass
+class CodeChunk:
+    """A function/class (or file header) from one source file"""
+    path: str
+    start_line: int
+    text: str
+    tokens: int = 0
+    score: float = 0.0
+
+
+def split_into_chunks(path: str, content: str, max_lines: int = 80) -> List[CodeChunk]:
+    """Split a source file at function/class boundaries; long bodies are cut at max_lines"""
+    pattern = _FUNCTION_START.get(Path(path).suffix.lower())
+    lines = content.splitlines()
+    chunks = []
+    start = 0
+    for index, line in enumerate(lines):
+        boundary = pattern is not None and index > start and pattern.match(line)
+        if boundary or index - start >= max_lines:
+            chunks.append(CodeChunk(path, start + 1, "\n".join(lines[start:index]).rstrip()))
+            start = index
+    chunks.append(CodeChunk(path, start + 1, "\n".join(lines[start:]).rstrip()))
+    return [chunk for chunk in chunks if chunk.text.strip()]
+
+
+def _normalized(text: str) -> str:
+    """Comment- and whitespace-insensitive form used for duplicate detection"""
+    text = re.sub(r'(#|//).*', '', text)
+    return ' '.join(text.split())
+
+
+def relevance(chunk: CodeChunk) -> float:
+    """Gameplay relevance of a chunk, before dividing by its token cost"""
+    words = _WORD_PATTERN.findall(chunk.text.lower())
+    if not words:
+        return 0.0
+    counts: Dict[str, int] = defaultdict(int)
+    for word in words:
+        if word in GAMEPLAY_TERMS:
+            counts[word] += 1
+    # Diminishing returns per term so one repeated word cannot dominate
+    score = sum(GAMEPLAY_TERMS[word] * np.log1p(count) for word, count in counts.items())
+    path = chunk.path.lower()
+    score *= 1.0 + sum(weight for key, weight in PATH_PRIORITY.items() if key in path) / 3.0
+    for key, factor in PATH_PENALTY.items():
+        if key in path:
+            score *= factor
+    if re.search(r'_(process|physics_process|input|ready)\b|\bUpdate\b|\bupdate\b', chunk.text):
+        score *= 1.3  # the game loop itself
+    return score
+
+
+def _source_files(repo_path: Path) -> List[Path]:
+    files = []
+    for path in sorted(repo_path.rglob('*')):
+        if path.suffix.lower() not in CODE_EXTENSIONS or not path.is_file():
+            continue
+        if any(part.lower() in SKIP_DIRS for part in path.relative_to(repo_path).parts[:-1]):
+            continue
+        try:
+            size = path.stat().st_size
+        except OSError:
+            continue
+        if 100 < size <= MAX_FILE_BYTES:
+            files.append(path)
+    # Gameplay-named files first if the repo is larger than the scan limit
+    files.sort(key=lambda p: -sum(w for key, w in PATH_PRIORITY.items() if key in p.name.lower()))
+    return files[:MAX_FILES]
+
+
+def deduplicate(chunks: Iterable[CodeChunk]) -> List[CodeChunk]:
+    """Drop exact (normalized) and near-duplicate chunks, keeping the first occurrence"""
+    chunks = list(chunks)
+    kept: List[CodeChunk] = []
+    seen = set()
+    vectors = None
+    for chunk in chunks:
+        normalized = _normalized(chunk.text)
+        if len(normalized) < 20:
+            continue
+        digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+        if digest in seen:
+            continue
+        vector = embed_text(normalized)
+        if vectors is None:
+            vectors = np.zeros((len(chunks), vector.shape[0]), dtype=np.float32)
+        if kept and float(np.max(vectors[:len(kept)] @ vector)) >= NEAR_DUPLICATE_SIMILARITY:
+            continue
+        seen.add(digest)
+        vectors[len(kept)] = vector
+        kept.append(chunk)
+    return kept
+
+
+def pack_code_context(repo_path: Path, budget: int = DEFAULT_CODE_BUDGET,
+                      counter: Optional[TokenCounter] = None) -> str:
+    """Most relevant function-level code chunks that fit in `budget` tokens"""
+    counter = counter or TokenCounter()
+    chunks = []
+    for path in _source_files(repo_path):
+        try:
+            content = path.read_text(encoding='utf-8')
+        except (UnicodeDecodeError, OSError):
+            continue
+        chunks.extend(split_into_chunks(str(path.relative_to(repo_path)), content))
+
+    # Rank before deduplicating so the best copy of a duplicated chunk survives
+    for chunk in chunks:
+        chunk.score = relevance(chunk)
+    chunks.sort(key=lambda c: c.score, reverse=True)
+    candidates = deduplicate(chunk for chunk in chunks if chunk.score > 0) or deduplicate(chunks)
+
+    # Greedy knapsack by relevance per token
+    for chunk in candidates:
+        chunk.tokens = counter.count(chunk.text)
+    candidates.sort(key=lambda c: c.score / max(c.tokens, 1), reverse=True)
+    selected = []
+    used = 0
+    headers = set()
+    for chunk in candidates:
+        header_cost = 0 if chunk.path in headers else counter.count(f"\n--- {chunk.path} ---\n")
+        if used + chunk.tokens + header_cost > budget:
+            continue
+        selected.append(chunk)
+        headers.add(chunk.path)
+        used += chunk.tokens + header_cost
+
+    # Present in file order so each file reads top to bottom
+    selected.sort(key=lambda c: (c.path, c.start_line))
+    sections = []
+    current = None
+    for chunk in selected:
+        if chunk.path != current:
+            sections.append(f"\n--- {chunk.path} ---")
+            current = chunk.path
+        sections.append(chunk.text)
+    return "\n".join(sections)
+
+
+def pack_asset_table(assets: List[Dict], budget: int = DEFAULT_ASSET_BUDGET,
+                     counter: Optional[TokenCounter] = None) -> str:
+    """Compact asset listing: category totals, then 'name WxH KB' rows grouped by directory
+
+    assets: dicts with file, dimensions, size_kb and category. Rows are
+    taken round-robin across categories so a budget-limited table still
+    shows every kind of asset.
+    """
+    counter = counter or TokenCounter()
+    if not assets:
+        return "(no image assets found)"
+
+    by_category: Dict[str, List[Dict]] = defaultdict(list)
+    for asset in sorted(assets, key=lambda a: a['file']):
+        by_category[asset['category']].append(asset)
+    dimensions: Dict[str, int] = defaultdict(int)
+    for asset in assets:
+        dimensions[asset['dimensions']] += 1
+    common = ', '.join(f"{dim}×{count}" for dim, count in sorted(dimensions.items(), key=lambda kv: -kv[1])[:5])
+    summary = (f"{len(assets)} images; " + ', '.join(f"{cat} {len(items)}" for cat, items in sorted(by_category.items()))
+               + f"; common sizes {common}\nrows: name WxH KB (grouped by directory/category)")
+
+    # Interleave categories
+    queues = [list(items) for _, items in sorted(by_category.items())]
+    ordered = []
+    while any(queues):
+        for queue in queues:
+            if queue:
+                ordered.append(queue.pop(0))
+
+    used = counter.count(summary)
+    chosen = []
+    for asset in ordered:
+        cost = counter.count(f"{Path(asset['file']).name} {asset['dimensions']} {asset['size_kb']}") + 1
+        if used + cost > budget:
+            break
+        chosen.append(asset)
+        used += cost
+
+    groups: Dict[tuple, List[Dict]] = defaultdict(list)
+    for asset in chosen:
+        groups[(str(Path(asset['file']).parent), asset['category'])].append(asset)
+    lines = [summary]
+    for (directory, category), items in sorted(groups.items()):
+        lines.append(f"[{directory}/ {category}]")
+        lines.extend(f"{Path(a['file']).name} {a['dimensions']} {a['size_kb']}" for a in items)
+    if len(chosen) < len(assets):
+        lines.append(f"(+{len(assets) - len(chosen)} more not listed)")
+    return "\n".join(lines)
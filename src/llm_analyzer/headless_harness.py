@@ -0,0 +1,141 @@
+"""
+Headless Mini-Game Harness
+
+Run by CodeValidator in a sandboxed subprocess, never imported by the
+analyzer itself:
+
+    python -I headless_harness.py <game_dir> <frames> <seed>
+
+Imports every module of a generated game under SDL's dummy video driver,
+then runs main.py with scripted input for a fixed number of frames.
+pygame is patched so that display.flip/update count frames and time
+them, Clock.tick and time.wait/delay never sleep (frame time is pure
+update + render work), and the run stops once enough frames were drawn.
+
+The last stdout line is a JSON report prefixed with REPORT_PREFIX.
+"""
+import importlib
+import json
+import os
+import random
+import runpy
+import sys
+import time
+import traceback
+
+REPORT_PREFIX = "HARNESS_REPORT "
+
+
+class FramesDone(BaseException):
+    """Raised from the patched flip once the frame budget is reached (BaseException so games can't swallow it)"""
+
+
+def report(**fields):
+    sys.stdout.flush()
+    print(REPORT_PREFIX + json.dumps(fields), flush=True)
+
+
+def install_hooks(pygame, frames: int, rng: random.Random, state: dict):
+    """Patch pygame for a fast, scripted, frame-limited run"""
+    size = [800, 600]
+    original_set_mode = pygame.display.set_mode
+
+    def set_mode(*args, **kwargs):
+        surface = original_set_mode(*args, **kwargs)
+        size[:] = surface.get_size()
+        return surface
+
+    def scripted_input():
+        # A tap or a key press every few frames, never QUIT
+        frame = state["frames"]
+        if frame % 7 == 0:
+            pos = (rng.randrange(max(1, size[0])), rng.randrange(max(1, size[1])))
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+        if frame % 11 == 0:
+            key = rng.choice([pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE])
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, mod=0, unicode="", scancode=0))
+
+    def frame_hook(original):
+        def present(*args, **kwargs):
+            result = original(*args, **kwargs)
+            now = time.perf_counter()
+            if state["last_frame"] is not None:
+                state["frame_times"].append(now - state["last_frame"])
+            state["last_frame"] = now
+            state["frames"] += 1
+            if state["frames"] >= frames:
+                raise FramesDone()
+            scripted_input()
+            return result
+        return present
+
+    class Clock:
+        """pygame.time.Clock without the sleep"""
+
+        def __init__(self):
+            self._fps = 60.0
+
+        def tick(self, framerate=0):
+            if framerate:
+                self._fps = float(framerate)
+            return int(1000 / self._fps)
+
+        tick_busy_loop = tick
+
+        def get_fps(self):
+            return self._fps
+
+        def get_time(self):
+            return int(1000 / self._fps)
+
+        get_rawtime = get_time
+
+    pygame.display.set_mode = set_mode
+    pygame.display.flip = frame_hook(pygame.display.flip)
+    pygame.display.update = frame_hook(pygame.display.update)
+    pygame.time.Clock = Clock
+    pygame.time.wait = lambda milliseconds: milliseconds
+    pygame.time.delay = lambda milliseconds: milliseconds
+
+
+def main():
+    game_dir, frames, seed = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    os.chdir(game_dir)
+    sys.path.insert(0, game_dir)
+    state = {"frames": 0, "last_frame": None, "frame_times": [], "stage": "import"}
+
+    try:
+        import pygame
+        install_hooks(pygame, frames, random.Random(seed), state)
+
+        # Import stage: every module must import cleanly (main.py may start the game right away)
+        modules = sorted(name[:-3] for name in os.listdir(game_dir) if name.endswith(".py"))
+        for module in modules:
+            importlib.import_module(module)
+
+        # Run stage: main(), falling back to executing main.py as a script
+        state["stage"] = "run"
+        main_module = sys.modules.get("main")
+        if main_module is not None and callable(getattr(main_module, "main", None)):
+            main_module.main()
+        else:
+            runpy.run_path(os.path.join(game_dir, "main.py"), run_name="__main__")
+        report(ok=False, stage="run", frames=state["frames"],
+               error=f"game returned after {state['frames']} of {frames} frames")
+    except FramesDone:
+        times = sorted(state["frame_times"])
+        report(ok=True, stage="run", frames=state["frames"],
+               mean_frame_ms=1000 * sum(times) / max(1, len(times)),
+               p95_frame_ms=1000 * times[int(0.95 * (len(times) - 1))] if times else 0.0)
+    except SystemExit as exit_:
+        report(ok=False, stage=state["stage"], frames=state["frames"],
+               error=f"exited ({exit_.code}) after {state['frames']} of {frames} frames")
+    except BaseException as e:
+        report(ok=False, stage=state["stage"], frames=state["frames"],
+               error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc(limit=5))
+
+
+if __name__ == "__main__":
+    main()
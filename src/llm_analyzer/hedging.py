@@ -0,0 +1,85 @@
+"""
+Hedged Requests
+
+Latency tracking and the hedging policy used when racing providers:
+if the primary provider has not answered within its recent p95
+latency, the next provider in fallback order is started as well and the
+first valid answer wins.
+
+Latency windows are kept per provider and shared by every client in the
+process (like the rate limiters), so hedge delays learned by one
+analysis carry over to the next.
+"""
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+import numpy as np
+
+
+@dataclass
+class HedgePolicy:
+    """When to fire the next provider while the current one is still running"""
+    enabled: bool = True
+    quantile: float = 0.95
+    min_samples: int = 20          # below this, use default_delay
+    default_delay: float = 30.0    # seconds; cold start before any latency is known
+    min_delay: float = 0.05
+    max_delay: float = 120.0
+    max_hedges: int = 2            # extra providers that may be in flight at once
+
+
+class LatencyTracker:
+    """Sliding window of successful response latencies for one provider"""
+
+    def __init__(self, provider: str, window: int = 200):
+        self.provider = provider
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            return float(np.quantile(np.fromiter(self._samples, dtype=float), q))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def hedge_delay(self, policy: HedgePolicy) -> float:
+        """Seconds to wait on this provider before hedging"""
+        if len(self) < max(1, policy.min_samples):
+            return policy.default_delay
+        return min(policy.max_delay, max(policy.min_delay, self.quantile(policy.quantile)))
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=float)
+        if samples.size == 0:
+            return {"provider": self.provider, "samples": 0}
+        p50, p95, p99 = np.quantile(samples, [0.5, 0.95, 0.99])
+        return {"provider": self.provider, "samples": int(samples.size),
+                "p50_s": round(float(p50), 3), "p95_s": round(float(p95), 3), "p99_s": round(float(p99), 3)}
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(provider: str) -> LatencyTracker:
+    """Process-wide latency window for a provider"""
+    with _trackers_lock:
+        if provider not in _trackers:
+            _trackers[provider] = LatencyTracker(provider)
+        return _trackers[provider]
+
+
+def reset_latency_trackers():
+    """Forget learned latencies (benchmarks compare policies from a cold start)"""
+    with _trackers_lock:
+        _trackers.clear()
@@ -6,8 +6,12 @@ understand gameplay mechanics, and identify the most engaging moments.
 """
 import os
 import json
+import time
 import base64
-from typing import Dict, List, Optional, Tuple
+import hashlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
 from dataclasses import dataclass
 import requests
@@ -15,6 +19,26 @@ from PIL import Image
 import anthropic
 import openai
 
+from .async_llm_client import AsyncLLMClient
+from .batch_client import BatchLLMClient, BatchRequest
+from .response_cache import ResponseCache, cache_key
+from .semantic_cache import SemanticCache
+from .streaming_json import IncrementalJSONParser, JSONPath
+from .context_packer import (TokenCounter, pack_code_context, pack_asset_table,
+                             DEFAULT_CODE_BUDGET, DEFAULT_ASSET_BUDGET)
+from .prompt_cache import (CachedPrompt, Prompt, PromptCacheStats, anthropic_messages, cache_usage,
+                           openai_cache_kwargs, prompt_text)
+from .telemetry import CallTrace, Telemetry, get_telemetry, pipeline_stage
+from .pipeline import PipelineNode, PipelineRun, PipelineScheduler, PipelineStore
+from .code_validator import CandidateRejected, CodeValidator, check_syntax
+from .code_response_parser import CodeResponseParser, parse_code_response
+from .code_patcher import PatchError
+from .code_templates import TEMPLATE_MAX_TOKENS, build_template_prompt, load_templates, render_template_game
+
+ANALYZER_CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+ANALYZER_GPT_MODEL = "gpt-4-turbo-preview"
+CODE_MODES = ('full', 'template')
+
 
 @dataclass
 class LLMAnalysisResult:
@@ -31,8 +55,15 @@ class LLMAnalysisResult:
 class LLMGameAnalyzer:
     """SOTA LLM-powered game analysis system"""
     
-    def __init__(self, anthropic_api_key: str = None, openai_api_key: str = None):
+    def __init__(self, anthropic_api_key: str = None, openai_api_key: str = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 semantic_cache: Optional[SemanticCache] = None,
+                 code_token_budget: int = DEFAULT_CODE_BUDGET,
+                 asset_token_budget: int = DEFAULT_ASSET_BUDGET,
+                 telemetry: Optional[Telemetry] = None):
         """Initialize with API keys for LLM services"""
+        self.anthropic_api_key = anthropic_api_key
+        self.openai_api_key = openai_api_key
         self.anthropic_client = None
         self.openai_client = None
         
@@ -41,27 +72,248 @@ class LLMGameAnalyzer:
         
         if openai_api_key:
             self.openai_client = openai.OpenAI(api_key=openai_api_key)
+        
+        # Persistent response cache; None falls back to LLM_CACHE_MODE (set it to "off" to disable)
+        self.response_cache = response_cache if response_cache is not None else ResponseCache.from_env()
+        # Optional near-duplicate reuse (LLM_SEMANTIC_CACHE=1), consulted after an exact miss
+        self.semantic_cache = semantic_cache if semantic_cache is not None else SemanticCache.from_env()
+        
+        # Prompt context is packed to fixed token budgets
+        self.code_token_budget = code_token_budget
+        self.asset_token_budget = asset_token_budget
+        self.token_counter = TokenCounter()
+        
+        # Provider-side prompt cache hits/misses for the shared analysis context
+        self.prompt_cache_stats = PromptCacheStats()
+        
+        # Per-call latency/token/cost records, labelled by analysis step
+        self.telemetry = telemetry or get_telemetry()
     
-    def analyze_game_with_llm(self, repo_path: Path, game_name: str) -> LLMAnalysisResult:
+    def analyze_game_with_llm(self, repo_path: Path, game_name: str,
+                              on_event: Optional[Callable[[JSONPath, Any], None]] = None) -> LLMAnalysisResult:
         """
         Use SOTA LLM to analyze game repository and identify engaging moments
-        """
-        # Step 1: Analyze code structure with LLM
-        code_analysis = self._analyze_code_with_llm(repo_path)
         
-        # Step 2: Analyze visual assets with LLM
-        visual_analysis = self._analyze_assets_with_llm(repo_path)
+        With on_event, steps 3 and 4 are streamed and each moment
+        (('moments', i), moment) and concept (('mini_game_concepts', i),
+        concept) is reported as soon as it has been generated.
         
-        # Step 3: Generate engagement insights
-        engagement_analysis = self._find_engaging_moments_with_llm(
-            code_analysis, visual_analysis, game_name
+        All four prompts open with the same repository context (and steps 3
+        and 4 with the step 1 + 2 results as well), marked for provider-side
+        prompt caching, so later steps read it from the cache.
+        """
+        run = self.run_pipeline(repo_path, game_name, targets=["concepts"], on_event=on_event)
+        run.raise_for_failure()
+        return self.result_from_outputs(run.outputs)
+    
+    def build_pipeline(self, repo_path: Path, game_name: str,
+                       code_generator: Optional['LLMCodeGenerator'] = None,
+                       assets_info: Optional[Dict] = None,
+                       on_event: Optional[Callable[[JSONPath, Any], None]] = None) -> List[PipelineNode]:
+        """
+        The analysis as a DAG: code and visual analysis (steps 1 and 2) both
+        need only the repository context, engagement (step 3) needs both,
+        concepts (step 4) need engagement, and with a code_generator one
+        code_generation task (generate_validated_code) runs per concept.
+        """
+        nodes = [
+            # Cheap and deterministic: always rebuilt, so repository changes invalidate stored steps
+            PipelineNode("repository_context", lambda: self._build_repository_context(repo_path), persist=False),
+            PipelineNode("code_analysis", lambda repository_context: self._require_parsed(
+                             "code_analysis", self._analyze_code_with_llm(repository_context)),
+                         ["repository_context"]),
+            PipelineNode("visual_analysis", lambda repository_context: self._require_parsed(
+                             "visual_analysis", self._analyze_assets_with_llm(repository_context)),
+                         ["repository_context"]),
+            PipelineNode("engagement", lambda repository_context, code_analysis, visual_analysis:
+                         self._require_parsed("engagement", self._find_engaging_moments_with_llm(
+                             repository_context, code_analysis, visual_analysis, game_name, on_event)),
+                         ["repository_context", "code_analysis", "visual_analysis"]),
+            PipelineNode("concepts", lambda repository_context, code_analysis, visual_analysis, engagement:
+                         self._require_parsed("concepts", self._generate_mini_game_concepts_with_llm(
+                             repository_context, code_analysis, visual_analysis, engagement, on_event)),
+                         ["repository_context", "code_analysis", "visual_analysis", "engagement"]),
+        ]
+        if code_generator is not None:
+            def generate_code(concepts: Dict) -> Dict[str, str]:
+                # Mapped over concepts: called once per concept, passed under the input's name
+                files = code_generator.generate_validated_code(concepts, assets_info or {})
+                if "error" in files:
+                    raise RuntimeError(f"Code generation failed: {files['error']}")
+                return files
+            
+            nodes.append(PipelineNode("code_generation", generate_code, ["concepts"], map_over="concepts"))
+        return nodes
+    
+    @staticmethod
+    def _require_parsed(step: str, result: Any) -> Any:
+        """Raise for an unparseable answer so the pipeline fails the node instead of storing the error"""
+        for item in (result if isinstance(result, list) else [result]):
+            if isinstance(item, dict) and "error" in item:
+                raise RuntimeError(f"{step}: {item['error']}")
+        return result
+    
+    def run_pipeline(self, repo_path: Path, game_name: str, run_dir: Optional[Path] = None,
+                     code_generator: Optional['LLMCodeGenerator'] = None,
+                     assets_info: Optional[Dict] = None,
+                     targets: Optional[List[str]] = None,
+                     on_event: Optional[Callable[[JSONPath, Any], None]] = None,
+                     max_workers: int = 4) -> PipelineRun:
+        """
+        Run the analysis DAG (see build_pipeline), independent nodes in
+        parallel. With run_dir every finished node is stored there and a
+        re-run with the same inputs reuses it, so a failed run resumes
+        where it stopped. Failures are reported in the returned PipelineRun.
+        """
+        scheduler = PipelineScheduler(
+            self.build_pipeline(repo_path, game_name, code_generator, assets_info, on_event),
+            store=PipelineStore(run_dir) if run_dir is not None else None,
+            max_workers=max_workers
         )
+        return scheduler.run(targets)
+    
+    def result_from_outputs(self, outputs: Dict[str, Any]) -> LLMAnalysisResult:
+        """LLMAnalysisResult from the outputs of a pipeline run"""
+        return self._build_result(outputs['engagement'], outputs['visual_analysis'], outputs['concepts'])
+    
+    async def analyze_game_with_llm_async(self, repo_path: Path, game_name: str,
+                                          client: Optional[AsyncLLMClient] = None) -> LLMAnalysisResult:
+        """
+        Async variant of analyze_game_with_llm: code and visual analysis
+        (steps 1 and 2) are independent and run concurrently. Both write the
+        shared context to the provider's prompt cache (neither can read the
+        other's entry); steps 3 and 4 read it.
+        """
+        owns_client = client is None
+        if owns_client:
+            client = AsyncLLMClient(
+                anthropic_key=self.anthropic_api_key,
+                openai_key=self.openai_api_key,
+                models={'anthropic': ANALYZER_CLAUDE_MODEL, 'openai': ANALYZER_GPT_MODEL},
+                response_cache=self.response_cache
+            )
         
-        # Step 4: Generate mini-game concepts
-        mini_game_concepts = self._generate_mini_game_concepts_with_llm(
-            engagement_analysis, visual_analysis
-        )
+        try:
+            # Context building walks the repository, so keep it off the event loop
+            context = await asyncio.to_thread(self._build_repository_context, repo_path)
+            
+            # Steps 1 + 2 concurrently
+            code_text, visual_text = await asyncio.gather(
+                self._query_llm_async(client, self._build_code_analysis_prompt(context), 2000, "code_analysis"),
+                self._query_llm_async(client, self._build_visual_analysis_prompt(context), 1500, "visual_analysis")
+            )
+            code_analysis = self._parse_json_response(code_text)
+            visual_analysis = self._parse_json_response(visual_text)
+            
+            # Step 3 depends on both
+            engagement_prompt = self._build_engagement_prompt(context, code_analysis, visual_analysis, game_name)
+            engagement_analysis = self._parse_json_response(
+                await self._query_llm_async(client, engagement_prompt, 3000, "engagement")
+            )
+            
+            # Step 4 depends on step 3
+            concepts_prompt = self._build_concepts_prompt(context, code_analysis, visual_analysis, engagement_analysis)
+            concepts = self._parse_json_response(
+                await self._query_llm_async(client, concepts_prompt, 3000, "concepts")
+            )
+            mini_game_concepts = concepts if isinstance(concepts, list) else [concepts]
+        finally:
+            if owns_client:
+                await client.aclose()
+        
+        return self._build_result(engagement_analysis, visual_analysis, mini_game_concepts)
+    
+    def analyze_games_batch(self, repos: Sequence[Tuple[Path, str]],
+                            client: Optional[BatchLLMClient] = None) -> Dict[str, LLMAnalysisResult]:
+        """
+        Offline bulk analysis of many repositories through provider batch APIs.
+        
+        Each analysis step is one batch across all repositories: steps 1 + 2
+        for every repo together, then step 3, then step 4. Returns
+        game_name -> result for the repositories that completed every step.
+        """
+        if client is None:
+            client = BatchLLMClient(
+                anthropic_key=self.anthropic_api_key,
+                openai_key=self.openai_api_key,
+                models={'anthropic': ANALYZER_CLAUDE_MODEL, 'openai': ANALYZER_GPT_MODEL},
+                response_cache=self.response_cache
+            )
         
+        def run_step(label: str, stage: str, requests: List[BatchRequest]) -> Dict[str, Any]:
+            print(f"🗂️ {label}: {len(requests)} prompt(s)")
+            with pipeline_stage(stage):
+                answers = client.run(requests)
+            parsed = {}
+            for request in requests:
+                response = answers.get(request.custom_id)
+                if response is not None and response.success:
+                    parsed[request.custom_id] = self._parse_json_response(response.content)
+                else:
+                    print(f"❌ {request.custom_id}: {response.error if response else 'no response'}")
+            return parsed
+        
+        # Steps 1 + 2 for every repository
+        contexts = [self._build_repository_context(repo_path) for repo_path, _ in repos]
+        first = run_step("Code and visual analysis", "code_and_visual_analysis", [
+            request
+            for index, context in enumerate(contexts)
+            for request in (
+                BatchRequest(f"repo{index}-code", self._build_code_analysis_prompt(context), 2000),
+                BatchRequest(f"repo{index}-visual", self._build_visual_analysis_prompt(context), 1500),
+            )
+        ])
+        live = [index for index in range(len(repos)) if f"repo{index}-code" in first and f"repo{index}-visual" in first]
+        
+        # Step 3 depends on both
+        engagement = run_step("Engaging moments", "engagement", [
+            BatchRequest(f"repo{index}-engagement", self._build_engagement_prompt(
+                contexts[index], first[f"repo{index}-code"], first[f"repo{index}-visual"], repos[index][1]), 3000)
+            for index in live
+        ])
+        live = [index for index in live if f"repo{index}-engagement" in engagement]
+        
+        # Step 4 depends on step 3
+        concepts = run_step("Mini-game concepts", "concepts", [
+            BatchRequest(f"repo{index}-concepts", self._build_concepts_prompt(
+                contexts[index], first[f"repo{index}-code"], first[f"repo{index}-visual"],
+                engagement[f"repo{index}-engagement"]), 3000)
+            for index in live
+        ])
+        
+        results = {}
+        for index in live:
+            if f"repo{index}-concepts" not in concepts:
+                continue
+            result = concepts[f"repo{index}-concepts"]
+            results[repos[index][1]] = self._build_result(
+                engagement[f"repo{index}-engagement"], first[f"repo{index}-visual"],
+                result if isinstance(result, list) else [result]
+            )
+        return results
+    
+    async def _query_llm_async(self, client: AsyncLLMClient, prompt: Prompt, max_tokens: int,
+                               stage: str = "analysis") -> str:
+        """Async counterpart of _query_llm; stage labels the call in telemetry"""
+        with pipeline_stage(stage):
+            return await self._query_llm_staged(client, prompt, max_tokens, stage)
+    
+    async def _query_llm_staged(self, client: AsyncLLMClient, prompt: Prompt, max_tokens: int, stage: str) -> str:
+        similar = self._semantic_lookup(prompt, stage)
+        if similar is not None:
+            with self.telemetry.trace() as trace:
+                self.telemetry.finish(trace, success=True, cached=True)
+            return similar
+        response = await client.query_with_retry(prompt, max_tokens)
+        if not response.success:
+            raise RuntimeError(f"LLM query failed: {response.error}")
+        if response.provider and not response.cached:
+            self.prompt_cache_stats.record(response.provider, response.prompt_cache)
+            self._semantic_store(prompt, stage, response.content)
+        return response.content
+    
+    def _build_result(self, engagement_analysis: Dict, visual_analysis: Dict,
+                      mini_game_concepts: List[Dict]) -> LLMAnalysisResult:
         return LLMAnalysisResult(
             game_summary=engagement_analysis.get('summary', ''),
             core_mechanics=engagement_analysis.get('mechanics', []),
@@ -72,25 +324,56 @@ class LLMGameAnalyzer:
             confidence_score=engagement_analysis.get('confidence', 0.0)
         )
     
-    def _analyze_code_with_llm(self, repo_path: Path) -> Dict:
-        """Use LLM to understand game code and mechanics"""
+    def _build_repository_context(self, repo_path: Path) -> str:
+        """Shared prompt prefix: packed code samples and asset table for the repository"""
         
         # Collect representative code files
         code_samples = self._collect_code_samples(repo_path)
         
+        # Find key visual assets
+        asset_info = self._collect_visual_assets(repo_path)
+        
+        context = f"""
+        Game repository under analysis. The tasks that follow refer to this material.
+        
+        Code samples:
+        {code_samples}
+        
+        Asset information:
+        {asset_info}
+        """
+        return context
+    
+    def _build_analysis_context(self, code_analysis: Dict, visual_analysis: Dict) -> str:
+        """Second shared prefix block for steps 3 and 4: the step 1 and 2 results"""
+        
+        context = f"""
+        Code Analysis:
+        {json.dumps(code_analysis, indent=2)}
+        
+        Visual Analysis:
+        {json.dumps(visual_analysis, indent=2)}
+        """
+        return context
+    
+    def _analyze_code_with_llm(self, context: str) -> Dict:
+        """Use LLM to understand game code and mechanics"""
+        return self._parse_json_response(self._query_llm(self._build_code_analysis_prompt(context), 2000,
+                                                       "code_analysis"))
+    
+    def _build_code_analysis_prompt(self, context: str) -> CachedPrompt:
+        """Prompt for step 1: code structure and mechanics"""
+        
         prompt = f"""
         You are an expert game developer analyzing a game repository. 
         
-        Analyze these code files and identify:
+        Analyze the code samples above and identify:
         1. Core gameplay mechanics
         2. Player interaction systems
         3. Game progression elements
         4. Combat/challenge systems
         5. Most engaging gameplay loops
         
-        Code samples:
-        {code_samples}
-        
         Provide analysis in JSON format:
         {{
             "mechanics": ["list of core mechanics"],
@@ -102,39 +385,20 @@ class LLMGameAnalyzer:
             "key_files": ["most important code files"]
         }}
         """
-        
-        if self.anthropic_client:
-            response = self.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=2000,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return self._parse_json_response(response.content[0].text)
-        
-        elif self.openai_client:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=2000
-            )
-            return self._parse_json_response(response.choices[0].message.content)
-        
-        else:
-            raise ValueError("No LLM API key provided")
+        return CachedPrompt(prefix=[context], suffix=prompt)
     
-    def _analyze_assets_with_llm(self, repo_path: Path) -> Dict:
+    def _analyze_assets_with_llm(self, context: str) -> Dict:
         """Use LLM to understand visual style and asset composition"""
-        
-        # Find key visual assets
-        asset_info = self._collect_visual_assets(repo_path)
+        return self._parse_json_response(self._query_llm(self._build_visual_analysis_prompt(context), 1500,
+                                                       "visual_analysis"))
+    
+    def _build_visual_analysis_prompt(self, context: str) -> CachedPrompt:
+        """Prompt for step 2: visual style and asset composition"""
         
         prompt = f"""
         You are an expert game artist analyzing visual assets from a game.
         
-        Asset information:
-        {asset_info}
-        
-        Analyze the visual style and provide insights:
+        Using the asset information above, analyze the visual style and provide insights:
         1. Art style (pixel art, 3D, hand-drawn, etc.)
         2. Color palette and mood
         3. Character design approach
@@ -154,36 +418,23 @@ class LLMGameAnalyzer:
             "appeal_factors": ["what makes visuals appealing"]
         }}
         """
-        
-        if self.anthropic_client:
-            response = self.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1500,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return self._parse_json_response(response.content[0].text)
-        
-        elif self.openai_client:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1500
-            )
-            return self._parse_json_response(response.choices[0].message.content)
+        return CachedPrompt(prefix=[context], suffix=prompt)
     
-    def _find_engaging_moments_with_llm(self, code_analysis: Dict, visual_analysis: Dict, game_name: str) -> Dict:
+    def _find_engaging_moments_with_llm(self, context: str, code_analysis: Dict, visual_analysis: Dict,
+                                        game_name: str,
+                                        on_event: Optional[Callable[[JSONPath, Any], None]] = None) -> Dict:
         """Use LLM to identify the most engaging moments for mini-games"""
+        prompt = self._build_engagement_prompt(context, code_analysis, visual_analysis, game_name)
+        return self._query_json(prompt, 3000, "engagement", on_event)
+    
+    def _build_engagement_prompt(self, context: str, code_analysis: Dict, visual_analysis: Dict,
+                                 game_name: str) -> CachedPrompt:
+        """Prompt for step 3: engaging moments"""
         
         prompt = f"""
         You are an expert in game design and player engagement, analyzing "{game_name}".
         
-        Code Analysis:
-        {json.dumps(code_analysis, indent=2)}
-        
-        Visual Analysis:
-        {json.dumps(visual_analysis, indent=2)}
-        
-        Based on this analysis, identify the most engaging moments that would work 
+        Based on the code and visual analysis above, identify the most engaging moments that would work 
         well as 5-10 minute interactive ads/mini-games. Consider:
         
         1. What are the most immediately satisfying gameplay loops?
@@ -214,25 +465,22 @@ class LLMGameAnalyzer:
         
         Rank moments by engagement potential for interactive ads.
         """
-        
-        if self.anthropic_client:
-            response = self.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=3000,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return self._parse_json_response(response.content[0].text)
-        
-        elif self.openai_client:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=3000
-            )
-            return self._parse_json_response(response.choices[0].message.content)
+        return CachedPrompt(prefix=[context, self._build_analysis_context(code_analysis, visual_analysis)],
+                            suffix=prompt)
     
-    def _generate_mini_game_concepts_with_llm(self, engagement_analysis: Dict, visual_analysis: Dict) -> List[Dict]:
+    def _generate_mini_game_concepts_with_llm(self, context: str, code_analysis: Dict, visual_analysis: Dict,
+                                              engagement_analysis: Dict,
+                                              on_event: Optional[Callable[[JSONPath, Any], None]] = None) -> List[Dict]:
         """Use LLM to generate specific mini-game implementation concepts"""
+        prompt = self._build_concepts_prompt(context, code_analysis, visual_analysis, engagement_analysis)
+        # The answer is a bare array; report its elements under the result field name
+        concept_events = (lambda path, value: on_event(('mini_game_concepts',) + path, value)) if on_event else None
+        result = self._query_json(prompt, 3000, "concepts", concept_events)
+        return result if isinstance(result, list) else [result]
+    
+    def _build_concepts_prompt(self, context: str, code_analysis: Dict, visual_analysis: Dict,
+                               engagement_analysis: Dict) -> CachedPrompt:
+        """Prompt for step 4: mini-game concepts (same cached prefix as step 3)"""
         
         top_moments = engagement_analysis.get('moments', [])[:3]  # Top 3 moments
         
@@ -243,8 +491,7 @@ class LLMGameAnalyzer:
         Top Engaging Moments:
         {json.dumps(top_moments, indent=2)}
         
-        Visual Style:
-        {json.dumps(visual_analysis, indent=2)}
+        The visual style is described in the visual analysis above.
         
         For each engaging moment, design a specific mini-game concept that:
         1. Can be played in 5-8 minutes
@@ -269,75 +516,166 @@ class LLMGameAnalyzer:
         
         Return as JSON array of concepts.
         """
+        return CachedPrompt(prefix=[context, self._build_analysis_context(code_analysis, visual_analysis)],
+                            suffix=prompt)
+    
+    def _query_json(self, prompt: Prompt, max_tokens: int, step: str,
+                    on_event: Optional[Callable[[JSONPath, Any], None]] = None) -> Any:
+        """Query and parse a JSON answer, streaming it through the incremental parser when on_event is set"""
+        if on_event is None:
+            return self._parse_json_response(self._query_llm(prompt, max_tokens, step))
+        parser = IncrementalJSONParser(on_event=on_event)
+        text = self._query_llm(prompt, max_tokens, step, on_text=parser.feed)
+        return parser.result if parser.result is not None else self._parse_json_response(text)
+    
+    def _query_llm(self, prompt: Prompt, max_tokens: int, step: str,
+                   on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Send one prompt to the configured provider (Claude preferred)
         
+        step names the analysis step for the semantic cache. on_text, when given, receives the completion incrementally (cached
+        answers arrive as a single chunk).
+        """
+        with self.telemetry.trace() as trace:
+            try:
+                text, provider, model, cached = self._fetch_llm(prompt, max_tokens, step, on_text, trace)
+            except Exception as e:
+                self.telemetry.finish(trace, success=False, error=str(e))
+                raise
+            self.telemetry.finish(trace, provider=provider, model=model, success=True, cached=cached)
+        return text
+    
+    def _fetch_llm(self, prompt: Prompt, max_tokens: int, step: str, on_text: Optional[Callable[[str], None]],
+                   trace: CallTrace) -> Tuple[str, str, str, bool]:
+        """Cache lookup, then the provider call; returns (text, provider, model, served from cache)"""
         if self.anthropic_client:
-            response = self.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=3000,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = self._parse_json_response(response.content[0].text)
-            return result if isinstance(result, list) else [result]
-        
+            provider, model = 'anthropic', ANALYZER_CLAUDE_MODEL
         elif self.openai_client:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=3000
+            provider, model = 'openai', ANALYZER_GPT_MODEL
+        else:
+            raise ValueError("No LLM API key provided")
+        
+        key = cache_key(provider, model, prompt, max_tokens, None)
+        if self.response_cache is not None:
+            hit = self.response_cache.get(key)
+            if hit is not None:
+                if on_text:
+                    on_text(hit[0])
+                return hit[0], provider, model, True
+        
+        similar = self._semantic_lookup(prompt, step)
+        if similar is not None:
+            if on_text:
+                on_text(similar)
+            return similar, provider, model, True
+        if self.response_cache is not None and self.response_cache.replay:
+            raise RuntimeError("LLM cache miss in replay mode")
+        
+        started = time.monotonic()
+        try:
+            if on_text:
+                def forward(text: str):
+                    trace.mark_first_byte()
+                    on_text(text)
+                text, response = self._stream_llm(provider, model, prompt, max_tokens, forward)
+            elif provider == 'anthropic':
+                response = self.anthropic_client.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    messages=anthropic_messages(prompt)
+                )
+                text = response.content[0].text
+            else:
+                response = self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt_text(prompt)}],
+                    max_tokens=max_tokens,
+                    **openai_cache_kwargs(prompt)
+                )
+                text = response.choices[0].message.content
+        except Exception:
+            trace.add_attempt(provider, model, 'error', latency=time.monotonic() - started)
+            raise
+        trace.add_attempt(provider, model, 'ok', latency=time.monotonic() - started, response=response)
+        self.prompt_cache_stats.record(provider, cache_usage(response))
+        
+        if self.response_cache is not None:
+            self.response_cache.put(key, provider, model, model, text)
+        self._semantic_store(prompt, step, text)
+        return text, provider, model, False
+    
+    def _stream_llm(self, provider: str, model: str, prompt: Prompt, max_tokens: int,
+                    on_text: Callable[[str], None]) -> Tuple[str, Any]:
+        """Streamed completion; returns the full text and the object carrying usage once the stream ends"""
+        parts = []
+        final = None
+        if provider == 'anthropic':
+            with self.anthropic_client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                messages=anthropic_messages(prompt)
+            ) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    on_text(text)
+                final = stream.get_final_message()
+        else:
+            stream = self.openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt_text(prompt)}],
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+                **openai_cache_kwargs(prompt)
             )
-            result = self._parse_json_response(response.choices[0].message.content)
-            return result if isinstance(result, list) else [result]
+            for chunk in stream:
+                if chunk.usage:
+                    final = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    on_text(chunk.choices[0].delta.content)
+        return "".join(parts), final
     
-    def _collect_code_samples(self, repo_path: Path) -> str:
-        """Collect representative code samples for LLM analysis"""
-        code_samples = []
-        
-        # Priority file patterns for game analysis
-        priority_patterns = [
-            '**/player*.gd', '**/player*.cs', '**/player*.py',
-            '**/game*.gd', '**/game*.cs', '**/game*.py',
-            '**/main*.gd', '**/main*.cs', '**/main*.py',
-            '**/combat*.gd', '**/combat*.cs', '**/combat*.py',
-            '**/level*.gd', '**/level*.cs', '**/level*.py'
-        ]
+    @staticmethod
+    def _semantic_namespace(prompt: Prompt, step: str) -> str:
+        """Step name plus a hash of the per-call instructions, which must match exactly
         
-        for pattern in priority_patterns:
-            for file_path in repo_path.glob(pattern):
-                if file_path.is_file():
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            if len(content) > 100:  # Skip tiny files
-                                code_samples.append(f"\n--- {file_path.name} ---\n{content[:2000]}")
-                                if len(code_samples) >= 10:  # Limit for token efficiency
-                                    break
-                    except (UnicodeDecodeError, Exception):
-                        continue
-            if len(code_samples) >= 10:
-                break
-        
-        # Fallback: get any code files
-        if not code_samples:
-            for ext in ['.gd', '.cs', '.py', '.js']:
-                for file_path in repo_path.rglob(f'*{ext}'):
-                    if file_path.is_file():
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                if len(content) > 100:
-                                    code_samples.append(f"\n--- {file_path.name} ---\n{content[:1500]}")
-                                    if len(code_samples) >= 8:
-                                        break
-                        except (UnicodeDecodeError, Exception):
-                            continue
-                if code_samples:
-                    break
-        
-        return '\n'.join(code_samples)
-    
-    def _collect_visual_assets(self, repo_path: Path) -> str:
-        """Collect information about visual assets for LLM analysis"""
-        asset_info = []
+        Steps share most of their context, so similarity alone cannot tell
+        one step's prompt from another's; only the context may differ.
+        """
+        if not isinstance(prompt, CachedPrompt):
+            return step
+        return f"{step}:{hashlib.sha256(prompt.suffix.encode('utf-8')).hexdigest()[:16]}"
+    
+    def _semantic_lookup(self, prompt: Prompt, step: str) -> Optional[str]:
+        """Stored analysis of a near-identical prompt for the same step, if any"""
+        if self.semantic_cache is None:
+            return None
+        hit = self.semantic_cache.lookup(prompt_text(prompt), namespace=self._semantic_namespace(prompt, step))
+        if hit is None:
+            return None
+        content, similarity = hit
+        print(f"♻️ Reusing cached analysis (similarity {similarity:.3f})")
+        return content
+    
+    def _semantic_store(self, prompt: Prompt, step: str, text: str):
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(prompt_text(prompt), text, namespace=self._semantic_namespace(prompt, step))
+    
+    def cache_stats(self) -> Dict:
+        """Response cache statistics for the current run"""
+        stats = self.response_cache.summary() if self.response_cache is not None else {"mode": "off"}
+        if self.semantic_cache is not None:
+            stats["semantic"] = self.semantic_cache.summary()
+        stats["prompt_cache"] = self.prompt_cache_stats.summary()
+        return stats
+    
+    def _collect_code_samples(self, repo_path: Path) -> str:
+        """Most relevant function-level code chunks within the code token budget"""
+        return pack_code_context(repo_path, self.code_token_budget, self.token_counter)
+    
+    def _collect_visual_assets(self, repo_path: Path, max_assets: int = 500) -> str:
+        """Compact table of visual assets within the asset token budget"""
+        assets = []
         
         # Find key visual files
         image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp']
@@ -350,21 +688,19 @@ class LLMGameAnalyzer:
                         with Image.open(file_path) as img:
                             width, height = img.size
                         
-                        size_mb = file_path.stat().st_size / (1024 * 1024)
-                        
-                        asset_info.append({
+                        assets.append({
                             'file': str(file_path.relative_to(repo_path)),
                             'dimensions': f'{width}x{height}',
-                            'size_mb': round(size_mb, 2),
+                            'size_kb': round(file_path.stat().st_size / 1024),
                             'category': self._categorize_asset_by_path(str(file_path))
                         })
                         
-                        if len(asset_info) >= 20:  # Limit for analysis
+                        if len(assets) >= max_assets:
                             break
                     except Exception:
                         continue
         
-        return json.dumps(asset_info, indent=2)
+        return pack_asset_table(assets, self.asset_token_budget, self.token_counter)
     
     def _categorize_asset_by_path(self, file_path: str) -> str:
         """Categorize asset based on file path"""
@@ -392,6 +728,10 @@ class LLMGameAnalyzer:
             elif '{' in response_text and '}' in response_text:
                 start = response_text.find('{')
                 end = response_text.rfind('}') + 1
+                # A bare array of objects (mini-game concepts) starts before its first '{'
+                array_start = response_text.find('[', 0, start)
+                if array_start != -1 and ']' in response_text[end:]:
+                    start, end = array_start, response_text.rfind(']') + 1
                 json_text = response_text[start:end]
             else:
                 json_text = response_text
@@ -406,7 +746,17 @@ class LLMGameAnalyzer:
 class LLMCodeGenerator:
     """Uses LLM to generate mini-game code based on analysis"""
     
-    def __init__(self, anthropic_api_key: str = None, openai_api_key: str = None):
+    def __init__(self, anthropic_api_key: str = None, openai_api_key: str = None,
+                 candidates: int = 3, validator: Optional[CodeValidator] = None, mode: str = 'full'):
+        """
+        mode 'full' asks for every file from scratch; 'template' asks for
+        parameters and diffs against the Quick Skirmish skeleton (see
+        code_templates), roughly a tenth of the output tokens.
+        """
+        if mode not in CODE_MODES:
+            raise ValueError(f"Unknown code generation mode {mode!r}; expected one of {CODE_MODES}")
+        self.mode = mode
+        self.templates = load_templates() if mode == 'template' else None
         self.anthropic_client = None
         self.openai_client = None
         
@@ -415,9 +765,21 @@ class LLMCodeGenerator:
         
         if openai_api_key:
             self.openai_client = openai.OpenAI(api_key=openai_api_key)
+        
+        # Candidates per concept for generate_validated_code, checked in one shared sandbox pool
+        self.candidates = candidates
+        self.validator = validator or CodeValidator()
     
-    def generate_mini_game_code(self, concept: Dict, assets_info: Dict) -> Dict[str, str]:
-        """Generate complete mini-game code using LLM"""
+    def generate_mini_game_code(self, concept: Dict, assets_info: Dict,
+                                on_file: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+        """Generate complete mini-game code using LLM
+        
+        With on_file the completion is streamed and each file is reported
+        as soon as its block is complete; on_file may raise to abandon the
+        candidate mid-stream.
+        """
+        if self.mode == 'template':
+            return self._generate_from_templates(concept, assets_info, on_file)
         
         prompt = f"""
         You are an expert game developer. Generate a complete, functional mini-game 
@@ -446,9 +808,12 @@ class LLMCodeGenerator:
         Make sure the code is complete and functional.
         """
         
+        if on_file is not None and (self.anthropic_client or self.openai_client):
+            return self._stream_code(prompt, on_file)
+        
         if self.anthropic_client:
             response = self.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
+                model=ANALYZER_CLAUDE_MODEL,
                 max_tokens=4000,
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -456,45 +821,124 @@ class LLMCodeGenerator:
         
         elif self.openai_client:
             response = self.openai_client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+                model=ANALYZER_GPT_MODEL,
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=4000
             )
             return self._parse_code_response(response.choices[0].message.content)
     
-    def _parse_code_response(self, response_text: str) -> Dict[str, str]:
-        """Parse code files from LLM response"""
+    def _generate_from_templates(self, concept: Dict, assets_info: Dict,
+                                 on_file: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+        """Template mode: parameters + diffs from the LLM, applied to the skeleton locally"""
+        prompt = build_template_prompt(concept, assets_info, self.templates)
+        
+        if self.anthropic_client:
+            response = self.anthropic_client.messages.create(
+                model=ANALYZER_CLAUDE_MODEL,
+                max_tokens=TEMPLATE_MAX_TOKENS,
+                messages=anthropic_messages(prompt)
+            )
+            text = response.content[0].text
+        elif self.openai_client:
+            response = self.openai_client.chat.completions.create(
+                model=ANALYZER_GPT_MODEL,
+                messages=[{"role": "user", "content": prompt_text(prompt)}],
+                max_tokens=TEMPLATE_MAX_TOKENS,
+                **openai_cache_kwargs(prompt)
+            )
+            text = response.choices[0].message.content
+        else:
+            return {"error": "No LLM client configured"}
+        
         try:
-            # Try to find JSON block first
-            if '```json' in response_text:
-                start = response_text.find('```json') + 7
-                end = response_text.find('```', start)
-                json_text = response_text[start:end].strip()
-                return json.loads(json_text)
-            
-            # Fallback: extract code blocks manually
-            files = {}
-            lines = response_text.split('\n')
-            current_file = None
-            current_code = []
-            
-            for line in lines:
-                if line.startswith('```python') and any(fname in line for fname in ['main.py', 'game_engine.py', 'ui_renderer.py', 'asset_manager.py']):
-                    if current_file:
-                        files[current_file] = '\n'.join(current_code)
-                    current_file = line.split('# ')[-1] if '# ' in line else 'main.py'
-                    current_code = []
-                elif line.startswith('```') and current_file:
-                    files[current_file] = '\n'.join(current_code)
-                    current_file = None
-                    current_code = []
-                elif current_file:
-                    current_code.append(line)
-            
-            if current_file and current_code:
-                files[current_file] = '\n'.join(current_code)
-            
-            return files
-            
-        except Exception as e:
-            return {"error": f"Failed to parse code response: {e}", "raw_response": response_text}
\ No newline at end of file
+            files = render_template_game(text, self.templates)
+        except PatchError as e:
+            return {"error": f"Template patch failed: {e}", "raw_response": text}
+        if on_file is not None:
+            for filename, code in files.items():
+                on_file(filename, code)
+        return files
+    
+    def _stream_code(self, prompt: str, on_file: Callable[[str, str], None]) -> Dict[str, str]:
+        """Stream the completion through the multi-file parser"""
+        parser = CodeResponseParser(on_file=on_file)
+        if self.anthropic_client:
+            with self.anthropic_client.messages.stream(
+                model=ANALYZER_CLAUDE_MODEL,
+                max_tokens=4000,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                for text in stream.text_stream:
+                    parser.feed(text)
+        else:
+            stream = self.openai_client.chat.completions.create(
+                model=ANALYZER_GPT_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=4000,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parser.feed(chunk.choices[0].delta.content)
+        files = parser.close()
+        return files if files else {"error": "No code files found in response"}
+    
+    def generate_validated_code(self, concept: Dict, assets_info: Dict,
+                                candidates: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Generate-and-verify: request several candidates concurrently,
+        validate each in the sandbox (syntax, import, headless run) as soon
+        as it arrives, and keep the valid one with the lowest mean frame
+        time. Returns {"error": ..., "validation": [...]} if none passes.
+        
+        Files are syntax-checked while the rest of the candidate is still
+        streaming, and a candidate with a broken file is abandoned there.
+        """
+        candidates = candidates or self.candidates
+        name = concept.get('concept_name', 'concept')
+        reports = []
+        validations = []
+        
+        def reject_broken(filename: str, code: str):
+            error = check_syntax({filename: code})
+            if error is not None:
+                raise CandidateRejected(error)
+        
+        with ThreadPoolExecutor(max_workers=candidates, thread_name_prefix="codegen") as executor:
+            generations = [executor.submit(self.generate_mini_game_code, concept, assets_info, reject_broken)
+                           for _ in range(candidates)]
+            for future in as_completed(generations):
+                try:
+                    files = future.result()
+                except CandidateRejected as e:
+                    reports.append({"valid": False, "stage": "syntax", "error": str(e)})
+                    continue
+                except Exception as e:
+                    reports.append({"valid": False, "stage": "generate", "error": str(e)})
+                    continue
+                if not files or "error" in files:
+                    reports.append({"valid": False, "stage": "generate",
+                                    "error": (files or {}).get("error", "no LLM client")})
+                    continue
+                validations.append((files, self.validator.submit(files)))
+        
+        best = None
+        for files, future in validations:
+            result = future.result()
+            reports.append(result.as_dict())
+            if result.valid and (best is None or result.mean_frame_ms < best[1].mean_frame_ms):
+                best = (files, result)
+        
+        if best is None:
+            print(f"❌ {name}: none of {candidates} candidates passed validation")
+            return {"error": f"No valid candidate out of {candidates}", "validation": reports}
+        print(f"🧪 {name}: {sum(report['valid'] for report in reports)}/{candidates} candidates valid, "
+              f"kept {best[1].mean_frame_ms:.2f} ms/frame")
+        return best[0]
+    
+    def _parse_code_response(self, response_text: str) -> Dict[str, str]:
+        """Parse code files from LLM response (fenced blocks, headings or JSON; see CodeResponseParser)"""
+        files = parse_code_response(response_text)
+        if not files:
+            return {"error": "No code files found in response", "raw_response": response_text}
+        return files
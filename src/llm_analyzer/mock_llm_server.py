@@ -0,0 +1,439 @@
+"""
+Mock LLM Server
+
+Local stand-in for the Anthropic Messages and OpenAI Chat Completions
+HTTP APIs, for exercising the LLM clients offline. It simulates latency
+(with an optional slow tail), 429 rate limits (with Retry-After) and 529
+overloads, and answers
+"stream": true requests with server-sent events in each provider's format.
+It also emulates the Anthropic Message Batches API and the OpenAI Files +
+Batch API; batches finish `batch_latency` seconds after submission, with
+`batch_error_prob` of their requests errored.
+
+Prompt caching is simulated as well: Anthropic cache_control breakpoints
+and OpenAI automatic prefix caching (prompts over ~1024 tokens, in
+128-token steps) report cache read/write tokens in `usage`.
+
+Point the SDKs at it with:
+    anthropic_base_url = server.url
+    openai_base_url = server.url + "/v1"
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from typing import Callable, Dict, List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def default_responder(prompt: str) -> str:
+    """Echo a small JSON document so callers can parse the reply"""
+    return json.dumps({"echo": prompt[:80], "length": len(prompt)})
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Clients that hang up (e.g. a cancelled hedge) are expected, not errors"""
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class MockLLMServer:
+    """Threaded HTTP server emulating LLM provider endpoints"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.05, latency_jitter: float = 0.0,
+                 tail_prob: float = 0.0, tail_latency: float = 0.0,
+                 rate_limit_prob: float = 0.0, overload_prob: float = 0.0,
+                 retry_after: float = 0.1, responder: Callable[[str], str] = default_responder,
+                 stream_chunk_size: int = 16, stream_delay: float = 0.0,
+                 batch_latency: float = 0.5, batch_error_prob: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.tail_prob = tail_prob        # chance a request takes tail_latency instead
+        self.tail_latency = tail_latency
+        self.rate_limit_prob = rate_limit_prob
+        self.overload_prob = overload_prob
+        self.retry_after = retry_after
+        self.responder = responder
+        self.stream_chunk_size = stream_chunk_size
+        self.stream_delay = stream_delay  # seconds between streamed chunks
+        self.batch_latency = batch_latency
+        self.batch_error_prob = batch_error_prob
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, int] = {"requests": 0, "rate_limited": 0, "overloaded": 0, "ok": 0,
+                                      "batches": 0, "batch_requests": 0}
+        self.batches: Dict[str, Dict] = {}
+        self.files: Dict[str, bytes] = {}
+        self.prompt_cache: set = set()  # hashes of cached prompt prefixes
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockLLMServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockLLMServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _draw_outcome(self) -> str:
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self.rng.random()
+            delay = self.latency + self.rng.uniform(0, self.latency_jitter)
+            if self.rng.random() < self.tail_prob:
+                delay = self.tail_latency
+            if roll < self.rate_limit_prob:
+                outcome = "rate_limited"
+            elif roll < self.rate_limit_prob + self.overload_prob:
+                outcome = "overloaded"
+            else:
+                outcome = "ok"
+            self.stats[outcome] += 1
+        time.sleep(delay)
+        return outcome
+
+    def _cache_lookup(self, prefixes: List[str]) -> int:
+        """Length of the longest prefix already cached; caches all of them"""
+        hit = 0
+        with self._lock:
+            for prefix in prefixes:
+                digest = hashlib.sha256(prefix.encode()).hexdigest()
+                if digest in self.prompt_cache:
+                    hit = max(hit, len(prefix))
+                self.prompt_cache.add(digest)
+        return hit
+
+    def _usage(self, request: Dict, prompt: str, anthropic_format: bool) -> Dict[str, int]:
+        """Input token usage with simulated prompt caching (~4 chars per token)"""
+        if anthropic_format:
+            prefixes, text = [], ""
+            for message in request.get("messages", []):
+                content = message.get("content", "")
+                blocks = [{"text": content}] if isinstance(content, str) else content
+                for block in blocks:
+                    text += block.get("text", "")
+                    if block.get("cache_control"):
+                        prefixes.append(text)
+            cached = max(prefixes, key=len) if prefixes else ""
+            read = self._cache_lookup(prefixes)
+            return {"input_tokens": (len(text) - len(cached)) // 4,
+                    "cache_read_input_tokens": read // 4,
+                    "cache_creation_input_tokens": (len(cached) - read) // 4}
+        step = 128 * 4
+        boundaries = [prompt[:end] for end in range(1024 * 4, len(prompt) + 1, step)]
+        read = self._cache_lookup(boundaries)
+        return {"prompt_tokens": len(prompt) // 4, "prompt_tokens_details": {"cached_tokens": read // 4}}
+
+    def _create_batch(self, provider: str, requests: List[Dict], **extra) -> Dict:
+        batch_id = ("msgbatch_" if provider == 'anthropic' else "batch_") + uuid.uuid4().hex[:16]
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["batch_requests"] += len(requests)
+            self.batches[batch_id] = {"id": batch_id, "provider": provider, "requests": requests,
+                                      "created": time.time(), "cancelled": False, "results": None, **extra}
+        return self.batches[batch_id]
+
+    def _batch_finished(self, batch: Dict) -> bool:
+        """Finished batches get their results computed once"""
+        finished = batch["cancelled"] or time.time() - batch["created"] >= self.batch_latency
+        if finished and batch["results"] is None:
+            results = []
+            for request in batch["requests"]:
+                with self._lock:
+                    errored = batch["cancelled"] or self.rng.random() < self.batch_error_prob
+                if errored:
+                    results.append((request["custom_id"], None, None))
+                else:
+                    params = request.get("params") or request.get("body") or {}
+                    prompt = _prompt_text(params.get("messages", []))
+                    results.append((request["custom_id"], prompt, self.responder(prompt)))
+            batch["results"] = results
+        return finished
+
+    def _anthropic_batch_json(self, batch: Dict) -> Dict:
+        finished = self._batch_finished(batch)
+        results = batch["results"] or []
+        succeeded = sum(1 for _, _, text in results if text is not None)
+        created = datetime.fromtimestamp(batch["created"], timezone.utc)
+        return {
+            "id": batch["id"], "type": "message_batch",
+            "processing_status": "ended" if finished else "in_progress",
+            "request_counts": {
+                "processing": 0 if finished else len(batch["requests"]),
+                "succeeded": succeeded if finished else 0,
+                "errored": (len(results) - succeeded) if finished and not batch["cancelled"] else 0,
+                "canceled": (len(results) - succeeded) if finished and batch["cancelled"] else 0,
+                "expired": 0,
+            },
+            "created_at": created.isoformat(),
+            "expires_at": (created + timedelta(hours=24)).isoformat(),
+            "ended_at": datetime.now(timezone.utc).isoformat() if finished else None,
+            "archived_at": None, "cancel_initiated_at": None,
+            "results_url": f"{self.url}/v1/messages/batches/{batch['id']}/results" if finished else None,
+        }
+
+    def _openai_batch_json(self, batch: Dict) -> Dict:
+        finished = self._batch_finished(batch)
+        if finished and "output_file_id" not in batch:
+            lines = []
+            for custom_id, prompt, text in batch["results"]:
+                if text is None:
+                    response = {"status_code": 529, "request_id": "req_mock", "body": {
+                        "error": {"message": "Overloaded", "type": "server_error"}}}
+                else:
+                    response = {"status_code": 200, "request_id": "req_mock", "body": {
+                        "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                        "model": "mock", "choices": [{"index": 0, "finish_reason": "stop",
+                                                      "message": {"role": "assistant", "content": text}}],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                                  "total_tokens": len(prompt) // 4 + len(text) // 4}}}
+                lines.append(json.dumps({"id": "batch_req_mock", "custom_id": custom_id, "response": response}))
+            batch["output_file_id"] = "file-" + uuid.uuid4().hex[:16]
+            self.files[batch["output_file_id"]] = "\n".join(lines).encode()
+        succeeded = sum(1 for _, _, text in batch["results"] or [] if text is not None)
+        return {
+            "id": batch["id"], "object": "batch", "endpoint": batch["endpoint"],
+            "input_file_id": batch["input_file_id"], "completion_window": "24h",
+            "status": ("cancelled" if batch["cancelled"] else "completed") if finished else "in_progress",
+            "output_file_id": batch.get("output_file_id"), "error_file_id": None,
+            "created_at": int(batch["created"]),
+            "request_counts": {"total": len(batch["requests"]), "completed": succeeded if finished else 0,
+                               "failed": (len(batch["requests"]) - succeeded) if finished else 0},
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # keep benchmark output clean
+
+            def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _read_body(self) -> bytes:
+                length = int(self.headers.get("Content-Length", 0))
+                return self.rfile.read(length)
+
+            def _not_found(self):
+                self._send_json(404, {"error": {"type": "not_found", "message": self.path}})
+
+            def do_POST(self):
+                body = self._read_body()
+                path = self.path.split("?")[0]
+                if path.endswith("/v1/files"):
+                    self._upload_file(body)
+                    return
+                request = json.loads(body or b"{}")
+                if path.endswith("/v1/messages"):
+                    self._handle(request, anthropic_format=True)
+                elif path.endswith("/chat/completions"):
+                    self._handle(request, anthropic_format=False)
+                elif path.endswith("/v1/messages/batches"):
+                    batch = server._create_batch('anthropic', request.get("requests", []))
+                    self._send_json(200, server._anthropic_batch_json(batch))
+                elif path.endswith("/v1/batches"):
+                    lines = server.files.get(request.get("input_file_id"), b"").decode().splitlines()
+                    batch = server._create_batch('openai', [json.loads(line) for line in lines if line.strip()],
+                                                 endpoint=request.get("endpoint"),
+                                                 input_file_id=request.get("input_file_id"))
+                    self._send_json(200, server._openai_batch_json(batch))
+                elif path.endswith("/cancel"):
+                    batch = server.batches.get(path.split("/")[-2])
+                    if batch is None:
+                        self._not_found()
+                        return
+                    batch["cancelled"] = True
+                    to_json = server._anthropic_batch_json if batch["provider"] == 'anthropic' else server._openai_batch_json
+                    self._send_json(200, to_json(batch))
+                else:
+                    self._not_found()
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].rstrip("/").split("/")
+                if "files" in parts and parts[-1] == "content":
+                    content = server.files.get(parts[-2])
+                    if content is None:
+                        self._not_found()
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                    return
+
+                batch_id = parts[-2] if parts[-1] == "results" else parts[-1]
+                batch = server.batches.get(batch_id)
+                if batch is None:
+                    self._not_found()
+                elif parts[-1] == "results":
+                    self._send_anthropic_results(batch)
+                elif batch["provider"] == 'anthropic':
+                    self._send_json(200, server._anthropic_batch_json(batch))
+                else:
+                    self._send_json(200, server._openai_batch_json(batch))
+
+            def _upload_file(self, body: bytes):
+                """multipart/form-data upload (OpenAI Files API)"""
+                message = BytesParser(policy=default_policy).parsebytes(
+                    b"Content-Type: " + self.headers.get("Content-Type", "").encode() + b"\r\n\r\n" + body
+                )
+                content = b""
+                filename = "upload.jsonl"
+                for part in message.iter_parts():
+                    if part.get_param("name", header="content-disposition") == "file":
+                        content = part.get_payload(decode=True) or b""
+                        filename = part.get_filename() or filename
+                file_id = "file-" + uuid.uuid4().hex[:16]
+                server.files[file_id] = content
+                self._send_json(200, {"id": file_id, "object": "file", "bytes": len(content),
+                                      "created_at": int(time.time()), "filename": filename,
+                                      "purpose": "batch", "status": "processed"})
+
+            def _send_anthropic_results(self, batch: Dict):
+                if not server._batch_finished(batch):
+                    self._send_json(400, {"type": "error", "error": {
+                        "type": "invalid_request_error", "message": "batch still processing"}})
+                    return
+                lines = []
+                for custom_id, prompt, text in batch["results"]:
+                    if text is None:
+                        result = {"type": "canceled"} if batch["cancelled"] else {"type": "errored", "error": {
+                            "type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}}
+                    else:
+                        result = {"type": "succeeded", "message": {
+                            "id": "msg_mock", "type": "message", "role": "assistant", "model": "mock",
+                            "content": [{"type": "text", "text": text}],
+                            "stop_reason": "end_turn", "stop_sequence": None,
+                            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}}}
+                    lines.append(json.dumps({"custom_id": custom_id, "result": result}))
+                payload = "\n".join(lines).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/binary")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self, request: Dict, anthropic_format: bool):
+                outcome = server._draw_outcome()
+                if outcome == "rate_limited":
+                    self._send_json(429, {"type": "error", "error": {
+                        "type": "rate_limit_error", "message": "rate_limit exceeded"}},
+                        {"retry-after": str(server.retry_after)})
+                    return
+                if outcome == "overloaded":
+                    self._send_json(529, {"type": "error", "error": {
+                        "type": "overloaded_error", "message": "Overloaded"}})
+                    return
+
+                prompt = _prompt_text(request.get("messages", []))
+                text = server.responder(prompt)
+                usage = server._usage(request, prompt, anthropic_format)
+                output_tokens = len(text) // 4
+                if request.get("stream"):
+                    self._stream(request, text, usage, output_tokens, anthropic_format)
+                elif anthropic_format:
+                    self._send_json(200, {
+                        "id": "msg_mock", "type": "message", "role": "assistant",
+                        "model": request.get("model", "mock"),
+                        "content": [{"type": "text", "text": text}],
+                        "stop_reason": "end_turn", "stop_sequence": None,
+                        "usage": {**usage, "output_tokens": output_tokens}
+                    })
+                else:
+                    self._send_json(200, {
+                        "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                        "model": request.get("model", "mock"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": text}}],
+                        "usage": {**usage, "completion_tokens": output_tokens,
+                                  "total_tokens": usage["prompt_tokens"] + output_tokens}
+                    })
+
+            def _stream(self, request: Dict, text: str, usage: Dict[str, int], output_tokens: int,
+                        anthropic_format: bool):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                model = request.get("model", "mock")
+                size = max(1, server.stream_chunk_size)
+                chunks = [text[i:i + size] for i in range(0, len(text), size)]
+
+                def event(data: Dict, name: Optional[str] = None):
+                    lines = (f"event: {name}\n" if name else "") + f"data: {json.dumps(data)}\n\n"
+                    self.wfile.write(lines.encode())
+                    self.wfile.flush()
+
+                if anthropic_format:
+                    event({"type": "message_start", "message": {
+                        "id": "msg_mock", "type": "message", "role": "assistant", "model": model,
+                        "content": [], "stop_reason": None, "stop_sequence": None,
+                        "usage": {**usage, "output_tokens": 0}}}, "message_start")
+                    event({"type": "content_block_start", "index": 0,
+                           "content_block": {"type": "text", "text": ""}}, "content_block_start")
+                    for chunk in chunks:
+                        time.sleep(server.stream_delay)
+                        event({"type": "content_block_delta", "index": 0,
+                               "delta": {"type": "text_delta", "text": chunk}}, "content_block_delta")
+                    event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+                    event({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                           "usage": {"output_tokens": output_tokens}}, "message_delta")
+                    event({"type": "message_stop"}, "message_stop")
+                else:
+                    base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                            "created": int(time.time()), "model": model}
+                    for chunk in chunks:
+                        time.sleep(server.stream_delay)
+                        event({**base, "choices": [{"index": 0, "finish_reason": None,
+                                                    "delta": {"role": "assistant", "content": chunk}}]})
+                    event({**base, "choices": [{"index": 0, "finish_reason": "stop", "delta": {}}]})
+                    event({**base, "choices": [], "usage": {
+                        **usage, "completion_tokens": output_tokens,
+                        "total_tokens": usage["prompt_tokens"] + output_tokens}})
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+
+        return Handler
+
+
+def _prompt_text(messages) -> str:
+    """Flatten chat messages (string or content-block form) into text"""
+    parts = []
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+    return "\n".join(parts)
@@ -0,0 +1,269 @@
+"""
+Analysis Pipeline Scheduler
+
+The LLM analysis is a DAG of named nodes. Each node declares the outputs
+it consumes (by node name) and produces one JSON-serializable output
+under its own name:
+
+    repository_context -> code_analysis   -> engagement -> concepts -> code_generation[i]
+                       -> visual_analysis ->
+
+The scheduler runs every node whose inputs are available on a thread
+pool, so independent nodes (code and visual analysis, code generation for
+each concept) run concurrently. A map node (map_over=<input>) fans out
+into one task per element of that input's list.
+
+With a PipelineStore each completed node (and each map element) is
+written to disk together with a fingerprint of its inputs. A later run
+reuses every stored output whose inputs are unchanged, so a pipeline that
+failed halfway resumes from the failed nodes instead of starting over.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .telemetry import pipeline_stage
+
+
+@dataclass
+class PipelineNode:
+    """One step of the pipeline; its output is published under name
+
+    func is called with the declared inputs as keyword arguments. For a
+    map node the map_over input is replaced by a single element of that
+    list, func runs once per element, and the node's output is the list
+    of results.
+    """
+    name: str
+    func: Callable[..., Any]
+    inputs: List[str] = field(default_factory=list)
+    map_over: Optional[str] = None
+    persist: bool = True        # False for cheap, deterministic nodes that should always be recomputed
+    stage: Optional[str] = None  # telemetry stage label (defaults to name)
+
+
+class PipelineError(Exception):
+    """Raised by PipelineRun.raise_for_failure when a node failed"""
+
+
+@dataclass
+class PipelineRun:
+    """Outcome of one scheduler run"""
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    failed: Dict[str, BaseException] = field(default_factory=dict)  # node or node.<index> -> error
+    skipped: List[str] = field(default_factory=list)  # not run because an input failed
+    reused: List[str] = field(default_factory=list)   # loaded from the store
+    ran: List[str] = field(default_factory=list)
+    partial: Dict[str, List[Any]] = field(default_factory=dict)  # map node with failed elements -> results (None if failed)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.skipped
+
+    def raise_for_failure(self):
+        if self.failed:
+            task, error = next(iter(self.failed.items()))
+            raise PipelineError(f"Pipeline node {task} failed: {error}") from error
+        if self.skipped:
+            raise PipelineError(f"Pipeline nodes not run: {', '.join(self.skipped)}")
+
+
+def fingerprint(values: Any) -> str:
+    """Content hash of a node's inputs; a stored output is reused only if it matches"""
+    payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PipelineStore:
+    """Node outputs as one JSON file per node (or map element) in a run directory"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, task: str) -> Path:
+        return self.directory / f"{task}.json"
+
+    def load(self, task: str, inputs_hash: str) -> Tuple[bool, Any]:
+        """(True, output) if task completed earlier with the same inputs"""
+        path = self._path(task)
+        if not path.exists():
+            return False, None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False, None
+        if entry.get("inputs") != inputs_hash:
+            return False, None
+        return True, entry.get("output")
+
+    def save(self, task: str, inputs_hash: str, output: Any):
+        # Write-then-rename so an interrupted run never leaves a truncated entry behind
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(task)
+        temp_path = path.with_suffix(".json.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump({"inputs": inputs_hash, "output": output}, f, indent=2)
+        os.replace(temp_path, path)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PipelineScheduler:
+    """Runs a DAG of PipelineNodes concurrently, persisting and reusing outputs"""
+
+    def __init__(self, nodes: Iterable[PipelineNode], store: Optional[PipelineStore] = None,
+                 max_workers: int = 4):
+        self.nodes: Dict[str, PipelineNode] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate pipeline node {node.name!r}")
+            if node.map_over is not None and node.map_over not in node.inputs:
+                raise ValueError(f"Node {node.name!r} maps over {node.map_over!r}, which is not one of its inputs")
+            self.nodes[node.name] = node
+        for node in self.nodes.values():
+            missing = [name for name in node.inputs if name not in self.nodes]
+            if missing:
+                raise ValueError(f"Node {node.name!r} depends on unknown node(s) {missing}")
+        self.order = self._topological_order()
+        self.store = store
+        self.max_workers = max_workers
+
+    def _topological_order(self) -> List[str]:
+        order, state = [], {}  # state: 1 = visiting, 2 = done
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Pipeline cycle: {' -> '.join(path + (name,))}")
+            state[name] = 1
+            for dependency in self.nodes[name].inputs:
+                visit(dependency, path + (name,))
+            state[name] = 2
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, ())
+        return order
+
+    def _required(self, targets: Optional[Iterable[str]]) -> Set[str]:
+        """targets and everything they depend on (all nodes when targets is None)"""
+        if targets is None:
+            return set(self.nodes)
+        required, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.nodes:
+                raise ValueError(f"Unknown pipeline node {name!r}")
+            if name not in required:
+                required.add(name)
+                stack.extend(self.nodes[name].inputs)
+        return required
+
+    def run(self, targets: Optional[Iterable[str]] = None) -> PipelineRun:
+        """Run the nodes needed for targets; failures are collected in the result, not raised"""
+        required = self._required(targets)
+        pending = [name for name in self.order if name in required]
+        run = PipelineRun()
+        futures: Dict[Future, Tuple[str, Optional[int], str]] = {}  # future -> (node, index, inputs hash)
+        mapped: Dict[str, List[Any]] = {}     # map node -> results so far
+        remaining: Dict[str, int] = {}        # map node -> unfinished elements
+
+        def element_done(name: str):
+            remaining[name] -= 1
+            if remaining[name]:
+                return
+            del remaining[name]
+            results = mapped.pop(name)
+            if any(task.startswith(f"{name}.") for task in run.failed):
+                # Finished elements stay stored; a resumed run only redoes the failed ones
+                run.failed[name] = PipelineError(f"{name}: some elements failed")
+                run.partial[name] = results
+            else:
+                run.outputs[name] = results
+
+        def start(node: PipelineNode, index: Optional[int], kwargs: Dict[str, Any], executor: ThreadPoolExecutor):
+            task = node.name if index is None else f"{node.name}.{index}"
+            inputs_hash = fingerprint(kwargs)
+            if node.persist and self.store is not None:
+                found, output = self.store.load(task, inputs_hash)
+                if found:
+                    run.reused.append(task)
+                    return output, True
+            # Copy the context so the worker sees the telemetry stage and any caller contextvars
+            context = contextvars.copy_context()
+            future = executor.submit(context.run, self._call, node, kwargs)
+            futures[future] = (node.name, index, inputs_hash)
+            return None, False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            while pending or futures:
+                # Launch every node whose inputs are all available
+                for name in list(pending):
+                    node = self.nodes[name]
+                    if any(dependency in run.failed or dependency in run.skipped for dependency in node.inputs):
+                        pending.remove(name)
+                        run.skipped.append(name)
+                        continue
+                    if not all(dependency in run.outputs for dependency in node.inputs):
+                        continue
+                    pending.remove(name)
+                    kwargs = {dependency: run.outputs[dependency] for dependency in node.inputs}
+                    if node.map_over is None:
+                        output, done = start(node, None, kwargs, executor)
+                        if done:
+                            run.outputs[name] = output
+                        continue
+                    items = kwargs[node.map_over]
+                    if not isinstance(items, list):
+                        run.failed[name] = TypeError(f"{node.map_over!r} is not a list")
+                        continue
+                    mapped[name] = [None] * len(items)
+                    remaining[name] = len(items) + 1  # held open until every element is started
+                    for index, item in enumerate(items):
+                        output, done = start(node, index, dict(kwargs, **{node.map_over: item}), executor)
+                        if done:
+                            mapped[name][index] = output
+                            element_done(name)
+                    element_done(name)
+                # Reused outputs may have made more nodes ready
+                if any(all(dependency in run.outputs for dependency in self.nodes[name].inputs) for name in pending):
+                    continue
+                if not futures:
+                    # Nothing running and nothing ready: the rest is blocked by failures
+                    run.skipped.extend(pending)
+                    break
+
+                finished, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, index, inputs_hash = futures.pop(future)
+                    node = self.nodes[name]
+                    task = name if index is None else f"{name}.{index}"
+                    error = future.exception()
+                    if error is not None:
+                        run.failed[task] = error
+                    else:
+                        output = future.result()
+                        run.ran.append(task)
+                        if node.persist and self.store is not None:
+                            self.store.save(task, inputs_hash, output)
+                        if index is None:
+                            run.outputs[name] = output
+                        else:
+                            mapped[name][index] = output
+                    if index is not None:
+                        element_done(name)
+        return run
+
+    @staticmethod
+    def _call(node: PipelineNode, kwargs: Dict[str, Any]) -> Any:
+        with pipeline_stage(node.stage or node.name):
+            return node.func(**kwargs)
@@ -0,0 +1,171 @@
+"""
+Provider Prompt Caching
+
+Prompts that share a large context (code samples, asset tables, earlier
+analysis results) are split into cacheable prefix blocks and a short
+per-call suffix, so providers can reuse the prefix instead of processing
+it again on every call:
+- Anthropic: explicit cache_control breakpoints on the prefix blocks
+  (up to four per request); reads are billed at a fraction of input
+- OpenAI: automatic prefix caching for prompts over ~1024 tokens, helped
+  by a stable prompt_cache_key derived from the first prefix block
+- Gemini: implicit caching, reported in usage metadata
+
+Cache read / write / uncached input tokens are taken from each response's
+usage and accumulated per provider.
+"""
+import hashlib
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Union
+
+MAX_CACHE_BREAKPOINTS = 4  # Anthropic limit per request
+BLOCK_SEPARATOR = "\n\n"
+
+
+@dataclass
+class CachedPrompt:
+    """A prompt as cacheable prefix blocks (most general first) plus a per-call suffix"""
+    prefix: List[str]
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        """The prompt as a single string (cache keys, token estimates, providers without blocks)"""
+        return BLOCK_SEPARATOR.join(self.prefix + [self.suffix])
+
+    @property
+    def prefix_key(self) -> str:
+        """Stable routing key for the shared context (OpenAI prompt_cache_key)"""
+        return hashlib.sha256(self.prefix[0].encode('utf-8')).hexdigest()[:32] if self.prefix else ""
+
+    def anthropic_content(self) -> List[Dict[str, Any]]:
+        """Content blocks with cache_control on the last (up to four) prefix blocks"""
+        first_marked = len(self.prefix) - MAX_CACHE_BREAKPOINTS
+        blocks = []
+        for index, text in enumerate(self.prefix):
+            block: Dict[str, Any] = {"type": "text", "text": text}
+            if index >= first_marked:
+                block["cache_control"] = {"type": "ephemeral"}
+            blocks.append(block)
+        blocks.append({"type": "text", "text": self.suffix})
+        return blocks
+
+
+Prompt = Union[str, CachedPrompt]
+
+
+def prompt_text(prompt: Prompt) -> str:
+    return prompt.text if isinstance(prompt, CachedPrompt) else prompt
+
+
+def anthropic_messages(prompt: Prompt) -> List[Dict[str, Any]]:
+    """Messages for the Anthropic API; cacheable prompts become content blocks"""
+    content = prompt.anthropic_content() if isinstance(prompt, CachedPrompt) else prompt
+    return [{"role": "user", "content": content}]
+
+
+def openai_cache_fields(prompt: Prompt) -> Dict[str, str]:
+    """Raw chat.completions body fields that keep a shared prefix on the same cache"""
+    if isinstance(prompt, CachedPrompt) and prompt.prefix:
+        return {"prompt_cache_key": prompt.prefix_key}
+    return {}
+
+
+def openai_cache_kwargs(prompt: Prompt) -> Dict[str, Dict[str, str]]:
+    """SDK keyword arguments for openai_cache_fields
+
+    Sent through extra_body: openai releases older than the prompt_cache_key
+    parameter (llm_requirements.txt allows them) reject it as a keyword.
+    """
+    fields = openai_cache_fields(prompt)
+    return {"extra_body": fields} if fields else {}
+
+
+@dataclass
+class PromptCacheUsage:
+    """Input tokens of one call, split by provider-side prompt cache outcome"""
+    read_tokens: int = 0       # served from the cache (hits)
+    write_tokens: int = 0      # processed and written to the cache
+    uncached_tokens: int = 0   # processed without caching
+
+    @property
+    def hit_tokens(self) -> int:
+        return self.read_tokens
+
+    @property
+    def miss_tokens(self) -> int:
+        return self.write_tokens + self.uncached_tokens
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"read_tokens": self.read_tokens, "write_tokens": self.write_tokens,
+                "uncached_tokens": self.uncached_tokens}
+
+
+def cache_usage(response: Any) -> Optional[PromptCacheUsage]:
+    """Prompt cache token counts from an Anthropic, OpenAI or Gemini response (None without usage)"""
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        if hasattr(usage, 'input_tokens'):
+            # Anthropic: input_tokens excludes cache reads and writes
+            return PromptCacheUsage(
+                read_tokens=getattr(usage, 'cache_read_input_tokens', None) or 0,
+                write_tokens=getattr(usage, 'cache_creation_input_tokens', None) or 0,
+                uncached_tokens=usage.input_tokens or 0
+            )
+        prompt_tokens = getattr(usage, 'prompt_tokens', None)
+        if prompt_tokens is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached = getattr(details, 'cached_tokens', None) or 0
+            return PromptCacheUsage(read_tokens=cached, uncached_tokens=max(0, prompt_tokens - cached))
+    metadata = getattr(response, 'usage_metadata', None)
+    if metadata is not None:
+        prompt_tokens = getattr(metadata, 'prompt_token_count', None) or 0
+        cached = getattr(metadata, 'cached_content_token_count', None) or 0
+        return PromptCacheUsage(read_tokens=cached, uncached_tokens=max(0, prompt_tokens - cached))
+    return None
+
+
+@dataclass
+class _ProviderTotals:
+    calls: int = 0
+    read_tokens: int = 0
+    write_tokens: int = 0
+    uncached_tokens: int = 0
+    recent: Deque[Dict] = field(default_factory=lambda: deque(maxlen=50))
+
+
+class PromptCacheStats:
+    """Per-provider prompt cache hit / miss token counts"""
+
+    def __init__(self):
+        self._totals: Dict[str, _ProviderTotals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, usage: Optional[PromptCacheUsage]):
+        if usage is None:
+            return
+        with self._lock:
+            totals = self._totals.setdefault(provider, _ProviderTotals())
+            totals.calls += 1
+            totals.read_tokens += usage.read_tokens
+            totals.write_tokens += usage.write_tokens
+            totals.uncached_tokens += usage.uncached_tokens
+            totals.recent.append(usage.as_dict())
+
+    def summary(self) -> Dict[str, Dict]:
+        """Totals and hit rate (share of input tokens read from the cache) per provider"""
+        with self._lock:
+            summary = {}
+            for provider, totals in self._totals.items():
+                input_tokens = totals.read_tokens + totals.write_tokens + totals.uncached_tokens
+                summary[provider] = {
+                    "calls": totals.calls,
+                    "read_tokens": totals.read_tokens,
+                    "write_tokens": totals.write_tokens,
+                    "uncached_tokens": totals.uncached_tokens,
+                    "hit_rate": round(totals.read_tokens / input_tokens, 3) if input_tokens else 0.0,
+                    "recent": list(totals.recent),
+                }
+            return summary
@@ -0,0 +1,297 @@
+"""
+Provider Rate Limiter
+
+Proactive per-provider pacing for LLM calls:
+- token buckets for requests-per-minute and tokens-per-minute budgets
+- AIMD adaptive concurrency (additive increase on success,
+  multiplicative decrease on 429/overload)
+- Retry-After and provider rate-limit headers tighten the buckets
+- live metrics: queue depth, wait time, rejections
+
+One limiter per provider is shared by every client in the process, and
+state is guarded by a threading lock so sync (RobustLLMClient) and async
+(AsyncLLMClient) callers draw from the same budget.
+"""
+import asyncio
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+from dataclasses import dataclass
+
+from .prompt_cache import Prompt, prompt_text
+
+
+# Conservative defaults; override per account tier with configure_rate_limiter()
+DEFAULT_LIMITS = {
+    'anthropic': {'rpm': 50, 'tpm': 40_000, 'max_concurrency': 8},
+    'gemini': {'rpm': 150, 'tpm': 1_000_000, 'max_concurrency': 8},
+    'openai': {'rpm': 500, 'tpm': 30_000, 'max_concurrency': 16},
+}
+
+_SLOT_POLL_INTERVAL = 0.01
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+
+
+class TokenBucket:
+    """Continuously refilling bucket; not thread-safe on its own"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket, not forever
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Refund (positive) or charge (negative) after actual usage is known"""
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+    def cap(self, remaining: float, now: float):
+        """Server says only `remaining` is left in the current window"""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+    def set_rate_per_minute(self, limit: float):
+        self.capacity = float(limit)
+        self.refill_per_second = float(limit) / 60.0
+        self.tokens = min(self.tokens, self.capacity)
+
+
+@dataclass
+class Permit:
+    """Handle for one admitted request"""
+    provider: str
+    estimated_tokens: int
+    wait_time: float
+
+
+class ProviderRateLimiter:
+    """RPM/TPM token buckets plus AIMD concurrency for one provider"""
+
+    def __init__(self, provider: str, rpm: float, tpm: float, max_concurrency: int = 8,
+                 initial_concurrency: Optional[int] = None, min_concurrency: int = 1,
+                 default_cooldown: float = 10.0):
+        self.provider = provider
+        self.request_bucket = TokenBucket(rpm, rpm / 60.0)
+        self.token_bucket = TokenBucket(tpm, tpm / 60.0)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(initial_concurrency or max(min_concurrency, max_concurrency // 2))
+        self.default_cooldown = default_cooldown
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.queue_depth = 0
+        self.admitted = 0
+        self.rejections = 0  # 429s and overloads reported by the provider
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _try_admit(self, estimated_tokens: int) -> float:
+        """Admit now and return 0, or return seconds to wait before retrying"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.in_flight >= int(self.concurrency_limit):
+                return _SLOT_POLL_INTERVAL
+            wait = max(self.request_bucket.wait_time(1, now),
+                       self.token_bucket.wait_time(estimated_tokens, now))
+            if wait > 0:
+                return wait
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(estimated_tokens)
+            self.in_flight += 1
+            self.admitted += 1
+            return 0.0
+
+    def _enter_queue(self):
+        with self._lock:
+            self.queue_depth += 1
+
+    def _leave_queue(self, waited: float):
+        with self._lock:
+            self.queue_depth -= 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    async def acquire(self, estimated_tokens: int) -> Permit:
+        """Wait (without blocking the event loop) until the request fits the budget"""
+        start = time.monotonic()
+        self._enter_queue()
+        try:
+            while True:
+                wait = self._try_admit(estimated_tokens)
+                if wait == 0.0:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            waited = time.monotonic() - start
+            self._leave_queue(waited)
+        return Permit(self.provider, estimated_tokens, waited)
+
+    def acquire_sync(self, estimated_tokens: int) -> Permit:
+        """Blocking variant for threaded/synchronous callers"""
+        start = time.monotonic()
+        self._enter_queue()
+        try:
+            while True:
+                wait = self._try_admit(estimated_tokens)
+                if wait == 0.0:
+                    break
+                time.sleep(wait)
+        finally:
+            waited = time.monotonic() - start
+            self._leave_queue(waited)
+        return Permit(self.provider, estimated_tokens, waited)
+
+    def release(self, permit: Permit, outcome: str = 'ok', actual_tokens: Optional[int] = None,
+                headers: Optional[Mapping[str, str]] = None, retry_after: Optional[float] = None):
+        """Finish a request; outcome is 'ok', 'rate_limit', 'overloaded' or 'error'"""
+        with self._lock:
+            self.in_flight -= 1
+            if actual_tokens is not None:
+                self.token_bucket.adjust(permit.estimated_tokens - actual_tokens)
+
+            if outcome == 'ok':
+                # Additive increase: roughly +1 slot per window of successful requests
+                self.concurrency_limit = min(self.max_concurrency,
+                                             self.concurrency_limit + 1.0 / self.concurrency_limit)
+            elif outcome in ('rate_limit', 'overloaded'):
+                self.rejections += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+                if outcome == 'rate_limit':
+                    cooldown = retry_after if retry_after is not None else self.default_cooldown
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + cooldown)
+
+        if headers:
+            self.update_from_headers(headers)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Apply Retry-After and Anthropic/OpenAI rate-limit headers"""
+        lowered = {k.lower(): v for k, v in headers.items()}
+        now = time.monotonic()
+        with self._lock:
+            retry_after = _parse_seconds(lowered.get('retry-after'))
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+            for bucket, kind in ((self.request_bucket, 'requests'), (self.token_bucket, 'tokens')):
+                limit = _first(lowered, f'anthropic-ratelimit-{kind}-limit', f'x-ratelimit-limit-{kind}')
+                remaining = _first(lowered, f'anthropic-ratelimit-{kind}-remaining', f'x-ratelimit-remaining-{kind}')
+                reset = _first(lowered, f'anthropic-ratelimit-{kind}-reset', f'x-ratelimit-reset-{kind}')
+                if limit is not None:
+                    try:
+                        bucket.set_rate_per_minute(float(limit))
+                    except ValueError:
+                        pass
+                if remaining is not None:
+                    try:
+                        bucket.cap(float(remaining), now)
+                    except ValueError:
+                        continue
+                    if float(remaining) <= 0:
+                        reset_in = _parse_reset(reset)
+                        if reset_in is not None:
+                            self.blocked_until = max(self.blocked_until, now + reset_in)
+
+    def metrics(self) -> Dict:
+        """Live snapshot for dashboards and batch-run logs"""
+        now = time.monotonic()
+        with self._lock:
+            self.request_bucket._refill(now)
+            self.token_bucket._refill(now)
+            return {
+                "provider": self.provider,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "admitted": self.admitted,
+                "rejections": self.rejections,
+                "total_wait_s": round(self.total_wait, 3),
+                "mean_wait_s": round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+                "max_wait_s": round(self.max_wait, 3),
+                "requests_available": round(self.request_bucket.tokens, 1),
+                "tokens_available": round(self.token_bucket.tokens, 1),
+                "blocked_for_s": round(max(0.0, self.blocked_until - now), 3),
+            }
+
+
+_registry: Dict[str, ProviderRateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Process-wide limiter for a provider"""
+    with _registry_lock:
+        if provider not in _registry:
+            _registry[provider] = ProviderRateLimiter(provider, **DEFAULT_LIMITS.get(provider, DEFAULT_LIMITS['openai']))
+        return _registry[provider]
+
+
+def configure_rate_limiter(provider: str, rpm: float, tpm: float, max_concurrency: int = 8, **kwargs) -> ProviderRateLimiter:
+    """Replace the process-wide limiter for a provider (e.g. for a higher account tier)"""
+    with _registry_lock:
+        _registry[provider] = ProviderRateLimiter(provider, rpm, tpm, max_concurrency, **kwargs)
+        return _registry[provider]
+
+
+def estimate_tokens(prompt: Prompt, max_tokens: int) -> int:
+    """Budget estimate before the call: ~4 chars per input token plus the output cap"""
+    return len(prompt_text(prompt)) // 4 + max_tokens
+
+
+def retry_after_from_error(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    return _parse_seconds(response.headers.get('retry-after'))
+
+
+def _first(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    for name in names:
+        if name in headers:
+            return headers[name]
+    return None
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds until reset from an RFC 3339 timestamp (Anthropic) or '6m0s'-style duration (OpenAI)"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if parts and ''.join(n + u for n, u in parts) == value:
+        scale = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+        return sum(float(n) * scale[u] for n, u in parts)
+    try:
+        reset_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return _parse_seconds(value)
+    return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
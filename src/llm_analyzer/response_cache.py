@@ -0,0 +1,223 @@
+"""
+LLM Response Cache
+
+Persistent, content-addressed cache for LLM completions so re-running an
+analysis on the same repository does not pay for identical prompts
+again. Entries live in SQLite, keyed by a SHA-256 of
+(provider, model, prompt, max_tokens, temperature), with TTLs and LRU
+eviction by total byte size. A small in-process memo serves repeat hits
+without touching the database.
+
+Modes (LLM_CACHE_MODE environment variable or constructor argument):
+- read_write: normal caching (default)
+- replay: read-only; misses fail instead of calling a provider, for
+  offline tests against a recorded cache
+- off: no caching
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from pathlib import Path
+
+from .prompt_cache import Prompt, prompt_text
+
+
+# Anchored at the repository root, so the cache does not depend on the working directory
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[2] / "data" / "cache" / "llm_responses.sqlite"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MODES = ('read_write', 'replay', 'off')
+
+
+def cache_key(provider: str, model: str, prompt: Prompt, max_tokens: int, temperature: Optional[float]) -> str:
+    """Content address of one request"""
+    payload = json.dumps([provider, model, prompt_text(prompt), max_tokens, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL and byte-size LRU eviction"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, mode: str = 'read_write',
+                 ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES, memo_size: int = 1024):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {CACHE_MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memo_size = memo_size
+        self._memo: OrderedDict = OrderedDict()  # key -> (content, model_used, expires)
+        self._touched: Dict[str, float] = {}  # deferred last_access updates
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expired": 0}
+
+        if mode == 'replay':
+            uri = f"file:{self.path}?mode=ro"
+            self._db = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT,
+                    model TEXT,
+                    model_used TEXT,
+                    content TEXT,
+                    size INTEGER,
+                    created REAL,
+                    last_access REAL,
+                    expires REAL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+            self._db.commit()
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @classmethod
+    def from_env(cls) -> Optional['ResponseCache']:
+        """Cache configured by LLM_CACHE_MODE / LLM_CACHE_PATH; None when disabled"""
+        mode = os.getenv('LLM_CACHE_MODE', 'read_write')
+        if mode == 'off':
+            return None
+        path = Path(os.getenv('LLM_CACHE_PATH', str(DEFAULT_CACHE_PATH)))
+        if mode == 'replay' and not path.exists():
+            print(f"⚠️ LLM cache replay requested but {path} does not exist; caching disabled")
+            return None
+        return cls(path, mode=mode)
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == 'replay'
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """(content, model_used) for a live entry, else None"""
+        hit = self._lookup(key)
+        with self._lock:
+            self.stats["hits" if hit is not None else "misses"] += 1
+        return hit
+
+    def _lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        """get() without hit/miss accounting (callers count one lookup per request)"""
+        now = time.time()
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                if entry[2] >= now:
+                    self._memo.move_to_end(key)
+                    self._touched[key] = now
+                    return entry[0], entry[1]
+                del self._memo[key]
+
+            row = self._db.execute(
+                "SELECT content, model_used, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[2] < now:
+                if row is not None:
+                    self.stats["expired"] += 1
+                return None
+
+            self._remember(key, row)
+            self._touched[key] = now
+            return row[0], row[1]
+
+    def get_any(self, candidates: Iterable[Tuple[str, str, Optional[float]]],
+                prompt: Prompt, max_tokens: int) -> Optional[Tuple[str, str, str]]:
+        """First hit over (provider, model, temperature) candidates in routing order
+
+        Returns (provider, content, model_used). Counts one miss at most.
+        """
+        for provider, model, temperature in candidates:
+            hit = self._lookup(cache_key(provider, model, prompt, max_tokens, temperature))
+            if hit is not None:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return provider, hit[0], hit[1]
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, provider: str, model: str, model_used: str, content: str, ttl: Optional[float] = None):
+        """Store a successful response (no-op in replay mode)"""
+        if self.mode != 'read_write' or not content:
+            return
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        size = len(content.encode('utf-8'))
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, model_used, content, size, now, now, expires)
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            self._remember(key, (content, model_used, expires))
+            self.stats["writes"] += 1
+            self._flush_touched()
+            self._evict()
+            self._db.commit()
+
+    def put_response(self, provider: str, model: str, prompt: Prompt, max_tokens: int,
+                     temperature: Optional[float], model_used: str, content: str):
+        self.put(cache_key(provider, model, prompt, max_tokens, temperature), provider, model, model_used, content)
+
+    def _remember(self, key: str, entry):
+        self._memo[key] = (entry[0], entry[1], entry[2])
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                                 [(ts, key) for key, ts in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self):
+        """Drop expired rows, then least-recently-used rows until under max_bytes"""
+        now = time.time()
+        expired = self._db.execute("SELECT key, size FROM responses WHERE expires < ?", (now,)).fetchall()
+        if expired:
+            self._db.execute("DELETE FROM responses WHERE expires < ?", (now,))
+            self.total_bytes -= sum(size for _, size in expired)
+            self.stats["evictions"] += len(expired)
+
+        if self.total_bytes <= self.max_bytes:
+            return
+        victims = []
+        freed = 0
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if self.total_bytes - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        for (key,) in victims:
+            self._memo.pop(key, None)
+        self.total_bytes -= freed
+        self.stats["evictions"] += len(victims)
+
+    def close(self):
+        with self._lock:
+            if self.mode == 'read_write':
+                self._flush_touched()
+                self._db.commit()
+            self._db.close()
+
+    def summary(self) -> Dict:
+        """Run statistics for scripts and reports"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries_bytes": self.total_bytes,
+        }
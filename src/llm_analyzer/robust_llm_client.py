@@ -5,12 +5,41 @@ Handles API rate limits, overloads, and provides backup options.
 """
 import time
 import json
-from typing import Dict, Optional, List
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, List, Tuple
 import anthropic
 import openai
 import google.generativeai as genai
 from dataclasses import dataclass
 
+from .rate_limiter import ProviderRateLimiter, get_rate_limiter, estimate_tokens
+from .hedging import HedgePolicy, get_latency_tracker
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from .response_cache import ResponseCache
+from .streaming_json import IncrementalJSONParser, JSONPath
+from .prompt_cache import (Prompt, PromptCacheStats, PromptCacheUsage, anthropic_messages, cache_usage,
+                           openai_cache_kwargs, prompt_text)
+from .telemetry import Telemetry, current_trace, get_telemetry
+
+CLAUDE_MODEL = "claude-sonnet-4-20250514"  # Claude Sonnet 4
+GEMINI_MODEL = "gemini-2.5-pro"
+GPT_MODEL = "gpt-4.1-2025-04-14"
+
+MODEL_DISPLAY_NAMES = {
+    'anthropic': "Claude Sonnet 4",
+    'gemini': "Gemini 2.5 Pro",
+    'openai': "GPT-4.1",
+}
+
+PROVIDER_MODELS = {
+    'anthropic': CLAUDE_MODEL,
+    'gemini': GEMINI_MODEL,
+    'openai': GPT_MODEL,
+}
+
 
 @dataclass
 class LLMResponse:
@@ -19,12 +48,66 @@ class LLMResponse:
     model_used: str
     success: bool
     error: Optional[str] = None
+    provider: Optional[str] = None
+    cached: bool = False
+    prompt_cache: Optional[PromptCacheUsage] = None  # provider-side prompt cache tokens of this call
+
+
+class ProviderError(Exception):
+    """Provider call failed; kind is 'rate_limit', 'overloaded' or 'error'"""
+
+    def __init__(self, provider: str, kind: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+def classify_error(provider: str, error: Exception) -> ProviderError:
+    """Map SDK exceptions onto retryable categories"""
+    message = str(error)
+    if isinstance(error, CircuitOpenError):
+        return ProviderError(provider, 'circuit_open', message, error.retry_in)
+    lowered = message.lower()
+    status = getattr(error, 'status_code', None)
+    retry_after = None
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            retry_after = None
+
+    if status == 429 or 'rate_limit' in lowered or 'quota' in lowered or 'resource exhausted' in lowered:
+        return ProviderError(provider, 'rate_limit', message, retry_after)
+    if status in (500, 502, 503, 529) or 'overloaded' in lowered or 'unavailable' in lowered:
+        return ProviderError(provider, 'overloaded', message, retry_after)
+    if isinstance(error, (anthropic.APIConnectionError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return ProviderError(provider, 'overloaded', message)
+    return ProviderError(provider, 'error', message)
+
+
+def _usage_tokens(response) -> Optional[int]:
+    """Total tokens billed for a response, across SDK response shapes"""
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        total = getattr(usage, 'total_tokens', None)
+        if total is not None:
+            return total
+        return getattr(usage, 'input_tokens', 0) + getattr(usage, 'output_tokens', 0)
+    usage = getattr(response, 'usage_metadata', None)
+    return getattr(usage, 'total_token_count', None)
 
 
 class RobustLLMClient:
     """LLM client with retry logic and multiple provider support"""
     
-    def __init__(self, anthropic_key: str = None, openai_key: str = None, gemini_key: str = None):
+    def __init__(self, anthropic_key: str = None, openai_key: str = None, gemini_key: str = None,
+                 rate_limiters: Optional[Dict[str, ProviderRateLimiter]] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 circuit_breakers: Optional[Dict[str, CircuitBreaker]] = None,
+                 telemetry: Optional[Telemetry] = None):
         self.anthropic_client = None
         self.openai_client = None
         self.gemini_configured = False
@@ -38,134 +121,198 @@ class RobustLLMClient:
         if gemini_key:
             genai.configure(api_key=gemini_key)
             self.gemini_configured = True
-    
-    def query_with_retry(self, prompt: str, max_tokens: int = 2000, max_retries: int = 3) -> LLMResponse:
-        """Query LLM with retry logic and fallback providers"""
         
-        # Try Anthropic Claude first
+        # Proactive pacing shared with every other client in the process
+        self.rate_limiters = {provider: get_rate_limiter(provider) for provider in ('anthropic', 'gemini', 'openai')}
+        self.rate_limiters.update(rate_limiters or {})
+        
+        # Persistent response cache; None falls back to LLM_CACHE_MODE (set it to "off" to disable)
+        self.response_cache = response_cache if response_cache is not None else ResponseCache.from_env()
+        
+        # query_with_retry races the next provider when the current one exceeds its p95 latency
+        self.hedge_policy = hedge_policy or HedgePolicy()
+        self.latency_trackers = {provider: get_latency_tracker(provider) for provider in ('anthropic', 'gemini', 'openai')}
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0}
+        
+        # Shared provider health: open circuits are skipped instead of retried
+        self.circuit_breakers = {provider: get_circuit_breaker(provider) for provider in ('anthropic', 'gemini', 'openai')}
+        self.circuit_breakers.update(circuit_breakers or {})
+        
+        # Provider-side prompt cache hits/misses (CachedPrompt prefixes)
+        self.prompt_cache_stats = PromptCacheStats()
+        
+        # Per-query latency/token/cost records, process-wide unless given
+        self.telemetry = telemetry or get_telemetry()
+    
+    def _fallback_routes(self) -> List[tuple]:
+        """(provider, model, temperature) in query_with_retry order, as cache candidates"""
+        routes = []
         if self.anthropic_client:
-            for attempt in range(max_retries):
-                try:
-                    print(f"🤖 Trying Claude (attempt {attempt + 1}/{max_retries})...")
-                    
-                    response = self.anthropic_client.messages.create(
-                        model="claude-sonnet-4-20250514",  # Claude Sonnet 4
-                        max_tokens=max_tokens,
-                        messages=[{"role": "user", "content": prompt}]
-                    )
-                    
-                    return LLMResponse(
-                        content=response.content[0].text,
-                        model_used="Claude Sonnet 4",
-                        success=True
-                    )
-                    
-                except anthropic.APIError as e:
-                    error_msg = str(e)
-                    print(f"❌ Claude error: {error_msg}")
-                    
-                    if "overloaded" in error_msg.lower():
-                        wait_time = (attempt + 1) * 10  # Exponential backoff
-                        print(f"⏳ Claude overloaded. Waiting {wait_time}s before retry...")
-                        time.sleep(wait_time)
-                        continue
-                    elif "rate_limit" in error_msg.lower():
-                        wait_time = (attempt + 1) * 15
-                        print(f"⏳ Rate limited. Waiting {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        break  # Don't retry for other errors
-                
-                except Exception as e:
-                    print(f"❌ Claude unexpected error: {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(5)
-                        continue
+            routes.append(('anthropic', CLAUDE_MODEL, None))
+        if self.gemini_configured:
+            routes.append(('gemini', GEMINI_MODEL, 0.1))
+        if self.openai_client:
+            routes.append(('openai', GPT_MODEL, None))
+        return routes
+    
+    def _through_cache(self, routes: List[tuple], prompt: Prompt, max_tokens: int,
+                       fetch: Callable[[], LLMResponse], cacheable: bool = True) -> LLMResponse:
+        """Serve from the response cache, or fetch and store the answer (one telemetry record either way)
+
+        cacheable=False always fetches: sampled (creative) answers must not be replayed.
+        """
+        with self.telemetry.trace() as trace:
+            if cacheable:
+                response = self._cached_or_fetch(routes, prompt, max_tokens, fetch)
+            else:
+                response = fetch()
+        model = next((model for provider, model, _ in routes if provider == response.provider), None)
+        self.telemetry.finish(trace, response, model=model)
+        return response
+    
+    def _cached_or_fetch(self, routes: List[tuple], prompt: Prompt, max_tokens: int,
+                         fetch: Callable[[], LLMResponse]) -> LLMResponse:
+        if self.response_cache is not None:
+            hit = self.response_cache.get_any(routes, prompt, max_tokens)
+            if hit is not None:
+                provider, content, model_used = hit
+                return LLMResponse(content=content, model_used=model_used, success=True,
+                                   provider=provider, cached=True)
+            if self.response_cache.replay:
+                return LLMResponse(content="", model_used="None", success=False,
+                                   error="Cache miss in replay mode")
+        
+        response = fetch()
+        if response.success and self.response_cache is not None:
+            for provider, model, temperature in routes:
+                if provider == response.provider:
+                    self.response_cache.put_response(provider, model, prompt, max_tokens, temperature,
+                                                     response.model_used, response.content)
                     break
+        return response
+    
+    def cache_stats(self) -> Dict:
+        """Response cache statistics for the current run"""
+        return self.response_cache.summary() if self.response_cache is not None else {"mode": "off"}
+    
+    def _limited_call(self, provider: str, prompt: Prompt, max_tokens: int, call: Callable,
+                      usage_of: Callable[[Any], Any] = lambda response: response,
+                      cancel: Optional[threading.Event] = None):
+        """Run one SDK call once the provider's circuit and rate limiter admit it
         
-        # Secondary fallback to Google Gemini 2.5 Pro
-        if self.gemini_configured:
-            for attempt in range(max_retries):
-                try:
-                    print(f"🤖 Trying Gemini 2.5 Pro (attempt {attempt + 1}/{max_retries})...")
-                    
-                    model = genai.GenerativeModel('gemini-2.5-pro')
-                    response = model.generate_content(
-                        prompt,
-                        generation_config=genai.types.GenerationConfig(
-                            max_output_tokens=max_tokens,
-                            temperature=0.1
-                        )
-                    )
-                    
-                    if response.text:
-                        return LLMResponse(
-                            content=response.text,
-                            model_used="Gemini 2.5 Pro",
-                            success=True
-                        )
-                    else:
-                        print("❌ Gemini returned empty response")
-                        continue
-                    
-                except Exception as e:
-                    error_msg = str(e)
-                    print(f"❌ Gemini error: {error_msg}")
-                    
-                    if "quota" in error_msg.lower() or "limit" in error_msg.lower():
-                        wait_time = (attempt + 1) * 25
-                        print(f"⏳ Gemini rate limited. Waiting {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    elif "overloaded" in error_msg.lower() or "unavailable" in error_msg.lower():
-                        wait_time = (attempt + 1) * 15
-                        print(f"⏳ Gemini unavailable. Waiting {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        if attempt < max_retries - 1:
-                            time.sleep(8)
-                            continue
-                        break
+        usage_of maps the call's result to the SDK object carrying usage.
+        The attempt is reported to the current telemetry trace. Returns
+        None without calling when cancel was set while the call waited
+        for admission (a hedged race decided meanwhile).
+        """
+        breaker = self.circuit_breakers[provider]
+        breaker.before_call()
+        limiter = self.rate_limiters[provider]
+        permit = limiter.acquire_sync(estimate_tokens(prompt, max_tokens))
+        trace = current_trace()
+        if cancel is not None and cancel.is_set():
+            # Lost a hedged race; free the slot without penalising the provider
+            limiter.release(permit, 'cancelled', actual_tokens=0)
+            breaker.record('cancelled')
+            if trace is not None:
+                trace.add_attempt(provider, PROVIDER_MODELS[provider], 'cancelled', permit.wait_time, 0.0)
+            return None
+        if permit.wait_time > 0.5:
+            print(f"⏳ {provider} rate limiter held request for {permit.wait_time:.1f}s")
+        started = time.monotonic()
+        try:
+            response = call()
+        except Exception as e:
+            error = classify_error(provider, e)
+            response_obj = getattr(e, 'response', None)
+            limiter.release(permit, error.kind, headers=getattr(response_obj, 'headers', None),
+                            retry_after=error.retry_after)
+            breaker.record(error.kind)
+            if trace is not None:
+                trace.add_attempt(provider, PROVIDER_MODELS[provider], error.kind, permit.wait_time,
+                                  time.monotonic() - started)
+            raise
+        elapsed = time.monotonic() - started
+        breaker.record('ok', elapsed)
+        self.latency_trackers[provider].record(elapsed)
+        limiter.release(permit, 'ok', actual_tokens=_usage_tokens(usage_of(response)))
+        if trace is not None:
+            trace.add_attempt(provider, PROVIDER_MODELS[provider], 'ok', permit.wait_time, elapsed,
+                              usage_of(response))
+        return response
+    
+    def rate_limit_metrics(self) -> Dict[str, Dict]:
+        """Live limiter metrics (queue depth, wait time, rejections) per provider"""
+        return {provider: limiter.metrics() for provider, limiter in self.rate_limiters.items()}
+    
+    def latency_metrics(self) -> Dict[str, Dict]:
+        """Observed latency quantiles per provider, plus hedge counters"""
+        metrics = {provider: tracker.metrics() for provider, tracker in self.latency_trackers.items()}
+        metrics["hedging"] = dict(self.hedge_stats)
+        return metrics
+    
+    def provider_health(self) -> Dict[str, Dict]:
+        """Circuit state and health score (0-1) per provider"""
+        return {provider: breaker.metrics() for provider, breaker in self.circuit_breakers.items()}
+    
+    def prompt_cache_metrics(self) -> Dict[str, Dict]:
+        """Provider-side prompt cache read/write/uncached input tokens per provider"""
+        return self.prompt_cache_stats.summary()
+    
+    def _prompt_cache_usage(self, provider: str, response) -> Optional[PromptCacheUsage]:
+        usage = cache_usage(response)
+        self.prompt_cache_stats.record(provider, usage)
+        return usage
+    
+    def _backoff(self, provider: str, seconds: float, cancel: Optional[threading.Event] = None):
+        """Sleep before a retry, unless the provider's circuit has opened (the retry would be refused)"""
+        if not self.circuit_breakers[provider].available():
+            return
+        if cancel is not None:
+            cancel.wait(seconds)
+        else:
+            time.sleep(seconds)
+    
+    def _routable(self, provider: str) -> bool:
+        if self.circuit_breakers[provider].available():
+            return True
+        print(f"🔌 Skipping {provider}: circuit open")
+        return False
+    
+    def query_with_retry(self, prompt: Prompt, max_tokens: int = 2000, max_retries: int = 3) -> LLMResponse:
+        """Query LLM with retry logic and fallback providers
         
-        # Final fallback to OpenAI GPT-4
+        A CachedPrompt's prefix blocks are marked for provider-side prompt
+        caching; a plain string is sent as is.
+        """
+        return self._through_cache(self._fallback_routes(), prompt, max_tokens,
+                                   lambda: self._query_with_retry(prompt, max_tokens, max_retries))
+    
+    def _query_with_retry(self, prompt: Prompt, max_tokens: int, max_retries: int) -> LLMResponse:
+        
+        # Fallback order: Claude, then Gemini 2.5 Pro, then GPT-4.1
+        attempts = []
+        if self.anthropic_client:
+            attempts.append(('anthropic', self._try_claude))
+        if self.gemini_configured:
+            attempts.append(('gemini', self._try_gemini))
         if self.openai_client:
-            for attempt in range(max_retries):
-                try:
-                    print(f"🤖 Trying GPT-4 (final attempt {attempt + 1}/{max_retries})...")
-                    
-                    response = self.openai_client.chat.completions.create(
-                        model="gpt-4.1-2025-04-14",
-                        messages=[{"role": "user", "content": prompt}],
-                        max_tokens=max_tokens
-                    )
-                    
-                    return LLMResponse(
-                        content=response.choices[0].message.content,
-                        model_used="GPT-4.1",
-                        success=True
-                    )
-                    
-                except openai.APIError as e:
-                    error_msg = str(e)
-                    print(f"❌ GPT-4 error: {error_msg}")
-                    
-                    if "rate_limit" in error_msg.lower():
-                        wait_time = (attempt + 1) * 20
-                        print(f"⏳ GPT-4 rate limited. Waiting {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        break
-                
-                except Exception as e:
-                    print(f"❌ GPT-4 unexpected error: {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(5)
-                        continue
+            attempts.append(('openai', self._try_gpt))
+        attempts = [(provider, attempt) for provider, attempt in attempts if self._routable(provider)]
+        
+        if self.hedge_policy.enabled and len(attempts) > 1:
+            response = self._race(attempts, prompt, max_tokens, max_retries)
+        else:
+            response = None
+            never_cancelled = threading.Event()
+            for _, attempt in attempts:
+                response = attempt(prompt, max_tokens, max_retries, never_cancelled)
+                if response:
                     break
         
+        if response:
+            return response
+        
         # If all providers failed
         return LLMResponse(
             content="",
@@ -174,31 +321,251 @@ class RobustLLMClient:
             error="All LLM providers failed or unavailable"
         )
     
-    def query_code_analysis(self, prompt: str, max_tokens: int = 2000) -> LLMResponse:
+    def _race(self, attempts: List[tuple], prompt: Prompt, max_tokens: int, max_retries: int) -> Optional[LLMResponse]:
+        """Hedged fallback: start the next provider once the newest one runs past its p95 latency
+        
+        The first successful answer wins. Losers are cancelled
+        cooperatively: they stop retrying and sleeping, a call still queued
+        on the rate limiter is dropped before it is sent, but an HTTP call
+        already in flight runs to completion and its result is discarded.
+        """
+        queue = list(attempts)
+        running = {}  # future -> (provider, cancel event)
+        executor = ThreadPoolExecutor(max_workers=len(attempts), thread_name_prefix="llm-hedge")
+        newest, newest_started = None, 0.0
+        
+        def launch():
+            nonlocal newest, newest_started
+            provider, attempt = queue.pop(0)
+            cancel = threading.Event()
+            # Copy the context so the attempt reports to this query's telemetry trace
+            context = contextvars.copy_context()
+            running[executor.submit(context.run, attempt, prompt, max_tokens, max_retries, cancel)] = (provider, cancel)
+            newest, newest_started = provider, time.monotonic()
+        
+        launch()
+        primary = newest
+        try:
+            while running:
+                timeout = None
+                if queue and len(running) <= self.hedge_policy.max_hedges:
+                    delay = self.latency_trackers[newest].hedge_delay(self.hedge_policy)
+                    timeout = max(0.0, newest_started + delay - time.monotonic())
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                if not done:
+                    print(f"🏁 {newest} slower than its p{int(self.hedge_policy.quantile * 100)} "
+                          f"({time.monotonic() - newest_started:.1f}s); hedging with {queue[0][0]}")
+                    self.hedge_stats["hedged"] += 1
+                    launch()
+                    continue
+                
+                for future in done:
+                    provider, _ = running.pop(future)
+                    response = future.result()
+                    if response:
+                        if provider != primary:
+                            self.hedge_stats["hedge_wins"] += 1
+                        return response
+                if not running and queue:
+                    launch()
+        finally:
+            for _, cancel in running.values():
+                cancel.set()
+            executor.shutdown(wait=False)
+        return None
+    
+    def _try_claude(self, prompt: Prompt, max_tokens: int, max_retries: int,
+                    cancel: threading.Event) -> Optional[LLMResponse]:
+        """Claude with retries; None when it gave up or was cancelled"""
+        for attempt in range(max_retries):
+            if cancel.is_set():
+                return None
+            try:
+                print(f"🤖 Trying Claude (attempt {attempt + 1}/{max_retries})...")
+                
+                response = self._limited_call('anthropic', prompt, max_tokens, lambda: self.anthropic_client.messages.create(
+                    model=CLAUDE_MODEL,
+                    max_tokens=max_tokens,
+                    messages=anthropic_messages(prompt)
+                ), cancel=cancel)
+                if response is None:
+                    return None  # cancelled while queued
+                
+                return LLMResponse(
+                    content=response.content[0].text,
+                    model_used="Claude Sonnet 4",
+                    success=True,
+                    provider='anthropic',
+                    prompt_cache=self._prompt_cache_usage('anthropic', response)
+                )
+                
+            except CircuitOpenError as e:
+                print(f"🔌 {e}")
+                return None
+                
+            except anthropic.APIError as e:
+                error_msg = str(e)
+                print(f"❌ Claude error: {error_msg}")
+                
+                if "overloaded" in error_msg.lower():
+                    wait_time = (attempt + 1) * 10  # Exponential backoff
+                    print(f"⏳ Claude overloaded. Waiting {wait_time}s before retry...")
+                    self._backoff('anthropic', wait_time, cancel)
+                    continue
+                elif "rate_limit" in error_msg.lower():
+                    # The limiter now holds the next attempt until Retry-After/cooldown passes
+                    print("⏳ Rate limited. Deferring to Claude rate limiter...")
+                    continue
+                else:
+                    break  # Don't retry for other errors
+            
+            except Exception as e:
+                print(f"❌ Claude unexpected error: {e}")
+                if attempt < max_retries - 1:
+                    self._backoff('anthropic', 5, cancel)
+                    continue
+                break
+        return None
+    
+    def _try_gemini(self, prompt: Prompt, max_tokens: int, max_retries: int,
+                    cancel: threading.Event) -> Optional[LLMResponse]:
+        """Secondary fallback to Google Gemini 2.5 Pro"""
+        for attempt in range(max_retries):
+            if cancel.is_set():
+                return None
+            try:
+                print(f"🤖 Trying Gemini 2.5 Pro (attempt {attempt + 1}/{max_retries})...")
+                
+                model = genai.GenerativeModel(GEMINI_MODEL)
+                response = self._limited_call('gemini', prompt, max_tokens, lambda: model.generate_content(
+                    prompt_text(prompt),
+                    generation_config=genai.types.GenerationConfig(
+                        max_output_tokens=max_tokens,
+                        temperature=0.1
+                    )
+                ), cancel=cancel)
+                if response is None:
+                    return None  # cancelled while queued
+                
+                if response.text:
+                    return LLMResponse(
+                        content=response.text,
+                        model_used="Gemini 2.5 Pro",
+                        success=True,
+                        provider='gemini',
+                        prompt_cache=self._prompt_cache_usage('gemini', response)
+                    )
+                else:
+                    print("❌ Gemini returned empty response")
+                    continue
+                
+            except CircuitOpenError as e:
+                print(f"🔌 {e}")
+                return None
+                
+            except Exception as e:
+                error_msg = str(e)
+                print(f"❌ Gemini error: {error_msg}")
+                
+                if "quota" in error_msg.lower() or "limit" in error_msg.lower():
+                    print("⏳ Gemini rate limited. Deferring to Gemini rate limiter...")
+                    continue
+                elif "overloaded" in error_msg.lower() or "unavailable" in error_msg.lower():
+                    wait_time = (attempt + 1) * 15
+                    print(f"⏳ Gemini unavailable. Waiting {wait_time}s...")
+                    self._backoff('gemini', wait_time, cancel)
+                    continue
+                else:
+                    if attempt < max_retries - 1:
+                        self._backoff('gemini', 8, cancel)
+                        continue
+                    break
+        return None
+    
+    def _try_gpt(self, prompt: Prompt, max_tokens: int, max_retries: int,
+                 cancel: threading.Event) -> Optional[LLMResponse]:
+        """Final fallback to OpenAI GPT-4"""
+        for attempt in range(max_retries):
+            if cancel.is_set():
+                return None
+            try:
+                print(f"🤖 Trying GPT-4 (final attempt {attempt + 1}/{max_retries})...")
+                
+                response = self._limited_call('openai', prompt, max_tokens, lambda: self.openai_client.chat.completions.create(
+                    model=GPT_MODEL,
+                    messages=[{"role": "user", "content": prompt_text(prompt)}],
+                    max_tokens=max_tokens,
+                    **openai_cache_kwargs(prompt)
+                ), cancel=cancel)
+                if response is None:
+                    return None  # cancelled while queued
+                
+                return LLMResponse(
+                    content=response.choices[0].message.content,
+                    model_used="GPT-4.1",
+                    success=True,
+                    provider='openai',
+                    prompt_cache=self._prompt_cache_usage('openai', response)
+                )
+                
+            except CircuitOpenError as e:
+                print(f"🔌 {e}")
+                return None
+                
+            except openai.APIError as e:
+                error_msg = str(e)
+                print(f"❌ GPT-4 error: {error_msg}")
+                
+                if "rate_limit" in error_msg.lower():
+                    print("⏳ GPT-4 rate limited. Deferring to OpenAI rate limiter...")
+                    continue
+                else:
+                    break
+            
+            except Exception as e:
+                print(f"❌ GPT-4 unexpected error: {e}")
+                if attempt < max_retries - 1:
+                    self._backoff('openai', 5, cancel)
+                    continue
+                break
+        return None
+    
+    def query_code_analysis(self, prompt: Prompt, max_tokens: int = 2000) -> LLMResponse:
         """Use Claude Sonnet 4 specifically for code analysis tasks"""
         if not self.anthropic_client:
             return LLMResponse(
                 content="", model_used="None", success=False,
                 error="Claude API key required for code analysis"
             )
+        return self._through_cache([('anthropic', CLAUDE_MODEL, None)], prompt, max_tokens,
+                                   lambda: self._query_code_analysis(prompt, max_tokens))
+    
+    def _query_code_analysis(self, prompt: Prompt, max_tokens: int) -> LLMResponse:
         
         # Force Claude-only for code analysis
         for attempt in range(3):
             try:
                 print(f"🧠 Claude Sonnet 4 code analysis (attempt {attempt + 1}/3)...")
                 
-                response = self.anthropic_client.messages.create(
-                    model="claude-sonnet-4-20250514",
+                response = self._limited_call('anthropic', prompt, max_tokens, lambda: self.anthropic_client.messages.create(
+                    model=CLAUDE_MODEL,
                     max_tokens=max_tokens,
-                    messages=[{"role": "user", "content": prompt}]
-                )
+                    messages=anthropic_messages(prompt)
+                ))
                 
                 return LLMResponse(
                     content=response.content[0].text,
                     model_used="Claude Sonnet 4 (Code Analysis)",
-                    success=True
+                    success=True,
+                    provider='anthropic',
+                    prompt_cache=self._prompt_cache_usage('anthropic', response)
                 )
                 
+            except CircuitOpenError as e:
+                print(f"🔌 {e}")
+                break
+                
             except anthropic.APIError as e:
                 error_msg = str(e)
                 print(f"❌ Claude error: {error_msg}")
@@ -206,14 +573,14 @@ class RobustLLMClient:
                 if "overloaded" in error_msg.lower():
                     wait_time = (attempt + 1) * 15
                     print(f"⏳ Claude overloaded. Waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                    self._backoff('anthropic', wait_time)
                     continue
                 else:
                     break
             except Exception as e:
                 print(f"❌ Claude unexpected error: {e}")
                 if attempt < 2:
-                    time.sleep(10)
+                    self._backoff('anthropic', 10)
                     continue
                 break
         
@@ -229,43 +596,50 @@ class RobustLLMClient:
                 content="", model_used="None", success=False,
                 error="Gemini API key required for creative generation"
             )
+        return self._through_cache([('gemini', GEMINI_MODEL, 0.8)], prompt, max_tokens,
+                                   lambda: self._query_creative_generation(prompt, max_tokens), cacheable=False)
+    
+    def _query_creative_generation(self, prompt: str, max_tokens: int) -> LLMResponse:
         
         # Force Gemini-only for creative generation
         for attempt in range(3):
             try:
                 print(f"🎨 Gemini 2.5 Pro creative generation (attempt {attempt + 1}/3)...")
                 
-                model = genai.GenerativeModel('gemini-2.5-pro')
-                response = model.generate_content(
+                model = genai.GenerativeModel(GEMINI_MODEL)
+                response = self._limited_call('gemini', prompt, max_tokens, lambda: model.generate_content(
                     prompt,
                     generation_config=genai.types.GenerationConfig(
                         max_output_tokens=max_tokens,
                         temperature=0.8  # Higher creativity for generation
                     )
-                )
+                ))
                 
                 if response.text:
                     return LLMResponse(
                         content=response.text,
                         model_used="Gemini 2.5 Pro (Creative Generation)",
-                        success=True
+                        success=True,
+                        provider='gemini'
                     )
                 else:
                     print("❌ Gemini returned empty response")
                     continue
                     
+            except CircuitOpenError as e:
+                print(f"🔌 {e}")
+                break
+                
             except Exception as e:
                 error_msg = str(e)
                 print(f"❌ Gemini error: {error_msg}")
                 
                 if "quota" in error_msg.lower() or "limit" in error_msg.lower():
-                    wait_time = (attempt + 1) * 20
-                    print(f"⏳ Gemini rate limited. Waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                    print("⏳ Gemini rate limited. Deferring to Gemini rate limiter...")
                     continue
                 else:
                     if attempt < 2:
-                        time.sleep(8)
+                        self._backoff('gemini', 8)
                         continue
                     break
         
@@ -274,7 +648,145 @@ class RobustLLMClient:
             error="Gemini creative generation failed after retries"
         )
 
-    def query_simple(self, prompt: str, context: str = "game analysis") -> Dict:
+    def _stream_provider(self, provider: str, prompt: Prompt, max_tokens: int, temperature: Optional[float],
+                         on_text: Callable[[str], None]) -> Tuple[str, Any]:
+        """One streamed completion; returns (full text, the object carrying the stream's usage)"""
+        parts = []
+        final = None
+        
+        if provider == 'anthropic':
+            with self.anthropic_client.messages.stream(
+                model=CLAUDE_MODEL,
+                max_tokens=max_tokens,
+                messages=anthropic_messages(prompt)
+            ) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    on_text(text)
+                final = stream.get_final_message()
+        
+        elif provider == 'gemini':
+            model = genai.GenerativeModel(GEMINI_MODEL)
+            for chunk in model.generate_content(
+                prompt_text(prompt),
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=temperature
+                ),
+                stream=True
+            ):
+                text = chunk.text if chunk.parts else ""
+                if text:
+                    parts.append(text)
+                    on_text(text)
+                if _usage_tokens(chunk):
+                    final = chunk
+        
+        elif provider == 'openai':
+            stream = self.openai_client.chat.completions.create(
+                model=GPT_MODEL,
+                messages=[{"role": "user", "content": prompt_text(prompt)}],
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+                **openai_cache_kwargs(prompt)
+            )
+            for chunk in stream:
+                if chunk.usage:
+                    final = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    text = chunk.choices[0].delta.content
+                    parts.append(text)
+                    on_text(text)
+        
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+        
+        return "".join(parts), final
+    
+    def query_stream(self, prompt: Prompt, max_tokens: int = 2000, on_text: Optional[Callable[[str], None]] = None,
+                     max_retries: int = 3) -> LLMResponse:
+        """Streaming query_with_retry: on_text receives text deltas as they arrive
+        
+        Providers are tried in the same fallback order. A provider is only
+        retried (or abandoned for the next one) before its first delta;
+        once text has been handed to on_text a mid-stream failure is
+        returned as an error rather than replayed from the start.
+        """
+        on_text = on_text or (lambda text: None)
+        routes = self._fallback_routes()
+        response = self._through_cache(routes, prompt, max_tokens,
+                                       lambda: self._query_stream(routes, prompt, max_tokens, on_text, max_retries))
+        if response.cached:
+            on_text(response.content)
+        return response
+    
+    def _query_stream(self, routes: List[tuple], prompt: Prompt, max_tokens: int,
+                      on_text: Callable[[str], None], max_retries: int) -> LLMResponse:
+        errors = []
+        for provider, _, temperature in routes:
+            if not self._routable(provider):
+                continue
+            name = MODEL_DISPLAY_NAMES[provider]
+            for attempt in range(max_retries):
+                delivered = []
+                trace = current_trace()
+                
+                def forward(text: str):
+                    if not delivered and trace is not None:
+                        trace.mark_first_byte()
+                    delivered.append(text)
+                    on_text(text)
+                
+                try:
+                    print(f"📡 Streaming from {name} (attempt {attempt + 1}/{max_retries})...")
+                    content, final = self._limited_call(
+                        provider, prompt, max_tokens,
+                        lambda: self._stream_provider(provider, prompt, max_tokens, temperature, forward),
+                        usage_of=lambda result: result[1]
+                    )
+                    usage = self._prompt_cache_usage(provider, final)
+                    if content:
+                        return LLMResponse(content=content, model_used=name, success=True, provider=provider,
+                                           prompt_cache=usage)
+                    print(f"❌ {name} returned empty response")
+                    continue
+                
+                except Exception as e:
+                    error = classify_error(provider, e)
+                    print(f"❌ {name} {error.kind}: {error}")
+                    if delivered:
+                        return LLMResponse(content="".join(delivered), model_used=name, success=False,
+                                           error=f"Stream interrupted: {error}", provider=provider)
+                    errors.append(f"{provider}: {error}")
+                    if error.kind in ('error', 'circuit_open'):
+                        break
+                    if error.kind == 'overloaded' and attempt < max_retries - 1:
+                        wait_time = (attempt + 1) * 10
+                        print(f"⏳ {name} overloaded. Waiting {wait_time}s before retry...")
+                        self._backoff(provider, wait_time)
+                    # Rate limits: the limiter holds the next attempt until the cooldown passes
+        
+        return LLMResponse(
+            content="",
+            model_used="None",
+            success=False,
+            error="All LLM providers failed or unavailable" + (f" ({'; '.join(errors)})" if errors else "")
+        )
+    
+    def query_json_stream(self, prompt: Prompt, max_tokens: int = 2000,
+                          on_event: Optional[Callable[[JSONPath, Any], None]] = None) -> Tuple[LLMResponse, Any]:
+        """Stream a JSON answer; on_event gets each top-level field and array element as it completes
+        
+        Returns the response and the parsed document (None if the stream
+        did not contain a complete JSON value).
+        """
+        parser = IncrementalJSONParser(on_event=on_event)
+        response = self.query_stream(prompt, max_tokens, on_text=parser.feed)
+        return response, parser.result
+
+    def query_simple(self, prompt: str, context: str = "game analysis",
+                     on_event: Optional[Callable[[JSONPath, Any], None]] = None) -> Dict:
         """Simplified query for basic analysis with better error handling"""
         
         # Shorter, more focused prompt to avoid token limits
@@ -285,11 +797,19 @@ class RobustLLMClient:
         Provide response in valid JSON format only, no extra text.
         """
         
-        response = self.query_with_retry(focused_prompt, max_tokens=1500)
+        # With on_event, fields are handed over while the answer is still streaming
+        if on_event is not None:
+            response, streamed = self.query_json_stream(focused_prompt, max_tokens=1500, on_event=on_event)
+        else:
+            response, streamed = self.query_with_retry(focused_prompt, max_tokens=1500), None
         
         if not response.success:
             return {"error": response.error, "model": response.model_used}
         
+        if isinstance(streamed, dict):
+            streamed["_model_used"] = response.model_used
+            return streamed
+        
         try:
             # Parse JSON response
             if '```json' in response.content:
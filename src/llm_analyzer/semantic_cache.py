@@ -0,0 +1,159 @@
+"""
+Semantic Prompt Cache
+
+Near-duplicate lookup for LLM analyses. The exact response cache misses
+whenever the sampled code in a prompt shifts slightly (a fork, a small
+commit, a different file order); this cache embeds prompts locally as
+hashed character n-gram vectors and reuses a stored analysis when the
+cosine similarity to a previous prompt clears a threshold.
+
+Everything runs offline: embeddings are feature-hashed with CRC32, the
+vector index is an in-memory NumPy matrix searched with one
+matrix-vector product, and entries persist in SQLite.
+
+Enable with LLM_SEMANTIC_CACHE=1; tune with LLM_SEMANTIC_THRESHOLD.
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_SEMANTIC_PATH = Path(__file__).resolve().parents[2] / "data" / "cache" / "llm_semantic.sqlite"
+DEFAULT_DIM = 2048
+DEFAULT_NGRAM = 5
+DEFAULT_THRESHOLD = 0.92
+
+
+def embed_text(text: str, dim: int = DEFAULT_DIM, ngram: int = DEFAULT_NGRAM) -> np.ndarray:
+    """Unit-length signed feature-hashing vector of character n-grams and words
+
+    Whitespace and case are normalized first so reformatting alone does
+    not move the vector.
+    """
+    normalized = ' '.join(text.lower().split())
+    features = [normalized[i:i + ngram] for i in range(max(1, len(normalized) - ngram + 1))]
+    features.extend(normalized.split())
+    hashes = np.fromiter((zlib.crc32(f.encode('utf-8')) for f in features), dtype=np.uint64, count=len(features))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+    vector = np.bincount((hashes % dim).astype(np.int64), weights=signs, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class SemanticCache:
+    """Threshold-gated nearest-neighbour cache over prompt embeddings"""
+
+    def __init__(self, path: Path = DEFAULT_SEMANTIC_PATH, threshold: float = DEFAULT_THRESHOLD,
+                 dim: int = DEFAULT_DIM, ngram: int = DEFAULT_NGRAM, max_entries: int = 5000):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.dim = dim
+        self.ngram = ngram
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "best_similarity": 0.0}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT,
+                dim INTEGER,
+                vector BLOB,
+                content TEXT,
+                created REAL
+            )
+        """)
+        self._db.commit()
+        self._load_index()
+
+    @classmethod
+    def from_env(cls) -> Optional['SemanticCache']:
+        """Cache configured by LLM_SEMANTIC_CACHE / LLM_SEMANTIC_THRESHOLD; None unless enabled"""
+        if os.getenv('LLM_SEMANTIC_CACHE', '0').lower() not in ('1', 'true', 'yes', 'on'):
+            return None
+        threshold = float(os.getenv('LLM_SEMANTIC_THRESHOLD', DEFAULT_THRESHOLD))
+        path = Path(os.getenv('LLM_SEMANTIC_PATH', str(DEFAULT_SEMANTIC_PATH)))
+        return cls(path, threshold=threshold)
+
+    def _load_index(self):
+        """Vectors of this dimensionality, stacked into one matrix for search"""
+        rows = self._db.execute(
+            "SELECT id, namespace, vector FROM entries WHERE dim = ? ORDER BY id", (self.dim,)
+        ).fetchall()
+        self._ids = [row[0] for row in rows]
+        self._namespaces = np.array([row[1] for row in rows], dtype=object)
+        self._matrix = (np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+                        if rows else np.zeros((0, self.dim), dtype=np.float32))
+
+    def embed(self, prompt: str) -> np.ndarray:
+        return embed_text(prompt, self.dim, self.ngram)
+
+    def lookup(self, prompt: str, namespace: str = "") -> Optional[Tuple[str, float]]:
+        """(content, similarity) of the closest stored prompt above the threshold"""
+        query = self.embed(prompt)
+        with self._lock:
+            if len(self._ids) == 0:
+                self.stats["misses"] += 1
+                return None
+            similarities = self._matrix @ query
+            similarities[self._namespaces != namespace] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            self.stats["best_similarity"] = max(self.stats["best_similarity"], similarity)
+            if similarity < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            row = self._db.execute("SELECT content FROM entries WHERE id = ?", (self._ids[best],)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return row[0], similarity
+
+    def add(self, prompt: str, content: str, namespace: str = ""):
+        """Index a prompt and the analysis it produced"""
+        if not content:
+            return
+        vector = self.embed(prompt)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO entries (namespace, dim, vector, content, created) VALUES (?, ?, ?, ?, ?)",
+                (namespace, self.dim, vector.tobytes(), content, time.time())
+            )
+            self._ids.append(cursor.lastrowid)
+            self._namespaces = np.append(self._namespaces, np.array([namespace], dtype=object))
+            self._matrix = np.vstack([self._matrix, vector[None, :]])
+            self.stats["writes"] += 1
+
+            if len(self._ids) > self.max_entries:
+                # Oldest entries go first
+                excess = len(self._ids) - self.max_entries
+                self._db.executemany("DELETE FROM entries WHERE id = ?", [(i,) for i in self._ids[:excess]])
+                self._ids = self._ids[excess:]
+                self._namespaces = self._namespaces[excess:]
+                self._matrix = self._matrix[excess:]
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def summary(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "path": str(self.path),
+            "threshold": self.threshold,
+            "entries": len(self._ids),
+            **self.stats,
+            "best_similarity": round(self.stats["best_similarity"], 4),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
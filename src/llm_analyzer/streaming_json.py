@@ -0,0 +1,182 @@
+"""
+Incremental JSON Parser
+
+Parses a JSON document as an LLM streams it and emits each top-level
+field - and each element of top-level arrays such as `moments` or
+`mini_game_concepts` - the moment its closing character arrives, so
+downstream stages can start before the completion finishes.
+
+Leading prose and ```json fences are skipped: parsing starts at the
+first '{' or '['.
+"""
+import json
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+JSONPath = Tuple[Any, ...]
+JSONEvent = Tuple[JSONPath, Any]
+
+
+class _Frame:
+    """An open object or array"""
+    __slots__ = ('kind', 'path', 'start', 'track', 'expect_key', 'key', 'index', 'child_start')
+
+    def __init__(self, kind: str, path: JSONPath, start: int, track: bool):
+        self.kind = kind
+        self.path = path
+        self.start = start
+        self.track = track  # emit events for this frame's children
+        self.expect_key = kind == '{'
+        self.key = None
+        self.index = 0
+        self.child_start: Optional[int] = None
+
+    @property
+    def child_path(self) -> JSONPath:
+        return self.path + ((self.key if self.kind == '{' else self.index),)
+
+
+class IncrementalJSONParser:
+    """Feed text chunks; get (path, value) events as values complete
+
+    Paths are tuples of keys/indices from the root, e.g. ('moments', 0)
+    for the first moment or (2,) for the third element of a top-level
+    array. Values nested deeper than max_depth are delivered as part of
+    their enclosing value. The complete document is emitted last with
+    path () and is available as `result`.
+    """
+
+    def __init__(self, max_depth: int = 2, on_event: Optional[Callable[[JSONPath, Any], None]] = None):
+        self.max_depth = max_depth
+        self.on_event = on_event
+        self.buffer = ''
+        self.result: Any = None
+        self.done = False
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._fields: List[Tuple[Any, Any]] = []  # completed children of the root
+
+    def feed(self, chunk: str) -> List[JSONEvent]:
+        """Consume a chunk; returns the events it completed"""
+        events: List[JSONEvent] = []
+        if self.done or not chunk:
+            return events
+        self.buffer += chunk
+        text = self.buffer
+        stack = self._stack
+
+        i = self._pos
+        end = len(text)
+        while i < end and not self.done:
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    top = stack[-1]
+                    if top.kind == '{' and top.expect_key and top.track:
+                        top.key = _loads(text[self._string_start:i + 1])
+                i += 1
+                continue
+
+            if not stack:
+                # Skip prose / code fences until the document opens
+                if c in '{[':
+                    stack.append(_Frame(c, (), i, self.max_depth > 0))
+                i += 1
+                continue
+
+            top = stack[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if not (top.kind == '{' and top.expect_key) and top.child_start is None:
+                    top.child_start = i
+            elif c in '{[':
+                if top.child_start is None:
+                    top.child_start = i
+                path = top.child_path if top.track else top.path
+                stack.append(_Frame(c, path, i, top.track and len(path) < self.max_depth))
+            elif c in '}]':
+                frame = stack.pop()
+                if frame.child_start is not None:
+                    self._emit(events, frame, text[frame.child_start:i])
+                if not stack:
+                    value = _loads(text[frame.start:i + 1])
+                    self.done = True
+                    if value is not _INVALID:
+                        self.result = value
+                        events.append(((), value))
+                        if self.on_event:
+                            self.on_event((), value)
+                else:
+                    parent = stack[-1]
+                    self._emit(events, parent, text[parent.child_start:i + 1])
+            elif c == ',':
+                if top.child_start is not None:
+                    self._emit(events, top, text[top.child_start:i])
+                if top.kind == '[':
+                    top.index += 1
+                else:
+                    top.expect_key = True
+            elif c == ':':
+                top.expect_key = False
+            elif not c.isspace() and top.child_start is None:
+                top.child_start = i  # number / true / false / null
+            i += 1
+
+        self._pos = i
+        return events
+
+    def _emit(self, events: List[JSONEvent], frame: _Frame, raw: str):
+        """A child of `frame` finished; decode and report it if tracked"""
+        path = frame.child_path
+        frame.child_start = None
+        if not frame.track:
+            return
+        value = _loads(raw.strip())
+        if value is _INVALID:
+            return
+        if len(path) == 1:
+            self._fields.append((path[0], value))
+        events.append((path, value))
+        if self.on_event:
+            self.on_event(path, value)
+
+    def partial(self) -> Any:
+        """The document so far, holding only the top-level fields/elements that have completed"""
+        if self.done:
+            return self.result
+        if not self._stack:
+            return None
+        if self._stack[0].kind == '{':
+            return dict(self._fields)
+        return [value for _, value in self._fields]
+
+
+_INVALID = object()
+
+
+def _loads(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, ValueError):
+        return _INVALID
+
+
+def parse_json_stream(chunks: Iterable[str], on_event: Optional[Callable[[JSONPath, Any], None]] = None,
+                      max_depth: int = 2) -> Any:
+    """Drive an IncrementalJSONParser over a chunk iterator; returns the document (None if incomplete)"""
+    parser = IncrementalJSONParser(max_depth=max_depth, on_event=on_event)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.result
@@ -0,0 +1,445 @@
+"""
+LLM Call Telemetry
+
+Structured instrumentation for every logical LLM query: pipeline stage,
+provider and model that answered, queue wait in the rate limiter, time
+to first byte, total latency, input/output and prompt cache tokens,
+retries, response cache hits and estimated cost.
+
+Records aggregate per (stage, provider) into HDR-style log-linear
+latency histograms (~1% relative error from microseconds to hours) and
+counters, and export as JSON (`save`, reloadable with `load_telemetry`)
+or Prometheus text format. scripts/llm_telemetry_report.py summarizes an
+export.
+
+Stages are labelled with the `pipeline_stage` context manager; clients
+open a `CallTrace` per query and their provider-call layer reports each
+attempt to the current trace. Both travel in contextvars, so they follow
+asyncio tasks and (when the context is copied) hedging threads.
+"""
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .prompt_cache import cache_usage
+
+
+# USD per million tokens: (input, cached input read, cache write, output); list prices
+MODEL_PRICING: Dict[str, Tuple[float, float, float, float]] = {
+    "claude-sonnet-4-20250514": (3.00, 0.30, 3.75, 15.00),
+    "claude-3-5-sonnet-20241022": (3.00, 0.30, 3.75, 15.00),
+    "gemini-2.5-pro": (1.25, 0.31, 1.25, 10.00),
+    "gpt-4.1-2025-04-14": (2.00, 0.50, 2.00, 8.00),
+    "gpt-4-turbo-preview": (10.00, 10.00, 10.00, 30.00),
+}
+
+# Prometheus histogram buckets (seconds)
+PROMETHEUS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+DEFAULT_STAGE = "unlabelled"
+RETRY_OUTCOMES = ('rate_limit', 'overloaded', 'error', 'circuit_open', 'empty')
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int,
+                  cache_read_tokens: int = 0, cache_write_tokens: int = 0) -> float:
+    """USD for one call; input_tokens excludes cache reads and writes. Unknown models cost 0"""
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return 0.0
+    input_price, read_price, write_price, output_price = pricing
+    return (input_tokens * input_price + cache_read_tokens * read_price
+            + cache_write_tokens * write_price + output_tokens * output_price) / 1_000_000
+
+
+def token_counts(response: Any) -> Tuple[int, int]:
+    """(prompt tokens including cached ones, output tokens) across SDK response shapes"""
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        if hasattr(usage, 'input_tokens'):
+            prompt = ((usage.input_tokens or 0) + (getattr(usage, 'cache_read_input_tokens', None) or 0)
+                      + (getattr(usage, 'cache_creation_input_tokens', None) or 0))
+            return prompt, usage.output_tokens or 0
+        if getattr(usage, 'prompt_tokens', None) is not None:
+            return usage.prompt_tokens or 0, getattr(usage, 'completion_tokens', None) or 0
+    metadata = getattr(response, 'usage_metadata', None)
+    if metadata is not None:
+        return (getattr(metadata, 'prompt_token_count', None) or 0,
+                getattr(metadata, 'candidates_token_count', None) or 0)
+    return 0, 0
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations, stored sparsely in microseconds
+
+    Values below 256us are exact; above that each power of two is split
+    into 128 linear sub-buckets, bounding the relative error at 1/128.
+    """
+
+    SUB_BUCKET_BITS = 8
+    HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        shift = max(0, micros.bit_length() - cls.SUB_BUCKET_BITS)
+        return shift * cls.HALF + (micros >> shift)
+
+    @classmethod
+    def _upper(cls, index: int) -> float:
+        """Highest value (seconds) that falls into a bucket"""
+        if index < 2 * cls.HALF:
+            return index / 1e6
+        shift = index // cls.HALF - 1
+        mantissa = index - shift * cls.HALF
+        return (((mantissa + 1) << shift) - 1) / 1e6
+
+    def record(self, seconds: float):
+        seconds = max(0.0, seconds)
+        index = self._index(int(seconds * 1e6))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0-1), to within the bucket resolution"""
+        if not self.count:
+            return None
+        target = max(1, round(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds) -> List[int]:
+        """Observations <= each bound (Prometheus `le` buckets)"""
+        ordered = sorted(self.counts.items())
+        result = []
+        for bound in bounds:
+            result.append(sum(count for index, count in ordered if self._upper(index) <= bound))
+        return result
+
+    def to_dict(self) -> Dict:
+        summary = {"count": self.count, "sum": round(self.total, 6), "min": self.min, "max": self.max}
+        for label, q in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99)):
+            summary[label] = self.percentile(q)
+        summary["buckets"] = {str(index): count for index, count in sorted(self.counts.items())}
+        return summary
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data.get("buckets", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("sum", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+
+@dataclass
+class CallRecord:
+    """One logical LLM query (all its retries and hedges)"""
+    stage: str
+    provider: Optional[str]
+    model: Optional[str]
+    success: bool
+    latency: float                   # seconds, including queueing, retries and backoff
+    ttfb: Optional[float]            # seconds to first streamed byte (or to the answer when not streamed)
+    queue_wait: float                # seconds spent held by rate limiters, all attempts
+    input_tokens: int = 0            # uncached prompt tokens
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    attempts: int = 0
+    retries: int = 0                 # failed attempts before the answer
+    hedged: int = 0                  # attempts cancelled after losing a hedge race
+    response_cached: bool = False    # served from the response or semantic cache
+    cost_usd: float = 0.0
+    error: Optional[str] = None
+    started_at: float = 0.0          # epoch seconds
+
+
+class CallTrace:
+    """Attempts of one logical query, reported by the provider-call layer"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.started = time.monotonic()
+        self.started_at = time.time()
+        self.first_byte: Optional[float] = None
+        self.attempts: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add_attempt(self, provider: str, model: str, outcome: str, queue_wait: float = 0.0,
+                    latency: float = 0.0, response: Any = None):
+        """outcome is 'ok', 'cancelled' or a ProviderError kind; response is the SDK object carrying usage"""
+        prompt_tokens, output_tokens = token_counts(response) if response is not None else (0, 0)
+        usage = cache_usage(response) if response is not None else None
+        attempt = {
+            "provider": provider, "model": model, "outcome": outcome,
+            "queue_wait": queue_wait, "latency": latency, "output_tokens": output_tokens,
+            "cache_read_tokens": usage.read_tokens if usage else 0,
+            "cache_write_tokens": usage.write_tokens if usage else 0,
+        }
+        attempt["input_tokens"] = max(0, prompt_tokens - attempt["cache_read_tokens"] - attempt["cache_write_tokens"])
+        with self._lock:
+            self.attempts.append(attempt)
+
+    def mark_first_byte(self):
+        if self.first_byte is None:
+            self.first_byte = time.monotonic()
+
+
+_stage: contextvars.ContextVar[str] = contextvars.ContextVar("llm_pipeline_stage", default=DEFAULT_STAGE)
+_trace: contextvars.ContextVar[Optional[CallTrace]] = contextvars.ContextVar("llm_call_trace", default=None)
+
+
+@contextmanager
+def pipeline_stage(name: str) -> Iterator[None]:
+    """Label every LLM call made inside the block with a pipeline stage"""
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def current_trace() -> Optional[CallTrace]:
+    return _trace.get()
+
+
+class _Aggregate:
+    """Histograms and counters for one (stage, provider)"""
+
+    COUNTERS = ('calls', 'errors', 'attempts', 'retries', 'hedged', 'response_cache_hits', 'input_tokens',
+                'output_tokens', 'cache_read_tokens', 'cache_write_tokens')
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.ttfb = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.counters = {name: 0 for name in self.COUNTERS}
+        self.cost_usd = 0.0
+
+    def add(self, record: CallRecord):
+        self.latency.record(record.latency)
+        if record.ttfb is not None:
+            self.ttfb.record(record.ttfb)
+        self.queue_wait.record(record.queue_wait)
+        counters = self.counters
+        counters['calls'] += 1
+        counters['errors'] += 0 if record.success else 1
+        counters['attempts'] += record.attempts
+        counters['retries'] += record.retries
+        counters['hedged'] += record.hedged
+        counters['response_cache_hits'] += 1 if record.response_cached else 0
+        for name in ('input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_write_tokens'):
+            counters[name] += getattr(record, name)
+        self.cost_usd += record.cost_usd
+
+    def to_dict(self) -> Dict:
+        return {**self.counters, "cost_usd": round(self.cost_usd, 6), "latency": self.latency.to_dict(),
+                "ttfb": self.ttfb.to_dict(), "queue_wait": self.queue_wait.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> '_Aggregate':
+        aggregate = cls()
+        aggregate.counters = {name: data.get(name, 0) for name in cls.COUNTERS}
+        aggregate.cost_usd = data.get("cost_usd", 0.0)
+        aggregate.latency = LatencyHistogram.from_dict(data.get("latency", {}))
+        aggregate.ttfb = LatencyHistogram.from_dict(data.get("ttfb", {}))
+        aggregate.queue_wait = LatencyHistogram.from_dict(data.get("queue_wait", {}))
+        return aggregate
+
+
+class Telemetry:
+    """Thread-safe collector of CallRecords, aggregated per (stage, provider)"""
+
+    def __init__(self, max_records: int = 10000):
+        self.records: Deque[CallRecord] = deque(maxlen=max_records)
+        self.aggregates: Dict[Tuple[str, str], _Aggregate] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self) -> Iterator[CallTrace]:
+        """Open a CallTrace for one logical query; finish() it with the response"""
+        trace = CallTrace(_stage.get())
+        token = _trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _trace.reset(token)
+
+    def finish(self, trace: CallTrace, response: Any = None, provider: Optional[str] = None,
+               model: Optional[str] = None, success: Optional[bool] = None,
+               cached: Optional[bool] = None, error: Optional[str] = None) -> CallRecord:
+        """Turn a trace into a CallRecord; response is an LLMResponse (or pass the fields directly)"""
+        latency = time.monotonic() - trace.started
+        with trace._lock:
+            attempts = list(trace.attempts)
+        provider = provider or getattr(response, 'provider', None)
+        success = success if success is not None else bool(getattr(response, 'success', False))
+        cached = cached if cached is not None else bool(getattr(response, 'cached', False))
+        error = error or getattr(response, 'error', None)
+
+        winner = next((a for a in reversed(attempts) if a["outcome"] == 'ok' and a["provider"] == provider), None)
+        model = model or (winner["model"] if winner else None)
+        record = CallRecord(
+            stage=trace.stage, provider=provider, model=model, success=success, latency=latency,
+            ttfb=(trace.first_byte - trace.started) if trace.first_byte is not None else (latency if success else None),
+            queue_wait=sum(a["queue_wait"] for a in attempts),
+            attempts=len(attempts),
+            retries=sum(1 for a in attempts if a["outcome"] in RETRY_OUTCOMES),
+            hedged=sum(1 for a in attempts if a["outcome"] == 'cancelled'),
+            response_cached=cached, error=None if success else error, started_at=trace.started_at,
+        )
+        # Every attempt that reached a provider is billed, not just the winner
+        for attempt in attempts:
+            record.input_tokens += attempt["input_tokens"]
+            record.output_tokens += attempt["output_tokens"]
+            record.cache_read_tokens += attempt["cache_read_tokens"]
+            record.cache_write_tokens += attempt["cache_write_tokens"]
+            record.cost_usd += estimate_cost(attempt["model"], attempt["input_tokens"], attempt["output_tokens"],
+                                             attempt["cache_read_tokens"], attempt["cache_write_tokens"])
+        self.add(record)
+        return record
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.aggregates.clear()
+
+    def add(self, record: CallRecord):
+        with self._lock:
+            self.records.append(record)
+            key = (record.stage, record.provider or "none")
+            if key not in self.aggregates:
+                self.aggregates[key] = _Aggregate()
+            self.aggregates[key].add(record)
+
+    def stage_totals(self) -> Dict[str, _Aggregate]:
+        """Aggregates merged across providers, per stage"""
+        with self._lock:
+            totals: Dict[str, _Aggregate] = {}
+            for (stage, _), aggregate in self.aggregates.items():
+                merged = totals.setdefault(stage, _Aggregate())
+                merged.latency.merge(aggregate.latency)
+                merged.ttfb.merge(aggregate.ttfb)
+                merged.queue_wait.merge(aggregate.queue_wait)
+                for name, value in aggregate.counters.items():
+                    merged.counters[name] += value
+                merged.cost_usd += aggregate.cost_usd
+            return totals
+
+    def to_dict(self, include_records: bool = True) -> Dict:
+        with self._lock:
+            data = {
+                "generated_at": time.time(),
+                "aggregates": [{"stage": stage, "provider": provider, **aggregate.to_dict()}
+                               for (stage, provider), aggregate in sorted(self.aggregates.items())],
+            }
+            if include_records:
+                data["calls"] = [asdict(record) for record in self.records]
+            return data
+
+    def save(self, path: Path, include_records: bool = True):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(include_records), f, indent=2)
+
+    def to_prometheus(self, prefix: str = "llm") -> str:
+        """Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self.aggregates.items())
+        lines = []
+        for name, attribute, help_text in (
+            ("call_duration_seconds", "latency", "End-to-end LLM query latency"),
+            ("time_to_first_byte_seconds", "ttfb", "Time to the first streamed byte (or the answer)"),
+            ("queue_wait_seconds", "queue_wait", "Time held by provider rate limiters"),
+        ):
+            metric = f"{prefix}_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for (stage, provider), aggregate in items:
+                histogram = getattr(aggregate, attribute)
+                labels = f'stage="{_escape(stage)}",provider="{_escape(provider)}"'
+                for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+        counters = [
+            ("calls_total", "LLM queries", lambda a: [("", a.counters['calls'])]),
+            ("errors_total", "LLM queries that failed", lambda a: [("", a.counters['errors'])]),
+            ("retries_total", "Failed provider attempts retried or failed over", lambda a: [("", a.counters['retries'])]),
+            ("hedges_cancelled_total", "Provider attempts cancelled after losing a hedge race",
+             lambda a: [("", a.counters['hedged'])]),
+            ("response_cache_hits_total", "Queries served from the response cache",
+             lambda a: [("", a.counters['response_cache_hits'])]),
+            ("tokens_total", "Tokens by kind",
+             lambda a: [(f',kind="{kind}"', a.counters[f'{kind}_tokens'])
+                        for kind in ('input', 'output', 'cache_read', 'cache_write')]),
+            ("cost_usd_total", "Estimated spend in USD (list prices)", lambda a: [("", round(a.cost_usd, 6))]),
+        ]
+        for name, help_text, values in counters:
+            metric = f"{prefix}_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for (stage, provider), aggregate in items:
+                for extra, value in values(aggregate):
+                    lines.append(f'{metric}{{stage="{_escape(stage)}",provider="{_escape(provider)}"{extra}}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def load_telemetry(path: Path) -> Telemetry:
+    """Rebuild a Telemetry from a save() export"""
+    with open(path) as f:
+        data = json.load(f)
+    telemetry = Telemetry()
+    for entry in data.get("aggregates", []):
+        telemetry.aggregates[(entry["stage"], entry["provider"])] = _Aggregate.from_dict(entry)
+    for call in data.get("calls", []):
+        telemetry.records.append(CallRecord(**call))
+    return telemetry
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry() -> Telemetry:
+    """Process-wide telemetry shared by every client"""
+    return _telemetry
+
+
+def reset_telemetry():
+    """Drop everything recorded so far (benchmarks compare runs from a clean slate)"""
+    _telemetry.clear()
@@ -0,0 +1,234 @@
+"""
+Batched Skirmish Engine
+
+Advances B independent Quick Skirmish games at once, for rollouts and
+balance runs where stepping one game at a time in Python is the limit.
+Unit fields are NumPy arrays shaped (B, max_units) and every step is a
+handful of whole-batch array operations: one unit action in every game
+that is still running.
+
+Rules are GameBoard's: units move along cheapest 4-connected paths
+within their movement range, never through obstacles or other units;
+they attack enemies within Manhattan attack_range for attack_power +
+randint(-5, 5) damage; units at 0 hp are removed; end of turn, turn
+limit and winner follow QuickSkirmishEngine. As in SkirmishState, an
+action is a move (possibly staying put) followed by an attack on the
+weakest enemy in range, after which the unit is done for the turn; a
+team's turn ends when all its units are done or no enemy is left.
+
+Which cell each unit moves to is up to a policy, a function
+policy(batch, games, units, reach) -> flat cell index per game, where
+reach is the (G, size, size) boolean mask of cells the acting unit may
+end its move on (its own cell included). greedy_policy and
+random_policy are built in.
+"""
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .game_engine import QuickSkirmishEngine, Team, UnitType, TEAM_CODES
+
+BLUE, RED = TEAM_CODES[Team.BLUE], TEAM_CODES[Team.RED]
+DRAW = 0  # winner code when nobody won
+UNIT_TYPES = list(UnitType)
+_NO_TARGET = np.iinfo(np.int64).max
+
+Policy = Callable[['BatchSkirmish', np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+
+class BatchSkirmish:
+    """B copies of a skirmish position, stepped together
+
+    Array fields are indexed [game, unit] (`cells` is [game, x, y] and
+    holds unit index + 1, 0 when empty). Unit indices never change:
+    removed units keep their slot with alive False.
+    """
+
+    def __init__(self, engine: QuickSkirmishEngine, batch_size: int, seed: Optional[int] = None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        board = engine.board
+        units = board.units
+        self.batch_size = batch_size
+        self.max_units = len(units)
+        self.size = board.size
+        self.move_costs = board.move_costs.copy()  # [x, y], shared by all games
+        self.max_turns = engine.max_turns
+        self.rng = np.random.default_rng(seed)
+
+        def per_game(values, dtype):
+            return np.tile(np.array(values, dtype=dtype).reshape(1, -1), (batch_size, 1))
+
+        self.unit_types = per_game([UNIT_TYPES.index(unit.unit_type) for unit in units], np.int8)
+        self.teams = per_game([TEAM_CODES[unit.team] for unit in units], np.int8)
+        self.x = per_game([unit.position.x for unit in units], np.int64)
+        self.y = per_game([unit.position.y for unit in units], np.int64)
+        self.hp = per_game([unit.health for unit in units], np.int64)
+        self.attack = per_game([unit.attack_power for unit in units], np.int64)
+        self.movement = per_game([unit.movement_range for unit in units], np.int64)
+        self.attack_range = per_game([unit.attack_range for unit in units], np.int64)
+        self.alive = self.hp > 0
+        self.moved = per_game([unit.has_moved for unit in units], bool)
+        self.attacked = per_game([unit.has_attacked for unit in units], bool)
+        self.cells = np.zeros((batch_size, self.size, self.size), dtype=np.int64)
+        for index, unit in enumerate(units):
+            self.cells[:, unit.position.x, unit.position.y] = index + 1
+        self.current_team = np.full(batch_size, TEAM_CODES[engine.current_team], dtype=np.int8)
+        self.turn_count = np.full(batch_size, engine.turn_count, dtype=np.int64)
+        self.game_over = np.full(batch_size, engine.game_over, dtype=bool)
+        self.winner = np.full(batch_size, TEAM_CODES[engine.winner] if engine.winner else DRAW, dtype=np.int8)
+        self.game_steps = 0
+        self.last_step: Dict[str, np.ndarray] = {}
+
+        # Cell coordinates, flat in x * size + y order like Reachability.predecessor
+        cell_x, cell_y = np.divmod(np.arange(self.size * self.size), self.size)
+        self._cell_x, self._cell_y = cell_x, cell_y
+
+    def reachability(self, games: np.ndarray, units: np.ndarray) -> np.ndarray:
+        """(G, size, size) cells each acting unit can end its move on, its own cell included
+
+        Bellman-Ford on the whole batch: every step costs at least 1, so
+        `movement` rounds of relaxing the four neighbours find every
+        cheapest path within range (GameBoard._relax, batched).
+        """
+        count = len(games)
+        origin_x, origin_y = self.x[games, units], self.y[games, units]
+        budget = np.where(self.moved[games, units], 0, self.movement[games, units])
+        step_costs = np.where(self.cells[games] == 0, self.move_costs, np.inf)
+        dist = np.full((count, self.size + 2, self.size + 2), np.inf)  # padded with unreachable borders
+        dist[np.arange(count), origin_x + 1, origin_y + 1] = 0.0
+        for _ in range(int(budget.max(initial=0))):
+            inner = dist[:, 1:-1, 1:-1]
+            neighbours = np.minimum(np.minimum(dist[:, :-2, 1:-1], dist[:, 2:, 1:-1]),
+                                    np.minimum(dist[:, 1:-1, :-2], dist[:, 1:-1, 2:]))
+            np.minimum(inner, neighbours + step_costs, out=inner)
+        return dist[:, 1:-1, 1:-1] <= budget[:, None, None]
+
+    def enemies(self, games: np.ndarray) -> np.ndarray:
+        """(G, max_units) live units not on the current team"""
+        return self.alive[games] & (self.teams[games] != self.current_team[games, None])
+
+    def step(self, blue: Policy = None, red: Policy = None) -> int:
+        """One unit action in every running game; returns how many games advanced"""
+        games = np.flatnonzero(~self.game_over)
+        if not games.size:
+            return 0
+        undone = self._undone(games)
+        idle = ~undone.any(axis=1)
+        if idle.any():  # nobody left to act (e.g. a position taken mid-turn): end that turn first
+            self._end_turn(games[idle])
+            games = np.flatnonzero(~self.game_over)
+            if not games.size:
+                return 0
+            undone = self._undone(games)
+        units = undone.argmax(axis=1)
+        reach = self.reachability(games, units)
+
+        destination = np.empty(len(games), dtype=np.int64)
+        for code, policy in ((BLUE, blue or greedy_policy), (RED, red or greedy_policy)):
+            side = self.current_team[games] == code
+            if side.any():
+                destination[side] = policy(self, games[side], units[side], reach[side])
+        destination_x, destination_y = np.divmod(destination, self.size)
+        if not reach[np.arange(len(games)), destination_x, destination_y].all():
+            raise ValueError("Policy chose a cell the unit cannot reach")
+
+        # Move
+        self.cells[games, self.x[games, units], self.y[games, units]] = 0
+        self.cells[games, destination_x, destination_y] = units + 1
+        self.x[games, units], self.y[games, units] = destination_x, destination_y
+
+        # Attack the weakest enemy in range, if any
+        in_range = (self.enemies(games) & ~self.attacked[games, units][:, None]
+                    & (np.abs(self.x[games] - destination_x[:, None]) + np.abs(self.y[games] - destination_y[:, None])
+                       <= self.attack_range[games, units][:, None]))
+        target = np.where(in_range, self.hp[games], _NO_TARGET).argmin(axis=1)
+        hit = in_range.any(axis=1)
+        roll = self.rng.integers(-5, 6, size=len(games))
+        hit_games, hit_targets = games[hit], target[hit]
+        self.hp[hit_games, hit_targets] -= self.attack[hit_games, units[hit]] + roll[hit]
+        killed = self.hp[hit_games, hit_targets] <= 0
+        dead_games, dead_units = hit_games[killed], hit_targets[killed]
+        self.alive[dead_games, dead_units] = False
+        self.cells[dead_games, self.x[dead_games, dead_units], self.y[dead_games, dead_units]] = 0
+
+        self.moved[games, units] = True
+        self.attacked[games, units] = True
+        self.last_step = {"games": games, "units": units, "x": destination_x, "y": destination_y,
+                          "targets": np.where(hit, target, -1), "rolls": roll}
+
+        finished = ~self._undone(games).any(axis=1) | ~self.enemies(games).any(axis=1)
+        self._end_turn(games[finished])
+        self.game_steps += len(games)
+        return len(games)
+
+    def run(self, blue: Policy = None, red: Policy = None, max_steps: Optional[int] = None) -> int:
+        """Step until every game is over (or max_steps batch steps); returns the game-steps played"""
+        start, steps = self.game_steps, 0
+        while not self.game_over.all() and (max_steps is None or steps < max_steps):
+            self.step(blue, red)
+            steps += 1
+        return self.game_steps - start
+
+    def _undone(self, games: np.ndarray) -> np.ndarray:
+        return (self.alive[games] & (self.teams[games] == self.current_team[games, None])
+                & ~(self.moved[games] & self.attacked[games]))
+
+    def _end_turn(self, games: np.ndarray):
+        """QuickSkirmishEngine.end_turn (without the AI) for the given games"""
+        if not games.size:
+            return
+        team = self.current_team[games]
+        own = self.teams[games] == team[:, None]
+        self.moved[games] &= ~own
+        self.attacked[games] &= ~own
+        team = np.where(team == BLUE, RED, BLUE).astype(np.int8)
+        self.current_team[games] = team
+        self.turn_count[games] += team == BLUE
+
+        blue = (self.alive[games] & (self.teams[games] == BLUE)).sum(axis=1)
+        red = (self.alive[games] & (self.teams[games] == RED)).sum(axis=1)
+        over = (blue == 0) | (red == 0) | (self.turn_count[games] >= self.max_turns)
+        self.game_over[games] = over
+        self.winner[games] = np.where(over, np.where(blue > red, BLUE, np.where(red > blue, RED, DRAW)), DRAW)
+
+    def win_counts(self) -> Dict[str, int]:
+        """Finished games by outcome"""
+        done = self.winner[self.game_over]
+        return {"blue": int((done == BLUE).sum()), "red": int((done == RED).sum()), "draw": int((done == DRAW).sum())}
+
+
+def greedy_policy(batch: BatchSkirmish, games: np.ndarray, units: np.ndarray, reach: np.ndarray) -> np.ndarray:
+    """SkirmishState.legal_actions' ordering: a cell to attack from (a kill first), else closest to an enemy"""
+    count, cells = len(games), batch.size * batch.size
+    enemies = batch.enemies(games)
+    can_attack = ~batch.attacked[games, units]
+    attack_range = batch.attack_range[games, units][:, None]
+    xs, ys, hp = batch.x[games], batch.y[games], batch.hp[games]
+    nearest = np.full((count, cells), 2 * batch.size, dtype=np.int64)
+    target_hp = np.full((count, cells), _NO_TARGET, dtype=np.int64)
+    # One (G, cells) pass per unit slot keeps the temporaries small
+    for slot in range(batch.max_units):
+        enemy = enemies[:, slot]
+        if not enemy.any():
+            continue
+        distance = np.abs(batch._cell_x - xs[:, slot, None]) + np.abs(batch._cell_y - ys[:, slot, None])
+        np.minimum(nearest, np.where(enemy[:, None], distance, 2 * batch.size), out=nearest)
+        in_range = (enemy & can_attack)[:, None] & (distance <= attack_range)
+        np.minimum(target_hp, np.where(in_range, hp[:, slot, None], _NO_TARGET), out=target_hp)
+    attacks = target_hp != _NO_TARGET
+    kills = attacks & (target_hp <= batch.attack[games, units][:, None])
+    # (can attack, kills, -nearest, -target hp) as one integer, highest best
+    score = ((attacks.astype(np.int64) * 2 + kills) << 50) + ((2 * batch.size - nearest) << 30)
+    score += np.where(attacks, (1 << 30) - 1 - np.minimum(target_hp, (1 << 30) - 1), 0)
+    score = np.where(reach.reshape(count, -1), score, -1)
+    return score.argmax(axis=1)
+
+
+def random_policy(batch: BatchSkirmish, games: np.ndarray, units: np.ndarray, reach: np.ndarray) -> np.ndarray:
+    """A uniformly random reachable cell"""
+    noise = batch.rng.random(reach.shape).reshape(len(games), -1)
+    return np.where(reach.reshape(len(games), -1), noise, -1.0).argmax(axis=1)
+
+
+POLICIES = {"greedy": greedy_policy, "random": random_policy}
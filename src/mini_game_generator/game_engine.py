@@ -4,13 +4,20 @@ Mini-Game Engine
 Core engine for generating and running tactical mini-games
 based on the Quick Skirmish format from Tanks of Freedom
 """
-import pygame
 import json
 import random
-from typing import Dict, List, Tuple, Optional
+import zlib
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Optional
 from pathlib import Path
 from dataclasses import dataclass
 from enum import Enum
+import numpy as np
+
+try:
+    from .replay import ActionLog
+except ImportError:  # standalone copies of the engine (generated games) play without logs
+    ActionLog = None
 
 
 class UnitType(Enum):
@@ -69,33 +76,158 @@ class Unit:
         self.has_attacked = False
 
 
+# Unit fields GameBoard.set_unit_stats may change
+UNIT_STATS = ("health", "max_health", "attack_power", "movement_range", "attack_range")
+
+# Occupancy codes stored in GameBoard.occupancy
+EMPTY = 0
+TEAM_CODES = {Team.BLUE: 1, Team.RED: 2}
+
+# Terrain codes stored in GameBoard.terrain and the movement points it costs to enter them
+OPEN = 0
+OBSTACLE = 1
+ROUGH = 2
+TERRAIN_COSTS = {OPEN: 1.0, OBSTACLE: np.inf, ROUGH: 2.0}
+
+# Movement ranges up to this use step-by-step frontier expansion, longer ones line sweeps
+FRONTIER_RANGE = 8
+
+
+@dataclass
+class Reachability:
+    """Where a unit standing at origin can go with budget movement points
+    
+    All arrays are read-only, board-sized and indexed [x, y].
+    """
+    origin: Position
+    budget: int
+    cost: np.ndarray         # cheapest movement cost to each cell (inf if out of reach)
+    mask: np.ndarray         # cells the unit can end its move on
+    predecessor: np.ndarray  # flat index (x * size + y) of the previous cell on a cheapest path, -1 if none
+    
+    def positions(self) -> List[Position]:
+        """Reachable destinations ordered by x then y"""
+        return [Position(int(x), int(y)) for x, y in np.argwhere(self.mask)]
+    
+    def path_to(self, pos: Position) -> List[Position]:
+        """Cheapest path from origin to pos, both included (empty if out of reach)"""
+        size = self.mask.shape[1]
+        if not (0 <= pos.x < self.mask.shape[0] and 0 <= pos.y < size) or not np.isfinite(self.cost[pos.x, pos.y]):
+            return []
+        path = [pos]
+        index = int(self.predecessor[pos.x, pos.y])
+        while index != -1:
+            x, y = divmod(index, size)
+            path.append(Position(x, y))
+            index = int(self.predecessor[x, y])
+        return path[::-1]
+
+
 class GameBoard:
-    """Manages the tactical game board"""
+    """Manages the tactical game board
     
-    def __init__(self, size: int = 8):
+    Unit lookups go through an occupancy index kept in sync by add_unit,
+    move_unit and remove_unit (change units only through those): a grid
+    of Unit references for O(1) get_unit_at, and `occupancy`, a NumPy
+    int8 array indexed [x, y] holding each cell's team code (EMPTY when
+    free) for vectorized move / attack masks.
+    
+    Movement follows the terrain: `terrain` rows are indexed [y][x] (the
+    map analyzer's CroppedBoard layout) and must be changed through
+    set_terrain / load_terrain, which keep the `move_costs` grid in step.
+    Units move along cheapest 4-connected paths within their movement
+    range, never through obstacles or other units. Reachability is cached
+    per (position, range) and dropped whenever `version` changes, i.e. on
+    any occupancy or terrain change.
+    
+    Attack damage is rolled with `rng` (the owning engine's seeded RNG).
+    on_attack, when set, is called after every successful attack with
+    (attacker, target, damage dealt), overkill not counted.
+    """
+    
+    def __init__(self, size: int = 8, rng: Optional[random.Random] = None):
         self.size = size
+        self.rng = rng or random.Random()
         self.units: List[Unit] = []
-        self.terrain = [[0 for _ in range(size)] for _ in range(size)]  # 0 = empty, 1 = obstacle
+        self.terrain = [[OPEN for _ in range(size)] for _ in range(size)]  # see TERRAIN_COSTS
+        self.move_costs = np.ones((size, size))  # TERRAIN_COSTS of each cell, indexed [x, y]
+        self.occupancy = np.zeros((size, size), dtype=np.int8)
+        self.version = 0
+        self._unit_grid: List[List[Optional[Unit]]] = [[None] * size for _ in range(size)]
+        self._reach_cache: Dict[Tuple[int, int, int], Reachability] = {}
+        self.on_attack: Optional[Callable[[Unit, Unit, int], None]] = None
         
+    def in_bounds(self, pos: Position) -> bool:
+        return 0 <= pos.x < self.size and 0 <= pos.y < self.size
+    
+    def set_terrain(self, pos: Position, kind: int):
+        """Change the terrain of one cell"""
+        if kind not in TERRAIN_COSTS:
+            raise ValueError(f"Unknown terrain code {kind!r}, expected one of {sorted(TERRAIN_COSTS)}")
+        self.terrain[pos.y][pos.x] = kind
+        self.move_costs[pos.x, pos.y] = TERRAIN_COSTS[kind]
+        self._changed()
+    
+    def load_terrain(self, rows: List[List[int]]):
+        """Replace the whole terrain (rows indexed [y][x], e.g. CroppedBoard.terrain)"""
+        if len(rows) != self.size or any(len(row) != self.size for row in rows):
+            raise ValueError(f"Terrain must be {self.size}x{self.size}")
+        unknown = {kind for row in rows for kind in row} - set(TERRAIN_COSTS)
+        if unknown:
+            raise ValueError(f"Unknown terrain codes {sorted(unknown)}, expected one of {sorted(TERRAIN_COSTS)}")
+        self.terrain = [list(row) for row in rows]
+        self.move_costs = np.array([[TERRAIN_COSTS[kind] for kind in row] for row in rows]).T.copy()
+        self._changed()
+    
     def add_unit(self, unit: Unit) -> bool:
         """Add unit to board if position is valid"""
-        if self.get_unit_at(unit.position) is None:
+        if (self.in_bounds(unit.position) and self.get_unit_at(unit.position) is None
+                and np.isfinite(self.move_costs[unit.position.x, unit.position.y])):
             self.units.append(unit)
+            self._place(unit)
+            self._changed()
             return True
         return False
     
+    def remove_unit(self, unit: Unit):
+        """Take unit off the board"""
+        self.units.remove(unit)
+        self._unit_grid[unit.position.x][unit.position.y] = None
+        self.occupancy[unit.position.x, unit.position.y] = EMPTY
+        self._changed()
+    
+    def set_unit_stats(self, unit: Unit, **stats: int):
+        """Override a unit's stats (health, attack_power, movement_range, ...)"""
+        for stat in stats:
+            if stat not in UNIT_STATS:
+                raise ValueError(f"Unknown unit stat {stat!r}, expected one of {list(UNIT_STATS)}")
+        for stat, value in stats.items():
+            setattr(unit, stat, value)
+        self._changed()  # cached reachability depends on movement_range
+    
+    def _place(self, unit: Unit):
+        self._unit_grid[unit.position.x][unit.position.y] = unit
+        self.occupancy[unit.position.x, unit.position.y] = TEAM_CODES[unit.team]
+    
+    def _changed(self):
+        self.version += 1
+        self._reach_cache.clear()
+    
     def get_unit_at(self, pos: Position) -> Optional[Unit]:
         """Get unit at position"""
-        for unit in self.units:
-            if unit.position.x == pos.x and unit.position.y == pos.y:
-                return unit
-        return None
+        if not self.in_bounds(pos):
+            return None
+        return self._unit_grid[pos.x][pos.y]
     
     def move_unit(self, unit: Unit, new_pos: Position) -> bool:
         """Move unit to new position"""
-        if unit.can_move_to(new_pos, self.size) and self.get_unit_at(new_pos) is None:
+        if not unit.has_moved and self.in_bounds(new_pos) and self.reachability(unit).mask[new_pos.x, new_pos.y]:
+            self._unit_grid[unit.position.x][unit.position.y] = None
+            self.occupancy[unit.position.x, unit.position.y] = EMPTY
             unit.position = new_pos
             unit.has_moved = True
+            self._place(unit)
+            self._changed()
             return True
         return False
     
@@ -104,53 +236,233 @@ class GameBoard:
         target = self.get_unit_at(target_pos)
         if target and attacker.can_attack(target_pos) and target.team != attacker.team:
             # Calculate damage
-            damage = attacker.attack_power + random.randint(-5, 5)
+            damage = attacker.attack_power + self.rng.randint(-5, 5)
+            health = target.health
             target.health -= damage
             attacker.has_attacked = True
             
             # Remove dead units
             if target.health <= 0:
-                self.units.remove(target)
+                self.remove_unit(target)
             
+            if self.on_attack is not None:
+                self.on_attack(attacker, target, health - max(target.health, 0))
             return True
         return False
     
+    def _reach(self, center: Position, radius: int) -> Tuple[Tuple[slice, slice], np.ndarray]:
+        """Board window around center and the Manhattan diamond of radius cropped to it"""
+        x0, x1 = max(0, center.x - radius), min(self.size, center.x + radius + 1)
+        y0, y1 = max(0, center.y - radius), min(self.size, center.y + radius + 1)
+        diamond = _diamond(radius)
+        dx, dy = x0 - (center.x - radius), y0 - (center.y - radius)
+        return (slice(x0, x1), slice(y0, y1)), diamond[dx:dx + x1 - x0, dy:dy + y1 - y0]
+    
+    def reachability(self, unit: Unit) -> Reachability:
+        """Cheapest paths from unit's cell within its movement range (cached until the board changes)"""
+        key = (unit.position.x, unit.position.y, unit.movement_range)
+        reach = self._reach_cache.get(key)
+        if reach is None:
+            reach = self._compute_reachability(unit.position, unit.movement_range)
+            self._reach_cache[key] = reach
+        return reach
+    
+    def _compute_reachability(self, origin: Position, budget: int) -> Reachability:
+        # Every step costs at least 1, so nothing beyond the budget-sized window is reachable
+        window, _ = self._reach(origin, budget)
+        step_costs = np.where(self.occupancy[window] == EMPTY, self.move_costs[window], np.inf)
+        ox, oy = origin.x - window[0].start, origin.y - window[1].start
+        dist = np.full(step_costs.shape, np.inf)
+        dist[ox, oy] = 0.0
+        if budget <= FRONTIER_RANGE:
+            dist = _relax(dist, step_costs, budget)
+        else:
+            dist = _sweep(dist, step_costs, budget)
+        local_pred = _predecessors(dist, step_costs)
+        local_pred[ox, oy] = -1
+        
+        cost = np.full((self.size, self.size), np.inf)
+        cost[window] = dist
+        predecessor = np.full((self.size, self.size), -1, dtype=np.int32)
+        # Window-local flat indices -> board flat indices
+        px, py = np.divmod(local_pred, dist.shape[1])
+        predecessor[window] = np.where(local_pred >= 0,
+                                       (px + window[0].start) * self.size + py + window[1].start, -1)
+        mask = np.isfinite(cost) & (self.occupancy == EMPTY)
+        for array in (cost, mask, predecessor):
+            array.flags.writeable = False
+        return Reachability(origin=Position(origin.x, origin.y), budget=budget,
+                            cost=cost, mask=mask, predecessor=predecessor)
+    
+    def distance_field(self, sources: List[Position], blocked_by_units: bool = False) -> np.ndarray:
+        """Movement cost from the nearest source to every cell, indexed [x, y] (multi-source Dijkstra)"""
+        step_costs = self.move_costs
+        if blocked_by_units:
+            step_costs = np.where(self.occupancy == EMPTY, step_costs, np.inf)
+        dist = np.full((self.size, self.size), np.inf)
+        for pos in sources:
+            dist[pos.x, pos.y] = 0.0
+        return _sweep(dist, step_costs)
+    
+    def move_mask(self, unit: Unit) -> np.ndarray:
+        """Boolean [x, y] array of the cells unit can move to"""
+        if unit.has_moved:
+            return np.zeros((self.size, self.size), dtype=bool)
+        return self.reachability(unit).mask.copy()
+    
+    def attack_mask(self, unit: Unit) -> np.ndarray:
+        """Boolean [x, y] array of the enemy-occupied cells unit can attack"""
+        mask = np.zeros((self.size, self.size), dtype=bool)
+        if unit.has_attacked:
+            return mask
+        window, diamond = self._reach(unit.position, unit.attack_range)
+        occupied = self.occupancy[window]
+        mask[window] = diamond & (occupied != EMPTY) & (occupied != TEAM_CODES[unit.team])
+        return mask
+    
     def get_valid_moves(self, unit: Unit) -> List[Position]:
         """Get all valid move positions for unit"""
-        moves = []
-        for x in range(max(0, unit.position.x - unit.movement_range), 
-                      min(self.size, unit.position.x + unit.movement_range + 1)):
-            for y in range(max(0, unit.position.y - unit.movement_range), 
-                          min(self.size, unit.position.y + unit.movement_range + 1)):
-                pos = Position(x, y)
-                if unit.can_move_to(pos, self.size) and self.get_unit_at(pos) is None:
-                    moves.append(pos)
-        return moves
+        if unit.has_moved:
+            return []
+        return self.reachability(unit).positions()
     
     def get_attack_targets(self, unit: Unit) -> List[Position]:
         """Get all valid attack targets for unit"""
+        # A handful of O(1) lookups beats array setup at these ranges; attack_mask serves whole-board queries
+        if unit.has_attacked:
+            return []
+        grid, size = self._unit_grid, self.size
         targets = []
-        for x in range(max(0, unit.position.x - unit.attack_range), 
-                      min(self.size, unit.position.x + unit.attack_range + 1)):
-            for y in range(max(0, unit.position.y - unit.attack_range), 
-                          min(self.size, unit.position.y + unit.attack_range + 1)):
-                pos = Position(x, y)
-                target = self.get_unit_at(pos)
-                if target and unit.can_attack(pos) and target.team != unit.team:
-                    targets.append(pos)
+        for dx, dy in _offsets(unit.attack_range):
+            x, y = unit.position.x + dx, unit.position.y + dy
+            if 0 <= x < size and 0 <= y < size:
+                target = grid[x][y]
+                if target is not None and target.team != unit.team:
+                    targets.append(Position(x, y))
         return targets
 
 
+@lru_cache(maxsize=None)
+def _offsets(radius: int) -> Tuple[Tuple[int, int], ...]:
+    """Offsets within Manhattan distance radius, ordered by x then y"""
+    return tuple((dx, dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+                 if abs(dx) + abs(dy) <= radius)
+
+
+_SWEEP_BLOCKED = 1e9  # far above any real path cost, small enough for exact float sums
+
+
+def _relax(dist: np.ndarray, step_costs: np.ndarray, budget: float) -> np.ndarray:
+    """Dijkstra by vectorized frontier expansion
+    
+    Each pass extends every known path by one step in all four
+    directions (step_costs[cell] is the cost of entering cell), so it
+    converges after as many passes as the longest cheapest path has steps.
+    """
+    for _ in range(dist.size):
+        relaxed = dist.copy()
+        np.minimum(relaxed[1:, :], dist[:-1, :] + step_costs[1:, :], out=relaxed[1:, :])
+        np.minimum(relaxed[:-1, :], dist[1:, :] + step_costs[:-1, :], out=relaxed[:-1, :])
+        np.minimum(relaxed[:, 1:], dist[:, :-1] + step_costs[:, 1:], out=relaxed[:, 1:])
+        np.minimum(relaxed[:, :-1], dist[:, 1:] + step_costs[:, :-1], out=relaxed[:, :-1])
+        relaxed[relaxed > budget] = np.inf
+        if np.array_equal(relaxed, dist):
+            break
+        dist = relaxed
+    return dist
+
+
+def _sweep(dist: np.ndarray, step_costs: np.ndarray, budget: float = np.inf) -> np.ndarray:
+    """Dijkstra by line sweeps, for whole-board distance fields and long ranges
+    
+    Along a row, dist[i] = min(dist[i], dist[i-1] + cost[i]) is a running
+    minimum of dist - cumsum(cost), so one sweep per direction settles
+    every straight run and the loop only repeats once per turn in the
+    longest cheapest path. Obstacles take a large finite cost so the sums
+    stay defined. Paths that crossed one, or cost more than budget, are
+    cut after every pass: costs only grow along a path, so they can never
+    lead back under the limit, and dropping them lets the loop stop as soon
+    as the paths that matter have settled.
+    """
+    finite = np.where(np.isfinite(step_costs), step_costs, _SWEEP_BLOCKED)
+    sums = [np.cumsum(finite, axis=0), np.cumsum(finite[::-1], axis=0),
+            np.cumsum(finite, axis=1), np.cumsum(finite[:, ::-1], axis=1)]
+    limit = min(budget, _SWEEP_BLOCKED - 1)
+    for _ in range(dist.size):
+        previous = dist
+        dist = np.minimum.accumulate(dist - sums[0], axis=0) + sums[0]
+        dist = (np.minimum.accumulate(dist[::-1] - sums[1], axis=0) + sums[1])[::-1]
+        dist = np.minimum.accumulate(dist - sums[2], axis=1) + sums[2]
+        dist = (np.minimum.accumulate(dist[:, ::-1] - sums[3], axis=1) + sums[3])[:, ::-1]
+        dist[dist > limit] = np.inf
+        if np.array_equal(dist, previous):
+            break
+    return dist
+
+
+def _predecessors(dist: np.ndarray, step_costs: np.ndarray) -> np.ndarray:
+    """Flat index of a neighbour each reached cell is cheapest entered from (-1 if none)"""
+    index = np.arange(dist.size).reshape(dist.shape)
+    pred = np.full(dist.shape, -1, dtype=np.int64)
+    reached = np.isfinite(dist)
+    for target, source in (((slice(1, None), slice(None)), (slice(None, -1), slice(None))),
+                           ((slice(None, -1), slice(None)), (slice(1, None), slice(None))),
+                           ((slice(None), slice(1, None)), (slice(None), slice(None, -1))),
+                           ((slice(None), slice(None, -1)), (slice(None), slice(1, None)))):
+        via = (pred[target] == -1) & reached[target] & (dist[source] + step_costs[target] == dist[target])
+        pred[target] = np.where(via, index[source], pred[target])
+    return pred
+
+
+@lru_cache(maxsize=None)
+def _diamond(radius: int) -> np.ndarray:
+    """(2r+1) x (2r+1) boolean mask of offsets within Manhattan distance radius"""
+    offsets = np.abs(np.arange(-radius, radius + 1))
+    diamond = offsets[:, None] + offsets[None, :] <= radius
+    diamond.flags.writeable = False
+    return diamond
+
+
+# Replay log opcodes and their payloads (see replay.ActionLog)
+LOG_GAME = "skirmish"
+LOG_MOVE = 1  # from x, from y, to x, to y
+LOG_ATTACK = 2  # from x, from y, target x, target y
+LOG_END_TURN = 3
+LOG_CHECKSUM = 4  # QuickSkirmishEngine.checksum() after the turn ended
+LOG_FORMATS = {LOG_MOVE: "BBBB", LOG_ATTACK: "BBBB", LOG_END_TURN: "", LOG_CHECKSUM: "I"}
+
+
 class QuickSkirmishEngine:
-    """Main game engine for Quick Skirmish mini-game"""
+    """Main game engine for Quick Skirmish mini-game
+    
+    RED is played by `ai` (a skirmish_ai player such as MCTSPlayer), or by
+    the built-in greedy rules when none is given. With background_ai the
+    AI plans on its worker thread: end_turn returns at once and the UI
+    loop calls update() every frame to apply the plan when it is ready.
     
-    def __init__(self):
+    Every session is reproducible: the dice come from `rng`, seeded with
+    `seed` (random when not given), and every move, attack and end of
+    turn, whichever side made it, goes into `action_log` together with a
+    state checksum per turn. replay(log) plays a log back into a new
+    engine without any AI.
+    """
+    
+    def __init__(self, ai=None, background_ai: bool = False, seed: Optional[int] = None, record: bool = True):
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)  # dice
+        self.ai_rng = random.Random(self.rng.getrandbits(64))  # built-in AI choices, not replayed
+        self.action_log = ActionLog(LOG_GAME, self.seed, LOG_FORMATS) if record and ActionLog else None
+        self.auto_red = True  # False while replaying: RED's actions come from the log
         self.board = GameBoard(6)  # Smaller board for quick games
+        self.board.rng = self.rng
         self.current_team = Team.BLUE
         self.turn_count = 0
         self.max_turns = 10  # 5 turns per player
         self.game_over = False
         self.winner = None
+        self.ai = ai
+        self.background_ai = background_ai
+        self._ai_future = None
         
         # Initialize units
         self._setup_units()
@@ -201,18 +513,43 @@ class QuickSkirmishEngine:
         """Move unit from one position to another"""
         unit = self.board.get_unit_at(from_pos)
         if unit and unit.team == self.current_team:
-            return self.board.move_unit(unit, to_pos)
+            return self._move(unit, to_pos)
         return False
     
     def attack_unit(self, from_pos: Position, target_pos: Position) -> bool:
         """Attack from one position to another"""
         attacker = self.board.get_unit_at(from_pos)
         if attacker and attacker.team == self.current_team:
-            return self.board.attack_unit(attacker, target_pos)
+            return self._attack(attacker, target_pos)
         return False
     
+    def _move(self, unit: Unit, to_pos: Position) -> bool:
+        from_pos = unit.position
+        if not self.board.move_unit(unit, to_pos):
+            return False
+        self._log(LOG_MOVE, from_pos.x, from_pos.y, to_pos.x, to_pos.y)
+        return True
+    
+    def _attack(self, attacker: Unit, target_pos: Position) -> bool:
+        if not self.board.attack_unit(attacker, target_pos):
+            return False
+        self._log(LOG_ATTACK, attacker.position.x, attacker.position.y, target_pos.x, target_pos.y)
+        return True
+    
+    def _log(self, op: int, *values):
+        if self.action_log is not None:
+            self.action_log.record(op, *values)
+    
+    def checksum(self) -> int:
+        """CRC32 of everything the rules depend on"""
+        units = tuple((unit.unit_type.value, unit.team.value, unit.position.x, unit.position.y, unit.health,
+                       unit.has_moved, unit.has_attacked) for unit in self.board.units)
+        return zlib.crc32(repr((units, self.current_team.value, self.turn_count, self.game_over)).encode())
+    
     def end_turn(self):
         """End current player's turn"""
+        self._log(LOG_END_TURN)
+        
         # Reset all units for current team
         for unit in self.board.units:
             if unit.team == self.current_team:
@@ -227,9 +564,10 @@ class QuickSkirmishEngine:
         
         # Check win conditions
         self._check_game_over()
+        self._log(LOG_CHECKSUM, self.checksum())
         
         # AI turn if it's RED's turn
-        if self.current_team == Team.RED and not self.game_over:
+        if self.current_team == Team.RED and not self.game_over and self.auto_red:
             self._ai_turn()
     
     def _check_game_over(self):
@@ -253,16 +591,37 @@ class QuickSkirmishEngine:
             else:
                 self.winner = None  # Draw
     
+    @property
+    def ai_thinking(self) -> bool:
+        return self._ai_future is not None
+    
+    def update(self) -> bool:
+        """Apply the background AI's turn once it is planned; returns True if it was applied"""
+        if self._ai_future is None or not self._ai_future.done():
+            return False
+        plan = self._ai_future.result()
+        self._ai_future = None
+        self.apply_plan(plan)
+        return True
+    
     def _ai_turn(self):
-        """Simple AI turn logic"""
+        """AI turn: the configured player, or the simple built-in logic"""
+        if self.ai is not None:
+            state = self.ai.observe(self)
+            if self.background_ai:
+                self._ai_future = self.ai.submit(state)
+            else:
+                self.apply_plan(self.ai.plan_turn(state))
+            return
+        
         red_units = [u for u in self.board.units if u.team == Team.RED]
         
         for unit in red_units:
             # Try to attack first
             targets = self.board.get_attack_targets(unit)
             if targets:
-                target = random.choice(targets)
-                self.board.attack_unit(unit, target)
+                target = self.ai_rng.choice(targets)
+                self._attack(unit, target)
             else:
                 # Move towards nearest enemy
                 blue_units = [u for u in self.board.units if u.team == Team.BLUE]
@@ -273,11 +632,30 @@ class QuickSkirmishEngine:
                     valid_moves = self.board.get_valid_moves(unit)
                     if valid_moves:
                         best_move = min(valid_moves, key=lambda pos: pos.distance_to(nearest_enemy.position))
-                        self.board.move_unit(unit, best_move)
+                        self._move(unit, best_move)
         
         # End AI turn
         self.end_turn()
     
+    def apply_plan(self, plan):
+        """Play a skirmish_ai plan (a list of UnitActions) for the current team with the real dice, then end the turn
+        
+        Headless drivers (simulator, ai_match) play BLUE this way; RED
+        replies inline unless background_ai is set.
+        """
+        for action in plan:
+            unit = self.board.get_unit_at(action.unit)
+            if unit is None or unit.team != self.current_team:
+                continue
+            if action.move_to != unit.position:
+                self._move(unit, action.move_to)
+            if action.attack is not None and not self._attack(unit, action.attack):
+                # The dice left the board differently from the plan: hit the weakest enemy in reach
+                targets = self.board.get_attack_targets(unit)
+                if targets:
+                    self._attack(unit, min(targets, key=lambda pos: self.board.get_unit_at(pos).health))
+        self.end_turn()
+    
     def get_valid_actions(self, pos: Position) -> Dict[str, List[Position]]:
         """Get valid actions for unit at position"""
         unit = self.board.get_unit_at(pos)
@@ -287,4 +665,19 @@ class QuickSkirmishEngine:
         return {
             "moves": self.board.get_valid_moves(unit),
             "attacks": self.board.get_attack_targets(unit)
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def replay(cls, log) -> 'QuickSkirmishEngine':
+        """Re-simulate a recorded session (no AI, no rendering); raises replay.ReplayDivergence on a mismatch"""
+        if log.game != LOG_GAME:
+            raise ValueError(f"Not a Quick Skirmish log: {log.game!r}")
+        engine = cls(seed=log.seed, record=False)
+        engine.auto_red = False
+        log.play({
+            LOG_MOVE: lambda fx, fy, tx, ty: engine.move_unit(Position(fx, fy), Position(tx, ty)),
+            LOG_ATTACK: lambda fx, fy, tx, ty: engine.attack_unit(Position(fx, fy), Position(tx, ty)),
+            LOG_END_TURN: engine.end_turn,
+            LOG_CHECKSUM: lambda checksum: engine.checksum() == checksum,
+        })
+        return engine
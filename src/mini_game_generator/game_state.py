@@ -0,0 +1,278 @@
+"""
+Compact Game State
+
+A Quick Skirmish position as struct-of-arrays: one flat list per unit
+field (type, team, x, y, hp, stats, turn flags) indexed by unit, plus a
+cell -> unit map. Made for look-ahead and replays, where the engine's
+Unit / Position objects would have to be deep-copied:
+- clone() copies a handful of flat lists, O(units)
+- make(action) / unmake() play and take back one unit action in place
+  through an undo stack
+- `hash` is a Zobrist hash kept up to date incrementally, for
+  transposition tables
+
+Rules follow QuickSkirmishEngine and GameBoard.reachability, except that
+attacks deal exactly attack_power (the engine's expected damage), so
+look-ahead is deterministic. Dead units keep their index with hp <= 0.
+"""
+import heapq
+import math
+import random
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from .game_engine import Team
+
+Cell = Tuple[int, int]
+Action = Tuple[int, Cell, int]  # (unit index, destination, target unit index or -1)
+
+# Every action is a move (possibly staying put) plus an attack; passing ends the turn
+PASS: Optional[Action] = None
+MATERIAL_SCALE = 60.0  # material lead (hp + 50 per unit) worth a 73% evaluation
+
+
+@lru_cache(maxsize=8)
+def _zobrist_keys(units: int, cells: int, hp_cap: int, turns: int):
+    """Random 64-bit keys: position and hp per unit, turn flags per unit, side to move, turn number"""
+    rng = random.Random(0x5EED)
+    key = lambda: rng.getrandbits(64)
+    position = [[key() for _ in range(cells)] for _ in range(units)]
+    hp = [[key() for _ in range(hp_cap + 1)] for _ in range(units)]
+    moved = [key() for _ in range(units)]
+    attacked = [key() for _ in range(units)]
+    turn = [key() for _ in range(turns + 1)]
+    return position, hp, moved, attacked, key(), turn
+
+
+class SkirmishState:
+    """Struct-of-arrays skirmish position with clone, make / unmake and a Zobrist hash"""
+
+    __slots__ = ('size', 'costs', 'unit_types', 'teams', 'xs', 'ys', 'hp', 'attack', 'movement',
+                 'attack_range', 'moved', 'attacked', 'cells', 'current_team', 'turn_count', 'max_turns',
+                 'game_over', 'winner', 'hash', '_keys', '_hp_cap', '_undo')
+
+    @classmethod
+    def from_engine(cls, engine) -> 'SkirmishState':
+        state = cls.__new__(cls)
+        board = engine.board
+        units = board.units
+        state.size = board.size
+        state.costs = board.move_costs.tolist()  # [x][y], shared by all clones
+        state.unit_types = [unit.unit_type for unit in units]
+        state.teams = [unit.team for unit in units]
+        state.xs = [unit.position.x for unit in units]
+        state.ys = [unit.position.y for unit in units]
+        state.hp = [unit.health for unit in units]
+        state.attack = [unit.attack_power for unit in units]
+        state.movement = [unit.movement_range for unit in units]
+        state.attack_range = [unit.attack_range for unit in units]
+        state.moved = [unit.has_moved for unit in units]
+        state.attacked = [unit.has_attacked for unit in units]
+        state.cells = {(unit.position.x, unit.position.y): index for index, unit in enumerate(units)}
+        state.current_team = engine.current_team
+        state.turn_count = engine.turn_count
+        state.max_turns = engine.max_turns
+        state.game_over = engine.game_over
+        state.winner = engine.winner
+        state._hp_cap = max([unit.max_health for unit in units] + [unit.health for unit in units] + [0])
+        state._keys = _zobrist_keys(len(units), board.size * board.size, state._hp_cap, engine.max_turns)
+        state._undo = []
+        state.hash = state.compute_hash()
+        return state
+
+    def clone(self) -> 'SkirmishState':
+        """Independent copy (the undo history is not copied)"""
+        state = SkirmishState.__new__(SkirmishState)
+        state.size = self.size
+        state.costs = self.costs
+        state.unit_types = self.unit_types  # never change
+        state.teams = self.teams
+        state.attack = self.attack
+        state.movement = self.movement
+        state.attack_range = self.attack_range
+        state.xs = self.xs[:]
+        state.ys = self.ys[:]
+        state.hp = self.hp[:]
+        state.moved = self.moved[:]
+        state.attacked = self.attacked[:]
+        state.cells = self.cells.copy()
+        state.current_team = self.current_team
+        state.turn_count = self.turn_count
+        state.max_turns = self.max_turns
+        state.game_over = self.game_over
+        state.winner = self.winner
+        state.hash = self.hash
+        state._keys = self._keys
+        state._hp_cap = self._hp_cap
+        state._undo = []
+        return state
+
+    def compute_hash(self) -> int:
+        """Zobrist hash from scratch (make / unmake keep `hash` equal to this)"""
+        position, hp, moved, attacked, red_to_move, turn = self._keys
+        value = turn[min(self.turn_count, len(turn) - 1)]
+        if self.current_team is Team.RED:
+            value ^= red_to_move
+        for index in range(len(self.hp)):
+            value ^= hp[index][self._hp_index(self.hp[index])]
+            if self.hp[index] > 0:
+                value ^= position[index][self.xs[index] * self.size + self.ys[index]]
+            if self.moved[index]:
+                value ^= moved[index]
+            if self.attacked[index]:
+                value ^= attacked[index]
+        return value
+
+    def _hp_index(self, hp: int) -> int:
+        return min(max(hp, 0), self._hp_cap)
+
+    @property
+    def ply(self) -> int:
+        """Team turns played so far (BLUE moves first)"""
+        return 2 * self.turn_count + (self.current_team is Team.RED)
+
+    def next_unit(self) -> Optional[int]:
+        """Index of the current team's next unit still to act"""
+        team, hp, moved, attacked = self.current_team, self.hp, self.moved, self.attacked
+        for index in range(len(hp)):
+            if self.teams[index] is team and hp[index] > 0 and not (moved[index] and attacked[index]):
+                return index
+        return None
+
+    def reachable(self, index: int) -> List[Cell]:
+        """Cells the unit can end its move on, its own cell included (GameBoard.reachability rules)"""
+        start = (self.xs[index], self.ys[index])
+        if self.moved[index]:
+            return [start]
+        budget, size, costs, cells = self.movement[index], self.size, self.costs, self.cells
+        best = {start: 0.0}
+        queue = [(0.0, start)]
+        while queue:
+            cost, (x, y) = heapq.heappop(queue)
+            if cost > best[(x, y)]:
+                continue
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < size and 0 <= ny < size and (nx, ny) not in cells:
+                    step = cost + costs[nx][ny]
+                    if step <= budget and step < best.get((nx, ny), math.inf):
+                        best[(nx, ny)] = step
+                        heapq.heappush(queue, (step, (nx, ny)))
+        return list(best)
+
+    def legal_actions(self) -> List[Action]:
+        """The next unit's actions, heuristically best last
+
+        One action per destination; the attack from there is fixed to the
+        weakest enemy in range, which keeps the branching factor at the
+        number of reachable cells.
+        """
+        index = self.next_unit()
+        if index is None:
+            return []
+        team, xs, ys, hp = self.teams[index], self.xs, self.ys, self.hp
+        can_attack, attack_range, attack = not self.attacked[index], self.attack_range[index], self.attack[index]
+        enemies = [i for i in range(len(hp)) if hp[i] > 0 and self.teams[i] is not team]
+        scored = []
+        for x, y in self.reachable(index):
+            target, target_hp, nearest = -1, math.inf, math.inf
+            for i in enemies:
+                distance = abs(xs[i] - x) + abs(ys[i] - y)
+                if distance < nearest:
+                    nearest = distance
+                if can_attack and distance <= attack_range and hp[i] < target_hp:
+                    target, target_hp = i, hp[i]
+            kills = target != -1 and target_hp <= attack
+            scored.append(((target != -1, kills, -nearest, -target_hp), (index, (x, y), target)))
+        scored.sort(key=lambda item: item[0])
+        return [action for _, action in scored]
+
+    def make(self, action: Optional[Action]):
+        """Play one unit's action (PASS ends the turn); ends the turn after the team's last unit"""
+        position, hp_keys, moved_keys, attacked_keys, _, _ = self._keys
+        if action is PASS:
+            self._undo.append((None, self.hash, self._end_turn()))
+            return
+        index, (x, y), target = action
+        previous_hash, old_x, old_y = self.hash, self.xs[index], self.ys[index]
+        moved_before, attacked_before = self.moved[index], self.attacked[index]
+        target_hp = self.hp[target] if target != -1 else 0
+        size = self.size
+        if (x, y) != (old_x, old_y):
+            del self.cells[(old_x, old_y)]
+            self.hash ^= position[index][old_x * size + old_y] ^ position[index][x * size + y]
+            self.xs[index], self.ys[index] = x, y
+            self.cells[(x, y)] = index
+        if not moved_before:
+            self.moved[index] = True
+            self.hash ^= moved_keys[index]
+        if not attacked_before:
+            self.attacked[index] = True
+            self.hash ^= attacked_keys[index]
+        if target != -1:
+            after = target_hp - self.attack[index]
+            self.hp[target] = after
+            self.hash ^= hp_keys[target][self._hp_index(target_hp)] ^ hp_keys[target][self._hp_index(after)]
+            if after <= 0 < target_hp:
+                del self.cells[(self.xs[target], self.ys[target])]
+                self.hash ^= position[target][self.xs[target] * size + self.ys[target]]
+        team = self.teams[index]
+        enemy_left = any(hp > 0 and self.teams[i] is not team for i, hp in enumerate(self.hp))
+        turn_record = self._end_turn() if not enemy_left or self.next_unit() is None else None
+        self._undo.append((index, previous_hash, turn_record, old_x, old_y, moved_before, attacked_before,
+                           target, target_hp))
+
+    def unmake(self):
+        """Take back the last make()"""
+        record = self._undo.pop()
+        index, previous_hash, turn_record = record[0], record[1], record[2]
+        if turn_record is not None:
+            moved, attacked, self.current_team, self.turn_count, self.game_over, self.winner = turn_record
+            self.moved, self.attacked = moved, attacked
+        if index is not None:
+            _, _, _, x, y, moved_before, attacked_before, target, target_hp = record
+            if target != -1:
+                if self.hp[target] <= 0 < target_hp:
+                    self.cells[(self.xs[target], self.ys[target])] = target
+                self.hp[target] = target_hp
+            if (x, y) != (self.xs[index], self.ys[index]):
+                del self.cells[(self.xs[index], self.ys[index])]
+                self.cells[(x, y)] = index
+                self.xs[index], self.ys[index] = x, y
+            self.moved[index] = moved_before
+            self.attacked[index] = attacked_before
+        self.hash = previous_hash
+
+    def _end_turn(self) -> tuple:
+        """QuickSkirmishEngine.end_turn without the AI hook; returns what unmake needs to restore"""
+        _, _, moved_keys, attacked_keys, red_to_move, turn = self._keys
+        saved = (self.moved, self.attacked, self.current_team, self.turn_count, self.game_over, self.winner)
+        self.moved, self.attacked = self.moved[:], self.attacked[:]
+        for index in range(len(self.hp)):
+            if self.teams[index] is self.current_team:
+                if self.moved[index]:
+                    self.moved[index] = False
+                    self.hash ^= moved_keys[index]
+                if self.attacked[index]:
+                    self.attacked[index] = False
+                    self.hash ^= attacked_keys[index]
+        self.current_team = Team.RED if self.current_team == Team.BLUE else Team.BLUE
+        self.hash ^= red_to_move
+        if self.current_team == Team.BLUE:
+            self.hash ^= turn[min(self.turn_count, len(turn) - 1)] ^ turn[min(self.turn_count + 1, len(turn) - 1)]
+            self.turn_count += 1
+        blue = sum(1 for index, hp in enumerate(self.hp) if hp > 0 and self.teams[index] is Team.BLUE)
+        red = sum(1 for index, hp in enumerate(self.hp) if hp > 0 and self.teams[index] is Team.RED)
+        if not blue or not red or self.turn_count >= self.max_turns:
+            self.game_over = True
+            self.winner = Team.BLUE if blue > red else Team.RED if red > blue else None
+        return saved
+
+    def evaluate(self, team: Team, material_scale: float = MATERIAL_SCALE) -> float:
+        """Value for team in [0, 1]: the result if the game is over, else a logistic of its material lead"""
+        if self.game_over:
+            return 0.5 if self.winner is None else float(self.winner is team)
+        lead = 0
+        for index, hp in enumerate(self.hp):
+            if hp > 0:
+                lead += 50 + hp if self.teams[index] is team else -50 - hp
+        return 1.0 / (1.0 + math.exp(-lead / material_scale))
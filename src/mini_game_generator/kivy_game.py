@@ -18,6 +18,7 @@ import json
 from pathlib import Path
 
 from .game_engine import QuickSkirmishEngine, Position, Team, UnitType
+from .skirmish_ai import create_player
 
 
 class GameBoard(Widget):
@@ -254,14 +255,15 @@ class GameUI(BoxLayout):
         super().__init__(**kwargs)
         self.orientation = 'vertical'
         
-        # Initialize game engine
-        self.engine = QuickSkirmishEngine()
+        # Initialize game engine; the AI plans off the UI thread
+        self.ai = create_player("mcts", "normal")
+        self.engine = QuickSkirmishEngine(ai=self.ai, background_ai=True)
         
         # Create UI elements
         self.setup_ui()
         
-        # Schedule AI turns
-        Clock.schedule_interval(self.check_ai_turn, 0.5)
+        # Pick up AI turns as soon as they are planned
+        Clock.schedule_interval(self.check_ai_turn, 1 / 30.0)
     
     def setup_ui(self):
         """Setup the UI layout"""
@@ -326,7 +328,7 @@ class GameUI(BoxLayout):
     
     def restart_game(self, instance):
         """Restart the game"""
-        self.engine = QuickSkirmishEngine()
+        self.engine = QuickSkirmishEngine(ai=self.ai, background_ai=True)
         self.board_widget.engine = self.engine
         self.board_widget.selected_unit_pos = None
         self.board_widget.highlighted_moves = []
@@ -334,12 +336,14 @@ class GameUI(BoxLayout):
         self.update_ui()
     
     def check_ai_turn(self, dt):
-        """Check if AI should take its turn"""
-        if (self.engine.current_team == Team.RED and 
-            not self.engine.game_over):
-            # AI turn is handled automatically in engine.end_turn()
-            pass
+        """Apply the AI's turn once its background search has finished"""
+        self.engine.update()
         self.update_ui()
+    
+    def shutdown(self):
+        """Stop polling for AI turns and release the AI's worker thread"""
+        Clock.unschedule(self.check_ai_turn)
+        self.ai.close()
 
 
 class QuickSkirmishApp(App):
@@ -349,6 +353,10 @@ class QuickSkirmishApp(App):
         """Build the application"""
         self.title = "Quick Skirmish"
         return GameUI()
+    
+    def on_stop(self):
+        """Release the AI worker when the app closes"""
+        self.root.shutdown()
 
 
 def main():
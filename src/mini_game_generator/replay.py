@@ -0,0 +1,160 @@
+"""
+Replay Logs
+
+Compact binary action logs for the mini-game engines. An engine owns a
+seeded RNG and records every input that changes its state (unit
+actions, key presses, frame times); replaying the log into a fresh
+engine with the same seed re-simulates the session exactly, without
+rendering and as fast as the engine can step. Engines also record state
+checksums now and then, so a replay stops at the first record where it
+no longer matches the session (ReplayDivergence).
+
+File layout (little-endian):
+- header: MAGIC, format version, game name, seed, and the payload
+  struct format of every opcode, so a log can be read without the game
+- records: opcode byte + payload; REPEAT + count repeats the previous
+  record (long runs of identical frames cost 3 bytes)
+"""
+import struct
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+MAGIC = b"MGRL"
+VERSION = 1
+REPEAT = 0xFF  # reserved opcode: the previous record again, count times
+MAX_REPEAT = 0xFFFF
+
+_HEADER = struct.Struct("<4sBB")  # magic, version, game name length
+_SEED = struct.Struct("<QB")  # seed, number of opcodes
+_REPEAT = struct.Struct("<BH")
+
+
+class ReplayDivergence(Exception):
+    """A replayed session no longer matches its log"""
+
+
+class ActionLog:
+    """Append-only binary log of (opcode, values) records
+
+    formats maps each opcode (0-254) to the struct format of its payload,
+    e.g. {MOVE: "BBBB", END_TURN: "", CHECKSUM: "I"}.
+    """
+
+    def __init__(self, game: str, seed: int, formats: Dict[int, str]):
+        if REPEAT in formats or not all(0 <= op < REPEAT for op in formats):
+            raise ValueError(f"Opcodes must be in 0..{REPEAT - 1}")
+        self.game = game
+        self.seed = seed
+        self.formats = dict(formats)
+        self._structs = self._compile(self.formats)
+        self._data = bytearray()
+        self._last: Optional[bytes] = None
+        self._repeats = 0
+        self.records_count = 0
+
+    @staticmethod
+    def _compile(formats: Dict[int, str]) -> Dict[int, struct.Struct]:
+        return {op: struct.Struct("<B" + fmt) for op, fmt in formats.items()}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Struct objects cannot be pickled; engines holding a log are copied and pickled
+        state = self.__dict__.copy()
+        del state["_structs"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._structs = self._compile(self.formats)
+
+    def record(self, op: int, *values):
+        packed = self._structs[op].pack(op, *values)
+        if packed == self._last and self._repeats < MAX_REPEAT:
+            self._repeats += 1
+        else:
+            self._flush()
+            self._data += packed
+            self._last = packed
+        self.records_count += 1
+
+    def _flush(self):
+        if self._repeats:
+            self._data += _REPEAT.pack(REPEAT, self._repeats)
+            self._repeats = 0
+
+    def __len__(self) -> int:
+        return self.records_count
+
+    def records(self) -> Iterator[Tuple[int, tuple]]:
+        """(opcode, values) for every record, repeats expanded"""
+        self._flush()
+        data, offset, last = self._data, 0, None
+        while offset < len(data):
+            op = data[offset]
+            if op == REPEAT:
+                _, count = _REPEAT.unpack_from(data, offset)
+                offset += _REPEAT.size
+                for _ in range(count):
+                    yield last
+                continue
+            layout = self._structs.get(op)
+            if layout is None:
+                raise ValueError(f"Unknown opcode {op} at byte {offset} of the {self.game} log")
+            values = layout.unpack_from(data, offset)
+            offset += layout.size
+            last = (op, values[1:])
+            yield last
+
+    def play(self, handlers: Dict[int, Callable[..., Any]]) -> int:
+        """Call handlers[op](*values) for every record; a handler returning False is a divergence
+
+        Returns the number of records played.
+        """
+        played = 0
+        for op, values in self.records():
+            if handlers[op](*values) is False:
+                raise ReplayDivergence(f"{self.game} replay (seed {self.seed}) diverged at record {played}: "
+                                       f"opcode {op} {values}")
+            played += 1
+        return played
+
+    def to_bytes(self) -> bytes:
+        self._flush()
+        name = self.game.encode()
+        header = bytearray(_HEADER.pack(MAGIC, VERSION, len(name)) + name)
+        header += _SEED.pack(self.seed, len(self.formats))
+        for op, fmt in sorted(self.formats.items()):
+            header += struct.pack("<BB", op, len(fmt)) + fmt.encode()
+        return bytes(header + self._data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ActionLog':
+        magic, version, name_length = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a mini-game replay log")
+        if version != VERSION:
+            raise ValueError(f"Unsupported replay log version {version} (expected {VERSION})")
+        offset = _HEADER.size
+        game = data[offset:offset + name_length].decode()
+        offset += name_length
+        seed, opcodes = _SEED.unpack_from(data, offset)
+        offset += _SEED.size
+        formats = {}
+        for _ in range(opcodes):
+            op, length = struct.unpack_from("<BB", data, offset)
+            offset += 2
+            formats[op] = data[offset:offset + length].decode()
+            offset += length
+        log = cls(game, seed, formats)
+        log._data = bytearray(data[offset:])
+        log.records_count = sum(1 for _ in log.records())
+        return log
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self.to_bytes())
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ActionLog':
+        return cls.from_bytes(Path(path).read_bytes())
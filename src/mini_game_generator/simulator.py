@@ -0,0 +1,258 @@
+"""
+Self-Play Simulator
+
+Plays many headless Quick Skirmish games between two skirmish_ai
+policies across a process pool, for balance and difficulty tuning.
+Unit stats (attack_power, movement_range, ...) and max_turns can be
+overridden per run, and the results are aggregated into a report: win
+rates, game length distribution and damage statistics.
+
+Every game has its own seed, so a game can be played again from its
+seed alone (time-budgeted policies such as mcts excepted: how far they
+search depends on the machine). Nothing here imports pygame or kivy.
+"""
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .game_engine import UNIT_STATS, QuickSkirmishEngine, Team, UnitType
+from .skirmish_ai import SkirmishPlayer, create_player
+
+ALL_UNITS = "*"  # unit_stats key for overrides that apply to every unit type
+
+
+@dataclass
+class SimulationConfig:
+    """One balance run: who plays, how many games and which rules
+
+    Policies are skirmish_ai specs: 'greedy', 'random', 'mcts',
+    'mcts:hard' or 'mcts:20' (budget in ms). unit_stats maps a unit type
+    ('soldier', 'tank', 'helicopter') or ALL_UNITS to stat overrides;
+    type-specific values win over ALL_UNITS.
+    """
+    blue: str = "greedy"
+    red: str = "greedy"
+    games: int = 1000
+    seed: int = 0
+    max_turns: Optional[int] = None
+    unit_stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.games < 1:
+            raise ValueError("games must be at least 1")
+        if self.max_turns is not None and self.max_turns < 1:
+            raise ValueError("max_turns must be at least 1")
+        unit_types = {unit_type.value for unit_type in UnitType} | {ALL_UNITS}
+        for unit_type, stats in self.unit_stats.items():
+            if unit_type not in unit_types:
+                raise ValueError(f"Unknown unit type {unit_type!r}, expected one of {sorted(unit_types)}")
+            for stat in stats:
+                if stat not in UNIT_STATS:
+                    raise ValueError(f"Unknown unit stat {stat!r}, expected one of {list(UNIT_STATS)}")
+        for spec in (self.blue, self.red):
+            make_policy(spec)  # fail here rather than in every worker
+
+    def stats_for(self, unit_type: UnitType) -> Dict[str, int]:
+        return {**self.unit_stats.get(ALL_UNITS, {}), **self.unit_stats.get(unit_type.value, {})}
+
+
+@dataclass
+class GameResult:
+    """Outcome of one game; damage is the health actually taken off (overkill not counted)"""
+    seed: int
+    winner: Optional[str]  # 'blue', 'red' or None for a draw
+    turns: int  # full turns (both teams) played
+    eliminated: bool  # False if the turn limit ended the game
+    damage: Dict[str, int]  # team -> damage dealt
+    hits: Dict[str, int]  # team -> successful attacks
+    kills: Dict[str, int]  # team -> enemy units destroyed
+    damage_by_type: Dict[str, int]  # attacker unit type -> damage dealt
+    survivors: Dict[str, int]  # team -> units left
+
+
+def make_policy(spec: str, seed: Optional[int] = None) -> SkirmishPlayer:
+    """Policy from 'backend[:difficulty or budget ms]'"""
+    backend, _, setting = spec.partition(":")
+    if setting.replace(".", "", 1).isdigit():
+        return create_player(backend, budget_ms=float(setting), seed=seed)
+    return create_player(backend, setting or "normal", seed=seed)
+
+
+def play_game(config: SimulationConfig, seed: int) -> GameResult:
+    """One seeded game: blue and red policies, the engine's rules and dice
+
+    Both policies' seeds are drawn from the game seed, so no two games
+    (or sides) share a random stream.
+    """
+    seeds = random.Random(seed)
+    blue = make_policy(config.blue, seeds.getrandbits(64))
+    red = make_policy(config.red, seeds.getrandbits(64))
+    engine = QuickSkirmishEngine(ai=red, seed=seed, record=False)
+    if config.max_turns is not None:
+        engine.max_turns = config.max_turns
+    for unit in engine.board.units:
+        engine.board.set_unit_stats(unit, **config.stats_for(unit.unit_type))
+
+    damage, hits, kills, damage_by_type = Counter(), Counter(), Counter(), Counter()
+
+    def tally(attacker, target, dealt):
+        team = attacker.team.value
+        damage[team] += dealt
+        hits[team] += 1
+        kills[team] += target.health <= 0
+        damage_by_type[attacker.unit_type.value] += dealt
+
+    engine.board.on_attack = tally  # every attack, whoever makes it
+    while not engine.game_over:
+        engine.apply_plan(blue.plan_turn(blue.observe(engine)))  # red replies inline
+    survivors = Counter(unit.team.value for unit in engine.board.units)
+    return GameResult(
+        seed=seed,
+        winner=engine.winner.value if engine.winner else None,
+        turns=engine.turn_count,
+        eliminated=len(survivors) < 2,
+        damage={team.value: damage[team.value] for team in Team},
+        hits={team.value: hits[team.value] for team in Team},
+        kills={team.value: kills[team.value] for team in Team},
+        damage_by_type=dict(damage_by_type),
+        survivors={team.value: survivors[team.value] for team in Team},
+    )
+
+
+def _play_chunk(config: SimulationConfig, seeds: List[int]) -> List[GameResult]:
+    return [play_game(config, seed) for seed in seeds]
+
+
+class SimulationReport:
+    """Aggregated results of a run"""
+
+    def __init__(self, config: SimulationConfig, results: List[GameResult], elapsed: float, workers: int):
+        self.config = config
+        self.results = sorted(results, key=lambda result: result.seed)
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def games_per_minute(self) -> float:
+        return len(self.results) * 60 / self.elapsed if self.elapsed > 0 else float('inf')
+
+    def win_rates(self) -> Dict[str, float]:
+        counts = Counter(result.winner or "draw" for result in self.results)
+        return {outcome: counts[outcome] / len(self.results) for outcome in ("blue", "red", "draw")}
+
+    def length_distribution(self) -> Dict[int, int]:
+        """Full turns played -> number of games"""
+        return dict(sorted(Counter(result.turns for result in self.results).items()))
+
+    def length_stats(self) -> Dict[str, float]:
+        turns = sorted(result.turns for result in self.results)
+        return {
+            "mean": sum(turns) / len(turns),
+            "p50": turns[len(turns) // 2],
+            "p90": turns[min(len(turns) - 1, int(len(turns) * 0.9))],
+            "eliminations": sum(result.eliminated for result in self.results) / len(turns),
+        }
+
+    def damage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per team: mean damage, hits and kills per game, and mean damage per hit"""
+        games = len(self.results)
+        stats = {}
+        for team in Team:
+            damage = sum(result.damage[team.value] for result in self.results)
+            hits = sum(result.hits[team.value] for result in self.results)
+            stats[team.value] = {
+                "damage_per_game": damage / games,
+                "hits_per_game": hits / games,
+                "kills_per_game": sum(result.kills[team.value] for result in self.results) / games,
+                "damage_per_hit": damage / hits if hits else 0.0,
+                "survivors_per_game": sum(result.survivors[team.value] for result in self.results) / games,
+            }
+        return stats
+
+    def damage_by_type(self) -> Dict[str, float]:
+        """Mean damage dealt per game by each attacking unit type (both teams)"""
+        totals = Counter()
+        for result in self.results:
+            totals.update(result.damage_by_type)
+        return {unit_type.value: totals[unit_type.value] / len(self.results) for unit_type in UnitType}
+
+    def to_dict(self) -> Dict:
+        return {
+            "config": {"blue": self.config.blue, "red": self.config.red, "games": self.config.games,
+                       "seed": self.config.seed, "max_turns": self.config.max_turns,
+                       "unit_stats": self.config.unit_stats},
+            "elapsed_s": self.elapsed,
+            "workers": self.workers,
+            "games_per_minute": self.games_per_minute,
+            "win_rates": self.win_rates(),
+            "length": self.length_stats(),
+            "length_distribution": self.length_distribution(),
+            "damage": self.damage_stats(),
+            "damage_by_type": self.damage_by_type(),
+        }
+
+    def format(self) -> str:
+        rates, length = self.win_rates(), self.length_stats()
+        lines = [
+            f"🎮 {len(self.results)} games, blue {self.config.blue} vs red {self.config.red} "
+            f"({self.elapsed:.1f}s on {self.workers} worker(s), {self.games_per_minute:,.0f} games/min)",
+            f"🏆 Win rates: blue {rates['blue']:.1%}, red {rates['red']:.1%}, draw {rates['draw']:.1%}",
+            f"⏱️  Length: mean {length['mean']:.2f} turns, p50 {length['p50']}, p90 {length['p90']}, "
+            f"{length['eliminations']:.1%} ended by elimination",
+        ]
+        distribution = self.length_distribution()
+        widest = max(distribution.values())
+        for turns, count in distribution.items():
+            lines.append(f"   {turns:3d} turns {count:7d} {'█' * max(1, round(30 * count / widest))}")
+        for team, stats in self.damage_stats().items():
+            lines.append(f"⚔️  {team:<4} {stats['damage_per_game']:6.1f} damage, {stats['hits_per_game']:4.1f} hits, "
+                         f"{stats['kills_per_game']:4.2f} kills, {stats['survivors_per_game']:4.2f} survivors "
+                         f"per game; {stats['damage_per_hit']:5.1f} damage per hit")
+        by_type = ", ".join(f"{unit_type} {damage:.1f}" for unit_type, damage in self.damage_by_type().items())
+        lines.append(f"💥 Damage per game by attacker type: {by_type}")
+        return "\n".join(lines)
+
+
+def run_simulation(config: SimulationConfig, workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> SimulationReport:
+    """Play config.games games (seeds config.seed, config.seed + 1, ...) on a process pool
+
+    Games are sent to workers in chunks to keep inter-process overhead
+    small; workers=1 plays them in this process. progress(done, total)
+    is called as chunks finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(config.seed, config.seed + config.games))
+    chunk_size = chunk_size or max(1, min(200, len(seeds) // (workers * 4)))
+    chunks = [seeds[start:start + chunk_size] for start in range(0, len(seeds), chunk_size)]
+    results: List[GameResult] = []
+    start = time.perf_counter()
+    if workers == 1:
+        for chunk in chunks:
+            results.extend(_play_chunk(config, chunk))
+            if progress:
+                progress(len(results), len(seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_play_chunk, config, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                results.extend(future.result())
+                if progress:
+                    progress(len(results), len(seeds))
+    return SimulationReport(config, results, time.perf_counter() - start, workers)
+
+
+def parse_unit_stats(assignments: List[str]) -> Dict[str, Dict[str, int]]:
+    """['attack_power=40', 'tank.movement_range=4'] -> {'*': {...}, 'tank': {...}}"""
+    unit_stats: Dict[str, Dict[str, int]] = {}
+    for assignment in assignments:
+        name, separator, value = assignment.partition("=")
+        if not separator or not value.lstrip("-").isdigit():
+            raise ValueError(f"Expected [unit_type.]stat=integer, got {assignment!r}")
+        unit_type, _, stat = name.rpartition(".")
+        unit_stats.setdefault(unit_type or ALL_UNITS, {})[stat] = int(value)
+    return unit_stats
@@ -0,0 +1,348 @@
+"""
+Skirmish AI
+
+Computer opponents for QuickSkirmishEngine. A player looks at a
+snapshot of the engine (game_state.SkirmishState) and returns the whole
+turn as a list of UnitActions, which the engine applies with its usual
+rules and dice.
+
+Backends:
+- greedy: every unit takes the best action by a fixed heuristic
+  (attack the weakest enemy in reach, otherwise close in)
+- random: every unit takes a uniformly random legal action (a baseline
+  for balance runs)
+- mcts: Monte Carlo Tree Search over unit actions, with short greedy
+  rollouts scored by remaining material
+
+Search plays to a per-turn time budget, and difficulty is just that
+budget (DIFFICULTY_BUDGETS_MS): with no time left the search falls back
+to the greedy heuristic. The budget is a hard limit: an iteration only
+starts if the slowest one so far would still finish in time, one that
+runs long anyway is abandoned, and the time to apply each unit's choice
+and to free the search afterwards (which grows with the search) is held
+back. Only the OS keeping the thread off the CPU can push a turn past
+it. Players can search on a worker thread (submit) so the UI keeps
+drawing frames while the AI thinks.
+"""
+import gc
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .game_engine import Position, Team
+from .game_state import PASS, Action, SkirmishState
+
+DIFFICULTY_BUDGETS_MS = {"easy": 10, "normal": 60, "hard": 250}
+YIELD_INTERVAL = 0.001  # seconds of search between GIL hand-offs to the UI thread
+RELEASE_WINDOW = 5  # turns whose slowest search-freeing rate is reserved for
+RELEASE_RATE_PRIOR = 3e-6  # seconds to free one cached position, assumed until the first turn is measured
+
+
+@dataclass
+class UnitAction:
+    """One unit's part of a planned turn"""
+    unit: Position
+    move_to: Position
+    attack: Optional[Position] = None
+
+
+def to_unit_action(state: SkirmishState, action: Action) -> UnitAction:
+    """Engine-side description of an action in state (before it is made)"""
+    index, (x, y), target = action
+    return UnitAction(unit=Position(state.xs[index], state.ys[index]), move_to=Position(x, y),
+                      attack=Position(state.xs[target], state.ys[target]) if target != -1 else None)
+
+
+class SkirmishPlayer:
+    """Base class for AI backends: observe the engine, then plan a turn in place or in the background"""
+
+    name = "base"
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def observe(self, engine) -> SkirmishState:
+        """Snapshot the engine (call on the thread that owns it)"""
+        return SkirmishState.from_engine(engine)
+
+    def plan_turn(self, state: SkirmishState) -> List[UnitAction]:
+        raise NotImplementedError
+
+    def submit(self, state: SkirmishState) -> 'Future[List[UnitAction]]':
+        """Plan on the player's worker thread"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-ai")
+        return self._executor.submit(self._plan_in_background, state)
+
+    def _plan_in_background(self, state: SkirmishState) -> List[UnitAction]:
+        return self.plan_turn(state)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class GreedyPlayer(SkirmishPlayer):
+    """Each unit takes the heuristically best action"""
+
+    name = "greedy"
+
+    def plan_turn(self, state: SkirmishState) -> List[UnitAction]:
+        state = state.clone()
+        team, plan = state.current_team, []
+        while not state.game_over and state.current_team is team:
+            actions = state.legal_actions()
+            if not actions:
+                break
+            plan.append(to_unit_action(state, actions[-1]))
+            state.make(actions[-1])
+        return plan
+
+
+class RandomPlayer(SkirmishPlayer):
+    """Each unit takes a random legal action"""
+
+    name = "random"
+
+    def __init__(self, seed: Optional[int] = None):
+        super().__init__()
+        self.rng = random.Random(seed)
+
+    def plan_turn(self, state: SkirmishState) -> List[UnitAction]:
+        state = state.clone()
+        team, plan = state.current_team, []
+        while not state.game_over and state.current_team is team:
+            actions = state.legal_actions()
+            if not actions:
+                break
+            action = self.rng.choice(actions)
+            plan.append(to_unit_action(state, action))
+            state.make(action)
+        return plan
+
+
+class _Node:
+    """Search tree node; the position is not stored but replayed from the root with make()"""
+    __slots__ = ('action', 'mover', 'children', 'untried', 'visits', 'value')
+
+    def __init__(self, action: Optional[Action] = None, mover: Optional[Team] = None):
+        self.action = action
+        self.mover = mover  # team that played action into this node
+        self.children: List['_Node'] = []
+        self.untried: Optional[List[Action]] = None  # most nodes stay leaves, so listed on first visit
+        self.visits = 0
+        self.value = 0.0
+
+
+class MCTSPlayer(SkirmishPlayer):
+    """Monte Carlo Tree Search over unit actions within a per-turn time budget
+
+    The budget is shared out over the units still to act; each unit's
+    search continues the tree from the previous unit's choice. The tree
+    and the rollouts (the greedy heuristic with some randomness) stop at
+    a fixed horizon, horizon_turns team turns after the planned turn
+    began (by default the end of the opponent's reply), where the
+    material left is scored, so every leaf is judged at the same point
+    of the game.
+
+    One SkirmishState is walked down and back up the tree with
+    make / unmake, and legal actions are memoized by Zobrist hash, since
+    rollouts from a node mostly replay the same greedy line.
+    """
+
+    name = "mcts"
+
+    def __init__(self, budget_ms: float = DIFFICULTY_BUDGETS_MS["normal"], exploration: float = 0.3,
+                 horizon_turns: int = 2, rollout_randomness: float = 0.2, seed: Optional[int] = None):
+        super().__init__()
+        if budget_ms <= 0:
+            raise ValueError("budget_ms must be positive")
+        self.budget_ms = budget_ms
+        self.exploration = exploration
+        self.horizon_turns = horizon_turns
+        self.rollout_randomness = rollout_randomness
+        self.rng = random.Random(seed)
+        self.last_stats: Dict[str, float] = {}
+        self._spent_trees: List[_Node] = []
+        self._actions: Dict[int, List[Action]] = {}  # transposition table: state hash -> legal actions
+        # Measured on earlier turns and reserved from this turn's budget (seconds)
+        self._release_rates = deque(maxlen=RELEASE_WINDOW)  # freeing the search, per cached position
+        self._commit_time = 0.0       # slowest choosing and applying of one unit's action last turn
+        self._iteration_time = 0.0    # slowest search iteration last turn
+
+    def plan_turn(self, state: SkirmishState) -> List[UnitAction]:
+        """Search inline, with the cyclic GC paused
+
+        Search trees are acyclic and freed by reference counting; a full
+        collection over a big tree can take tens of milliseconds
+        mid-search. gc.disable() is process-wide, so only the thread that
+        runs the game loop may pause it: from a worker it would also stall
+        collection for the UI thread, and two searches would race to
+        re-enable it. Background searches (submit) leave the GC on.
+        """
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return self._search(state)
+        finally:
+            if collecting:
+                # The search's churn ran up the allocation count, so the caller's next allocation
+                # would start a collection; the young generation is nearly empty now, so run it here
+                gc.collect(0)
+                gc.enable()
+
+    def _plan_in_background(self, state: SkirmishState) -> List[UnitAction]:
+        return self._search(state)
+
+    def _search(self, state: SkirmishState) -> List[UnitAction]:
+        start = time.perf_counter()
+        # Freeing the trees and the table takes a few milliseconds; it is
+        # done before returning, so the collector (re-enabled by plan_turn)
+        # is not left to scan them on the caller's next allocation, and the
+        # search reserves time for it as the trees grow
+        plan = self._plan_turn(state.clone(), start, start + self.budget_ms / 1000)
+        released, positions = time.perf_counter(), len(self._actions)
+        self._spent_trees.clear()
+        self._actions.clear()
+        if positions:
+            # The table dominates and trees grow with it, so the cost scales with the cached positions
+            self._release_rates.append((time.perf_counter() - released) / positions)
+        return plan
+
+    def _legal_actions(self, state: SkirmishState) -> List[Action]:
+        actions = self._actions.get(state.hash)
+        if actions is None:
+            actions = state.legal_actions() if not state.game_over else []
+            self._actions[state.hash] = actions
+        return actions
+
+    def _plan_turn(self, state: SkirmishState, start: float, deadline: float) -> List[UnitAction]:
+        team, plan, iterations = state.current_team, [], 0
+        horizon = state.ply + self.horizon_turns
+        last_yield = start
+        # Seeded with last turn's, so the first iteration and commit of a turn are reserved for too
+        slowest_iteration, slowest_commit = self._iteration_time, self._commit_time
+        measured_iteration = measured_commit = 0.0
+        release_rate = max(self._release_rates, default=RELEASE_RATE_PRIOR)
+        root = _Node()
+        root.untried = list(self._legal_actions(state))
+        while not state.game_over and state.current_team is team and (root.untried or root.children):
+            units_left = sum(1 for index, hp in enumerate(state.hp) if hp > 0 and state.teams[index] is team
+                             and not (state.moved[index] and state.attacked[index]))
+            now = time.perf_counter()
+            # Every unit still to act needs time to commit its action, and the search so far to be freed
+            positions = len(self._actions)
+            reserved = units_left * slowest_commit + positions * release_rate
+            unit_deadline = now + max(0.0, deadline - now - reserved) / max(1, units_left)
+            if len(root.untried) + len(root.children) > 1:
+                # Only start an iteration that would finish, and be freed, in time even if it is the slowest yet
+                while now + slowest_iteration + (len(self._actions) - positions) * release_rate < unit_deadline:
+                    cached = len(self._actions)
+                    # Abandoned if it runs past the unit's deadline after all
+                    completed = self._iterate(root, state, team, horizon, unit_deadline)
+                    iterations += completed
+                    finished = time.perf_counter()
+                    if finished - last_yield > YIELD_INTERVAL:
+                        time.sleep(0)  # let the UI thread take the GIL
+                        finished = last_yield = time.perf_counter()
+                    cost = finished - now + (len(self._actions) - cached) * release_rate
+                    measured_iteration = max(measured_iteration, cost)
+                    slowest_iteration = max(slowest_iteration, cost)
+                    now = finished
+                    if not completed:
+                        break
+            if root.children:
+                best = max(root.children, key=lambda child: child.visits)
+            else:
+                # No time for any search: the heuristic choice (best is last)
+                best = _Node(root.untried[-1], team)
+            plan.append(to_unit_action(state, best.action))
+            state.make(best.action)
+            self._spent_trees.append(root)
+            root = best  # reuse the subtree for the next unit
+            if root.untried is None:
+                root.untried = list(self._legal_actions(state))
+            committed = time.perf_counter()
+            measured_commit = max(measured_commit, committed - now)
+            slowest_commit = max(slowest_commit, committed - now)
+        self._spent_trees.append(root)
+        # Only this turn's measurements carry over, so one preempted iteration does not shrink every later search
+        self._iteration_time = measured_iteration or self._iteration_time
+        self._commit_time = measured_commit or self._commit_time
+        self.last_stats = {"iterations": iterations, "elapsed_ms": (time.perf_counter() - start) * 1000,
+                           "cached_positions": len(self._actions)}
+        return plan
+
+    def _iterate(self, root: _Node, state: SkirmishState, team: Team, horizon: int, cutoff: float) -> bool:
+        """One selection, expansion, rollout and backup; False (tree unchanged) if the rollout hit cutoff"""
+        node, path = root, [root]
+        # Nodes at the horizon are leaves (beyond it values would not be comparable)
+        while node.children and not node.untried:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.value / child.visits
+                       + self.exploration * math.sqrt(log_visits / child.visits))
+            state.make(node.action)
+            path.append(node)
+        if node.untried is None:
+            node.untried = list(self._legal_actions(state)) if state.ply < horizon else []
+        expanded = bool(node.untried)
+        if expanded:
+            action = node.untried.pop()
+            child = _Node(action, state.current_team)
+            node.children.append(child)
+            state.make(action)
+            path.append(child)
+        reward = self._rollout(state, team, horizon, cutoff)
+        if reward is None and expanded:
+            node.untried.append(node.children.pop().action)
+        for visited in reversed(path):
+            if reward is not None:
+                visited.visits += 1
+                visited.value += reward if visited.mover is team else 1.0 - reward
+            if visited is not root:
+                state.unmake()
+        return reward is not None
+
+    def _rollout(self, state: SkirmishState, team: Team, horizon: int, cutoff: float) -> Optional[float]:
+        made = 0
+        while not state.game_over and state.ply < horizon:
+            if time.perf_counter() > cutoff:
+                for _ in range(made):
+                    state.unmake()
+                return None
+            actions = self._legal_actions(state)
+            if not actions:
+                state.make(PASS)
+            elif self.rng.random() < self.rollout_randomness:
+                state.make(self.rng.choice(actions))
+            else:
+                state.make(actions[-1])
+            made += 1
+        reward = state.evaluate(team)
+        for _ in range(made):
+            state.unmake()
+        return reward
+
+
+AI_BACKENDS = {"greedy": GreedyPlayer, "random": RandomPlayer, "mcts": MCTSPlayer}
+
+
+def create_player(backend: str = "mcts", difficulty: str = "normal", budget_ms: Optional[float] = None,
+                  seed: Optional[int] = None) -> SkirmishPlayer:
+    """AI player by backend name; search backends take difficulty (or an explicit budget_ms)"""
+    if backend not in AI_BACKENDS:
+        raise ValueError(f"Unknown AI backend {backend!r}, expected one of {sorted(AI_BACKENDS)}")
+    if backend == "greedy":
+        return GreedyPlayer()
+    if backend == "random":
+        return RandomPlayer(seed=seed)
+    if budget_ms is None:
+        if difficulty not in DIFFICULTY_BUDGETS_MS:
+            raise ValueError(f"Unknown difficulty {difficulty!r}, expected one of {list(DIFFICULTY_BUDGETS_MS)}")
+        budget_ms = DIFFICULTY_BUDGETS_MS[difficulty]
+    return MCTSPlayer(budget_ms=budget_ms, seed=seed)
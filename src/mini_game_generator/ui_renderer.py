@@ -5,7 +5,7 @@ Renders the mini-game interface using pygame
 """
 import pygame
 from typing import Dict, List, Tuple, Optional
-from .game_engine import QuickSkirmishEngine, Position, Team, UnitType
+from .game_engine import QuickSkirmishEngine, Position, Team, UnitType, OBSTACLE, ROUGH
 from .asset_manager import AssetManager
 
 
@@ -43,6 +43,8 @@ class UIRenderer:
             'background': (50, 50, 50),
             'board': (100, 150, 50),
             'grid': (80, 120, 40),
+            'obstacle': (70, 70, 70),
+            'rough': (130, 120, 60),
             'text': (255, 255, 255),
             'blue_team': (100, 150, 255),
             'red_team': (255, 100, 100),
@@ -88,6 +90,14 @@ class UIRenderer:
         # Fill board background
         pygame.draw.rect(self.screen, self.colors['board'], board_rect)
         
+        # Fill obstacle and rough terrain tiles
+        for y, row in enumerate(self.engine.board.terrain):
+            for x, kind in enumerate(row):
+                if kind == OBSTACLE:
+                    pygame.draw.rect(self.screen, self.colors['obstacle'], self._get_tile_rect(Position(x, y)))
+                elif kind == ROUGH:
+                    pygame.draw.rect(self.screen, self.colors['rough'], self._get_tile_rect(Position(x, y)))
+        
         # Draw grid lines
         for i in range(self.engine.board.size + 1):
             # Vertical lines
@@ -245,6 +255,9 @@ class UIRenderer:
         # End turn button (only for human player)
         if self.engine.current_team == Team.BLUE:
             self._render_end_turn_button(panel_x, panel_y + 140)
+        elif self.engine.ai_thinking:
+            thinking_surface = self.font.render("AI thinking...", True, self.colors['red_team'])
+            self.screen.blit(thinking_surface, (panel_x, panel_y + 145))
         
         # Instructions
         instructions = [
@@ -9,17 +9,30 @@ A 5-8 minute mini-game capturing SuperTuxKart's most exciting elements:
 
 Based on comprehensive analysis of SuperTuxKart's 129MB open-source codebase.
 Features authentic kart physics, powerup combat, and spectacular visual effects.
+
+Every session is seeded and recorded (frame times, pressed keys, key
+presses) to data/replays; SuperTuxKartMiniGame.replay re-simulates a log
+headlessly (see scripts/replay_session.py).
 """
 
 import pygame
 import math
 import random
 import json
+import sys
+import zlib
 from enum import Enum
 from dataclasses import dataclass
+from pathlib import Path
 from typing import List, Tuple, Optional
 import colorsys
 
+sys.path.append(str(Path(__file__).parent / "src"))
+try:
+    from mini_game_generator.replay import ActionLog
+except ImportError:  # copied without src/: play without logs
+    ActionLog = None
+
 # Initialize Pygame
 pygame.init()
 
@@ -49,6 +62,32 @@ TRACK_BORDER = (200, 200, 0)
 GRASS_COLOR = (40, 120, 40)
 BOOST_PAD = (0, 255, 255)
 
+# Replay log opcodes and their payloads (see mini_game_generator.replay)
+LOG_GAME = "kart"
+LOG_FRAME = 1  # frame time in ms, pressed INPUT_KEYS as bits
+LOG_KEY = 2  # key pressed
+LOG_CHECKSUM = 3  # SuperTuxKartMiniGame.checksum() every CHECKSUM_INTERVAL frames
+LOG_FORMATS = {LOG_FRAME: "HH", LOG_KEY: "I", LOG_CHECKSUM: "I"}
+CHECKSUM_INTERVAL = 60
+REPLAY_DIR = Path(__file__).parent / "data" / "replays"
+
+# Keys the karts read every frame
+INPUT_KEYS = (pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s, pygame.K_LEFT, pygame.K_a,
+              pygame.K_RIGHT, pygame.K_d, pygame.K_SPACE)
+
+class PressedKeys:
+    """The held INPUT_KEYS as a bit set, indexable like pygame.key.get_pressed()"""
+    
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+    
+    @classmethod
+    def from_pygame(cls, pressed) -> 'PressedKeys':
+        return cls(sum(1 << i for i, key in enumerate(INPUT_KEYS) if pressed[key]))
+    
+    def __getitem__(self, key) -> bool:
+        return key in INPUT_KEYS and bool(self.bits >> INPUT_KEYS.index(key) & 1)
+
 class GamePhase(Enum):
     MENU = "menu"
     SPEED_CIRCUIT = "speed_circuit"
@@ -210,7 +249,9 @@ class Projectile:
         pygame.draw.circle(screen, WHITE, (draw_x, draw_y), size, 2)
 
 class Kart:
-    def __init__(self, x: float, y: float, color: Tuple[int, int, int], name: str, is_player: bool = False):
+    def __init__(self, x: float, y: float, color: Tuple[int, int, int], name: str, is_player: bool = False,
+                 rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()  # AI decisions; particles stay on the global random (cosmetic)
         self.x = x
         self.y = y
         self.angle = 0
@@ -317,11 +358,11 @@ class Kart:
             self.ai_decision_timer = 0
             
             # Choose new target (random movement for arena)
-            self.ai_target_x = self.x + random.uniform(-200, 200)
-            self.ai_target_y = self.y + random.uniform(-200, 200)
+            self.ai_target_x = self.x + self.rng.uniform(-200, 200)
+            self.ai_target_y = self.y + self.rng.uniform(-200, 200)
             
             # Use powerup randomly
-            if self.current_powerup and random.random() < 0.3:
+            if self.current_powerup and self.rng.random() < 0.3:
                 self._use_powerup()
         
         # Move toward target
@@ -513,13 +554,20 @@ class Kart:
                 pygame.draw.circle(screen, GREEN, (life_x, life_y), 3)
 
 class SuperTuxKartMiniGame:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("SuperTuxKart: Kart Combat Arena")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.title_font = pygame.font.Font(None, 72)
+    def __init__(self, seed: Optional[int] = None, headless: bool = False, record: bool = True):
+        if not headless:
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            pygame.display.set_caption("SuperTuxKart: Kart Combat Arena")
+            self.clock = pygame.time.Clock()
+            self.font = pygame.font.Font(None, 36)
+            self.small_font = pygame.font.Font(None, 24)
+            self.title_font = pygame.font.Font(None, 72)
+        
+        # Seeded gameplay RNG and the session's replay log
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.action_log = ActionLog(LOG_GAME, self.seed, LOG_FORMATS) if record and ActionLog else None
+        self.frame = 0
         
         self.phase = GamePhase.MENU
         self.phase_timer = 0
@@ -549,7 +597,7 @@ class SuperTuxKartMiniGame:
         self.particles = []
         
         # Create player kart
-        player_kart = Kart(200, 400, BLUE, "Player", True)
+        player_kart = Kart(200, 400, BLUE, "Player", True, rng=self.rng)
         self.karts.append(player_kart)
         
         # Create AI karts
@@ -557,10 +605,11 @@ class SuperTuxKartMiniGame:
         for i in range(4):
             ai_kart = Kart(
                 200 + (i + 1) * 60,
-                400 + random.uniform(-50, 50),
+                400 + self.rng.uniform(-50, 50),
                 ai_colors[i % len(ai_colors)],
                 f"AI_{i+1}",
-                False
+                False,
+                rng=self.rng
             )
             self.karts.append(ai_kart)
         
@@ -619,7 +668,7 @@ class SuperTuxKartMiniGame:
         for i in range(8):
             x = 200 + i * 150
             y = 300 + math.sin(i * 0.5) * 100
-            powerup_type = random.choice(powerup_types)
+            powerup_type = self.rng.choice(powerup_types)
             self.powerups.append(Powerup(powerup_type, x, y))
             
     def spawn_powerups_arena(self):
@@ -629,11 +678,11 @@ class SuperTuxKartMiniGame:
         
         powerup_types = list(PowerupType)
         for _ in range(12):
-            angle = random.uniform(0, 2 * math.pi)
-            radius = random.uniform(50, 250)
+            angle = self.rng.uniform(0, 2 * math.pi)
+            radius = self.rng.uniform(50, 250)
             x = arena_center_x + math.cos(angle) * radius
             y = arena_center_y + math.sin(angle) * radius
-            powerup_type = random.choice(powerup_types)
+            powerup_type = self.rng.choice(powerup_types)
             self.powerups.append(Powerup(powerup_type, x, y))
     
     def update_game(self, dt, keys_pressed):
@@ -726,11 +775,11 @@ class SuperTuxKartMiniGame:
                         kart.y += math.sin(angle_to_center) * 50 * dt
                         
                         # Damage over time
-                        if random.random() < 0.02:  # 2% chance per frame
+                        if self.rng.random() < 0.02:  # 2% chance per frame
                             kart.take_damage()
         
         # Respawn powerups periodically
-        if len(self.powerups) < 8 and random.random() < 0.01:
+        if len(self.powerups) < 8 and self.rng.random() < 0.01:
             if self.phase == GamePhase.SPEED_CIRCUIT:
                 self.spawn_powerups_circuit()
             else:
@@ -926,31 +975,80 @@ class SuperTuxKartMiniGame:
                 return False
                 
             if event.type == pygame.KEYDOWN:
-                if self.phase == GamePhase.MENU:
-                    if event.key == pygame.K_SPACE:
-                        self.start_speed_circuit()
-                elif self.phase == GamePhase.GAME_OVER:
-                    if event.key == pygame.K_r:
-                        self.phase = GamePhase.MENU
-                    elif event.key == pygame.K_q:
-                        return False
+                if not self.handle_key(event.key):
+                    return False
                         
         return True
     
+    def handle_key(self, key) -> bool:
+        """React to a key press; False means quit"""
+        self._log(LOG_KEY, key)
+        if self.phase == GamePhase.MENU:
+            if key == pygame.K_SPACE:
+                self.start_speed_circuit()
+        elif self.phase == GamePhase.GAME_OVER:
+            if key == pygame.K_r:
+                self.phase = GamePhase.MENU
+            elif key == pygame.K_q:
+                return False
+        return True
+    
+    def step(self, dt_ms: int, keys_pressed: PressedKeys):
+        """One frame of game logic (everything but drawing)"""
+        if self.phase in [GamePhase.SPEED_CIRCUIT, GamePhase.ARENA_BATTLE, 
+                          GamePhase.FINAL_SHOWDOWN, GamePhase.PHASE_TRANSITION]:
+            self._log(LOG_FRAME, dt_ms, keys_pressed.bits)
+            self.update_game(dt_ms / 1000.0, keys_pressed)
+            self.frame += 1
+            if self.frame % CHECKSUM_INTERVAL == 0:
+                self._log(LOG_CHECKSUM, self.checksum())
+    
+    def _log(self, op: int, *values):
+        if self.action_log is not None:
+            self.action_log.record(op, *values)
+    
+    def checksum(self) -> int:
+        """CRC32 of the gameplay state (karts, powerups, projectiles, phase)"""
+        karts = [(k.x, k.y, k.angle, k.speed, k.lives, k.nitro_boost, k.powerup_cooldown,
+                  k.current_powerup.value if k.current_powerup else None) for k in self.karts]
+        powerups = [(p.x, p.y, p.type.value, p.collected) for p in self.powerups]
+        projectiles = [(p.x, p.y, p.lifetime) for p in self.projectiles]
+        state = (self.phase.value, self.phase_timer, self.arena_radius, karts, powerups, projectiles)
+        return zlib.crc32(repr(state).encode())
+    
+    def save_replay(self) -> Optional[Path]:
+        if self.action_log is None or not len(self.action_log):
+            return None
+        path = self.action_log.save(REPLAY_DIR / f"{LOG_GAME}-{self.seed}.mgrl")
+        print(f"💾 Replay saved to {path}")
+        return path
+    
+    @classmethod
+    def replay(cls, log) -> 'SuperTuxKartMiniGame':
+        """Re-simulate a recorded session headlessly; raises ReplayDivergence on a mismatch"""
+        if log.game != LOG_GAME:
+            raise ValueError(f"Not a SuperTuxKart log: {log.game!r}")
+        game = cls(seed=log.seed, headless=True, record=False)
+        
+        def key(key):
+            game.handle_key(key)
+        
+        def frame(dt_ms, bits):
+            game.step(dt_ms, PressedKeys(bits))
+        
+        log.play({LOG_FRAME: frame, LOG_KEY: key, LOG_CHECKSUM: lambda checksum: game.checksum() == checksum})
+        return game
+    
     def run(self):
         running = True
         
         while running:
-            dt = self.clock.tick(FPS) / 1000.0  # Delta time in seconds
+            dt_ms = min(self.clock.tick(FPS), 0xFFFF)  # frame time as logged
             
             running = self.handle_events()
             
-            keys_pressed = pygame.key.get_pressed()
-            
             # Update game state
-            if self.phase in [GamePhase.SPEED_CIRCUIT, GamePhase.ARENA_BATTLE, 
-                             GamePhase.FINAL_SHOWDOWN, GamePhase.PHASE_TRANSITION]:
-                self.update_game(dt, keys_pressed)
+            self.step(dt_ms, PressedKeys.from_pygame(pygame.key.get_pressed()))
             
             # Draw everything
             self.screen.fill(GRASS_COLOR)
@@ -992,6 +1090,7 @@ class SuperTuxKartMiniGame:
             
             pygame.display.flip()
             
+        self.save_replay()
         pygame.quit()
 
 if __name__ == "__main__":
@@ -999,9 +1098,12 @@ if __name__ == "__main__":
     print("Based on the 129MB open-source racing masterpiece!")
     print("Experience authentic kart physics and spectacular powerup combat!")
     
+    game = None
     try:
         game = SuperTuxKartMiniGame()
         game.run()
     except Exception as e:
         print(f"Game error: {e}")
+        if game is not None:
+            game.save_replay()  # reproduce the crash with scripts/replay_session.py
         pygame.quit()
\ No newline at end of file